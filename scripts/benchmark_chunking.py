@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: chunking throughput (MB/s) per chunking strategy.
+
+Chunks a set of files (default: this repo's `server/` and `mkdocs/docs/` trees) with every
+strategy and reports throughput plus how many times each document was tokenized (the chunker
+tokenizes a document once and answers span token counts from its offset table).
+
+No services required:
+
+    uv run scripts/benchmark_chunking.py --tokenizer tiktoken --target-tokens 512
+    uv run scripts/benchmark_chunking.py --paths ./my-repo --strategies recursive,ast
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.indexing.chunker import Chunker  # noqa: E402
+from server.models.tribrid_config_model import ChunkingConfig, TokenizationConfig  # noqa: E402
+
+_ROOT = Path(__file__).resolve().parent.parent
+_STRATEGIES = ("fixed_chars", "fixed_tokens", "recursive", "markdown", "sentence", "qa_blocks", "ast", "hybrid")
+_SUFFIXES = {".py", ".ts", ".tsx", ".js", ".jsx", ".md", ".txt", ".rst"}
+
+
+def _load_documents(paths: list[Path], max_files: int) -> list[tuple[str, str]]:
+    docs: list[tuple[str, str]] = []
+    for base in paths:
+        files = [base] if base.is_file() else sorted(p for p in base.rglob("*") if p.suffix in _SUFFIXES)
+        for p in files:
+            if len(docs) >= max_files:
+                return docs
+            try:
+                docs.append((str(p), p.read_text(encoding="utf-8")))
+            except (OSError, UnicodeDecodeError):
+                continue
+    return docs
+
+
+def _bench_strategy(
+    strategy: str, docs: list[tuple[str, str]], tok_cfg: TokenizationConfig, args: argparse.Namespace
+) -> tuple[float, int, float]:
+    """Best-of-N seconds, chunk count and tokenizer calls per document for one strategy."""
+    cfg = ChunkingConfig(
+        chunking_strategy=strategy,
+        target_tokens=args.target_tokens,
+        overlap_tokens=args.overlap_tokens,
+        max_chunk_tokens=args.max_chunk_tokens,
+    )
+    chunker = Chunker(cfg, tok_cfg)
+    calls = 0
+    tokenize = chunker._tokenizer.tokenize_with_offsets
+
+    def _counting(text: str):  # type: ignore[no-untyped-def]
+        nonlocal calls
+        calls += 1
+        return tokenize(text)
+
+    chunker._tokenizer.tokenize_with_offsets = _counting  # type: ignore[method-assign]
+
+    best = float("inf")
+    n_chunks = 0
+    for _ in range(max(1, args.repeats)):
+        calls = 0
+        t0 = time.perf_counter()
+        n_chunks = sum(len(chunker.chunk_file(path, text)) for path, text in docs)
+        best = min(best, time.perf_counter() - t0)
+    return best, n_chunks, calls / max(1, len(docs))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark chunking throughput per strategy")
+    ap.add_argument("--paths", nargs="*", type=Path, default=[_ROOT / "server", _ROOT / "mkdocs" / "docs"])
+    ap.add_argument("--max-files", type=int, default=400, help="Cap on documents loaded")
+    ap.add_argument(
+        "--strategies", default=",".join(_STRATEGIES), help="Comma-separated strategies (default: all)"
+    )
+    ap.add_argument("--tokenizer", choices=["tiktoken", "whitespace", "huggingface"], default="whitespace")
+    ap.add_argument("--hf-tokenizer", default="gpt2", help="Tokenizer name for --tokenizer huggingface")
+    ap.add_argument("--target-tokens", type=int, default=512)
+    ap.add_argument("--overlap-tokens", type=int, default=64)
+    ap.add_argument("--max-chunk-tokens", type=int, default=8000)
+    ap.add_argument("--repeats", type=int, default=3, help="Repeats per strategy (best-of)")
+    args = ap.parse_args()
+
+    docs = _load_documents(list(args.paths), args.max_files)
+    if not docs:
+        print("no documents found")
+        return 1
+    total_mb = sum(len(text.encode("utf-8")) for _path, text in docs) / 1e6
+    tok_cfg = TokenizationConfig(strategy=args.tokenizer, hf_tokenizer_name=args.hf_tokenizer)
+
+    print(f"documents={len(docs)} size={total_mb:.2f} MB tokenizer={args.tokenizer} target={args.target_tokens}")
+    print(f"{'strategy':<14}{'MB/s':>10}{'seconds':>10}{'chunks':>10}{'tokenize/doc':>14}")
+    for strategy in [s.strip() for s in args.strategies.split(",") if s.strip()]:
+        seconds, n_chunks, calls_per_doc = _bench_strategy(strategy, docs, tok_cfg, args)
+        print(
+            f"{strategy:<14}{total_mb / max(seconds, 1e-9):>10.2f}{seconds:>10.3f}{n_chunks:>10}{calls_per_doc:>14.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -105,6 +105,12 @@ async def readiness_check(scope: CorpusScope = _CORPUS_SCOPE_DEP) -> dict[str, A
         except Exception as e:
             out["dependencies"]["neo4j"]["database_exists"] = None
             out["dependencies"]["neo4j"]["database_error"] = str(e)
+        # Bootstrap constraints/indexes (created on first connect). Missing or POPULATING indexes
+        # are reported, not treated as not-ready: queries still work, only slower.
+        try:
+            out["dependencies"]["neo4j"]["schema"] = await neo4j.schema_status()
+        except Exception as e:
+            out["dependencies"]["neo4j"]["schema"] = {"ready": None, "error": str(e)}
         await neo4j.disconnect()
     except Exception as e:
         out["ready"] = False
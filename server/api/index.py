@@ -3,25 +3,34 @@ from __future__ import annotations
 import asyncio
 import json
 import re
-from collections import defaultdict
-from collections.abc import AsyncGenerator
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import asdict, dataclass, replace
 from datetime import UTC, datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from starlette.responses import StreamingResponse
 
 from server.chat.generation import generate_chat_text
 from server.chat.provider_router import select_provider_route
-from server.db.neo4j import Neo4jClient
+from server.db.neo4j import Neo4jClient, corpus_chunk_label, corpus_vector_index_name
 from server.db.postgres import PostgresClient
 from server.indexing.chunker import Chunker
-from server.indexing.embedder import Embedder
+from server.indexing.embedder import Embedder, EmbeddingMatrix
+from server.indexing.file_prep import PreparedFile, prepare_file
+from server.indexing.fingerprints import (
+    FileFingerprint,
+    hash_file,
+    index_config_hash,
+    plan_incremental,
+)
 from server.indexing.graph_builder import GraphBuilder
+from server.indexing.graph_parse_cache import delete_graph_parse_cache
 from server.indexing.loader import FileLoader
-from server.indexing.text_extractors import extract_text_for_path
+from server.indexing.process_pool import ProcessPoolUnavailableError, run_in_process
 from server.models.graph import Entity, Relationship
 from server.models.index import Chunk, IndexRequest, IndexStats, IndexStatus
 from server.models.tribrid_config_model import (
@@ -32,6 +41,7 @@ from server.models.tribrid_config_model import (
     DashboardIndexStatusMetadata,
     DashboardIndexStatusResponse,
     DashboardIndexStorageBreakdown,
+    GraphSearchConfig,
     IndexEstimate,
     TriBridConfig,
     VocabPreviewResponse,
@@ -49,6 +59,8 @@ from server.observability.metrics import (
     INDEX_STAGE_LATENCY_SECONDS,
     INDEX_TOKENS_TOTAL,
 )
+from server.retrieval.cache import bump_index_generation
+from server.retrieval.graph_snapshot import build_graph_snapshot, delete_graph_snapshot
 from server.services.config_store import get_config as load_scoped_config
 
 router = APIRouter(tags=["index"])
@@ -99,6 +111,62 @@ _EST_RANGE_LOW_MULT = 0.6
 _EST_RANGE_HIGH_MULT = 1.9
 
 
+# Extra time a prepare worker gets to report its own `indexing.prepare_timeout_s` timeout before
+# the pipeline gives up on it as wedged.
+_PREPARE_TIMEOUT_GRACE_S = 5.0
+
+
+# Indexing pipeline messages (see _run_index).
+@dataclass
+class _FileChunks:
+    rel_path: str
+    chunks: list[Chunk]
+
+
+@dataclass
+class _FileDone:
+    """End-of-file marker; travels through every stage behind the file's chunks."""
+
+    rel_path: str
+    ok: bool
+    chunk_count: int = 0
+    token_count: int = 0
+
+
+@dataclass
+class _PreparedEntry:
+    """A file after extraction/chunking, waiting for its turn to be emitted (walk order)."""
+
+    rel_path: str
+    abs_path: Path
+    prepared: PreparedFile | None = None
+    ok: bool = True
+    # Large text file read in blocks while it is emitted (see indexing.large_file_mode).
+    stream: bool = False
+
+
+@dataclass
+class _WriteBatch:
+    chunks: list[Chunk]
+    done: list[_FileDone]
+    # Embeddings of `chunks` (float32 rows) when computed here rather than carried on the chunks.
+    vectors: EmbeddingMatrix | None = None
+
+
+@dataclass(frozen=True)
+class _IndexRunDeps:
+    """Collaborators `_run_index` builds per run; tests pass in-memory fakes instead of the real clients."""
+
+    load_config: Callable[..., Awaitable[TriBridConfig]] = load_scoped_config
+    postgres: Callable[[str], PostgresClient] = PostgresClient
+    neo4j: Callable[..., Neo4jClient] = Neo4jClient
+    embedder: Callable[..., Embedder] = Embedder
+    # Must stay a picklable module-level function when indexing.prepare_workers > 0.
+    prepare_file: Callable[..., PreparedFile] = prepare_file
+    build_graph_snapshot: Callable[..., Awaitable[dict[str, Any] | None]] = build_graph_snapshot
+    delete_graph_snapshot: Callable[[GraphSearchConfig, str], object] = delete_graph_snapshot
+
+
 def _estimate_tokens_from_bytes(total_bytes: int) -> int:
     b = max(0, int(total_bytes or 0))
     return int(float(b) / float(_EST_BYTES_PER_TOKEN)) if b > 0 else 0
@@ -296,6 +364,41 @@ def _emit_event(
             return
 
 
+async def _clear_corpus(
+    repo_id: str,
+    postgres: PostgresClient,
+    neo4j: Neo4jClient | None,
+    *,
+    batch_size: int,
+    event_queue: asyncio.Queue[dict[str, Any]] | None = None,
+    snapshot_cfg: GraphSearchConfig | None = None,
+    delete_snapshot: Callable[[GraphSearchConfig, str], object] = delete_graph_snapshot,
+) -> tuple[int, int]:
+    """Delete a corpus's chunks (and graph, plus its in-memory snapshot) in batches, streaming progress
+    as log events.
+
+    Returns (deleted_chunks, deleted_graph_nodes).
+    """
+
+    def _chunk_progress(n: int) -> None:
+        _emit_event(event_queue, {"type": "log", "message": f"🧹 Deleted {n} chunks..."}, drop_oldest=True)
+
+    def _graph_progress(label: str, n: int) -> None:
+        _emit_event(
+            event_queue, {"type": "log", "message": f"🧹 Deleted {n} graph nodes ({label})..."}, drop_oldest=True
+        )
+
+    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="postgres_delete_chunks").time():
+        deleted_chunks = await postgres.delete_chunks(repo_id, batch_size=batch_size, on_progress=_chunk_progress)
+    deleted_nodes = 0
+    if neo4j is not None:
+        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_delete_graph").time():
+            deleted_nodes = await neo4j.delete_graph(repo_id, batch_size=batch_size, on_progress=_graph_progress)
+        if snapshot_cfg is not None:
+            await asyncio.to_thread(delete_snapshot, snapshot_cfg, repo_id)
+    return deleted_chunks, deleted_nodes
+
+
 def _extract_semantic_concepts(text: str, *, min_len: int, max_terms: int) -> list[str]:
     """Deterministic concept extraction (fallback for tests/offline)."""
     if max_terms <= 0:
@@ -438,10 +541,13 @@ async def _run_index(
     force_reindex: bool,
     *,
     event_queue: asyncio.Queue[dict[str, Any]] | None = None,
+    deps: _IndexRunDeps | None = None,
 ) -> IndexStats:
-    cfg = await load_scoped_config(repo_id=repo_id)
+    deps = deps or _IndexRunDeps()
+    cfg = await deps.load_config(repo_id=repo_id)
+    incremental = bool(int(getattr(cfg.indexing, "incremental_indexing", 1) or 0) == 1) and not force_reindex
 
-    if not force_reindex and repo_id in _STATS:
+    if not force_reindex and not incremental and repo_id in _STATS:
         return _STATS[repo_id]
 
     # Build ignore patterns from config
@@ -465,9 +571,10 @@ async def _run_index(
         int(cfg.indexing.index_max_file_size_mb) * 1024 * 1024,
     )
     skip_dense = bool(int(cfg.indexing.skip_dense or 0) == 1)
-    embedder = None if skip_dense else Embedder(cfg.embedding, cfg.tokenization)
-    postgres = PostgresClient(cfg.indexing.postgres_url)
+    postgres = deps.postgres(cfg.indexing.postgres_url)
     await postgres.connect()
+    # Postgres doubles as the content-addressed embedding cache (embedding.embedding_cache_enabled).
+    embedder = None if skip_dense else deps.embedder(cfg.embedding, cfg.tokenization, cache_store=postgres)
     await postgres.upsert_corpus(repo_id, name=repo_id, root_path=repo_path)
 
     # Corpus-level exclude paths (stored in Postgres corpora.meta.exclude_paths)
@@ -485,17 +592,25 @@ async def _run_index(
 
     neo4j: Neo4jClient | None = None
     graph_builder: GraphBuilder | None = None
+    corpus_label = (
+        corpus_chunk_label(repo_id)
+        if cfg.graph_storage.neo4j_database_mode == "shared"
+        and cfg.graph_indexing.chunk_corpus_vector_index
+        and cfg.graph_indexing.store_chunk_embeddings
+        and not skip_dense
+        else None
+    )
     try:
         if cfg.graph_indexing.enabled:
             db_name = cfg.graph_storage.resolve_database(repo_id)
-            neo4j = Neo4jClient(
+            neo4j = deps.neo4j(
                 cfg.graph_storage.neo4j_uri,
                 cfg.graph_storage.neo4j_user,
                 cfg.graph_storage.neo4j_password,
                 database=db_name,
             )
             await neo4j.connect()
-            graph_builder = GraphBuilder(neo4j, cfg.graph_indexing)
+            graph_builder = GraphBuilder(neo4j, cfg.graph_indexing, cfg.graph_storage)
 
             # Lexical chunk vector index (Neo4j native vector indexes)
             if cfg.graph_indexing.build_lexical_graph and cfg.graph_indexing.store_chunk_embeddings and not skip_dense:
@@ -513,450 +628,892 @@ async def _run_index(
                 except Exception:
                     # Graph indexing should never block dense/sparse indexing.
                     pass
+                if corpus_label is not None:
+                    # Per-corpus vector index over a per-corpus Chunk label: scoped ANN search in a shared
+                    # database. Chunks written before the label was enabled are labelled here.
+                    try:
+                        assert embedder is not None
+                        await neo4j.ensure_vector_index(
+                            index_name=corpus_vector_index_name(cfg.graph_indexing.chunk_vector_index_name, repo_id),
+                            label=corpus_label,
+                            embedding_property=cfg.graph_indexing.chunk_embedding_property,
+                            dimensions=int(embedder.dim),
+                            similarity_function=cfg.graph_indexing.vector_similarity_function,
+                            wait_online=False,
+                        )
+                        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_label_corpus_chunks").time():
+                            await neo4j.label_corpus_chunks(
+                                repo_id,
+                                corpus_label,
+                                batch_size=int(getattr(cfg.indexing, "delete_batch_size", 5000) or 5000),
+                            )
+                    except Exception:
+                        INDEX_STAGE_ERRORS_TOTAL.labels(stage="neo4j_label_corpus_chunks").inc()
+                        corpus_label = None
     except Exception:
         # Graph layer is optional at runtime; vector + sparse indexing should still work.
+        if neo4j is not None:
+            await neo4j.disconnect()
         neo4j = None
         graph_builder = None
 
-    total_files = 0
-    total_chunks = 0
-    total_tokens = 0
-    file_breakdown: dict[str, int] = defaultdict(int)
-
-    prev_status = _STATUS.get(repo_id)
-    started_at = prev_status.started_at if prev_status and prev_status.started_at else datetime.now(UTC)
-
-    # Collect file paths once so we can report progress deterministically,
-    # without loading every file's contents into memory.
-    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="collect_file_paths").time():
-        file_entries = list(loader.iter_repo_files(repo_path))
-    total_files = len(file_entries)
-
-    # GraphBuilder consumes (path, content) and currently only supports Python AST.
-    graph_files: list[tuple[str, str]] = []
+    try:
+        total_files = 0
+        total_chunks = 0
+        total_tokens = 0
+        file_breakdown: dict[str, int] = defaultdict(int)
+        config_hash = index_config_hash(cfg)
+        pending_fingerprints: list[dict[str, Any]] = []
+        delete_batch_size = int(getattr(cfg.indexing, "delete_batch_size", 5000) or 5000)
+
+        prev_status = _STATUS.get(repo_id)
+        started_at = prev_status.started_at if prev_status and prev_status.started_at else datetime.now(UTC)
+
+        # Collect file paths once so we can report progress deterministically,
+        # without loading every file's contents into memory.
+        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="collect_file_paths").time():
+            file_entries = list(loader.iter_repo_files(repo_path))
+        total_files = len(file_entries)
+        for rel_path, _abs_path in file_entries:
+            file_breakdown["." + rel_path.split(".")[-1] if "." in rel_path else ""] += 1
+
+        previous: dict[str, FileFingerprint] = {}
+        if incremental:
+            try:
+                rows = await postgres.get_file_fingerprints(repo_id)
+                previous = {path: FileFingerprint.from_row(row) for path, row in rows.items()}
+            except Exception:
+                # Without trustworthy fingerprints, fall back to a regular (upsert-everything) run.
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="incremental_plan").inc()
+                incremental = False
 
-    if force_reindex:
-        await postgres.delete_chunks(repo_id)
-        if neo4j is not None:
-            await neo4j.delete_graph(repo_id)
-        if event_queue is not None:
-            _emit_event(
-                event_queue,
-                {"type": "log", "message": "🧹 Cleared existing index (force_reindex=1)"},
-                drop_oldest=True,
-            )
+        # First fingerprinted run: rows already stored are untracked. Rather than wiping the corpus,
+        # every walked file is planned as changed (its old rows are replaced) and rows of files that
+        # are no longer walked are swept once the plan is known.
+        baseline = incremental and not previous
 
-    # If skip_dense is enabled, ensure no stale embeddings remain from previous runs.
-    # This makes graph-only / sparse-only workflows deterministic.
-    if skip_dense:
-        deleted = await postgres.delete_embeddings(repo_id)
-        await postgres.update_corpus_embedding_meta(repo_id, provider="", model="", dimensions=0)
-        if event_queue is not None:
-            _emit_event(
-                event_queue,
-                {"type": "log", "message": f"⚡ skip_dense=1 → skipping embeddings (cleared {deleted} existing vectors)"},
-                drop_oldest=True,
+        if force_reindex:
+            # Drop ANN indexes first so a full rebuild does not pay per-row index maintenance.
+            try:
+                await postgres.drop_vector_ann_indexes(repo_id)
+            except Exception:
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="postgres_vector_ann_index").inc()
+            await _clear_corpus(
+                repo_id,
+                postgres,
+                neo4j,
+                batch_size=delete_batch_size,
+                event_queue=event_queue,
+                snapshot_cfg=cfg.graph_search,
+                delete_snapshot=deps.delete_graph_snapshot,
             )
+            await postgres.delete_file_fingerprints(repo_id)
+            bump_index_generation(repo_id)
+            if event_queue is not None:
+                _emit_event(
+                    event_queue,
+                    {"type": "log", "message": "🧹 Cleared existing index (force_reindex=1)"},
+                    drop_oldest=True,
+                )
 
-    semantic_budget = int(cfg.graph_indexing.semantic_kg_max_chunks) if cfg.graph_indexing.semantic_kg_enabled else 0
-    semantic_processed = 0
-
-    for idx, (rel_path, abs_path) in enumerate(file_entries, start=1):
-        ext = "." + rel_path.split(".")[-1] if "." in rel_path else ""
-        file_breakdown[ext] += 1
+        # If skip_dense is enabled, ensure no stale embeddings remain from previous runs.
+        # This makes graph-only / sparse-only workflows deterministic.
+        if skip_dense:
+            deleted = await postgres.delete_embeddings(repo_id)
+            await postgres.update_corpus_embedding_meta(repo_id, provider="", model="", dimensions=0)
+            if event_queue is not None:
+                _emit_event(
+                    event_queue,
+                    {"type": "log", "message": f"⚡ skip_dense=1 → skipping embeddings (cleared {deleted} existing vectors)"},
+                    drop_oldest=True,
+                )
 
-        _STATUS[repo_id] = IndexStatus(
-            repo_id=repo_id,
-            status="indexing",
-            progress=idx / max(1, total_files),
-            current_file=rel_path,
-            started_at=started_at,
-        )
-        if event_queue is not None:
-            _emit_event(
-                event_queue,
-                {"type": "progress", "percent": int((_STATUS[repo_id].progress) * 100), "message": rel_path},
-                drop_oldest=True,
+        # Fingerprint every walked file (stat first, hash only when needed). Non-incremental runs plan
+        # against an empty baseline so every file is reprocessed, and record stat-only fingerprints:
+        # hashing there would read the whole tree once more before chunking starts.
+        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="incremental_plan").time():
+            plan = await asyncio.to_thread(
+                plan_incremental,
+                file_entries,
+                previous,
+                config_hash=config_hash,
+                max_file_bytes=max_indexable_bytes,
+                hasher=hash_file if incremental else None,
+                baseline=baseline,
             )
-
-        try:
-            size_bytes = int(abs_path.stat().st_size)
-        except Exception:
-            size_bytes = None
-        if size_bytes is not None and size_bytes > max_indexable_bytes:
+        purge_paths = plan.purge_paths if incremental else []
+        if purge_paths:
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="incremental_purge").time():
+                await postgres.delete_chunks_for_files(repo_id, purge_paths)
+                await postgres.delete_file_fingerprints(repo_id, purge_paths)
+                if neo4j is not None:
+                    try:
+                        await neo4j.delete_file_nodes(repo_id, purge_paths, batch_size=delete_batch_size)
+                    except Exception:
+                        INDEX_STAGE_ERRORS_TOTAL.labels(stage="incremental_purge").inc()
+            bump_index_generation(repo_id)
+        if baseline:
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="incremental_purge").time():
+                orphan_paths = await postgres.delete_chunks_outside_files(repo_id, sorted(plan.to_index))
+                if neo4j is not None and orphan_paths:
+                    try:
+                        await neo4j.delete_file_nodes(repo_id, orphan_paths, batch_size=delete_batch_size)
+                    except Exception:
+                        INDEX_STAGE_ERRORS_TOTAL.labels(stage="incremental_purge").inc()
+            bump_index_generation(repo_id)
             if event_queue is not None:
                 _emit_event(
                     event_queue,
                     {
                         "type": "log",
                         "message": (
-                            f"⏭️ Skipping large file ({size_bytes} bytes > {max_indexable_bytes} bytes): {rel_path}"
+                            f"🧹 No file fingerprints yet → building an incremental baseline "
+                            f"(dropped {len(orphan_paths)} files no longer in the repo)"
                         ),
                     },
                     drop_oldest=True,
                 )
-            continue
+        if plan.refreshed:
+            await postgres.upsert_file_fingerprints(repo_id, [asdict(fp) for fp in plan.refreshed])
+        if event_queue is not None:
+            if incremental:
+                _emit_event(
+                    event_queue,
+                    {
+                        "type": "log",
+                        "message": (
+                            f"♻️ Incremental: {len(plan.added)} added, {len(plan.changed)} changed, "
+                            f"{len(plan.removed)} removed, {len(plan.unchanged)} unchanged"
+                        ),
+                    },
+                    drop_oldest=True,
+                )
+            for skipped_path, skipped_bytes in plan.oversized:
+                _emit_event(
+                    event_queue,
+                    {
+                        "type": "log",
+                        "message": (
+                            f"⏭️ Skipping large file ({skipped_bytes} bytes > {max_indexable_bytes} bytes): {skipped_path}"
+                        ),
+                    },
+                    drop_oldest=True,
+                )
+
+        def _mark_indexed(rel_path: str, *, chunk_count: int, token_count: int) -> None:
+            fp = plan.to_index.get(rel_path)
+            if fp is None:
+                return
+            pending_fingerprints.append(asdict(replace(fp, chunk_count=chunk_count, token_count=token_count)))
+
+        async def _flush_fingerprints(*, min_batch: int = 1) -> None:
+            if len(pending_fingerprints) < max(1, min_batch):
+                return
+            batch = list(pending_fingerprints)
+            pending_fingerprints.clear()
+            await postgres.upsert_file_fingerprints(repo_id, batch)
+
+        semantic_budget = int(cfg.graph_indexing.semantic_kg_max_chunks) if cfg.graph_indexing.semantic_kg_enabled else 0
+        semantic_processed = 0
+
+        async def _extract_semantic_kg(chunks_for_semantic: list[Chunk]) -> None:
+            nonlocal semantic_processed
+            # Optional semantic KG extraction (concept entities + related_to edges linked to chunk_ids).
+            if (
+                neo4j is not None
+                and cfg.graph_indexing.build_lexical_graph
+                and cfg.graph_indexing.semantic_kg_enabled
+                and semantic_budget > 0
+                and semantic_processed < semantic_budget
+            ):
+                try:
+                    mode = str(cfg.graph_indexing.semantic_kg_mode or "heuristic").strip().lower()
+                    max_terms = int(cfg.graph_indexing.semantic_kg_max_concepts_per_chunk)
+                    min_len = int(cfg.graph_indexing.semantic_kg_min_concept_len)
+                    max_rels_per_chunk = int(cfg.graph_indexing.semantic_kg_max_relations_per_chunk)
+                    llm_model = str(cfg.graph_indexing.semantic_kg_llm_model or "").strip() or str(cfg.generation.enrich_model)
+                    llm_prompt = str(cfg.system_prompts.semantic_kg_extraction or "").strip()
+                    llm_timeout_s = float(cfg.graph_indexing.semantic_kg_llm_timeout_s)
+                    llm_max_chars = int(cfg.enrichment.enrich_max_chars)
+
+                    def _norm_concept(name: str, *, _min_len: int = min_len) -> str | None:
+                        v = (name or "").strip().lower()
+                        v = re.sub(r"[^a-z0-9_]+", "_", v).strip("_")
+                        if len(v) < _min_len:
+                            return None
+                        if v in _SEM_STOPWORDS:
+                            return None
+                        if not _SEM_TOKEN_RE.fullmatch(v):
+                            return None
+                        return v
+
+                    concept_entities: dict[str, Entity] = {}
+                    rels: list[Relationship] = []
+                    link_set: set[tuple[str, str]] = set()
+
+                    for ch in chunks_for_semantic:
+                        if semantic_processed >= semantic_budget:
+                            break
+                        semantic_processed += 1
+
+                        concepts_raw: list[str]
+                        relations_raw: list[dict[str, str]]
+                        if mode == "llm" and llm_prompt:
+                            # Best-effort LLM extraction. If it fails or returns no concepts,
+                            # fall back to deterministic heuristic extraction so we still
+                            # build an entity graph for non-code corpora.
+                            concepts_raw, relations_raw = await _extract_semantic_kg_llm(
+                                (ch.content or "")[: max(0, llm_max_chars)],
+                                cfg=cfg,
+                                prompt=llm_prompt,
+                                model=llm_model,
+                                timeout_s=llm_timeout_s,
+                            )
+                            if not concepts_raw:
+                                concepts_raw = _extract_semantic_concepts(
+                                    ch.content, min_len=min_len, max_terms=max_terms
+                                )
+                                relations_raw = []
+                        else:
+                            concepts_raw = _extract_semantic_concepts(ch.content, min_len=min_len, max_terms=max_terms)
+                            relations_raw = []
+
+                        concepts: list[str] = []
+                        seen_concepts: set[str] = set()
+                        for name in concepts_raw:
+                            n = _norm_concept(name)
+                            if not n or n in seen_concepts:
+                                continue
+                            seen_concepts.add(n)
+                            concepts.append(n)
+                            if len(concepts) >= max_terms:
+                                break
+                        if not concepts:
+                            continue
+
+                        concept_ids: list[str] = []
+                        for name in concepts:
+                            ent_id = GraphBuilder._stable_id(repo_id, "", "concept", name)
+                            concept_ids.append(ent_id)
+                            if ent_id not in concept_entities:
+                                concept_entities[ent_id] = Entity(
+                                    entity_id=ent_id,
+                                    name=name,
+                                    entity_type="concept",
+                                    file_path=None,
+                                    description=None,
+                                    properties={"source": "semantic"},
+                                )
+                            link_set.add((ent_id, ch.chunk_id))
+
+                        if max_rels_per_chunk > 0:
+                            # LLM mode: use suggested relations if present, otherwise fall back.
+                            rels_added = 0
+                            if mode == "llm" and relations_raw:
+                                name_to_id = {n: GraphBuilder._stable_id(repo_id, "", "concept", n) for n in concepts}
+                                for r in relations_raw:
+                                    if rels_added >= max_rels_per_chunk:
+                                        break
+                                    src = _norm_concept(str(r.get("source") or ""))
+                                    tgt = _norm_concept(str(r.get("target") or ""))
+                                    rel_type = str(r.get("relation_type") or "related_to").strip().lower()
+                                    if not src or not tgt or src == tgt:
+                                        continue
+                                    if rel_type not in {"related_to", "references"}:
+                                        continue
+                                    # Ensure entities exist even if relation mentions a concept not in concepts list.
+                                    for nm in (src, tgt):
+                                        if nm not in name_to_id:
+                                            eid = GraphBuilder._stable_id(repo_id, "", "concept", nm)
+                                            name_to_id[nm] = eid
+                                            if eid not in concept_entities:
+                                                concept_entities[eid] = Entity(
+                                                    entity_id=eid,
+                                                    name=nm,
+                                                    entity_type="concept",
+                                                    file_path=None,
+                                                    description=None,
+                                                    properties={"source": "semantic", "mode": "llm"},
+                                                )
+                                            link_set.add((eid, ch.chunk_id))
+                                    rels.append(
+                                        Relationship(
+                                            source_id=name_to_id[src],
+                                            target_id=name_to_id[tgt],
+                                            relation_type=rel_type,  # type: ignore[arg-type]
+                                            weight=float(cfg.graph_indexing.semantic_kg_relation_weight_llm),
+                                            properties={"source": "semantic", "mode": "llm"},
+                                        )
+                                    )
+                                    rels_added += 1
+                            # Heuristic fallback: star graph around the top concept in this chunk.
+                            if rels_added == 0 and len(concept_ids) >= 2:
+                                root = concept_ids[0]
+                                for tgt in concept_ids[1:]:
+                                    rels.append(
+                                        Relationship(
+                                            source_id=root,
+                                            target_id=tgt,
+                                            relation_type="related_to",
+                                                weight=float(cfg.graph_indexing.semantic_kg_relation_weight_heuristic),
+                                            properties={"source": "semantic", "mode": "heuristic"},
+                                        )
+                                    )
+                                    rels_added += 1
+                                    if rels_added >= max_rels_per_chunk:
+                                        break
+
+                    if concept_entities:
+                        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_semantic_entities").time():
+                            await neo4j.upsert_entities(repo_id, list(concept_entities.values()))
+                    if rels:
+                        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_semantic_relationships").time():
+                            await neo4j.upsert_relationships(repo_id, rels)
+                    if link_set:
+                        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_link_entities_to_chunks").time():
+                            await neo4j.link_entities_to_chunks(
+                                repo_id,
+                                links=[{"entity_id": eid, "chunk_id": cid} for (eid, cid) in sorted(link_set)],
+                            )
+                except Exception:
+                    INDEX_STAGE_ERRORS_TOTAL.labels(stage="semantic_kg").inc()
+                    # Semantic KG is optional; never block baseline indexing.
+                    pass
 
-        # Large text files: allow a streaming ingestion mode to avoid loading the entire file into memory.
-        ext_lower = abs_path.suffix.lower()
+        # -------------------------------------------------------------------------
+        # Pipeline: file preparation (extract/chunk in worker processes, emitted in walk order) → embedder (batches coalesced
+        # across files) → Postgres and Neo4j writers running concurrently. Bounded queues provide
+        # backpressure, so a slow stage throttles the ones before it instead of buffering the corpus.
+        # Python files are also handed to the code-graph stream as they are read (AST parsing in worker
+        # processes, entity/relationship batches written as they fill).
+        # -------------------------------------------------------------------------
+        work_entries = [(rel_path, abs_path) for rel_path, abs_path in file_entries if rel_path in plan.to_index]
+        workers = max(1, int(getattr(cfg.indexing, "indexing_workers", 4) or 4))
+        embed_batch_size = max(1, int(getattr(cfg.embedding, "embedding_batch_size", 64) or 64))
+        write_lexical = neo4j is not None and bool(cfg.graph_indexing.build_lexical_graph)
+        semantic_on = write_lexical and bool(cfg.graph_indexing.semantic_kg_enabled) and semantic_budget > 0
         stream_mode = str(getattr(cfg.indexing, "large_file_mode", "read_all") or "read_all").strip().lower()
         stream_block_chars = int(getattr(cfg.indexing, "large_file_stream_chunk_chars", 2_000_000) or 2_000_000)
-        use_stream = (
-            stream_mode == "stream"
-            and ext_lower in {".txt", ".md", ".rst", ".log"}
-            and size_bytes is not None
-            and size_bytes >= stream_block_chars
+        extract_kwargs: dict[str, Any] = {
+            "parquet_max_rows": int(getattr(cfg.indexing, "parquet_extract_max_rows", 5000) or 5000),
+            "parquet_max_chars": int(getattr(cfg.indexing, "parquet_extract_max_chars", 2_000_000) or 2_000_000),
+            "parquet_max_cell_chars": int(getattr(cfg.indexing, "parquet_extract_max_cell_chars", 20_000) or 20_000),
+            "parquet_text_columns_only": bool(int(getattr(cfg.indexing, "parquet_extract_text_columns_only", 1) or 0) == 1),
+            "parquet_include_column_names": bool(
+                int(getattr(cfg.indexing, "parquet_extract_include_column_names", 1) or 0) == 1
+            ),
+        }
+
+        # Local-only "late chunking": embed the full doc segment once, then pool per chunk span.
+        # This is experimental and only applies when explicitly enabled via config.
+        late_mode = (
+            not skip_dense
+            and str(getattr(cfg.embedding, "embedding_backend", "deterministic") or "deterministic").strip().lower()
+            == "provider"
+            and str(getattr(cfg.embedding, "contextual_chunk_embeddings", "off") or "off").strip().lower()
+            == "late_chunking_local_only"
+        )
+        if late_mode and work_entries:
+            strat = str(getattr(cfg.chunking, "chunking_strategy", "") or "").strip().lower()
+            if strat not in {"fixed_tokens"}:
+                raise RuntimeError("late_chunking_local_only requires chunking.chunking_strategy='fixed_tokens'")
+
+        graph_stream = (
+            graph_builder.stream(repo_id, batch_size=int(cfg.indexing.indexing_batch_size))
+            if graph_builder is not None
+            else None
         )
 
-        async def _upsert_chunks_for_file(chunks: list[Chunk], rel_path: str = rel_path) -> list[Chunk]:
-            nonlocal total_chunks, total_tokens
-            if not chunks:
-                return []
-            total_chunks += len(chunks)
-            chunk_tokens = sum(int(c.token_count or 0) for c in chunks)
-            total_tokens += chunk_tokens
-            INDEX_CHUNKS_CREATED_TOTAL.inc(len(chunks))
-            INDEX_TOKENS_TOTAL.inc(chunk_tokens)
-
-            if skip_dense:
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="postgres_upsert_fts").time():
-                    await postgres.upsert_fts(repo_id, chunks, ts_config=cfg.indexing.postgres_ts_config)
-                if neo4j is not None and cfg.graph_indexing.build_lexical_graph:
-                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_document_chunks").time():
-                        await neo4j.upsert_document_and_chunks(
-                            repo_id,
-                            rel_path,
-                            chunks,
-                            store_embeddings=False,
-                            embedding_property=cfg.graph_indexing.chunk_embedding_property,
-                        )
-                return chunks
-
-            assert embedder is not None
-            if all(c.embedding is not None for c in chunks):
-                embedded = chunks
-            else:
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="embed_chunks").time():
-                    embedded = await embedder.embed_chunks(chunks)
-            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="postgres_upsert_embeddings").time():
-                await postgres.upsert_embeddings(repo_id, embedded)
-            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="postgres_upsert_fts").time():
-                await postgres.upsert_fts(repo_id, embedded, ts_config=cfg.indexing.postgres_ts_config)
-            if neo4j is not None and cfg.graph_indexing.build_lexical_graph:
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_document_chunks").time():
-                    await neo4j.upsert_document_and_chunks(
-                        repo_id,
-                        rel_path,
-                        embedded,
-                        store_embeddings=bool(cfg.graph_indexing.store_chunk_embeddings),
-                        embedding_property=cfg.graph_indexing.chunk_embedding_property,
+        prepared_q: asyncio.Queue[_FileChunks | _FileDone | None] = asyncio.Queue(maxsize=workers * 2)
+        postgres_q: asyncio.Queue[_WriteBatch | None] = asyncio.Queue(maxsize=4)
+        graph_q: asyncio.Queue[_WriteBatch | None] = asyncio.Queue(maxsize=4)
+        entries_iter = iter(enumerate(work_entries, start=1))
+        # A file is indexed once every writer has seen its end marker.
+        writers_per_file = 2 if write_lexical else 1
+        pending_writers: dict[str, int] = {}
+
+        def _file_written(done: _FileDone) -> None:
+            left = pending_writers.get(done.rel_path, writers_per_file) - 1
+            if left > 0:
+                pending_writers[done.rel_path] = left
+                return
+            pending_writers.pop(done.rel_path, None)
+            if done.ok:
+                _mark_indexed(done.rel_path, chunk_count=done.chunk_count, token_count=done.token_count)
+
+        # Extraction + chunking run in worker processes (pure-Python parsers would otherwise hold the GIL
+        # and stall the event loop); threads are the fallback when no pool can be started.
+        prepare_workers = max(0, int(cfg.indexing.prepare_workers))
+        prepare_timeout_s = max(0.0, float(cfg.indexing.prepare_timeout_s))
+        prepare_memory_mb = max(0, int(cfg.indexing.prepare_memory_limit_mb))
+        prepare_in_pool = prepare_workers > 0
+
+        async def _prepare_content(rel_path: str, abs_path: Path, *, want_text: bool) -> PreparedFile:
+            nonlocal prepare_in_pool
+            args = (
+                str(abs_path),
+                rel_path,
+                None if late_mode else cfg.chunking,
+                cfg.tokenization,
+                extract_kwargs,
+                want_text or late_mode,
+                prepare_timeout_s,
+                prepare_memory_mb,
+            )
+            # Workers enforce the limits themselves; the caller-side timeout only catches a hung worker.
+            # A thread cannot be interrupted, so there it is the only limit (the thread finishes unobserved).
+            if prepare_in_pool:
+                try:
+                    return await asyncio.wait_for(
+                        run_in_process(deps.prepare_file, *args, max_workers=prepare_workers),
+                        timeout=prepare_timeout_s + _PREPARE_TIMEOUT_GRACE_S if prepare_timeout_s else None,
                     )
-            return embedded
-
-        indexing_batch = max(10, int(getattr(cfg.indexing, "indexing_batch_size", 100) or 100))
-
-        chunks_for_semantic: list[Chunk] = []
+                except ProcessPoolUnavailableError:
+                    INDEX_STAGE_ERRORS_TOTAL.labels(stage="file_prepare_pool").inc()
+                    prepare_in_pool = False
+            return await asyncio.wait_for(asyncio.to_thread(deps.prepare_file, *args), timeout=prepare_timeout_s or None)
+
+        def _late_chunk_files(docs: list[tuple[str, str]]) -> list[list[Chunk]]:
+            from server.indexing.late_chunking import late_chunk_documents
+
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="late_chunking").time():
+                return late_chunk_documents(docs, chunking=cfg.chunking, embedding=cfg.embedding)
+
+        def _chunk_stream_block(
+            f: TextIO, rel_path: str, *, base_char: int, base_line: int, ordinal: int
+        ) -> tuple[str, list[Chunk]] | None:
+            block = f.read(stream_block_chars)
+            if not block or "\x00" in block:
+                return None
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="chunk").time():
+                chunks = chunker.chunk_text(
+                    rel_path,
+                    block,
+                    base_char_offset=base_char,
+                    base_line=base_line,
+                    starting_ordinal=ordinal,
+                )
+            return block, chunks
+
+        async def _prepare_file(idx: int, rel_path: str, abs_path: Path) -> _PreparedEntry | None:
+            """Extract + chunk one file (concurrently with other files); None = skipped without a trace."""
+            _STATUS[repo_id] = IndexStatus(
+                repo_id=repo_id,
+                status="indexing",
+                progress=idx / max(1, len(work_entries)),
+                current_file=rel_path,
+                started_at=started_at,
+            )
+            if event_queue is not None:
+                _emit_event(
+                    event_queue,
+                    {"type": "progress", "percent": int((_STATUS[repo_id].progress) * 100), "message": rel_path},
+                    drop_oldest=True,
+                )
 
-        if use_stream:
-            base_char = 0
-            base_line = 1
-            ordinal = 0
             try:
-                INDEX_FILES_PROCESSED_TOTAL.inc()
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="file_read_stream").time():
-                    with abs_path.open("r", encoding="utf-8", errors="ignore") as f:
-                        while True:
-                            block = f.read(stream_block_chars)
-                            if not block:
-                                break
-                            if "\x00" in block:
-                                break
-                            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="chunk").time():
-                                chunks = chunker.chunk_text(
-                                    rel_path,
-                                    block,
-                                    base_char_offset=base_char,
-                                    base_line=base_line,
-                                    starting_ordinal=ordinal,
-                                )
-                            ordinal += len(chunks)
-                            base_char += len(block)
-                            base_line += block.count("\n")
-                            if not chunks:
-                                continue
-                            for i0 in range(0, len(chunks), indexing_batch):
-                                embedded_batch = await _upsert_chunks_for_file(chunks[i0 : i0 + indexing_batch])
-                                if (
-                                    semantic_budget > 0
-                                    and semantic_processed < semantic_budget
-                                    and cfg.graph_indexing.semantic_kg_enabled
-                                    and neo4j is not None
-                                ):
-                                    remaining = max(0, semantic_budget - semantic_processed)
-                                    chunks_for_semantic.extend(embedded_batch[:remaining])
+                size_bytes = int(abs_path.stat().st_size)
             except Exception:
-                INDEX_STAGE_ERRORS_TOTAL.labels(stage="file_read_stream").inc()
-                continue
-        else:
-            try:
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="file_read").time():
-                    content = extract_text_for_path(
-                        abs_path,
-                        parquet_max_rows=int(getattr(cfg.indexing, "parquet_extract_max_rows", 5000) or 5000),
-                        parquet_max_chars=int(getattr(cfg.indexing, "parquet_extract_max_chars", 2_000_000) or 2_000_000),
-                        parquet_max_cell_chars=int(
-                            getattr(cfg.indexing, "parquet_extract_max_cell_chars", 20_000) or 20_000
-                        ),
-                        parquet_text_columns_only=bool(
-                            int(getattr(cfg.indexing, "parquet_extract_text_columns_only", 1) or 0) == 1
-                        ),
-                        parquet_include_column_names=bool(
-                            int(getattr(cfg.indexing, "parquet_extract_include_column_names", 1) or 0) == 1
-                        ),
+                size_bytes = None
+            if size_bytes is not None and size_bytes > max_indexable_bytes:
+                if event_queue is not None:
+                    _emit_event(
+                        event_queue,
+                        {
+                            "type": "log",
+                            "message": (
+                                f"⏭️ Skipping large file ({size_bytes} bytes > {max_indexable_bytes} bytes): {rel_path}"
+                            ),
+                        },
+                        drop_oldest=True,
                     )
-                    if content is None:
-                        content = abs_path.read_text(encoding="utf-8", errors="ignore")
+                return None
+
+            # Large text files: allow a streaming ingestion mode to avoid loading the entire file into memory.
+            if (
+                stream_mode == "stream"
+                and abs_path.suffix.lower() in {".txt", ".md", ".rst", ".log"}
+                and size_bytes is not None
+                and size_bytes >= stream_block_chars
+            ):
+                return _PreparedEntry(rel_path=rel_path, abs_path=abs_path, stream=True)
+
+            try:
+                prepared = await _prepare_content(
+                    rel_path, abs_path, want_text=graph_stream is not None and graph_stream.accepts(rel_path)
+                )
+            except TimeoutError:
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="file_prepare_timeout").inc()
+                _emit_event(
+                    event_queue,
+                    {"type": "log", "message": f"⏱️ Skipping {rel_path}: extraction/chunking exceeded {prepare_timeout_s:g}s"},
+                    drop_oldest=True,
+                )
+                return _PreparedEntry(rel_path=rel_path, abs_path=abs_path, ok=False)
+            except MemoryError:
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="file_prepare_memory").inc()
+                _emit_event(
+                    event_queue,
+                    {"type": "log", "message": f"🧱 Skipping {rel_path}: extraction/chunking exceeded {prepare_memory_mb} MB"},
+                    drop_oldest=True,
+                )
+                return _PreparedEntry(rel_path=rel_path, abs_path=abs_path, ok=False)
             except Exception:
                 INDEX_STAGE_ERRORS_TOTAL.labels(stage="file_read").inc()
-                continue
-            if "\x00" in content:
-                continue
-
-            # Local-only "late chunking": embed the full doc segment once, then pool per chunk span.
-            # This is experimental and only applies when explicitly enabled via config.
-            late_mode = (
-                not skip_dense
-                and str(getattr(cfg.embedding, "embedding_backend", "deterministic") or "deterministic").strip().lower()
-                == "provider"
-                and str(getattr(cfg.embedding, "contextual_chunk_embeddings", "off") or "off").strip().lower()
-                == "late_chunking_local_only"
-            )
-            if late_mode:
-                from server.indexing.late_chunking import late_chunk_document
-
-                strat = str(getattr(cfg.chunking, "chunking_strategy", "") or "").strip().lower()
-                if strat not in {"fixed_tokens"}:
-                    raise RuntimeError("late_chunking_local_only requires chunking.chunking_strategy='fixed_tokens'")
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="late_chunking").time():
-                    chunks = late_chunk_document(rel_path, content, chunking=cfg.chunking, embedding=cfg.embedding)
-                INDEX_FILES_PROCESSED_TOTAL.inc()
+                return _PreparedEntry(rel_path=rel_path, abs_path=abs_path, ok=False)
+            INDEX_STAGE_LATENCY_SECONDS.labels(stage="file_read").observe(prepared.read_seconds)
+            if not prepared.binary and not late_mode:
+                INDEX_STAGE_LATENCY_SECONDS.labels(stage="chunk").observe(prepared.chunk_seconds)
+            return _PreparedEntry(rel_path=rel_path, abs_path=abs_path, prepared=prepared)
+
+        async def _emit_file(entry: _PreparedEntry) -> None:
+            """Hand one prepared file to the embedder (and the code graph), in walk order."""
+            rel_path = entry.rel_path
+            chunk_count = 0
+            token_count = 0
+
+            async def _put_chunks(chunks: list[Chunk]) -> None:
+                nonlocal chunk_count, token_count
                 if not chunks:
-                    continue
-                for i0 in range(0, len(chunks), indexing_batch):
-                    embedded_batch = await _upsert_chunks_for_file(chunks[i0 : i0 + indexing_batch])
-                    if (
-                        semantic_budget > 0
-                        and semantic_processed < semantic_budget
-                        and cfg.graph_indexing.semantic_kg_enabled
-                        and neo4j is not None
-                    ):
-                        remaining = max(0, semantic_budget - semantic_processed)
-                        chunks_for_semantic.extend(embedded_batch[:remaining])
-                continue
-
-            if graph_builder is not None and rel_path.lower().endswith(".py"):
-                graph_files.append((rel_path, content))
+                    return
+                chunk_count += len(chunks)
+                token_count += sum(int(c.token_count or 0) for c in chunks)
+                await prepared_q.put(_FileChunks(rel_path=rel_path, chunks=chunks))
 
-            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="chunk").time():
-                chunks = chunker.chunk_file(rel_path, content)
-            INDEX_FILES_PROCESSED_TOTAL.inc()
-            if not chunks:
-                continue
-            for i0 in range(0, len(chunks), indexing_batch):
-                embedded_batch = await _upsert_chunks_for_file(chunks[i0 : i0 + indexing_batch])
-                if (
-                    semantic_budget > 0
-                    and semantic_processed < semantic_budget
-                    and cfg.graph_indexing.semantic_kg_enabled
-                    and neo4j is not None
-                ):
-                    remaining = max(0, semantic_budget - semantic_processed)
-                    chunks_for_semantic.extend(embedded_batch[:remaining])
-
-        # Optional semantic KG extraction (concept entities + related_to edges linked to chunk_ids).
-        if (
-            neo4j is not None
-            and cfg.graph_indexing.build_lexical_graph
-            and cfg.graph_indexing.semantic_kg_enabled
-            and semantic_budget > 0
-            and semantic_processed < semantic_budget
-        ):
-            try:
-                mode = str(cfg.graph_indexing.semantic_kg_mode or "heuristic").strip().lower()
-                max_terms = int(cfg.graph_indexing.semantic_kg_max_concepts_per_chunk)
-                min_len = int(cfg.graph_indexing.semantic_kg_min_concept_len)
-                max_rels_per_chunk = int(cfg.graph_indexing.semantic_kg_max_relations_per_chunk)
-                llm_model = str(cfg.graph_indexing.semantic_kg_llm_model or "").strip() or str(cfg.generation.enrich_model)
-                llm_prompt = str(cfg.system_prompts.semantic_kg_extraction or "").strip()
-                llm_timeout_s = float(cfg.graph_indexing.semantic_kg_llm_timeout_s)
-                llm_max_chars = int(cfg.enrichment.enrich_max_chars)
-
-                def _norm_concept(name: str, *, _min_len: int = min_len) -> str | None:
-                    v = (name or "").strip().lower()
-                    v = re.sub(r"[^a-z0-9_]+", "_", v).strip("_")
-                    if len(v) < _min_len:
-                        return None
-                    if v in _SEM_STOPWORDS:
-                        return None
-                    if not _SEM_TOKEN_RE.fullmatch(v):
-                        return None
-                    return v
-
-                concept_entities: dict[str, Entity] = {}
-                rels: list[Relationship] = []
-                link_set: set[tuple[str, str]] = set()
-
-                for ch in chunks_for_semantic:
-                    if semantic_processed >= semantic_budget:
-                        break
-                    semantic_processed += 1
-
-                    concepts_raw: list[str]
-                    relations_raw: list[dict[str, str]]
-                    if mode == "llm" and llm_prompt:
-                        # Best-effort LLM extraction. If it fails or returns no concepts,
-                        # fall back to deterministic heuristic extraction so we still
-                        # build an entity graph for non-code corpora.
-                        concepts_raw, relations_raw = await _extract_semantic_kg_llm(
-                            (ch.content or "")[: max(0, llm_max_chars)],
-                            cfg=cfg,
-                            prompt=llm_prompt,
-                            model=llm_model,
-                            timeout_s=llm_timeout_s,
-                        )
-                        if not concepts_raw:
-                            concepts_raw = _extract_semantic_concepts(
-                                ch.content, min_len=min_len, max_terms=max_terms
-                            )
-                            relations_raw = []
-                    else:
-                        concepts_raw = _extract_semantic_concepts(ch.content, min_len=min_len, max_terms=max_terms)
-                        relations_raw = []
-
-                    concepts: list[str] = []
-                    seen_concepts: set[str] = set()
-                    for name in concepts_raw:
-                        n = _norm_concept(name)
-                        if not n or n in seen_concepts:
-                            continue
-                        seen_concepts.add(n)
-                        concepts.append(n)
-                        if len(concepts) >= max_terms:
-                            break
-                    if not concepts:
-                        continue
-
-                    concept_ids: list[str] = []
-                    for name in concepts:
-                        ent_id = GraphBuilder._stable_id(repo_id, "", "concept", name)
-                        concept_ids.append(ent_id)
-                        if ent_id not in concept_entities:
-                            concept_entities[ent_id] = Entity(
-                                entity_id=ent_id,
-                                name=name,
-                                entity_type="concept",
-                                file_path=None,
-                                description=None,
-                                properties={"source": "semantic"},
-                            )
-                        link_set.add((ent_id, ch.chunk_id))
-
-                    if max_rels_per_chunk > 0:
-                        # LLM mode: use suggested relations if present, otherwise fall back.
-                        rels_added = 0
-                        if mode == "llm" and relations_raw:
-                            name_to_id = {n: GraphBuilder._stable_id(repo_id, "", "concept", n) for n in concepts}
-                            for r in relations_raw:
-                                if rels_added >= max_rels_per_chunk:
-                                    break
-                                src = _norm_concept(str(r.get("source") or ""))
-                                tgt = _norm_concept(str(r.get("target") or ""))
-                                rel_type = str(r.get("relation_type") or "related_to").strip().lower()
-                                if not src or not tgt or src == tgt:
-                                    continue
-                                if rel_type not in {"related_to", "references"}:
-                                    continue
-                                # Ensure entities exist even if relation mentions a concept not in concepts list.
-                                for nm in (src, tgt):
-                                    if nm not in name_to_id:
-                                        eid = GraphBuilder._stable_id(repo_id, "", "concept", nm)
-                                        name_to_id[nm] = eid
-                                        if eid not in concept_entities:
-                                            concept_entities[eid] = Entity(
-                                                entity_id=eid,
-                                                name=nm,
-                                                entity_type="concept",
-                                                file_path=None,
-                                                description=None,
-                                                properties={"source": "semantic", "mode": "llm"},
-                                            )
-                                        link_set.add((eid, ch.chunk_id))
-                                rels.append(
-                                    Relationship(
-                                        source_id=name_to_id[src],
-                                        target_id=name_to_id[tgt],
-                                        relation_type=rel_type,  # type: ignore[arg-type]
-                                        weight=float(cfg.graph_indexing.semantic_kg_relation_weight_llm),
-                                        properties={"source": "semantic", "mode": "llm"},
-                                    )
-                                )
-                                rels_added += 1
-                        # Heuristic fallback: star graph around the top concept in this chunk.
-                        if rels_added == 0 and len(concept_ids) >= 2:
-                            root = concept_ids[0]
-                            for tgt in concept_ids[1:]:
-                                rels.append(
-                                    Relationship(
-                                        source_id=root,
-                                        target_id=tgt,
-                                        relation_type="related_to",
-                                            weight=float(cfg.graph_indexing.semantic_kg_relation_weight_heuristic),
-                                        properties={"source": "semantic", "mode": "heuristic"},
-                                    )
+            async def _finish(ok: bool) -> None:
+                await prepared_q.put(
+                    _FileDone(rel_path=rel_path, ok=ok, chunk_count=chunk_count, token_count=token_count)
+                )
+
+            if entry.stream:
+                base_char = 0
+                base_line = 1
+                ordinal = 0
+                try:
+                    INDEX_FILES_PROCESSED_TOTAL.inc()
+                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="file_read_stream").time():
+                        with entry.abs_path.open("r", encoding="utf-8", errors="ignore") as f:
+                            while True:
+                                res = await asyncio.to_thread(
+                                    _chunk_stream_block,
+                                    f,
+                                    rel_path,
+                                    base_char=base_char,
+                                    base_line=base_line,
+                                    ordinal=ordinal,
                                 )
-                                rels_added += 1
-                                if rels_added >= max_rels_per_chunk:
+                                if res is None:
                                     break
+                                block, chunks = res
+                                ordinal += len(chunks)
+                                base_char += len(block)
+                                base_line += block.count("\n")
+                                await _put_chunks(chunks)
+                except Exception:
+                    INDEX_STAGE_ERRORS_TOTAL.labels(stage="file_read_stream").inc()
+                    await _finish(False)
+                    return
+                await _finish(True)
+                return
 
-                if concept_entities:
-                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_semantic_entities").time():
-                        await neo4j.upsert_entities(repo_id, list(concept_entities.values()))
-                if rels:
-                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_semantic_relationships").time():
-                        await neo4j.upsert_relationships(repo_id, rels)
-                if link_set:
-                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_link_entities_to_chunks").time():
-                        await neo4j.link_entities_to_chunks(
+            prepared = entry.prepared
+            if prepared is None or not entry.ok:
+                await _finish(False)
+                return
+            if prepared.binary:
+                # Binary content is deterministic for a given hash: remember it so it is not re-read.
+                await _finish(True)
+                return
+
+            if not late_mode and graph_stream is not None and prepared.text is not None:
+                await graph_stream.add_file(rel_path, prepared.text)
+            chunks = prepared.chunks
+            entry.prepared = None
+            INDEX_FILES_PROCESSED_TOTAL.inc()
+            await _put_chunks(chunks)
+            await _finish(True)
+
+        # Late chunking embeds while it chunks: files are held back until their encoder windows fill
+        # about one padded forward pass, then encoded together (and emitted in walk order).
+        late_pending: list[_PreparedEntry] = []
+        late_pending_chars = 0
+        late_batch_windows = max(1, int(cfg.embedding.late_chunking_batch_windows))
+        late_batch_chars = int(late_batch_windows * cfg.embedding.late_chunking_max_doc_tokens * _EST_BYTES_PER_TOKEN)
+
+        async def _flush_late() -> None:
+            nonlocal late_pending_chars
+            if not late_pending:
+                return
+            batch = list(late_pending)
+            late_pending.clear()
+            late_pending_chars = 0
+            docs = [(e.rel_path, e.prepared.text or "") for e in batch if e.prepared is not None]
+            results = await asyncio.to_thread(_late_chunk_files, docs)
+            for entry, chunks in zip(batch, results, strict=True):
+                assert entry.prepared is not None
+                entry.prepared.chunks = chunks
+                entry.prepared.text = None
+                await _emit_file(entry)
+
+        async def _emit_next(entry: _PreparedEntry) -> None:
+            nonlocal late_pending_chars
+            prepared = entry.prepared
+            if late_mode and entry.ok and prepared is not None and not prepared.binary:
+                late_pending.append(entry)
+                late_pending_chars += len(prepared.text or "")
+                if len(late_pending) >= late_batch_windows or late_pending_chars >= late_batch_chars:
+                    await _flush_late()
+                return
+            await _flush_late()
+            await _emit_file(entry)
+
+        async def _produce() -> None:
+            # Up to `workers` files are prepared at once; results are emitted in walk order.
+            pending: deque[asyncio.Task[_PreparedEntry | None]] = deque()
+            try:
+                for idx, (rel_path, abs_path) in entries_iter:
+                    pending.append(asyncio.create_task(_prepare_file(idx, rel_path, abs_path)))
+                    while len(pending) >= workers or (pending and pending[0].done()):
+                        entry = await pending.popleft()
+                        if entry is not None:
+                            await _emit_next(entry)
+                while pending:
+                    entry = await pending.popleft()
+                    if entry is not None:
+                        await _emit_next(entry)
+                await _flush_late()
+            finally:
+                for task in pending:
+                    task.cancel()
+            await prepared_q.put(None)
+
+        async def _embed_stage() -> None:
+            # FIFO of chunks and end-of-file markers; a marker always trails its file's chunks.
+            buffer: deque[Chunk | _FileDone] = deque()
+            buffered_chunks = 0
+
+            async def _flush(limit: int) -> None:
+                nonlocal buffered_chunks
+                chunks: list[Chunk] = []
+                done: list[_FileDone] = []
+                while buffer and (len(chunks) < limit or isinstance(buffer[0], _FileDone)):
+                    item = buffer.popleft()
+                    if isinstance(item, _FileDone):
+                        done.append(item)
+                    else:
+                        chunks.append(item)
+                buffered_chunks -= len(chunks)
+                vectors: EmbeddingMatrix | None = None
+                if chunks and not skip_dense and not all(c.embedding is not None for c in chunks):
+                    assert embedder is not None
+                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="embed_chunks").time():
+                        vectors = await embedder.embed_chunks_array(chunks)
+                batch = _WriteBatch(chunks=chunks, done=done, vectors=vectors)
+                await postgres_q.put(batch)
+                if write_lexical:
+                    await graph_q.put(batch)
+
+            while (item := await prepared_q.get()) is not None:
+                if isinstance(item, _FileDone):
+                    buffer.append(item)
+                    continue
+                buffer.extend(item.chunks)
+                buffered_chunks += len(item.chunks)
+                while buffered_chunks >= embed_batch_size:
+                    await _flush(embed_batch_size)
+            while buffer:
+                await _flush(embed_batch_size)
+            await postgres_q.put(None)
+            if write_lexical:
+                await graph_q.put(None)
+
+        async def _postgres_writer() -> None:
+            nonlocal total_chunks, total_tokens
+            while (batch := await postgres_q.get()) is not None:
+                if batch.chunks:
+                    chunk_tokens = sum(int(c.token_count or 0) for c in batch.chunks)
+                    total_chunks += len(batch.chunks)
+                    total_tokens += chunk_tokens
+                    INDEX_CHUNKS_CREATED_TOTAL.inc(len(batch.chunks))
+                    INDEX_TOKENS_TOTAL.inc(chunk_tokens)
+                    # One COPY + merge writes content, embedding and tsv together.
+                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="postgres_upsert_chunks").time():
+                        await postgres.upsert_chunks(
                             repo_id,
-                            links=[{"entity_id": eid, "chunk_id": cid} for (eid, cid) in sorted(link_set)],
+                            batch.chunks,
+                            ts_config=cfg.indexing.postgres_ts_config,
+                            store_embeddings=not skip_dense,
+                            vectors=batch.vectors,
                         )
+                for done in batch.done:
+                    _file_written(done)
+                await _flush_fingerprints(min_batch=100)
+
+        lexical_batch_docs = max(1, int(getattr(cfg.graph_indexing, "lexical_write_batch_docs", 200) or 200))
+        lexical_batch_chunks = max(1, int(getattr(cfg.graph_indexing, "lexical_write_batch_chunks", 5000) or 5000))
+        lexical_concurrency = max(1, int(getattr(cfg.graph_indexing, "lexical_write_concurrency", 2) or 2))
+        lexical_stats: dict[str, int] = {}
+        graph_embeddings = bool(cfg.graph_indexing.store_chunk_embeddings) and not skip_dense
+        semantic_lock = asyncio.Lock()
+
+        async def _write_lexical_batch(files: list[tuple[_FileDone, list[Chunk]]]) -> None:
+            assert neo4j is not None
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_upsert_document_chunks").time():
+                await neo4j.upsert_documents_and_chunks(
+                    repo_id,
+                    [(done.rel_path, chunks) for done, chunks in files],
+                    store_embeddings=graph_embeddings,
+                    embedding_property=cfg.graph_indexing.chunk_embedding_property,
+                    corpus_label=corpus_label,
+                    stats=lexical_stats,
+                )
+            for done, chunks in files:
+                if semantic_on and semantic_processed < semantic_budget:
+                    async with semantic_lock:
+                        await _extract_semantic_kg([c for c in chunks if c.content])
+                _file_written(done)
+
+        async def _graph_writer() -> None:
+            # The lexical graph is written per file (Document + ordered NEXT_CHUNK chain), so chunks are
+            # held until the file's end marker arrives. Completed files are grouped into multi-document
+            # transactions (lexical_write_batch_docs / _chunks), with up to lexical_write_concurrency in
+            # flight. Content is only kept for semantic KG extraction.
+            file_chunks: dict[str, list[Chunk]] = defaultdict(list)
+            ready: list[tuple[_FileDone, list[Chunk]]] = []
+            ready_chunks = 0
+            inflight: set[asyncio.Task[None]] = set()
+
+            async def _reap(return_when: str) -> None:
+                finished, _ = await asyncio.wait(inflight, return_when=return_when)
+                for task in finished:
+                    inflight.discard(task)
+                    task.result()
+
+            async def _dispatch() -> None:
+                nonlocal ready, ready_chunks
+                if not ready:
+                    return
+                files, ready, ready_chunks = ready, [], 0
+                while len(inflight) >= lexical_concurrency:
+                    await _reap(asyncio.FIRST_COMPLETED)
+                inflight.add(asyncio.create_task(_write_lexical_batch(files)))
+
+            try:
+                while (batch := await graph_q.get()) is not None:
+                    vectors = batch.vectors.tolist() if batch.vectors is not None and graph_embeddings else None
+                    for i, ch in enumerate(batch.chunks):
+                        held = file_chunks[ch.file_path]
+                        update: dict[str, Any] = {}
+                        if vectors is not None:
+                            update["embedding"] = vectors[i]
+                        if not (semantic_on and len(held) < semantic_budget - semantic_processed):
+                            update["content"] = ""
+                        held.append(ch.model_copy(update=update) if update else ch)
+                    for done in batch.done:
+                        chunks = file_chunks.pop(done.rel_path, [])
+                        if not chunks:
+                            _file_written(done)
+                            continue
+                        ready.append((done, chunks))
+                        ready_chunks += len(chunks)
+                        if len(ready) >= lexical_batch_docs or ready_chunks >= lexical_batch_chunks:
+                            await _dispatch()
+                await _dispatch()
+                if inflight:
+                    await _reap(asyncio.ALL_COMPLETED)
+            finally:
+                for task in inflight:
+                    task.cancel()
+
+        stages = [
+            asyncio.create_task(_produce()),
+            asyncio.create_task(_embed_stage()),
+            asyncio.create_task(_postgres_writer()),
+        ]
+        if write_lexical:
+            stages.append(asyncio.create_task(_graph_writer()))
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            if graph_stream is not None:
+                graph_stream.cancel()
+            raise
+        finally:
+            # Fail fast: one failing stage cancels the rest so nothing blocks on a dead queue.
+            for task in stages:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+        await _flush_fingerprints()
+        if event_queue is not None and lexical_stats:
+            _emit_event(
+                event_queue,
+                {
+                    "type": "log",
+                    "message": (
+                        f"🕸️ Lexical graph: {lexical_stats.get('documents', 0)} documents, "
+                        f"{lexical_stats.get('chunks', 0)} chunks in {lexical_stats.get('transactions', 0)} transactions"
+                    ),
+                },
+                drop_oldest=True,
+            )
+
+        # Incremental runs with no code changes and nothing purged leave the code graph untouched.
+        if graph_stream is not None and (graph_stream.files or purge_paths or not incremental):
+            try:
+                if event_queue is not None:
+                    _emit_event(
+                        event_queue,
+                        {"type": "log", "message": "🧠 Finishing Neo4j graph (entities + relationships, communities)..."},
+                        drop_oldest=True,
+                    )
+                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="graph_build").time():
+                    await graph_stream.finish(
+                        changed_files=sorted(set(plan.to_index) | set(purge_paths)) if incremental else None,
+                    )
+                if event_queue is not None and graph_stream.files:
+                    _emit_event(
+                        event_queue,
+                        {
+                            "type": "log",
+                            "message": (
+                                f"🧠 Code graph: {graph_stream.files} files ({graph_stream.cache_hits} cached, "
+                                f"{graph_stream.timeouts} timed out), {graph_stream.entities_written} entities"
+                            ),
+                        },
+                        drop_oldest=True,
+                    )
+                # Link entities to chunk_ids so the graph leg can hydrate deterministically.
+                if neo4j is not None and cfg.graph_indexing.build_lexical_graph:
+                    with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_rebuild_entity_chunk_links").time():
+                        await neo4j.rebuild_entity_chunk_links(repo_id)
             except Exception:
-                INDEX_STAGE_ERRORS_TOTAL.labels(stage="semantic_kg").inc()
-                # Semantic KG is optional; never block baseline indexing.
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="graph_build").inc()
+                # Do not fail indexing if graph extraction is partial.
                 pass
 
-    if graph_builder is not None:
-        try:
-            if event_queue is not None:
-                _emit_event(
-                    event_queue,
-                    {"type": "log", "message": "🧠 Building Neo4j graph (entities + relationships)..."},
-                    drop_oldest=True,
-                )
-            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="graph_build").time():
-                await graph_builder.build_graph_for_files(
-                    repo_id,
-                    graph_files,
-                    batch_size=int(cfg.indexing.indexing_batch_size),
-                )
-            # Link entities to chunk_ids so the graph leg can hydrate deterministically.
-            if neo4j is not None and cfg.graph_indexing.build_lexical_graph:
-                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="neo4j_rebuild_entity_chunk_links").time():
-                    await neo4j.rebuild_entity_chunk_links(repo_id)
-        except Exception:
-            INDEX_STAGE_ERRORS_TOTAL.labels(stage="graph_build").inc()
-            # Do not fail indexing if graph extraction is partial.
-            pass
+        # Refresh the in-memory graph snapshot; queries pick it up once the index generation is bumped below.
+        if neo4j is not None and int(cfg.graph_search.snapshot_enabled) == 1 and (plan.to_index or purge_paths or not incremental):
+            try:
+                with INDEX_STAGE_LATENCY_SECONDS.labels(stage="graph_snapshot_build").time():
+                    snapshot_meta = await deps.build_graph_snapshot(neo4j, cfg.graph_search, repo_id)
+                if event_queue is not None:
+                    message = (
+                        f"🗺️ Graph snapshot: {snapshot_meta['entities']} entities, {snapshot_meta['edges']} edges"
+                        if snapshot_meta is not None
+                        else "🗺️ Graph snapshot skipped (graph exceeds graph_search.snapshot_max_edges)"
+                    )
+                    _emit_event(event_queue, {"type": "log", "message": message}, drop_oldest=True)
+            except Exception:
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="graph_snapshot_build").inc()
+                # The previous build no longer matches the graph: drop it so search falls back to Neo4j.
+                await asyncio.to_thread(deps.delete_graph_snapshot, cfg.graph_search, repo_id)
+    finally:
+        if neo4j is not None:
+            # Release this run's hold on the shared driver (the driver itself stays pooled), even when
+            # a stage fails: a leaked hold keeps a retired driver open forever.
+            await neo4j.disconnect()
 
     if not skip_dense:
         assert embedder is not None
@@ -967,6 +1524,67 @@ async def _run_index(
             dimensions=int(embedder.dim),
         )
 
+        # Per-corpus ANN index (pgvector HNSW/IVFFlat). Best-effort: exact scan still works without it.
+        ann_method = str(getattr(cfg.vector_search, "ann_index", "none") or "none")
+
+        def _on_ann_progress(progress: dict[str, Any]) -> None:
+            if event_queue is None:
+                return
+            pct = progress.get("percent")
+            phase = str(progress.get("phase") or "building")
+            _emit_event(
+                event_queue,
+                {
+                    "type": "log",
+                    "message": f"🧭 {ann_method.upper()} index: {phase}" + (f" ({pct}%)" if pct is not None else ""),
+                },
+                drop_oldest=True,
+            )
+
+        try:
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="postgres_vector_ann_index").time():
+                ann_status = await postgres.ensure_vector_ann_index(
+                    repo_id,
+                    dimensions=int(embedder.dim),
+                    method=ann_method,
+                    m=int(cfg.vector_search.hnsw_m),
+                    ef_construction=int(cfg.vector_search.hnsw_ef_construction),
+                    lists=int(cfg.vector_search.ivfflat_lists),
+                    min_rows=int(cfg.vector_search.ann_min_rows),
+                    progress_cb=_on_ann_progress,
+                )
+            if event_queue is not None and ann_status.get("built"):
+                _emit_event(
+                    event_queue,
+                    {
+                        "type": "log",
+                        "message": f"🧭 Built {ann_method.upper()} index over {ann_status.get('rows', 0)} vectors",
+                    },
+                    drop_oldest=True,
+                )
+        except Exception as e:
+            INDEX_STAGE_ERRORS_TOTAL.labels(stage="postgres_vector_ann_index").inc()
+            if event_queue is not None:
+                _emit_event(
+                    event_queue,
+                    {"type": "log", "message": f"⚠️ ANN index build failed (exact search still works): {e}"},
+                    drop_oldest=True,
+                )
+
+        # Keep the shared embedding cache bounded (it gains a row per distinct chunk text and model).
+        try:
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="embedding_cache_prune").time():
+                await postgres.prune_embedding_cache(
+                    max_age_days=int(cfg.embedding.embedding_cache_max_age_days),
+                    max_entries=int(cfg.embedding.embedding_cache_max_entries),
+                )
+        except Exception:
+            INDEX_STAGE_ERRORS_TOTAL.labels(stage="embedding_cache_prune").inc()
+
+    # Unchanged files keep their stored chunks; count them so stats describe the whole corpus.
+    total_chunks += sum(fp.chunk_count for fp in plan.unchanged.values())
+    total_tokens += sum(fp.token_count for fp in plan.unchanged.values())
+
     stats = IndexStats(
         repo_id=repo_id,
         total_files=total_files,
@@ -977,8 +1595,16 @@ async def _run_index(
         embedding_dimensions=0 if skip_dense else (embedder.dim if embedder is not None else 0),
         last_indexed=datetime.now(UTC),
         file_breakdown=dict(file_breakdown),
+        incremental=incremental,
+        files_added=len(plan.added),
+        files_changed=len(plan.changed),
+        files_removed=len(plan.removed),
+        files_skipped=len(plan.unchanged),
     )
     _STATS[repo_id] = stats
+    # New index content: invalidate cached search results for this corpus.
+    if plan.to_index or purge_paths or not incremental:
+        bump_index_generation(repo_id)
     return stats
 
 
@@ -1401,9 +2027,18 @@ async def delete_index(corpus_id: str) -> dict[str, Any]:
     cfg = await load_scoped_config(repo_id=repo_id)
     postgres = PostgresClient(cfg.indexing.postgres_url)
     await postgres.connect()
-    deleted_vec = await postgres.delete_embeddings(repo_id)
-    deleted_fts = await postgres.delete_fts(repo_id)
-    deleted_rows = await postgres.delete_chunks(repo_id)
+    try:
+        await postgres.drop_vector_ann_indexes(repo_id)
+    except Exception:
+        INDEX_STAGE_ERRORS_TOTAL.labels(stage="postgres_vector_ann_index").inc()
+    delete_batch_size = int(getattr(cfg.indexing, "delete_batch_size", 5000) or 5000)
+    # Batched row deletes; embedding/FTS counts come from the deleted rows (no full-table NULL-ing pass).
+    deleted_counts: dict[str, int] = {}
+    deleted_rows = await postgres.delete_chunks(repo_id, batch_size=delete_batch_size, counts=deleted_counts)
+    deleted_vec = int(deleted_counts.get("embeddings", 0))
+    deleted_fts = int(deleted_counts.get("fts", 0))
+    # Forget fingerprints too, or the next incremental run would skip every (now missing) file.
+    await postgres.delete_file_fingerprints(repo_id)
 
     try:
         db_name = cfg.graph_storage.resolve_database(repo_id)
@@ -1414,13 +2049,25 @@ async def delete_index(corpus_id: str) -> dict[str, Any]:
             database=db_name,
         )
         await neo4j.connect()
-        await neo4j.delete_graph(repo_id)
-        await neo4j.disconnect()
+        try:
+            await neo4j.delete_graph(repo_id, batch_size=delete_batch_size)
+            if cfg.graph_storage.neo4j_database_mode == "shared" and cfg.graph_indexing.chunk_corpus_vector_index:
+                await neo4j.drop_vector_index(
+                    corpus_vector_index_name(cfg.graph_indexing.chunk_vector_index_name, repo_id)
+                )
+        finally:
+            await neo4j.disconnect()
     except Exception:
         # Graph layer optional
         pass
+    try:
+        await asyncio.to_thread(delete_graph_snapshot, cfg.graph_search, repo_id)
+        await asyncio.to_thread(delete_graph_parse_cache, cfg.graph_indexing, repo_id)
+    except Exception:
+        pass
     _STATUS.pop(repo_id, None)
     _STATS.pop(repo_id, None)
+    bump_index_generation(repo_id)
     # Best-effort gauges (process-level; no per-corpus labels).
     # Reset to zero to avoid stale dashboards in single-corpus dev flows.
     try:
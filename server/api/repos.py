@@ -111,8 +111,10 @@ async def add_repo(request: CorpusCreateRequest) -> Corpus:
         )
         await neo4j.connect()
         db_name = cfg.graph_storage.resolve_database(corpus_id)
-        ok = await neo4j.ensure_database(db_name)
-        await neo4j.disconnect()
+        try:
+            ok = await neo4j.ensure_database(db_name)
+        finally:
+            await neo4j.disconnect()
         if not ok:
             raise HTTPException(
                 status_code=503,
@@ -261,8 +263,10 @@ async def get_repo_stats(corpus_id: str) -> CorpusStats:
     graph_stats = None
     try:
         neo4j = await _get_neo4j(repo_id)
-        graph_stats = await neo4j.get_graph_stats(repo_id)
-        await neo4j.disconnect()
+        try:
+            graph_stats = await neo4j.get_graph_stats(repo_id)
+        finally:
+            await neo4j.disconnect()
         if graph_stats.total_entities == 0:
             graph_stats = None
     except Exception:
@@ -290,8 +294,10 @@ async def delete_repo(corpus_id: str) -> dict[str, Any]:
     await pg.delete_corpus(repo_id)
     try:
         neo4j = await _get_neo4j(repo_id)
-        await neo4j.delete_graph(repo_id)
-        await neo4j.disconnect()
+        try:
+            await neo4j.delete_graph(repo_id)
+        finally:
+            await neo4j.disconnect()
     except Exception:
         pass
     return {"ok": True}
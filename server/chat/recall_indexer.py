@@ -92,8 +92,7 @@ async def index_recall_conversation(
     chunks = build_recall_chunks(conversation_id=conversation_id, messages=messages, config=config)
     embedded_chunks = await embedder.embed_chunks(chunks)
 
-    await pg.upsert_embeddings(config.default_corpus_id, embedded_chunks)
-    await pg.upsert_fts(config.default_corpus_id, embedded_chunks, ts_config=ts_config)
+    await pg.upsert_chunks(config.default_corpus_id, embedded_chunks, ts_config=ts_config)
 
     return len(chunks)
 
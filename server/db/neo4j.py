@@ -1,43 +1,341 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
+import math
 import os
+import posixpath
 import re
 import time
-from collections import defaultdict
-from collections.abc import Iterable
+import uuid
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Literal, cast
 
-from neo4j import AsyncDriver, AsyncGraphDatabase
-
-from server.models.graph import Community, Entity, GraphNeighborsResponse, GraphStats, Relationship
+import numpy as np
+from neo4j import WRITE_ACCESS, AsyncDriver, AsyncGraphDatabase, AsyncManagedTransaction
+
+from server.models.graph import (
+    Community,
+    Entity,
+    GraphNeighborsResponse,
+    GraphSchemaIndex,
+    GraphStats,
+    Relationship,
+)
 from server.models.index import Chunk
 from server.models.retrieval import ChunkMatch
+from server.models.tribrid_config_model import GraphSearchConfig, GraphStorageConfig
 
 EntityType = Literal["function", "class", "module", "variable", "concept"]
 RelationshipType = Literal["calls", "imports", "inherits", "contains", "references", "related_to"]
 
 
+# Drivers own their own connection pools; share one per (uri, user, database) per process.
+_DRIVER_IDLE_TTL_S = 300.0
+_DRIVER_HEALTHCHECK_INTERVAL_S = 30.0
+
+
+@dataclass
+class _SharedDriver:
+    driver: AsyncDriver
+    password: str
+    refs: int = 0
+    last_used: float = 0.0
+    last_checked: float = 0.0
+
+
+_DriverKey = tuple[str, str, str]
+_DRIVERS_BY_KEY: dict[_DriverKey, _SharedDriver] = {}
+_DRIVER_LOCKS_BY_KEY: dict[_DriverKey, asyncio.Lock] = {}
+
+
+async def _close_driver_quietly(driver: AsyncDriver) -> None:
+    try:
+        await driver.close()
+    except Exception:
+        pass
+
+
+async def _evict_idle_drivers(now: float) -> None:
+    """Close shared drivers nobody holds that have been idle longer than the TTL."""
+    for key, entry in list(_DRIVERS_BY_KEY.items()):
+        if entry.refs > 0 or (now - entry.last_used) < _DRIVER_IDLE_TTL_S:
+            continue
+        if _DRIVERS_BY_KEY.get(key) is entry:
+            del _DRIVERS_BY_KEY[key]
+            await _close_driver_quietly(entry.driver)
+
+
+# Schema bootstrap: composite uniqueness constraints on the MERGE keys plus range indexes for the
+# file_path lookups incremental indexing relies on. Runs once per (uri, database) per process.
+@dataclass(frozen=True)
+class _SchemaItem:
+    name: str
+    kind: Literal["constraint", "index", "fulltext"]
+    label: str
+    properties: tuple[str, ...]
+
+
+_SCHEMA_ITEMS: tuple[_SchemaItem, ...] = (
+    _SchemaItem("tribrid_entity_key", "constraint", "Entity", ("repo_id", "entity_id")),
+    _SchemaItem("tribrid_chunk_key", "constraint", "Chunk", ("repo_id", "chunk_id")),
+    _SchemaItem("tribrid_document_key", "constraint", "Document", ("repo_id", "file_path")),
+    _SchemaItem("tribrid_community_key", "constraint", "Community", ("repo_id", "community_id")),
+    _SchemaItem("tribrid_entity_id", "index", "Entity", ("entity_id",)),
+    _SchemaItem("tribrid_entity_file", "index", "Entity", ("repo_id", "file_path")),
+    _SchemaItem("tribrid_chunk_file", "index", "Chunk", ("repo_id", "file_path")),
+    _SchemaItem(
+        "tribrid_entity_text", "fulltext", "Entity", ("name", "qualified_name", "name_terms", "description", "repo_id")
+    ),
+)
+_ENTITY_FULLTEXT_INDEX = "tribrid_entity_text"
+
+_SchemaKey = tuple[str, str]
+_SCHEMA_READY_BY_KEY: dict[_SchemaKey, dict[str, str]] = {}
+_SCHEMA_LOCKS_BY_KEY: dict[_SchemaKey, asyncio.Lock] = {}
+
+
+def _schema_item_cypher(item: _SchemaItem) -> str:
+    props = ", ".join(f"n.`{p}`" for p in item.properties)
+    if item.kind == "constraint":
+        return f"CREATE CONSTRAINT `{item.name}` IF NOT EXISTS FOR (n:`{item.label}`) REQUIRE ({props}) IS UNIQUE;"
+    if item.kind == "fulltext":
+        return f"CREATE FULLTEXT INDEX `{item.name}` IF NOT EXISTS FOR (n:`{item.label}`) ON EACH [{props}];"
+    return f"CREATE INDEX `{item.name}` IF NOT EXISTS FOR (n:`{item.label}`) ON ({props});"
+
+
+# delete_graph: known corpus labels go label by label; a final unlabeled pass sweeps anything else.
+_GRAPH_DELETE_LABELS = ("Community", "Entity", "Chunk", "Document")
+_GRAPH_DELETE_ROUNDS = 10
+
+# Relationship types that make up the entity graph (traversal, communities, snapshot export).
+_ENTITY_REL_TYPES = ("calls", "imports", "inherits", "contains", "references", "related_to")
+
+# Community detection: write batch sizes, and the share of the graph above which an incremental
+# recompute is done as a full one.
+_COMMUNITY_WRITE_BATCH = 1000
+_COMMUNITY_MEMBERSHIP_BATCH = 10000
+_COMMUNITY_INCREMENTAL_MAX_FRACTION = 0.5
+
+
+@dataclass(frozen=True)
+class GraphExpansionBudget:
+    """Cost caps for frontier-based entity expansion (GraphSearchConfig.expansion_*)."""
+
+    fanout_cap: int = 50
+    max_visited: int = 2000
+    hub_degree: int = 200
+
+    @classmethod
+    def from_config(cls, cfg: GraphSearchConfig) -> GraphExpansionBudget | None:
+        """Budget for `cfg`, or None when the legacy variable-length path strategy is configured."""
+        if str(getattr(cfg, "expansion_strategy", "frontier")) != "frontier":
+            return None
+        return cls(
+            fanout_cap=max(1, int(getattr(cfg, "expansion_fanout_cap", 50) or 50)),
+            max_visited=max(1, int(getattr(cfg, "expansion_max_visited", 2000) or 2000)),
+            hub_degree=max(0, int(getattr(cfg, "expansion_hub_degree", 0) or 0)),
+        )
+
+    def hub_weight(self, degree: int) -> float:
+        if self.hub_degree <= 0 or degree <= self.hub_degree:
+            return 1.0
+        return math.sqrt(float(self.hub_degree) / float(degree))
+
+
 class Neo4jClient:
-    def __init__(self, uri: str, user: str, password: str, database: str | None = None):
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        database: str | None = None,
+        *,
+        driver_factory: Callable[..., AsyncDriver] | None = None,
+    ):
         self.uri = uri
         self.user = user
         self.password = password
         self.database = database or "neo4j"
+        # Builds the shared driver on first connect for a key; defaults to AsyncGraphDatabase.driver.
+        self._driver_factory = driver_factory or AsyncGraphDatabase.driver
         self._driver: AsyncDriver | None = None
+        self._shared: tuple[_DriverKey, _SharedDriver] | None = None
 
     async def connect(self) -> None:
+        if self._driver is not None:
+            return
+
         uri = os.getenv("NEO4J_URI") or self.uri
         user = os.getenv("NEO4J_USER") or self.user
         password = os.getenv("NEO4J_PASSWORD") or self.password
-        self._driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+        key: _DriverKey = (uri, user, self.database)
+        now = time.monotonic()
+        await _evict_idle_drivers(now)
+
+        lock = _DRIVER_LOCKS_BY_KEY.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            _DRIVER_LOCKS_BY_KEY[key] = lock
+
+        async with lock:
+            entry = _DRIVERS_BY_KEY.get(key)
+            if entry is not None and entry.password != password:
+                # Credentials rotated: retire the old driver once current holders are done with it.
+                del _DRIVERS_BY_KEY[key]
+                if entry.refs <= 0:
+                    await _close_driver_quietly(entry.driver)
+                entry = None
+            if entry is not None and (now - entry.last_checked) >= _DRIVER_HEALTHCHECK_INTERVAL_S:
+                try:
+                    await entry.driver.verify_connectivity()
+                    entry.last_checked = now
+                except Exception:
+                    del _DRIVERS_BY_KEY[key]
+                    if entry.refs <= 0:
+                        await _close_driver_quietly(entry.driver)
+                    entry = None
+            if entry is None:
+                entry = _SharedDriver(
+                    driver=self._driver_factory(uri, auth=(user, password)),
+                    password=password,
+                    last_checked=now,
+                )
+                _DRIVERS_BY_KEY[key] = entry
+            entry.refs += 1
+            entry.last_used = now
+
+        self._driver = entry.driver
+        self._shared = (key, entry)
+        try:
+            await self.ensure_schema()
+        except BaseException:
+            # Callers only disconnect() after a successful connect(): release the hold here.
+            await self.disconnect()
+            raise
 
     async def disconnect(self) -> None:
-        if self._driver:
-            await self._driver.close()
-            self._driver = None
+        # NOTE: Drivers are shared per (uri, user, database). disconnect() releases this client's
+        # hold; the driver stays pooled until it idles out or close_shared_drivers() runs.
+        shared = self._shared
+        self._driver = None
+        self._shared = None
+        if shared is None:
+            return
+        key, entry = shared
+        entry.refs = max(0, entry.refs - 1)
+        entry.last_used = time.monotonic()
+        if entry.refs == 0 and _DRIVERS_BY_KEY.get(key) is not entry:
+            # Retired (failed health check / rotated credentials) while held; last holder closes it.
+            await _close_driver_quietly(entry.driver)
+
+    @classmethod
+    async def close_shared_drivers(cls) -> None:
+        """Close all shared drivers (best-effort).
+
+        Intended for tests/shutdown hooks. Production request paths should not
+        call this.
+        """
+        for _key, entry in list(_DRIVERS_BY_KEY.items()):
+            await _close_driver_quietly(entry.driver)
+        _DRIVERS_BY_KEY.clear()
+        _DRIVER_LOCKS_BY_KEY.clear()
+        _SCHEMA_READY_BY_KEY.clear()
+        _SCHEMA_LOCKS_BY_KEY.clear()
+
+    async def ensure_schema(self, *, force: bool = False) -> dict[str, str]:
+        """Create the uniqueness constraints and lookup indexes this client relies on (idempotent).
+
+        Runs once per (uri, database) per process; later calls return the cached outcome. Never raises:
+        a composite uniqueness constraint that cannot be created (e.g. pre-existing duplicate nodes)
+        falls back to a plain range index on the same properties, and per-item failures are recorded
+        as "error: ..." in the returned {name: outcome} map.
+        """
+        key: _SchemaKey = (self.uri, self.database)
+        shared = self._shared
+        if shared is not None:
+            key = (shared[0][0], shared[0][2])
+        if not force and key in _SCHEMA_READY_BY_KEY:
+            return _SCHEMA_READY_BY_KEY[key]
+
+        lock = _SCHEMA_LOCKS_BY_KEY.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            _SCHEMA_LOCKS_BY_KEY[key] = lock
+
+        async with lock:
+            if not force and key in _SCHEMA_READY_BY_KEY:
+                return _SCHEMA_READY_BY_KEY[key]
+            outcome: dict[str, str] = {}
+            try:
+                driver = self._require_driver()
+                async with driver.session(database=self.database) as session:
+                    for item in _SCHEMA_ITEMS:
+                        try:
+                            await session.run(_schema_item_cypher(item))
+                            outcome[item.name] = item.kind
+                        except Exception as e:
+                            if item.kind != "constraint":
+                                outcome[item.name] = f"error: {e}"
+                                continue
+                            fallback = _SchemaItem(item.name, "index", item.label, item.properties)
+                            try:
+                                await session.run(_schema_item_cypher(fallback))
+                                outcome[item.name] = "index"
+                            except Exception as e2:
+                                outcome[item.name] = f"error: {e2}"
+            except Exception as e:
+                # Database unreachable/offline: leave it un-bootstrapped so the next connect retries.
+                return {item.name: f"error: {e}" for item in _SCHEMA_ITEMS}
+            if any(not v.startswith("error") for v in outcome.values()):
+                # Cache partial outcomes too; only an across-the-board failure (offline db) retries.
+                _SCHEMA_READY_BY_KEY[key] = outcome
+            return outcome
+
+    async def schema_status(self) -> dict[str, Any]:
+        """Report the state of the bootstrap constraints/indexes (SHOW INDEXES).
+
+        Returns {"ready": bool, "indexes": [...], "missing": [...]} where `ready` means every expected
+        index exists and is ONLINE.
+        """
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            res = await session.run(
+                """
+                SHOW INDEXES
+                YIELD name, type, labelsOrTypes, properties, state, owningConstraint
+                WHERE name IN $names
+                RETURN name, type, labelsOrTypes, properties, state, owningConstraint;
+                """,
+                names=[item.name for item in _SCHEMA_ITEMS],
+            )
+            rows = await res.data()
+
+        by_name = {str(r.get("name") or ""): r for r in rows}
+        indexes: list[dict[str, Any]] = []
+        missing: list[str] = []
+        for item in _SCHEMA_ITEMS:
+            row = by_name.get(item.name)
+            if row is None:
+                missing.append(item.name)
+                continue
+            indexes.append(
+                {
+                    "name": item.name,
+                    "label": item.label,
+                    "properties": list(item.properties),
+                    "type": str(row.get("type") or ""),
+                    "state": str(row.get("state") or "").upper(),
+                    "unique": bool(row.get("owningConstraint")),
+                }
+            )
+        ready = not missing and all(ix["state"] == "ONLINE" for ix in indexes)
+        return {"ready": ready, "indexes": indexes, "missing": missing}
 
     async def ping(self) -> dict[str, Any]:
         """Lightweight connectivity + server info probe.
@@ -170,6 +468,35 @@ class Neo4jClient:
             await asyncio.sleep(0.25)
         return False
 
+    async def label_corpus_chunks(self, repo_id: str, label: str, *, batch_size: int = 5000) -> int:
+        """Add `label` to the corpus' Chunk nodes that lack it (chunks written before it was enabled)."""
+        lbl = _sanitize_cypher_identifier(label)
+        if not lbl:
+            raise ValueError(f"Invalid Neo4j label name: {label!r}")
+        driver = self._require_driver()
+        cypher = f"""
+        MATCH (c:Chunk {{repo_id: $repo_id}})
+        WHERE NOT c:`{lbl}`
+        CALL {{
+          WITH c
+          SET c:`{lbl}`
+        }} IN TRANSACTIONS OF $batch ROWS
+        RETURN count(c) AS n;
+        """
+        async with driver.session(database=self.database) as session:
+            res = await session.run(cypher, repo_id=repo_id, batch=max(1, int(batch_size)))
+            rec = await res.single()
+        return int(rec.get("n") or 0) if rec else 0
+
+    async def drop_vector_index(self, index_name: str) -> None:
+        """Drop a vector index if it exists."""
+        idx = _sanitize_cypher_identifier(index_name)
+        if not idx:
+            raise ValueError(f"Invalid Neo4j vector index name: {index_name!r}")
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            await session.run(f"DROP INDEX `{idx}` IF EXISTS;")
+
     async def upsert_document_and_chunks(
         self,
         repo_id: str,
@@ -178,83 +505,138 @@ class Neo4jClient:
         *,
         store_embeddings: bool,
         embedding_property: str = "embedding",
+        corpus_label: str | None = None,
     ) -> int:
-        """Upsert a lexical Document/Chunk graph for a single file.
+        """Upsert a lexical Document/Chunk graph for a single file (see `upsert_documents_and_chunks`)."""
+        return await self.upsert_documents_and_chunks(
+            repo_id,
+            [(file_path, chunks)],
+            store_embeddings=store_embeddings,
+            embedding_property=embedding_property,
+            corpus_label=corpus_label,
+        )
+
+    async def upsert_documents_and_chunks(
+        self,
+        repo_id: str,
+        documents: list[tuple[str, list[Chunk]]],
+        *,
+        store_embeddings: bool,
+        embedding_property: str = "embedding",
+        corpus_label: str | None = None,
+        stats: dict[str, int] | None = None,
+    ) -> int:
+        """Upsert the lexical Document/Chunk graph for many files in one write transaction.
 
         Stores Chunk nodes keyed by (repo_id, chunk_id) and links them with:
         - (Document)-[:HAS_CHUNK]->(Chunk)
         - (Chunk)-[:NEXT_CHUNK]->(Chunk) in file order
+
+        Each document carries its complete chunk list. Edges are diffed against it: edges that
+        already match are left alone, stale HAS_CHUNK / NEXT_CHUNK edges are deleted and missing
+        ones are merged. Re-indexing an unchanged file therefore rewrites no relationships.
+
+        `corpus_label` (see `corpus_chunk_label`) is added to every Chunk so a per-corpus vector
+        index can cover it.
         """
-        if not chunks:
-            return 0
         prop = _sanitize_cypher_identifier(embedding_property)
         if not prop:
             raise ValueError(f"Invalid Neo4j embedding property name: {embedding_property!r}")
+        label = _sanitize_cypher_identifier(corpus_label or "")
+        set_label = f"SET c:`{label}`" if label else ""
 
-        driver = self._require_driver()
-        payload: list[dict[str, Any]] = []
-        for i, ch in enumerate(chunks):
-            payload.append(
+        docs: list[dict[str, Any]] = []
+        for file_path, chunks in documents:
+            if not chunks:
+                continue
+            ids = [ch.chunk_id for ch in chunks]
+            docs.append(
                 {
-                    "seq": int(i),
-                    "chunk_id": ch.chunk_id,
-                    "file_path": ch.file_path,
-                    "start_line": int(ch.start_line),
-                    "end_line": int(ch.end_line),
-                    "language": ch.language,
-                    "token_count": int(ch.token_count or 0),
-                    "embedding": ch.embedding,
+                    "file_path": str(file_path),
+                    "chunk_ids": ids,
+                    "next": [[a, b] for a, b in zip(ids, ids[1:], strict=False)],
+                    "chunks": [
+                        {
+                            "chunk_id": ch.chunk_id,
+                            "file_path": ch.file_path,
+                            "start_line": int(ch.start_line),
+                            "end_line": int(ch.end_line),
+                            "language": ch.language,
+                            "token_count": int(ch.token_count or 0),
+                            "embedding": ch.embedding,
+                        }
+                        for ch in chunks
+                    ],
                 }
             )
+        if not docs:
+            return 0
 
         cypher = f"""
-        // Ensure the Document exists
-        MERGE (d:Document {{repo_id: $repo_id, file_path: $file_path}})
-
-        // Remove prior edges from this Document (we rebuild deterministically)
-        WITH d
-        OPTIONAL MATCH (d)-[old:HAS_CHUNK]->(:Chunk)
-        WITH d, collect(old) AS olds
-        FOREACH (r IN olds | DELETE r)
-
-        // Upsert chunks + reattach
-        WITH d
-        UNWIND $chunks AS ch
-        WITH d, ch
-        ORDER BY ch.seq ASC
-        MERGE (c:Chunk {{repo_id: $repo_id, chunk_id: ch.chunk_id}})
-        SET c.file_path = ch.file_path,
-            c.start_line = ch.start_line,
-            c.end_line = ch.end_line,
-            c.language = ch.language,
-            c.token_count = ch.token_count
-        FOREACH (_ IN CASE WHEN $store_embeddings AND ch.embedding IS NOT NULL THEN [1] ELSE [] END |
-            SET c.`{prop}` = ch.embedding
-        )
-        MERGE (d)-[:HAS_CHUNK]->(c)
-        WITH collect(c) AS cs
-
-        // Clear previous NEXT_CHUNK edges for this file (avoid stale adjacency)
-        OPTIONAL MATCH (a:Chunk {{repo_id: $repo_id, file_path: $file_path}})-[r:NEXT_CHUNK]->(b:Chunk {{repo_id: $repo_id, file_path: $file_path}})
-        WITH cs, collect(r) AS rels
-        FOREACH (r IN rels | DELETE r)
-
-        // Recreate NEXT_CHUNK edges in order
-        WITH cs
-        UNWIND CASE WHEN size(cs) < 2 THEN [] ELSE range(0, size(cs)-2) END AS i
-        WITH cs[i] AS a, cs[i+1] AS b
-        MERGE (a)-[:NEXT_CHUNK]->(b);
+        UNWIND $docs AS doc
+        MERGE (d:Document {{repo_id: $repo_id, file_path: doc.file_path}})
+        WITH d, doc
+        CALL {{
+          WITH d, doc
+          UNWIND doc.chunks AS ch
+          MERGE (c:Chunk {{repo_id: $repo_id, chunk_id: ch.chunk_id}})
+          SET c.file_path = ch.file_path,
+              c.start_line = ch.start_line,
+              c.end_line = ch.end_line,
+              c.language = ch.language,
+              c.token_count = ch.token_count
+          {set_label}
+          FOREACH (_ IN CASE WHEN $store_embeddings AND ch.embedding IS NOT NULL THEN [1] ELSE [] END |
+              SET c.`{prop}` = ch.embedding
+          )
+          MERGE (d)-[:HAS_CHUNK]->(c)
+          RETURN count(c) AS chunks
+        }}
+        CALL {{
+          WITH d, doc
+          MATCH (d)-[old:HAS_CHUNK]->(c:Chunk)
+          WHERE NOT c.chunk_id IN doc.chunk_ids
+          DELETE old
+          RETURN count(old) AS has_chunk_removed
+        }}
+        CALL {{
+          WITH doc
+          MATCH (a:Chunk {{repo_id: $repo_id, file_path: doc.file_path}})-[r:NEXT_CHUNK]->(b:Chunk {{repo_id: $repo_id, file_path: doc.file_path}})
+          WHERE NOT [a.chunk_id, b.chunk_id] IN doc.next
+          DELETE r
+          RETURN count(r) AS next_chunk_removed
+        }}
+        CALL {{
+          WITH doc
+          UNWIND doc.next AS pair
+          MATCH (a:Chunk {{repo_id: $repo_id, chunk_id: pair[0]}})
+          MATCH (b:Chunk {{repo_id: $repo_id, chunk_id: pair[1]}})
+          MERGE (a)-[:NEXT_CHUNK]->(b)
+          RETURN count(*) AS next_chunk_linked
+        }}
+        RETURN count(d) AS documents,
+               sum(chunks) AS chunks,
+               sum(has_chunk_removed) AS has_chunk_removed,
+               sum(next_chunk_removed) AS next_chunk_removed,
+               sum(next_chunk_linked) AS next_chunk_linked;
         """
 
-        async with driver.session(database=self.database) as session:
-            await session.run(
-                cypher,
-                repo_id=repo_id,
-                file_path=str(file_path),
-                chunks=payload,
-                store_embeddings=bool(store_embeddings),
-            )
-        return len(chunks)
+        async def _write(tx: AsyncManagedTransaction) -> dict[str, Any] | None:
+            res = await tx.run(cypher, repo_id=repo_id, docs=docs, store_embeddings=bool(store_embeddings))
+            rec = await res.single()
+            return dict(rec) if rec else None
+
+        # Managed write transaction: retried on transient errors (e.g. lock contention between
+        # concurrent batches) and routed to the leader on clusters.
+        driver = self._require_driver()
+        async with driver.session(database=self.database, default_access_mode=WRITE_ACCESS) as session:
+            counts = await session.execute_write(_write)
+
+        if stats is not None:
+            stats["transactions"] = int(stats.get("transactions", 0)) + 1
+            for key in ("documents", "chunks", "has_chunk_removed", "next_chunk_removed", "next_chunk_linked"):
+                stats[key] = int(stats.get(key, 0)) + int((counts or {}).get(key) or 0)
+        return sum(len(doc["chunks"]) for doc in docs)
 
     async def chunk_vector_search(
         self,
@@ -265,58 +647,105 @@ class Neo4jClient:
         top_k: int,
         neighbor_window: int = 0,
         overfetch_multiplier: int = 1,
+        adaptive: bool = False,
+        overfetch_growth: int = 4,
+        max_candidates: int = 10000,
+        corpus_index_name: str | None = None,
+        stats: dict[str, Any] | None = None,
     ) -> list[tuple[str, float]]:
-        """Vector search over Chunk nodes in Neo4j; returns (chunk_id, score)."""
+        """Vector search over Chunk nodes in Neo4j; returns (chunk_id, score).
+
+        The ANN index may hold chunks of other corpora (shared database), so it is queried for
+        `top_k * overfetch_multiplier` candidates which are then filtered by repo_id. With
+        `adaptive`, a round that yields fewer than `top_k` in-corpus seeds is retried with the
+        candidate count multiplied by `overfetch_growth`, until enough seeds are found, the index
+        has no more candidates, or `max_candidates` is reached.
+
+        `corpus_index_name` names a per-corpus vector index (see `corpus_vector_index_name`). It
+        needs no overfetch and is tried first; if it does not exist the shared index is used.
+
+        `stats` (optional) receives rounds, seed_k, candidates, matched, and whether the scoped
+        index served the query.
+        """
         if not embedding or top_k <= 0:
             return []
 
         driver = self._require_driver()
-        seed_k = max(1, int(top_k) * max(1, int(overfetch_multiplier)))
         window = max(0, int(neighbor_window))
 
         # Neo4j does not allow parameterized variable-length patterns (e.g., *0..$window),
         # so we safely inline the integer window (validated + clamped above).
         cypher = f"""
         CALL db.index.vector.queryNodes($index_name, $seed_k, $embedding) YIELD node, score
-        WITH node, score
-        WHERE node.repo_id = $repo_id
-        WITH node, score
-        ORDER BY score DESC
-        LIMIT $top_k
+        WITH count(*) AS candidates,
+             collect(CASE WHEN node.repo_id = $repo_id THEN {{node: node, score: score}} END) AS hits
+        WITH candidates, size(hits) AS matched, hits[..$top_k] AS seeds
         CALL {{
-          WITH node, score
+          WITH seeds
+          UNWIND seeds AS seed
+          WITH seed.node AS node, seed.score AS score
           MATCH p = (node)-[:NEXT_CHUNK*0..{window}]-(n:Chunk {{repo_id: $repo_id}})
-          RETURN n.chunk_id AS chunk_id,
-                 min(length(p)) AS dist,
-                 max(score) AS seed_score
+          WITH n.chunk_id AS chunk_id,
+               min(length(p)) AS dist,
+               max(score) AS seed_score
+          RETURN collect({{chunk_id: chunk_id, score: seed_score / (1 + dist)}}) AS results
         }}
-        WITH chunk_id,
-             min(dist) AS dist,
-             max(seed_score) AS seed_score
-        RETURN chunk_id AS chunk_id,
-               (seed_score / (1 + dist)) AS score
-        ORDER BY score DESC
-        LIMIT $top_k;
+        RETURN candidates, matched, results;
         """
 
-        async with driver.session(database=self.database) as session:
+        async def _round(session: Any, index: str, seed_k: int) -> tuple[int, int, list[dict[str, Any]]]:
             res = await session.run(
                 cypher,
                 repo_id=repo_id,
-                index_name=str(index_name),
+                index_name=str(index),
                 seed_k=int(seed_k),
                 embedding=embedding,
                 top_k=int(top_k),
             )
-            records = await res.data()
+            rec = await res.single()
+            if not rec:
+                return 0, 0, []
+            return int(rec.get("candidates") or 0), int(rec.get("matched") or 0), list(rec.get("results") or [])
+
+        seed_k = max(1, int(top_k) * max(1, int(overfetch_multiplier)))
+        cap = max(seed_k, int(max_candidates))
+        growth = max(2, int(overfetch_growth))
+        rounds = 0
+        scoped = False
+        async with driver.session(database=self.database) as session:
+            if corpus_index_name:
+                try:
+                    candidates, matched, results = await _round(session, corpus_index_name, int(top_k))
+                    rounds, seed_k, scoped = 1, int(top_k), True
+                except Exception:
+                    # Per-corpus index not built (yet): use the shared index below.
+                    pass
+            while not scoped:
+                rounds += 1
+                candidates, matched, results = await _round(session, index_name, seed_k)
+                if not adaptive or matched >= top_k or candidates < seed_k or seed_k >= cap:
+                    break
+                seed_k = min(cap, seed_k * growth)
+
+        if stats is not None:
+            stats.update(
+                {
+                    "rounds": rounds,
+                    "seed_k": seed_k,
+                    "candidates": candidates,
+                    "matched": matched,
+                    "scoped": scoped,
+                }
+            )
 
         out: list[tuple[str, float]] = []
-        for r in records:
+        for r in results:
             cid = str(r.get("chunk_id") or "").strip()
             if not cid:
                 continue
             out.append((cid, float(r.get("score") or 0.0)))
-        return out
+        out.sort(key=lambda item: (-item[1], item[0]))
+        return out[: int(top_k)]
 
     # Entity operations
     async def upsert_entity(self, repo_id: str, entity: Entity) -> None:
@@ -339,6 +768,8 @@ class Neo4jClient:
                     "entity_type": e.entity_type,
                     "file_path": e.file_path,
                     "description": e.description,
+                    "qualified_name": _entity_qualified_name(e),
+                    "name_terms": " ".join(_identifier_terms(e.name)),
                     "properties_json": json.dumps(e.properties or {}),
                     "start_line": int(start_line) if start_line is not None else None,
                     "end_line": int(end_line) if end_line is not None else None,
@@ -352,6 +783,8 @@ class Neo4jClient:
             n.entity_type = e.entity_type,
             n.file_path = e.file_path,
             n.description = e.description,
+            n.qualified_name = e.qualified_name,
+            n.name_terms = e.name_terms,
             n.properties_json = e.properties_json,
             n.start_line = e.start_line,
             n.end_line = e.end_line;
@@ -769,8 +1202,357 @@ class Neo4jClient:
         return GraphNeighborsResponse(entities=entities, relationships=rels)
 
     # Community operations
-    async def detect_communities(self, repo_id: str) -> list[Community]:
-        # Heuristic community detection (works without GDS): group by top-level directory.
+    async def detect_communities(
+        self,
+        repo_id: str,
+        config: GraphStorageConfig | None = None,
+        *,
+        changed_files: Iterable[str] | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> list[Community]:
+        """Detect hierarchical entity communities and store them.
+
+        Runs `community_algorithm` (Louvain or label propagation) over the corpus' Entity
+        relationship graph: through Neo4j GDS for full recomputes when the plugin is installed,
+        otherwise in-process over an edge list exported within `community_memory_budget_mb`
+        (see `server.indexing.communities`). The coarsest `community_levels` levels are stored,
+        level 0 on top, each community linked to its parent.
+
+        With `changed_files` (incremental runs), only the top-level communities containing entities
+        of those files or their neighbors are recomputed and replaced. Graphs without relationships
+        fall back to grouping entities by top-level directory.
+        """
+        cfg = config or GraphStorageConfig()
+        info: dict[str, Any] = stats if stats is not None else {}
+        info.update({"algorithm": cfg.community_algorithm, "mode": "full", "truncated": False})
+        if not cfg.include_communities:
+            info["engine"] = "disabled"
+            # Drop communities stored while detection was enabled so get_communities stops serving them.
+            await self._store_communities(repo_id, [], method=cfg.community_algorithm)
+            return []
+
+        budget_bytes = int(cfg.community_memory_budget_mb) * 1024 * 1024
+        region: list[str] | None = None
+        replace_roots: list[str] | None = None
+        if changed_files is not None and int(cfg.community_incremental) == 1:
+            scoped = await self._community_region(
+                repo_id, sorted({str(p) for p in changed_files if p}), method=cfg.community_algorithm
+            )
+            if scoped is not None:
+                region, replace_roots = scoped
+                info.update({"mode": "incremental", "region_entities": len(region), "replaced_roots": len(replace_roots)})
+                if not region and not replace_roots:
+                    info.update({"engine": "none", "communities": 0})
+                    return []
+
+        graph = await self._community_graph(repo_id, cfg, region, budget_bytes, info)
+        if not graph.memberships and region is not None:
+            # The region has no relationships left: replacing its roots with nothing would strip its
+            # entities of every community, so recompute the whole graph instead.
+            region, replace_roots = None, None
+            info["mode"] = "full"
+            graph = await self._community_graph(repo_id, cfg, None, budget_bytes, info)
+        info["entities"] = len(graph.ids)
+
+        if not graph.memberships:
+            info["engine"] = "directory"
+            communities = await self._directory_communities(repo_id)
+            await self._store_communities(repo_id, communities, method="directory")
+            info["communities"] = len(communities)
+            return communities
+
+        communities = _communities_from_levels(
+            repo_id,
+            graph,
+            graph.memberships[-int(cfg.community_levels) :],
+            min_size=int(cfg.community_min_size),
+        )
+        await self._store_communities(
+            repo_id, communities, method=cfg.community_algorithm, replace_roots=replace_roots
+        )
+        info["levels"] = len({c.level for c in communities})
+        info["communities"] = len(communities)
+        return communities
+
+    async def _community_graph(
+        self,
+        repo_id: str,
+        cfg: GraphStorageConfig,
+        region: list[str] | None,
+        budget_bytes: int,
+        info: dict[str, Any],
+    ) -> _CommunityGraph:
+        """Detected memberships: through GDS for full recomputes when available, else in-process."""
+        if region is None and int(cfg.community_use_gds) == 1:
+            graph = await self._gds_community_graph(repo_id, cfg)
+            if graph is not None:
+                info["engine"] = "gds"
+                return graph
+        info["engine"] = "in_process"
+        return await self._in_process_community_graph(repo_id, cfg, region, budget_bytes, info)
+
+    async def _community_region(
+        self, repo_id: str, changed_files: list[str], *, method: str
+    ) -> tuple[list[str], list[str]] | None:
+        """Entities and top-level community ids an incremental recompute must cover.
+
+        Returns None when a full recompute is needed instead: nothing stored yet, communities stored
+        by another method, or a region spanning most of the graph.
+        """
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            res = await session.run(
+                """
+                MATCH (c:Community {repo_id: $repo_id})
+                RETURN count(c) AS total,
+                       count(CASE WHEN coalesce(c.method, '') <> $method OR c.root_id IS NULL THEN 1 END) AS foreign;
+                """,
+                repo_id=repo_id,
+                method=method,
+            )
+            rec = await res.single()
+            if not rec or int(rec["total"] or 0) == 0 or int(rec["foreign"] or 0) > 0:
+                return None
+
+            # Entities of the changed files (code entities by path, semantic ones via their chunks) + 1-hop neighbors.
+            res = await session.run(
+                """
+                UNWIND $paths AS fp
+                CALL {
+                  WITH fp
+                  MATCH (e:Entity {repo_id: $repo_id, file_path: fp})
+                  RETURN e
+                  UNION
+                  WITH fp
+                  MATCH (:Chunk {repo_id: $repo_id, file_path: fp})<-[:IN_CHUNK]-(e:Entity {repo_id: $repo_id})
+                  RETURN e
+                }
+                WITH DISTINCT e
+                OPTIONAL MATCH (e)-[r]-(n:Entity {repo_id: $repo_id})
+                WHERE type(r) IN $rel_types
+                WITH e, collect(DISTINCT n.entity_id) AS neighbors
+                UNWIND ([e.entity_id] + neighbors) AS entity_id
+                RETURN DISTINCT entity_id;
+                """,
+                repo_id=repo_id,
+                paths=changed_files,
+                rel_types=list(_ENTITY_REL_TYPES),
+            )
+            affected = [str(r["entity_id"]) for r in await res.data() if r.get("entity_id")]
+
+            # Top-level communities holding affected entities, plus those that lost members to deleted files.
+            res = await session.run(
+                """
+                UNWIND $ids AS id
+                MATCH (:Entity {repo_id: $repo_id, entity_id: id})-[:IN_COMMUNITY]->(c:Community {repo_id: $repo_id})
+                RETURN DISTINCT c.root_id AS root_id
+                UNION
+                MATCH (c:Community {repo_id: $repo_id, level: 0})
+                WHERE COUNT { (:Entity)-[:IN_COMMUNITY]->(c) } <> c.size
+                RETURN c.root_id AS root_id;
+                """,
+                repo_id=repo_id,
+                ids=affected,
+            )
+            roots = sorted({str(r["root_id"]) for r in await res.data() if r.get("root_id")})
+
+            res = await session.run(
+                """
+                UNWIND $roots AS rid
+                MATCH (e:Entity {repo_id: $repo_id})-[:IN_COMMUNITY]->(:Community {repo_id: $repo_id, community_id: rid})
+                RETURN DISTINCT e.entity_id AS entity_id;
+                """,
+                repo_id=repo_id,
+                roots=roots,
+            )
+            members = [str(r["entity_id"]) for r in await res.data() if r.get("entity_id")]
+
+            res = await session.run("MATCH (e:Entity {repo_id: $repo_id}) RETURN count(e) AS n;", repo_id=repo_id)
+            rec = await res.single()
+            total = int(rec["n"] or 0) if rec else 0
+
+        region = sorted(set(affected) | set(members))
+        if total and len(region) > total * _COMMUNITY_INCREMENTAL_MAX_FRACTION:
+            return None
+        return region, roots
+
+    async def _in_process_community_graph(
+        self,
+        repo_id: str,
+        cfg: GraphStorageConfig,
+        region: list[str] | None,
+        budget_bytes: int,
+        info: dict[str, Any],
+    ) -> _CommunityGraph:
+        """Export entities + relationships (whole corpus or `region`) and run detection in a worker thread."""
+        # local import to avoid cycles at import time (server.indexing imports this module)
+        from server.indexing.communities import (
+            EXPORT_BYTES_PER_EDGE,
+            EXPORT_BYTES_PER_NODE,
+            build_csr,
+            detect_hierarchy,
+        )
+
+        driver = self._require_driver()
+        ids: list[str] = []
+        names: list[str] = []
+        paths: list[str | None] = []
+        src = array("q")
+        dst = array("q")
+        weight = array("d")
+        truncated = False
+        scope = "MATCH ({var}:Entity {{repo_id: $repo_id}})"
+        if region is not None:
+            scope = "UNWIND $ids AS id MATCH ({var}:Entity {{repo_id: $repo_id, entity_id: id}})"
+        async with driver.session(database=self.database) as session:
+            res = await session.run(
+                scope.format(var="e") + " RETURN e.entity_id AS entity_id, e.name AS name, e.file_path AS file_path;",
+                repo_id=repo_id,
+                ids=region or [],
+            )
+            async for rec in res:
+                ids.append(str(rec["entity_id"]))
+                names.append(str(rec["name"] or ""))
+                paths.append(str(rec["file_path"]) if rec["file_path"] else None)
+            index = {eid: i for i, eid in enumerate(ids)}
+
+            max_edges = max(0, (budget_bytes - len(ids) * EXPORT_BYTES_PER_NODE) // EXPORT_BYTES_PER_EDGE)
+            if ids and max_edges > 0:
+                res = await session.run(
+                    scope.format(var="a")
+                    + """
+                    MATCH (a)-[r]->(b:Entity {repo_id: $repo_id})
+                    WHERE type(r) IN $rel_types AND a <> b
+                    RETURN a.entity_id AS s, b.entity_id AS t, coalesce(r.weight, 1.0) AS w
+                    LIMIT $limit;
+                    """,
+                    repo_id=repo_id,
+                    ids=region or [],
+                    rel_types=list(_ENTITY_REL_TYPES),
+                    limit=int(max_edges) + 1,
+                )
+                async for rec in res:
+                    si = index.get(str(rec["s"]))
+                    ti = index.get(str(rec["t"]))
+                    if si is None or ti is None:
+                        continue
+                    if len(src) >= max_edges:
+                        truncated = True
+                        break
+                    src.append(si)
+                    dst.append(ti)
+                    weight.append(float(rec["w"] or 1.0))
+
+        info["edges"] = len(src)
+        info["truncated"] = truncated
+
+        def _detect() -> tuple[Any, list[Any]]:
+            graph = build_csr(
+                len(ids),
+                np.frombuffer(src, dtype=np.int64),
+                np.frombuffer(dst, dtype=np.int64),
+                np.frombuffer(weight, dtype=np.float64),
+            )
+            levels = detect_hierarchy(
+                graph,
+                algorithm=cfg.community_algorithm,
+                resolution=float(cfg.community_resolution),
+                memory_budget_bytes=budget_bytes,
+            )
+            return np.diff(graph.indptr), levels
+
+        degree, memberships = await asyncio.to_thread(_detect)
+        return _CommunityGraph(ids=ids, names=names, paths=paths, degree=degree, memberships=memberships)
+
+    async def _gds_community_graph(self, repo_id: str, cfg: GraphStorageConfig) -> _CommunityGraph | None:
+        """Run detection with Neo4j GDS (projected, streamed, dropped). None when GDS is unavailable or fails."""
+        driver = self._require_driver()
+        graph_name = f"tribrid_communities_{uuid.uuid4().hex[:12]}"
+        if cfg.community_algorithm == "louvain":
+            stream = """
+            CALL gds.louvain.stream($graph_name, {
+              relationshipWeightProperty: 'weight', includeIntermediateCommunities: true
+            })
+            YIELD nodeId, communityId, intermediateCommunityIds
+            WITH gds.util.asNode(nodeId) AS n, coalesce(intermediateCommunityIds, [communityId]) AS levels
+            """
+        else:
+            stream = """
+            CALL gds.labelPropagation.stream($graph_name, {relationshipWeightProperty: 'weight'})
+            YIELD nodeId, communityId
+            WITH gds.util.asNode(nodeId) AS n, [communityId] AS levels
+            """
+        ids: list[str] = []
+        names: list[str] = []
+        paths: list[str | None] = []
+        degrees: list[int] = []
+        labels: list[list[int]] = []
+        try:
+            async with driver.session(database=self.database) as session:
+                res = await session.run("CALL gds.version() YIELD gdsVersion RETURN gdsVersion;")
+                if not await res.single():
+                    return None
+        except Exception:
+            return None
+        try:
+            async with driver.session(database=self.database) as session:
+                res = await session.run(
+                    """
+                    MATCH (a:Entity {repo_id: $repo_id})
+                    OPTIONAL MATCH (a)-[r]->(b:Entity {repo_id: $repo_id})
+                    WHERE type(r) IN $rel_types AND a <> b
+                    WITH gds.graph.project(
+                      $graph_name, a, b,
+                      {relationshipProperties: {weight: coalesce(r.weight, 1.0)}},
+                      {undirectedRelationshipTypes: ['*']}
+                    ) AS g
+                    RETURN g.relationshipCount AS relationships;
+                    """,
+                    repo_id=repo_id,
+                    rel_types=list(_ENTITY_REL_TYPES),
+                    graph_name=graph_name,
+                )
+                projected = await res.single()
+                if projected and int(projected["relationships"] or 0) > 0:
+                    res = await session.run(
+                        stream
+                        + """
+                        RETURN n.entity_id AS entity_id, n.name AS name, n.file_path AS file_path,
+                               COUNT { (n)--(:Entity) } AS degree, levels;
+                        """,
+                        graph_name=graph_name,
+                    )
+                    async for rec in res:
+                        ids.append(str(rec["entity_id"]))
+                        names.append(str(rec["name"] or ""))
+                        paths.append(str(rec["file_path"]) if rec["file_path"] else None)
+                        degrees.append(int(rec["degree"] or 0))
+                        labels.append([int(x) for x in (rec["levels"] or [])])
+        except Exception:
+            return None
+        finally:
+            try:
+                async with driver.session(database=self.database) as session:
+                    await session.run("CALL gds.graph.drop($graph_name, false) YIELD graphName RETURN graphName;", graph_name=graph_name)
+            except Exception:
+                pass
+
+        # Nested levels: an unchanged community count means GDS repeated the previous level.
+        memberships: list[Any] = []
+        counts: list[int] = []
+        depth = min((len(x) for x in labels), default=0)
+        for lvl in range(depth):
+            uniq, part = np.unique(np.asarray([x[lvl] for x in labels], dtype=np.int64), return_inverse=True)
+            if counts and int(uniq.shape[0]) == counts[-1]:
+                continue
+            counts.append(int(uniq.shape[0]))
+            memberships.append(part.astype(np.int64))
+        return _CommunityGraph(
+            ids=ids, names=names, paths=paths, degree=np.asarray(degrees, dtype=np.int64), memberships=memberships
+        )
+
+    async def _directory_communities(self, repo_id: str) -> list[Community]:
+        # Heuristic grouping by top-level directory, used when the graph has no relationships.
         #
         # IMPORTANT:
         # - Code entities have file_path.
@@ -819,8 +1601,6 @@ class Neo4jClient:
                     level=0,
                 )
             )
-
-        await self._store_communities(repo_id, communities)
         return communities
 
     async def get_communities(self, repo_id: str, level: int | None) -> list[Community]:
@@ -840,6 +1620,7 @@ class Neo4jClient:
                c.name AS name,
                c.summary AS summary,
                c.level AS level,
+               c.parent_id AS parent_id,
                member_ids AS member_ids;
         """
         async with driver.session(database=self.database) as session:
@@ -855,58 +1636,63 @@ class Neo4jClient:
                     summary=str(r["summary"] or ""),
                     member_ids=[str(x) for x in (r.get("member_ids") or [])],
                     level=int(r.get("level") or 0),
+                    parent_id=str(r["parent_id"]) if r.get("parent_id") else None,
                 )
             )
         return out
 
     # Search
-    async def graph_search(self, repo_id: str, query: str, max_hops: int, top_k: int) -> list[ChunkMatch]:
+    async def graph_search(
+        self,
+        repo_id: str,
+        query: str,
+        max_hops: int,
+        top_k: int,
+        *,
+        budget: GraphExpansionBudget | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> list[ChunkMatch]:
+        """Entity-level graph search: full-text seeds expanded up to `max_hops`.
+
+        With a `budget`, expansion is frontier-based (see `_frontier_expand`); otherwise one
+        variable-length path match is used. Expansion counters are written into `stats` when given.
+        """
         if not query.strip() or top_k <= 0:
             return []
-        driver = self._require_driver()
-
-        # Tokenize query for deterministic matching (no LLM).
-        tokens = [t.lower() for t in re.findall(r"[A-Za-z_][A-Za-z0-9_]{1,63}", query)]
-        # Fall back to whole-string match if we got no tokens (e.g. symbols-only queries).
-        if not tokens:
-            tokens = [query.strip().lower()]
-        # Cap token count to keep Cypher params small and stable.
-        tokens = list(dict.fromkeys(tokens))[:8]
 
+        tokens = _query_tokens(query)
         max_hops = int(max(0, max_hops or 0))
-        allowed_rels = ["calls", "imports", "inherits", "contains", "references", "related_to"]
+        if budget is not None:
+            seeds = await self._seed_entity_scores(repo_id, tokens, budget=budget, top_k=top_k)
+            scored = await self._frontier_expand(repo_id, seeds, max_hops=max_hops, budget=budget, stats=stats)
+            ranked = sorted(scored.items(), key=lambda kv: (-kv[1][0], kv[1][1], kv[0]))[: int(top_k)]
+            records = await self._entity_rows(repo_id, ranked)
+            return self._entity_matches(records, tokens)
+
+        if stats is not None:
+            stats.update({"strategy": "paths"})
         # Neo4j does not allow parameterized variable-length patterns (*0..$max_hops),
         # so we safely inline the integer hop limit (validated + clamped above).
-        cypher = f"""
-        MATCH (seed:Entity {{repo_id: $repo_id}})
-        WHERE any(tok IN $tokens WHERE toLower(seed.name) CONTAINS tok)
+        expand = f"""
         MATCH p = (seed)-[rels*0..{max_hops}]-(e:Entity {{repo_id: $repo_id}})
         WHERE ALL(r IN rels WHERE type(r) IN $allowed_rels)
-        WITH
-          e,
-          min(length(p)) AS hops,
-          any(tok IN $tokens WHERE toLower(e.name) CONTAINS tok) AS direct_match
-        RETURN DISTINCT
+        WITH e, min(length(p)) AS hops, max(seed_score / (1.0 + toFloat(length(p)))) AS score
+        RETURN
           e.entity_id AS entity_id,
           e.file_path AS file_path,
           e.properties_json AS properties_json,
           e.name AS name,
           hops AS hops,
-          direct_match AS direct_match
-        ORDER BY direct_match DESC, hops ASC, name ASC
+          hops = 0 AS direct_match,
+          score AS score
+        ORDER BY score DESC, hops ASC, name ASC
         LIMIT $limit;
         """
+        records = await self._seeded_entity_query(repo_id, tokens, expand, top_k=top_k)
+        return self._entity_matches(records, tokens)
 
-        async with driver.session(database=self.database) as session:
-            res = await session.run(
-                cypher,
-                repo_id=repo_id,
-                tokens=tokens,
-                allowed_rels=allowed_rels,
-                limit=int(top_k),
-            )
-            records = await res.data()
-
+    @staticmethod
+    def _entity_matches(records: list[dict[str, Any]], tokens: list[str]) -> list[ChunkMatch]:
         out: list[ChunkMatch] = []
         for r in records:
             fp = r.get("file_path")
@@ -918,9 +1704,11 @@ class Neo4jClient:
                     props = {}
             hops = int(r.get("hops") or 0)
             direct_match = bool(r.get("direct_match"))
-            # Deterministic score: direct matches outrank neighbors; deeper hops decay.
-            base = 1.0 if direct_match else 0.7
-            score = float(base / float(1 + max(0, hops)))
+            # Seed relevance (normalized full-text score) decayed by hop distance.
+            raw_score = r.get("score")
+            if raw_score is None:
+                raw_score = (1.0 if direct_match else 0.7) / float(1 + max(0, hops))
+            score = float(raw_score)
             # Graph returns entity-level hits; chunk hydration happens in higher-level retriever.
             out.append(
                 ChunkMatch(
@@ -1010,6 +1798,8 @@ class Neo4jClient:
         *,
         max_hops: int,
         top_k: int,
+        budget: GraphExpansionBudget | None = None,
+        stats: dict[str, Any] | None = None,
     ) -> list[tuple[str, float]]:
         """Expand from seed chunks through Entity graph and return (chunk_id, score)."""
         if not seeds or top_k <= 0:
@@ -1023,6 +1813,28 @@ class Neo4jClient:
         if not payload:
             return []
 
+        if budget is not None:
+            async with driver.session(database=self.database) as session:
+                res = await session.run(
+                    """
+                    UNWIND $seeds AS s
+                    MATCH (:Chunk {repo_id: $repo_id, chunk_id: s.chunk_id})<-[:IN_CHUNK]-(e:Entity {repo_id: $repo_id})
+                    RETURN e.entity_id AS entity_id, max(toFloat(s.score)) AS score
+                    ORDER BY score DESC
+                    LIMIT $limit;
+                    """,
+                    repo_id=repo_id,
+                    seeds=payload,
+                    limit=int(budget.max_visited),
+                )
+                seed_rows = await res.data()
+            seed_scores = {str(r["entity_id"]): float(r.get("score") or 0.0) for r in seed_rows if r.get("entity_id")}
+            scored = await self._frontier_expand(repo_id, seed_scores, max_hops=hops, budget=budget, stats=stats)
+            return await self._entity_chunk_scores(repo_id, scored, top_k=top_k)
+
+        if stats is not None:
+            stats.update({"strategy": "paths"})
+
         # Neo4j does not allow parameterized variable-length patterns (*0..$max_hops),
         # so we safely inline the integer hop limit (validated + clamped above).
         cypher = f"""
@@ -1060,52 +1872,41 @@ class Neo4jClient:
         return out
 
     async def entity_chunk_search(
-        self, repo_id: str, query: str, max_hops: int, top_k: int
+        self,
+        repo_id: str,
+        query: str,
+        max_hops: int,
+        top_k: int,
+        *,
+        budget: GraphExpansionBudget | None = None,
+        stats: dict[str, Any] | None = None,
     ) -> list[tuple[str, float]]:
         """Entity-graph search that returns real chunk_ids via Entity-[:IN_CHUNK]->Chunk."""
         if not query.strip() or top_k <= 0:
             return []
-        driver = self._require_driver()
-
-        tokens = [t.lower() for t in re.findall(r"[A-Za-z_][A-Za-z0-9_]{1,63}", query)]
-        if not tokens:
-            tokens = [query.strip().lower()]
-        tokens = list(dict.fromkeys(tokens))[:8]
 
+        tokens = _query_tokens(query)
         max_hops = int(max(0, max_hops or 0))
-        allowed_rels = ["calls", "imports", "inherits", "contains", "references", "related_to"]
+        if budget is not None:
+            seeds = await self._seed_entity_scores(repo_id, tokens, budget=budget, top_k=top_k)
+            scored = await self._frontier_expand(repo_id, seeds, max_hops=max_hops, budget=budget, stats=stats)
+            return await self._entity_chunk_scores(repo_id, scored, top_k=top_k)
+
+        if stats is not None:
+            stats.update({"strategy": "paths"})
         # Neo4j does not allow parameterized variable-length patterns (*0..$max_hops),
         # so we safely inline the integer hop limit (validated + clamped above).
-        cypher = f"""
-        MATCH (seed:Entity {{repo_id: $repo_id}})
-        WHERE any(tok IN $tokens WHERE toLower(seed.name) CONTAINS tok)
+        expand = f"""
         MATCH p = (seed)-[rels*0..{max_hops}]-(e:Entity {{repo_id: $repo_id}})
         WHERE ALL(r IN rels WHERE type(r) IN $allowed_rels)
-        WITH
-          e,
-          min(length(p)) AS hops,
-          any(tok IN $tokens WHERE toLower(e.name) CONTAINS tok) AS direct_match
-        WITH
-          e,
-          hops,
-          direct_match,
-          (CASE WHEN direct_match THEN 1.0 ELSE 0.7 END) / (1.0 + toFloat(hops)) AS entity_score
+        WITH e, max(seed_score / (1.0 + toFloat(length(p)))) AS entity_score
         MATCH (e)-[:IN_CHUNK]->(c:Chunk {{repo_id: $repo_id}})
         RETURN c.chunk_id AS chunk_id,
                max(entity_score) AS score
         ORDER BY score DESC
         LIMIT $limit;
         """
-
-        async with driver.session(database=self.database) as session:
-            res = await session.run(
-                cypher,
-                repo_id=repo_id,
-                tokens=tokens,
-                allowed_rels=allowed_rels,
-                limit=int(top_k),
-            )
-            records = await res.data()
+        records = await self._seeded_entity_query(repo_id, tokens, expand, top_k=top_k)
 
         out: list[tuple[str, float]] = []
         for r in records:
@@ -1266,6 +2067,15 @@ class Neo4jClient:
 
         entity_breakdown = {str(r["t"]): int(r["n"]) for r in entity_rows}
         rel_breakdown = {str(r["t"]): int(r["n"]) for r in rel_rows}
+        schema_ready: bool | None = None
+        schema_indexes: list[GraphSchemaIndex] = []
+        try:
+            schema = await self.schema_status()
+            schema_ready = bool(schema["ready"])
+            schema_indexes = [GraphSchemaIndex(**ix) for ix in schema["indexes"]]
+        except Exception:
+            # SHOW INDEXES needs extra privileges on some deployments; stats stay usable without it.
+            pass
         return GraphStats(
             repo_id=repo_id,
             total_entities=int(rec["total_entities"] if rec else 0),
@@ -1275,69 +2085,568 @@ class Neo4jClient:
             total_chunks=int(rec["total_chunks"] if rec else 0),
             entity_breakdown=entity_breakdown,
             relationship_breakdown=rel_breakdown,
+            schema_ready=schema_ready,
+            schema_indexes=schema_indexes,
         )
 
-    async def delete_graph(self, repo_id: str) -> None:
-        """Delete all graph data (entities, rels, communities) for a corpus."""
+    async def delete_file_nodes(self, repo_id: str, file_paths: list[str], *, batch_size: int = 5000) -> int:
+        """Delete Document/Chunk/Entity nodes that belong to specific files.
+
+        Runs one label-scoped `CALL { ... } IN TRANSACTIONS OF batch_size ROWS` delete per label, so
+        each statement uses the (repo_id, file_path) index and large purges never build one huge
+        transaction. File-less entities (import targets, call targets, semantic concepts) are shared
+        across files: only those the deleted nodes pointed to are removed, once nothing else
+        references them.
+        """
+        if not file_paths:
+            return 0
         driver = self._require_driver()
+        batch = max(1, int(batch_size))
+        paths = list(file_paths)
+        total = 0
         async with driver.session(database=self.database) as session:
-            await session.run("MATCH (n {repo_id: $repo_id}) DETACH DELETE n;", repo_id=repo_id)
+            res = await session.run(
+                """
+                CALL {
+                  MATCH (n:Chunk {repo_id: $repo_id}) WHERE n.file_path IN $file_paths RETURN n
+                  UNION
+                  MATCH (n:Document {repo_id: $repo_id}) WHERE n.file_path IN $file_paths RETURN n
+                  UNION
+                  MATCH (n:Entity {repo_id: $repo_id}) WHERE n.file_path IN $file_paths RETURN n
+                }
+                MATCH (n)--(e:Entity {repo_id: $repo_id})
+                WHERE e.file_path IS NULL
+                RETURN collect(DISTINCT e.entity_id) AS entity_ids;
+                """,
+                repo_id=repo_id,
+                file_paths=paths,
+            )
+            rec = await res.single()
+            placeholder_ids = list(rec.get("entity_ids") or []) if rec else []
+
+            for label in ("Chunk", "Document", "Entity"):
+                res = await session.run(
+                    f"""
+                    MATCH (n:`{label}` {{repo_id: $repo_id}})
+                    WHERE n.file_path IN $file_paths
+                    CALL {{
+                      WITH n
+                      DETACH DELETE n
+                      RETURN 1 AS deleted
+                    }} IN TRANSACTIONS OF $batch ROWS
+                    RETURN count(deleted) AS n;
+                    """,
+                    repo_id=repo_id,
+                    file_paths=paths,
+                    batch=batch,
+                )
+                rec = await res.single()
+                total += int(rec.get("n") or 0) if rec else 0
+
+            if placeholder_ids:
+                await session.run(
+                    """
+                    MATCH (e:Entity {repo_id: $repo_id})
+                    WHERE e.entity_id IN $entity_ids AND e.file_path IS NULL AND NOT (e)--()
+                    CALL {
+                      WITH e
+                      DELETE e
+                    } IN TRANSACTIONS OF $batch ROWS;
+                    """,
+                    repo_id=repo_id,
+                    entity_ids=placeholder_ids,
+                    batch=batch,
+                )
+        return total
+
+    async def delete_graph(
+        self,
+        repo_id: str,
+        *,
+        batch_size: int = 5000,
+        on_progress: Callable[[str, int], None] | None = None,
+    ) -> int:
+        """Delete all graph data (documents, chunks, entities, rels, communities) for a corpus.
+
+        Deletes label by label with `CALL { ... } IN TRANSACTIONS OF batch_size ROWS`, so no single
+        transaction holds the whole corpus in Neo4j heap. Each round matches at most
+        `_GRAPH_DELETE_ROUNDS * batch_size` nodes, which lets `on_progress(label, total_deleted)`
+        report between rounds. Nodes without one of the known labels are swept last.
+        """
+        driver = self._require_driver()
+        batch = max(1, int(batch_size))
+        round_size = batch * _GRAPH_DELETE_ROUNDS
+        total = 0
+        async with driver.session(database=self.database) as session:
+            for label in (*_GRAPH_DELETE_LABELS, None):
+                match = f"MATCH (n:`{label}` {{repo_id: $repo_id}})" if label else "MATCH (n {repo_id: $repo_id})"
+                cypher = f"""
+                {match}
+                WITH n LIMIT $round_size
+                CALL {{
+                  WITH n
+                  DETACH DELETE n
+                  RETURN 1 AS deleted
+                }} IN TRANSACTIONS OF $batch ROWS
+                RETURN count(deleted) AS n;
+                """
+                while True:
+                    res = await session.run(cypher, repo_id=repo_id, round_size=round_size, batch=batch)
+                    rec = await res.single()
+                    n = int(rec.get("n") or 0) if rec else 0
+                    total += n
+                    if n > 0 and on_progress is not None:
+                        on_progress(label or "other", total)
+                    if n < round_size:
+                        break
+        return total
 
     # ------------------------------------------------------------------
     # Internals
     # ------------------------------------------------------------------
 
-    def _require_driver(self) -> AsyncDriver:
-        if self._driver is None:
-            raise RuntimeError("Neo4j driver is not connected. Call connect() first.")
-        return self._driver
+    async def export_entity_graph(self, repo_id: str, *, max_edges: int) -> dict[str, Any] | None:
+        """Stream the corpus' traversal graph into compact arrays (for the in-process graph snapshot).
 
-    async def _store_communities(self, repo_id: str, communities: Iterable[Community]) -> None:
+        Returns entities sorted by entity_id (with full-text search terms and total degree), Entity-Entity
+        edges over the traversal relationship types as index pairs, and Entity-[:IN_CHUNK]->Chunk links.
+        Returns None when the graph has more than `max_edges` traversal edges.
+        """
+        entity_ids: list[str] = []
+        search_text: list[str] = []
+        degree = array("q")
+        edge_src = array("q")
+        edge_dst = array("q")
+        link_entity = array("q")
+        link_chunk = array("q")
+        chunk_index: dict[str, int] = {}
         driver = self._require_driver()
         async with driver.session(database=self.database) as session:
-            # Clear existing communities + membership edges
-            await session.run(
+            res = await session.run(
                 """
-                MATCH (c:Community {repo_id: $repo_id})
-                DETACH DELETE c;
+                MATCH (e:Entity {repo_id: $repo_id})
+                RETURN e.entity_id AS entity_id,
+                       e.name AS name,
+                       e.qualified_name AS qualified_name,
+                       e.name_terms AS name_terms,
+                       COUNT { (e)--() } AS degree
+                ORDER BY entity_id;
+                """,
+                repo_id=repo_id,
+            )
+            async for rec in res:
+                entity_ids.append(str(rec["entity_id"]))
+                search_text.append(
+                    "\t".join(str(rec[k] or "") for k in ("name", "qualified_name", "name_terms"))
+                )
+                degree.append(int(rec["degree"] or 0))
+            index = {eid: i for i, eid in enumerate(entity_ids)}
+
+            res = await session.run(
+                """
+                MATCH (a:Entity {repo_id: $repo_id})-[r]->(b:Entity {repo_id: $repo_id})
+                WHERE type(r) IN $allowed_rels AND a <> b
+                RETURN a.entity_id AS s, b.entity_id AS t
+                LIMIT $limit;
+                """,
+                repo_id=repo_id,
+                allowed_rels=list(_ENTITY_REL_TYPES),
+                limit=int(max_edges) + 1,
+            )
+            async for rec in res:
+                si = index.get(str(rec["s"]))
+                ti = index.get(str(rec["t"]))
+                if si is None or ti is None:
+                    continue
+                if len(edge_src) >= int(max_edges):
+                    return None
+                edge_src.append(si)
+                edge_dst.append(ti)
+
+            res = await session.run(
+                """
+                MATCH (e:Entity {repo_id: $repo_id})-[:IN_CHUNK]->(c:Chunk {repo_id: $repo_id})
+                RETURN e.entity_id AS entity_id, c.chunk_id AS chunk_id;
                 """,
                 repo_id=repo_id,
             )
+            async for rec in res:
+                ei = index.get(str(rec["entity_id"]))
+                if ei is None or not rec["chunk_id"]:
+                    continue
+                link_entity.append(ei)
+                link_chunk.append(chunk_index.setdefault(str(rec["chunk_id"]), len(chunk_index)))
+
+        return {
+            "entity_ids": entity_ids,
+            "search_text": search_text,
+            "degree": degree,
+            "edge_src": edge_src,
+            "edge_dst": edge_dst,
+            "chunk_ids": list(chunk_index),
+            "link_entity": link_entity,
+            "link_chunk": link_chunk,
+        }
+
+    async def _seeded_entity_query(
+        self, repo_id: str, tokens: list[str], expand: str, *, top_k: int
+    ) -> list[dict[str, Any]]:
+        """Run `expand` over seed entities matching `tokens`.
 
-            comm_payload = [
+        Seeds come from the entity full-text index (`seed`, plus `seed_score` normalized to the best hit
+        in (0, 1]). If the index is missing or not queryable yet, falls back to a substring scan over
+        entity names with the previous fixed seed score of 1.0.
+        """
+        driver = self._require_driver()
+        params: dict[str, Any] = {
+            "repo_id": repo_id,
+            "tokens": tokens,
+            "allowed_rels": ["calls", "imports", "inherits", "contains", "references", "related_to"],
+            "limit": int(top_k),
+        }
+        fulltext_seed = """
+        CALL db.index.fulltext.queryNodes($index_name, $search, {limit: $seed_limit}) YIELD node, score
+        WITH node, score
+        WHERE node.repo_id = $repo_id
+        WITH collect({node: node, score: score}) AS hits, max(score) AS top
+        UNWIND hits AS hit
+        WITH hit.node AS seed, hit.score / top AS seed_score
+        """
+        scan_seed = """
+        MATCH (seed:Entity {repo_id: $repo_id})
+        WHERE any(tok IN $tokens WHERE toLower(seed.name) CONTAINS tok)
+        WITH seed, 1.0 AS seed_score
+        """
+        async with driver.session(database=self.database) as session:
+            try:
+                res = await session.run(
+                    fulltext_seed + expand,
+                    **params,
+                    index_name=_ENTITY_FULLTEXT_INDEX,
+                    search=_entity_fulltext_search(repo_id, tokens),
+                    seed_limit=max(50, int(top_k) * 4),
+                )
+                return list(await res.data())
+            except Exception:
+                res = await session.run(scan_seed + expand, **params)
+                return list(await res.data())
+
+    async def _seed_entity_scores(
+        self, repo_id: str, tokens: list[str], *, budget: GraphExpansionBudget, top_k: int
+    ) -> dict[str, float]:
+        seed_cap = min(int(budget.max_visited), max(50, int(top_k) * 2))
+        rows = await self._seeded_entity_query(
+            repo_id,
+            tokens,
+            """
+            RETURN seed.entity_id AS entity_id, seed_score AS score
+            ORDER BY score DESC
+            LIMIT $limit;
+            """,
+            top_k=seed_cap,
+        )
+        return {str(r["entity_id"]): float(r.get("score") or 0.0) for r in rows if r.get("entity_id")}
+
+    async def _frontier_expand(
+        self,
+        repo_id: str,
+        seeds: dict[str, float],
+        *,
+        max_hops: int,
+        budget: GraphExpansionBudget,
+        stats: dict[str, Any] | None = None,
+    ) -> dict[str, tuple[float, int]]:
+        """Budgeted breadth-first expansion over Entity relationships.
+
+        Visits each entity at most once (at its shortest hop distance), one Cypher round-trip per hop.
+        Per hop, every frontier entity follows at most `fanout_cap` unvisited neighbors (lowest degree
+        first); new entities are admitted best-score-first until `max_visited` is reached. Scores decay
+        like the path query (seed_score / (1 + hops)) and are further scaled by
+        sqrt(hub_degree / degree) when entering an entity above `hub_degree`.
+
+        Returns {entity_id: (score, hops)}.
+        """
+        visited: dict[str, tuple[float, int]] = {}
+        ranked_seeds = sorted(seeds.items(), key=lambda kv: (-kv[1], kv[0]))
+        exhausted = len(ranked_seeds) > int(budget.max_visited)
+        for entity_id, score in ranked_seeds[: int(budget.max_visited)]:
+            visited[entity_id] = (float(score), 0)
+
+        frontier = [entity_id for entity_id, _score in ranked_seeds[: int(budget.max_visited)]]
+        frontier_sizes: list[int] = [len(frontier)]
+        fanout_capped = 0
+        hubs = 0
+        hops_completed = 0
+        cypher = """
+        UNWIND $frontier AS source_id
+        MATCH (n:Entity {repo_id: $repo_id, entity_id: source_id})
+        CALL {
+          WITH n
+          MATCH (n)-[r]-(m:Entity {repo_id: $repo_id})
+          WHERE type(r) IN $allowed_rels AND NOT m.entity_id IN $visited
+          WITH DISTINCT m
+          WITH m, COUNT { (m)--() } AS degree
+          ORDER BY degree ASC, m.entity_id ASC
+          WITH collect({entity_id: m.entity_id, degree: degree}) AS ns
+          RETURN ns[0..$fanout] AS neighbors, size(ns) AS available
+        }
+        RETURN source_id, neighbors, available;
+        """
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            for hop in range(1, int(max_hops) + 1):
+                if not frontier:
+                    break
+                if len(visited) >= int(budget.max_visited):
+                    exhausted = True
+                    break
+                res = await session.run(
+                    cypher,
+                    repo_id=repo_id,
+                    frontier=frontier,
+                    visited=list(visited),
+                    allowed_rels=["calls", "imports", "inherits", "contains", "references", "related_to"],
+                    fanout=int(budget.fanout_cap),
+                )
+                rows = await res.data()
+                hops_completed = hop
+
+                decay = float(hop) / float(hop + 1)
+                candidates: dict[str, float] = {}
+                for row in rows:
+                    source = visited.get(str(row.get("source_id")))
+                    if source is None:
+                        continue
+                    if int(row.get("available") or 0) > int(budget.fanout_cap):
+                        fanout_capped += 1
+                    for nb in row.get("neighbors") or []:
+                        entity_id = str(nb.get("entity_id") or "")
+                        if not entity_id or entity_id in visited:
+                            continue
+                        weight = budget.hub_weight(int(nb.get("degree") or 0))
+                        if weight < 1.0:
+                            hubs += 1
+                        score = source[0] * decay * weight
+                        if score > candidates.get(entity_id, -1.0):
+                            candidates[entity_id] = score
+
+                ranked = sorted(candidates.items(), key=lambda kv: (-kv[1], kv[0]))
+                room = int(budget.max_visited) - len(visited)
+                if len(ranked) > room:
+                    exhausted = True
+                    ranked = ranked[: max(0, room)]
+                for entity_id, score in ranked:
+                    visited[entity_id] = (score, hop)
+                frontier = [entity_id for entity_id, _score in ranked]
+                frontier_sizes.append(len(frontier))
+
+        if stats is not None:
+            stats.update(
+                {
+                    "strategy": "frontier",
+                    "seeds": len(ranked_seeds),
+                    "hops_completed": hops_completed,
+                    "visited": len(visited),
+                    "frontier_sizes": frontier_sizes,
+                    "fanout_capped": fanout_capped,
+                    "hubs_downweighted": hubs,
+                    "budget_exhausted": exhausted,
+                }
+            )
+        return visited
+
+    async def _entity_rows(self, repo_id: str, ranked: list[tuple[str, tuple[float, int]]]) -> list[dict[str, Any]]:
+        """Hydrate scored entities into graph_search records, preserving rank order."""
+        if not ranked:
+            return []
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            res = await session.run(
+                """
+                UNWIND $ids AS id
+                MATCH (e:Entity {repo_id: $repo_id, entity_id: id})
+                RETURN e.entity_id AS entity_id,
+                       e.file_path AS file_path,
+                       e.properties_json AS properties_json,
+                       e.name AS name;
+                """,
+                repo_id=repo_id,
+                ids=[entity_id for entity_id, _ in ranked],
+            )
+            rows = {str(r.get("entity_id")): r for r in await res.data()}
+        out: list[dict[str, Any]] = []
+        for entity_id, (score, hops) in ranked:
+            row = rows.get(entity_id)
+            if row is None:
+                continue
+            out.append({**row, "hops": hops, "direct_match": hops == 0, "score": score})
+        return out
+
+    async def _entity_chunk_scores(
+        self, repo_id: str, scored: dict[str, tuple[float, int]], *, top_k: int
+    ) -> list[tuple[str, float]]:
+        """Map scored entities to their chunks via IN_CHUNK (best entity score per chunk)."""
+        if not scored:
+            return []
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            res = await session.run(
+                """
+                UNWIND $entities AS x
+                MATCH (e:Entity {repo_id: $repo_id, entity_id: x.entity_id})-[:IN_CHUNK]->(c:Chunk {repo_id: $repo_id})
+                RETURN c.chunk_id AS chunk_id, max(x.score) AS score
+                ORDER BY score DESC
+                LIMIT $limit;
+                """,
+                repo_id=repo_id,
+                entities=[{"entity_id": k, "score": float(v[0])} for k, v in scored.items()],
+                limit=int(top_k),
+            )
+            records = await res.data()
+        out: list[tuple[str, float]] = []
+        for r in records:
+            cid = str(r.get("chunk_id") or "").strip()
+            if cid:
+                out.append((cid, float(r.get("score") or 0.0)))
+        return out
+
+    def _require_driver(self) -> AsyncDriver:
+        if self._driver is None:
+            raise RuntimeError("Neo4j driver is not connected. Call connect() first.")
+        return self._driver
+
+    async def _store_communities(
+        self,
+        repo_id: str,
+        communities: Iterable[Community],
+        *,
+        method: str,
+        replace_roots: list[str] | None = None,
+    ) -> None:
+        """Replace stored communities (all, or only the trees under `replace_roots`) in batches."""
+        root_of: dict[str, str] = {}
+        payload: list[dict[str, Any]] = []
+        for c in sorted(communities, key=lambda c: int(c.level)):
+            root = root_of.get(c.parent_id, c.community_id) if c.parent_id else c.community_id
+            root_of[c.community_id] = root
+            payload.append(
                 {
                     "community_id": c.community_id,
                     "name": c.name,
                     "summary": c.summary,
                     "level": int(c.level),
+                    "parent_id": c.parent_id,
+                    "root_id": root,
+                    "size": len(c.member_ids),
                     "member_ids": list(c.member_ids),
                 }
-                for c in communities
-            ]
+            )
 
+        driver = self._require_driver()
+        async with driver.session(database=self.database) as session:
+            # Clear the replaced communities + membership edges
             await session.run(
                 """
-                UNWIND $communities AS c
-                MERGE (comm:Community {repo_id: $repo_id, community_id: c.community_id})
-                SET comm.name = c.name,
-                    comm.summary = c.summary,
-                    comm.level = c.level;
+                MATCH (c:Community {repo_id: $repo_id})
+                WHERE $roots IS NULL OR c.root_id IN $roots
+                CALL { WITH c DETACH DELETE c } IN TRANSACTIONS OF $batch ROWS;
                 """,
                 repo_id=repo_id,
-                communities=comm_payload,
+                roots=replace_roots,
+                batch=_COMMUNITY_WRITE_BATCH,
             )
 
-            await session.run(
-                """
-                UNWIND $communities AS c
-                MATCH (comm:Community {repo_id: $repo_id, community_id: c.community_id})
-                UNWIND c.member_ids AS mid
-                MATCH (e:Entity {repo_id: $repo_id, entity_id: mid})
-                MERGE (e)-[:IN_COMMUNITY]->(comm);
-                """,
-                repo_id=repo_id,
-                communities=comm_payload,
+            for start in range(0, len(payload), _COMMUNITY_WRITE_BATCH):
+                await session.run(
+                    """
+                    UNWIND $communities AS c
+                    MERGE (comm:Community {repo_id: $repo_id, community_id: c.community_id})
+                    SET comm.name = c.name,
+                        comm.summary = c.summary,
+                        comm.level = c.level,
+                        comm.parent_id = c.parent_id,
+                        comm.root_id = c.root_id,
+                        comm.size = c.size,
+                        comm.method = $method;
+                    """,
+                    repo_id=repo_id,
+                    method=method,
+                    communities=[
+                        {k: v for k, v in c.items() if k != "member_ids"}
+                        for c in payload[start : start + _COMMUNITY_WRITE_BATCH]
+                    ],
+                )
+
+            rows: list[dict[str, str]] = []
+            for item in payload:
+                rows.extend({"community_id": item["community_id"], "entity_id": mid} for mid in item["member_ids"])
+            for start in range(0, len(rows), _COMMUNITY_MEMBERSHIP_BATCH):
+                await session.run(
+                    """
+                    UNWIND $rows AS row
+                    MATCH (comm:Community {repo_id: $repo_id, community_id: row.community_id})
+                    MATCH (e:Entity {repo_id: $repo_id, entity_id: row.entity_id})
+                    MERGE (e)-[:IN_COMMUNITY]->(comm);
+                    """,
+                    repo_id=repo_id,
+                    rows=rows[start : start + _COMMUNITY_MEMBERSHIP_BATCH],
+                )
+
+
+@dataclass(frozen=True)
+class _CommunityGraph:
+    """Detection output aligned by node index: entity metadata, degrees and per-level memberships (finest first)."""
+
+    ids: list[str]
+    names: list[str]
+    paths: list[str | None]
+    degree: Any
+    memberships: list[Any]
+
+
+def _communities_from_levels(
+    repo_id: str, graph: _CommunityGraph, memberships: list[Any], *, min_size: int
+) -> list[Community]:
+    """Turn membership arrays (finest first) into Community models, level 0 = coarsest.
+
+    Ids hash the member set so unchanged communities keep their id across recomputes. Each community
+    is named after its highest-degree member and the directory most of its members live in.
+    """
+    out: list[Community] = []
+    parent_labels: Any = None
+    parent_ids: dict[int, str] = {}
+    for level, labels in enumerate(reversed(memberships)):
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        level_ids: dict[int, str] = {}
+        for group in np.split(order, bounds):
+            if int(group.size) < max(1, int(min_size)):
+                continue
+            members = [graph.ids[i] for i in group.tolist()]
+            digest = hashlib.sha1("\n".join(sorted(members)).encode()).hexdigest()[:12]
+            community_id = f"{repo_id}:L{level}:{digest}"
+            rep = int(group[int(np.argmax(graph.degree[group]))])
+            dirs = Counter(
+                posixpath.dirname(p.replace("\\", "/")) or "(root)"
+                for p in (graph.paths[i] for i in group.tolist())
+                if p
             )
+            where = dirs.most_common(1)[0][0] if dirs else None
+            rep_name = graph.names[rep] or graph.ids[rep]
+            parent = parent_ids.get(int(parent_labels[rep])) if parent_labels is not None else None
+            level_ids[int(labels[rep])] = community_id
+            out.append(
+                Community(
+                    community_id=community_id,
+                    name=f"{rep_name} ({where})" if where else rep_name,
+                    summary=f"{len(members)} entities around '{rep_name}'" + (f", mostly in '{where}'" if where else ""),
+                    member_ids=members,
+                    level=level,
+                    parent_id=parent,
+                )
+            )
+        parent_labels, parent_ids = labels, level_ids
+    return out
 
 
 def _entity_from_record(record: Any) -> Entity:
@@ -1398,6 +2707,70 @@ def _sanitize_database_name(name: str) -> str:
     return raw[:63]
 
 
+_LUCENE_SPECIAL_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+_IDENTIFIER_WORD_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z0-9]+|[A-Z]+[0-9]*|[0-9]+")
+
+
+def _query_tokens(query: str) -> list[str]:
+    """Deterministic query tokens for entity seed lookup (no LLM)."""
+    tokens = [t.lower() for t in re.findall(r"[A-Za-z_][A-Za-z0-9_]{1,63}", query)]
+    # Fall back to whole-string match if we got no tokens (e.g. symbols-only queries).
+    if not tokens:
+        tokens = [query.strip().lower()]
+    # Cap token count to keep Cypher params small and stable.
+    return list(dict.fromkeys(tokens))[:8]
+
+
+def _identifier_terms(name: str) -> list[str]:
+    """Split an identifier/path into lowercase words: `getGraphStats`/`get_graph_stats` -> get, graph, stats."""
+    words: list[str] = []
+    for part in re.split(r"[^A-Za-z0-9]+", name or ""):
+        words.extend(w.lower() for w in _IDENTIFIER_WORD_RE.findall(part))
+    return list(dict.fromkeys(words))
+
+
+def _entity_qualified_name(entity: Entity) -> str | None:
+    """Dotted module path + name for code entities (`server.db.neo4j.Neo4jClient`), if derivable."""
+    explicit = (entity.properties or {}).get("qualified_name")
+    if explicit:
+        return str(explicit)
+    if not entity.file_path:
+        return None
+    module = re.sub(r"\.[A-Za-z0-9]+$", "", entity.file_path.replace("\\", "/")).strip("/").replace("/", ".")
+    if entity.entity_type == "module" or not module:
+        return module or None
+    return f"{module}.{entity.name}"
+
+
+def _lucene_escape(text: str) -> str:
+    return _LUCENE_SPECIAL_RE.sub(r"\\\1", text)
+
+
+def _entity_fulltext_search(repo_id: str, tokens: list[str]) -> str:
+    """Lucene query for the entity full-text index: any token (or identifier word) in any text field,
+    restricted to the corpus. Exact name hits are boosted; longer tokens also match as prefixes."""
+    terms: list[str] = []
+    for tok in tokens:
+        esc = _lucene_escape(tok)
+        terms.append(f"name:{esc}^4")
+        terms.append(esc)
+        if len(tok) >= 3 and esc == tok:
+            terms.append(f"{esc}*")
+        terms.extend(_lucene_escape(w) for w in _identifier_terms(tok) if w != tok)
+    clause = " OR ".join(dict.fromkeys(terms)) or '""'
+    return f'+repo_id:"{_lucene_escape(repo_id)}" +({clause})'
+
+
+def corpus_chunk_label(repo_id: str) -> str:
+    """Per-corpus label added to Chunk nodes when per-corpus vector indexes are enabled."""
+    return f"CorpusChunk_{hashlib.sha1(repo_id.encode('utf-8')).hexdigest()[:12]}"
+
+
+def corpus_vector_index_name(index_name: str, repo_id: str) -> str:
+    """Name of the per-corpus Chunk vector index derived from the shared index name."""
+    return f"{index_name}_{hashlib.sha1(repo_id.encode('utf-8')).hexdigest()[:12]}"
+
+
 def _sanitize_cypher_identifier(name: str) -> str:
     """Conservative Cypher identifier sanitizer (labels, properties, index names).
 
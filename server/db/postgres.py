@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
+import math
 import os
 import re
 import time
 from collections import defaultdict
+from collections.abc import Callable
 from datetime import UTC, datetime
 from typing import Any, cast
 
 import asyncpg
+import numpy as np
+import numpy.typing as npt
 from pgvector.asyncpg import register_vector
 
 from server.models.index import Chunk, IndexStats
@@ -32,6 +37,24 @@ _POOLS_BY_DSN: dict[str, asyncpg.Pool] = {}
 _POOL_LOCKS_BY_DSN: dict[str, asyncio.Lock] = {}
 
 
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Register pgvector codecs on every pooled connection (chunk COPY sends vectors in binary).
+
+    On a fresh database the extension does not exist yet when the first connection opens; `connect`
+    registers that one after creating the schema.
+    """
+    try:
+        await register_vector(conn)
+    except ValueError:
+        pass
+
+
+def _stage_vector(ch: Chunk, vectors: npt.NDArray[np.float32] | None, row: int) -> Any:
+    if vectors is not None:
+        return vectors[row]
+    return ch.embedding
+
+
 _RELAXED_FTS_TERM_RE = re.compile(r"[A-Za-z0-9_]{3,64}")
 _FILE_PATH_TERM_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.\\-]{1,63}")
 
@@ -124,6 +147,29 @@ def _coerce_jsonb_dict(value: Any) -> dict[str, Any]:
         return {}
 
 
+# Per-corpus partial ANN indexes over chunks.embedding. The column is undimensioned, so indexes
+# are built on an `embedding::vector(<dim>)` expression and queries order by the same expression.
+_ANN_INDEX_PREFIX = "idx_chunks_ann_"
+
+
+def _ann_index_prefix(repo_id: str) -> str:
+    """Stable per-corpus index-name prefix (repo_id itself is not a safe identifier)."""
+    digest = hashlib.sha1(repo_id.encode("utf-8")).hexdigest()[:12]
+    return f"{_ANN_INDEX_PREFIX}{digest}_"
+
+
+def _sql_string_literal(value: str) -> str:
+    # Partial-index predicates cannot be parameterized; quote as a standard SQL literal.
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _auto_ivfflat_lists(rows: int) -> int:
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond.
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return max(1, int(math.sqrt(rows)))
+
+
 class PostgresClient:
     """Postgres index store (pgvector + FTS).
 
@@ -167,7 +213,7 @@ class PostgresClient:
         async with lock:
             pool = _POOLS_BY_DSN.get(dsn)
             if pool is None:
-                pool = await asyncpg.create_pool(dsn=dsn, min_size=1, max_size=10)
+                pool = await asyncpg.create_pool(dsn=dsn, min_size=1, max_size=10, init=_init_connection)
                 try:
                     async with pool.acquire() as conn:
                         # Ensure extension exists before registering pgvector codecs.
@@ -335,6 +381,44 @@ class PostgresClient:
         )
         await conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_tsv ON chunks USING GIN (tsv);")
 
+        # Content-addressed embedding cache shared across corpora (see Embedder.cache_key).
+        # REAL[] rather than vector: cached dims vary by model and need no ANN indexing.
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+              cache_key TEXT PRIMARY KEY,
+              dims INT NOT NULL,
+              embedding REAL[] NOT NULL,
+              created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+        # Recency for pruning (see prune_embedding_cache); refreshed on hits at most once a day.
+        await conn.execute(
+            "ALTER TABLE embedding_cache ADD COLUMN IF NOT EXISTS last_used_at TIMESTAMPTZ NOT NULL DEFAULT now();"
+        )
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used_at);"
+        )
+
+        # Per-file fingerprints for incremental indexing (see server/indexing/fingerprints.py).
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_fingerprints (
+              repo_id TEXT NOT NULL REFERENCES corpora(repo_id) ON DELETE CASCADE,
+              file_path TEXT NOT NULL,
+              size_bytes BIGINT NOT NULL,
+              mtime_ns BIGINT NOT NULL,
+              content_hash TEXT NOT NULL,
+              config_hash TEXT NOT NULL,
+              chunk_count INT NOT NULL DEFAULT 0,
+              token_count BIGINT NOT NULL DEFAULT 0,
+              indexed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+              PRIMARY KEY (repo_id, file_path)
+            );
+            """
+        )
+
         # Optional recall-only HNSW index for low-latency Recall vector search.
         # Best-effort: do not block startup if the pgvector build lacks HNSW support.
         try:
@@ -498,79 +582,165 @@ class PostgresClient:
             for r in rows
         ]
 
-    # Vector operations
+    # Chunk writes
+    async def upsert_chunks(
+        self,
+        repo_id: str,
+        chunks: list[Chunk],
+        *,
+        ts_config: str,
+        store_embeddings: bool = True,
+        vectors: npt.NDArray[np.float32] | None = None,
+    ) -> int:
+        """Upsert chunk rows with their embedding and FTS vector in one bulk write.
+
+        `vectors` (one float32 row per chunk) takes precedence over `Chunk.embedding`; its rows are
+        sent in pgvector's binary format without a per-value Python float. With
+        store_embeddings=False the existing embedding column is left untouched (skip_dense).
+        """
+        return await self._copy_merge_chunks(
+            repo_id, chunks, embeddings=store_embeddings, ts_config=ts_config, vectors=vectors
+        )
+
     async def upsert_embeddings(self, repo_id: str, chunks: list[Chunk]) -> int:
+        return await self._copy_merge_chunks(repo_id, chunks, embeddings=True, ts_config=None)
+
+    async def _copy_merge_chunks(
+        self,
+        repo_id: str,
+        chunks: list[Chunk],
+        *,
+        embeddings: bool,
+        ts_config: str | None,
+        vectors: npt.NDArray[np.float32] | None = None,
+    ) -> int:
+        """COPY chunk rows into a per-connection staging table, then merge them with one statement.
+
+        COPY avoids per-row statement round trips; the set-based merge writes each row once even when
+        both the embedding and the tsv are being (re)computed.
+        """
         if not chunks:
             return 0
+        if vectors is not None and len(vectors) != len(chunks):
+            raise ValueError(f"vectors has {len(vectors)} rows for {len(chunks)} chunks")
         await self._require_pool()
         assert self._pool is not None
 
-        async with self._pool.acquire() as conn:
-            await register_vector(conn)
-            await self._ensure_corpus_row(conn, repo_id, name=repo_id, root_path=".")
-
-            stmt = """
-            INSERT INTO chunks (
-              repo_id, chunk_id, file_path, start_line, end_line, language, content, token_count, metadata, embedding
-            )
-            VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9::jsonb,$10)
+        insert_cols = ["repo_id", "chunk_id", "file_path", "start_line", "end_line", "language", "content"]
+        insert_cols += ["token_count", "metadata"]
+        select_exprs = ["$1", "s.chunk_id", "s.file_path", "s.start_line", "s.end_line", "s.language", "s.content"]
+        select_exprs += ["s.token_count", "s.metadata::jsonb"]
+        args: list[Any] = [repo_id]
+        if embeddings:
+            insert_cols.append("embedding")
+            select_exprs.append("s.embedding::vector")
+        if ts_config is not None:
+            args.append(ts_config)
+            insert_cols.append("tsv")
+            select_exprs.append("to_tsvector($2::regconfig, s.content)")
+        updates = ",\n              ".join(
+            f"{col} = EXCLUDED.{col}" for col in insert_cols if col not in {"repo_id", "chunk_id"}
+        )
+        # DISTINCT ON keeps the last occurrence of a chunk_id: ON CONFLICT cannot touch a row twice.
+        merge_sql = f"""
+            INSERT INTO chunks ({", ".join(insert_cols)})
+            SELECT {", ".join(select_exprs)}
+            FROM (
+              SELECT DISTINCT ON (chunk_id) *
+              FROM _chunk_upsert_stage
+              ORDER BY chunk_id, seq DESC
+            ) AS s
             ON CONFLICT (repo_id, chunk_id) DO UPDATE SET
-              file_path = EXCLUDED.file_path,
-              start_line = EXCLUDED.start_line,
-              end_line = EXCLUDED.end_line,
-              language = EXCLUDED.language,
-              content = EXCLUDED.content,
-              token_count = EXCLUDED.token_count,
-              metadata = EXCLUDED.metadata,
-              embedding = EXCLUDED.embedding;
-            """
-
-            await conn.executemany(
-                stmt,
-                [
-                    (
-                        repo_id,
-                        ch.chunk_id,
-                        ch.file_path,
-                        int(ch.start_line),
-                        int(ch.end_line),
-                        ch.language,
-                        ch.content,
-                        int(ch.token_count or 0),
-                        json.dumps(ch.metadata or {}),
-                        ch.embedding,
-                    )
-                    for ch in chunks
-                ],
-            )
-            await conn.execute(
-                "UPDATE corpora SET last_indexed = $2 WHERE repo_id = $1;",
-                repo_id,
-                datetime.now(UTC),
+              {updates};
+        """
+        records = [
+            (
+                seq,
+                ch.chunk_id,
+                ch.file_path,
+                int(ch.start_line),
+                int(ch.end_line),
+                ch.language,
+                ch.content,
+                int(ch.token_count or 0),
+                json.dumps(ch.metadata or {}),
+                _stage_vector(ch, vectors, seq) if embeddings else None,
             )
+            for seq, ch in enumerate(chunks)
+        ]
+
+        async with self._pool.acquire() as conn:
+            await self._ensure_corpus_row(conn, repo_id, name=repo_id, root_path=".")
+            async with conn.transaction():
+                # Vectors are COPYed with the pgvector binary codec (see _init_connection).
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE IF NOT EXISTS _chunk_upsert_stage (
+                      seq INT NOT NULL,
+                      chunk_id TEXT NOT NULL,
+                      file_path TEXT NOT NULL,
+                      start_line INT NOT NULL,
+                      end_line INT NOT NULL,
+                      language TEXT,
+                      content TEXT NOT NULL,
+                      token_count INT NOT NULL,
+                      metadata TEXT NOT NULL,
+                      embedding vector
+                    ) ON COMMIT DELETE ROWS;
+                    """
+                )
+                await conn.copy_records_to_table("_chunk_upsert_stage", records=records)
+                await conn.execute(merge_sql, *args)
+                await conn.execute(
+                    "UPDATE corpora SET last_indexed = $2 WHERE repo_id = $1;",
+                    repo_id,
+                    datetime.now(UTC),
+                )
         return len(chunks)
 
-    async def vector_search(self, repo_id: str, embedding: list[float], top_k: int) -> list[ChunkMatch]:
+    async def vector_search(
+        self,
+        repo_id: str,
+        embedding: list[float],
+        top_k: int,
+        *,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> list[ChunkMatch]:
         if top_k <= 0:
             return []
         await self._require_pool()
         assert self._pool is not None
 
+        # Order by the same dimensioned expression the per-corpus ANN index is built on, so the
+        # planner can use it when present (exact scan otherwise).
+        dims = len(embedding)
+        order_expr = f"embedding::vector({int(dims)})" if dims > 0 else "embedding"
         async with self._pool.acquire() as conn:
             await register_vector(conn)
-            rows = await conn.fetch(
-                """
-                SELECT chunk_id, content, file_path, start_line, end_line, language, metadata,
-                       (1 - (embedding <=> $1))::float8 AS score
-                FROM chunks
-                WHERE repo_id = $2 AND embedding IS NOT NULL
-                ORDER BY embedding <=> $1
-                LIMIT $3;
-                """,
-                embedding,
-                repo_id,
-                int(top_k),
-            )
+            async with conn.transaction():
+                # Partial ANN indexes are keyed on a literal repo_id; custom plans let the planner
+                # match the bound parameter against the index predicate.
+                await conn.execute("SET LOCAL plan_cache_mode = force_custom_plan;")
+                if ef_search is not None and int(ef_search) > 0:
+                    # HNSW returns at most ef_search rows; never let it truncate top_k.
+                    ef = max(int(ef_search), int(top_k))
+                    await conn.execute(f"SET LOCAL hnsw.ef_search = {ef};")
+                if probes is not None and int(probes) > 0:
+                    await conn.execute(f"SET LOCAL ivfflat.probes = {int(probes)};")
+                rows = await conn.fetch(
+                    f"""
+                    SELECT chunk_id, content, file_path, start_line, end_line, language, metadata,
+                           (1 - (embedding <=> $1))::float8 AS score
+                    FROM chunks
+                    WHERE repo_id = $2 AND embedding IS NOT NULL
+                    ORDER BY {order_expr} <=> $1
+                    LIMIT $3;
+                    """,
+                    embedding,
+                    repo_id,
+                    int(top_k),
+                )
 
         return [
             ChunkMatch(
@@ -587,66 +757,261 @@ class PostgresClient:
             for r in rows
         ]
 
-    async def delete_embeddings(self, repo_id: str) -> int:
+    async def ensure_vector_ann_index(
+        self,
+        repo_id: str,
+        *,
+        dimensions: int,
+        method: str = "hnsw",
+        m: int = 16,
+        ef_construction: int = 64,
+        lists: int = 0,
+        min_rows: int = 0,
+        progress_cb: Callable[[dict[str, Any]], None] | None = None,
+        progress_interval_s: float = 1.0,
+    ) -> dict[str, Any]:
+        """Ensure a partial HNSW/IVFFlat index exists for one corpus.
+
+        The index is built CONCURRENTLY so searches keep working during (re)builds. Indexes from a
+        previous method/dimension/parameter set are dropped only after the new one is valid.
+        Build progress (pg_stat_progress_create_index) is reported through progress_cb.
+        """
         await self._require_pool()
         assert self._pool is not None
+
+        method = str(method or "none").strip().lower()
+        status: dict[str, Any] = {"method": method, "index_name": None, "rows": 0, "built": False}
+        if method not in {"hnsw", "ivfflat"} or int(dimensions) <= 0:
+            status["dropped"] = await self.drop_vector_ann_indexes(repo_id)
+            status["reason"] = "disabled"
+            return status
+
         async with self._pool.acquire() as conn:
-            result = await conn.execute(
-                "UPDATE chunks SET embedding = NULL WHERE repo_id = $1 AND embedding IS NOT NULL;",
+            rows = int(
+                await conn.fetchval(
+                    "SELECT count(*) FROM chunks WHERE repo_id = $1 AND embedding IS NOT NULL;",
+                    repo_id,
+                )
+                or 0
+            )
+        status["rows"] = rows
+        if rows < max(1, int(min_rows)):
+            status["dropped"] = await self.drop_vector_ann_indexes(repo_id)
+            status["reason"] = "below_min_rows"
+            return status
+
+        if method == "hnsw":
+            with_clause = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+        else:
+            with_clause = f"lists = {int(lists) if int(lists) > 0 else _auto_ivfflat_lists(rows)}"
+        prefix = _ann_index_prefix(repo_id)
+        signature = hashlib.sha1(f"{method}|{int(dimensions)}|{with_clause}".encode()).hexdigest()[:8]
+        index_name = f"{prefix}{method}_{signature}"
+        status["index_name"] = index_name
+
+        existing = await self._list_vector_ann_indexes(repo_id)
+        if existing.get(index_name) is True:
+            status["reason"] = "exists"
+        else:
+            if index_name in existing:
+                # A failed CONCURRENTLY build leaves an INVALID index behind; rebuild it.
+                async with self._pool.acquire() as conn:
+                    await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}";')
+            await self._build_vector_ann_index(
                 repo_id,
+                index_name=index_name,
+                method=method,
+                dimensions=int(dimensions),
+                with_clause=with_clause,
+                progress_cb=progress_cb,
+                progress_interval_s=progress_interval_s,
             )
-        # asyncpg returns "UPDATE <n>"
-        return int(result.split()[-1])
+            status["built"] = True
 
-    # FTS operations
-    async def upsert_fts(self, repo_id: str, chunks: list[Chunk], *, ts_config: str) -> int:
-        if not chunks:
-            return 0
+        stale = [name for name in existing if name != index_name]
+        if stale:
+            async with self._pool.acquire() as conn:
+                for name in stale:
+                    await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";')
+        status["dropped"] = len(stale)
+        return status
+
+    async def _build_vector_ann_index(
+        self,
+        repo_id: str,
+        *,
+        index_name: str,
+        method: str,
+        dimensions: int,
+        with_clause: str,
+        progress_cb: Callable[[dict[str, Any]], None] | None,
+        progress_interval_s: float,
+    ) -> None:
+        assert self._pool is not None
+        ddl = f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}"
+              ON chunks USING {method} ((embedding::vector({int(dimensions)})) vector_cosine_ops)
+              WITH ({with_clause})
+              WHERE repo_id = {_sql_string_literal(repo_id)} AND embedding IS NOT NULL;
+        """
+
+        async def _poll_progress(build_pid: int) -> None:
+            assert self._pool is not None
+            while True:
+                await asyncio.sleep(max(0.1, float(progress_interval_s)))
+                try:
+                    async with self._pool.acquire() as conn:
+                        row = await conn.fetchrow(
+                            """
+                            SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total
+                            FROM pg_stat_progress_create_index
+                            WHERE pid = $1;
+                            """,
+                            build_pid,
+                        )
+                except Exception:
+                    continue
+                if row is None or progress_cb is None:
+                    continue
+                done, total = int(row["tuples_done"] or 0), int(row["tuples_total"] or 0)
+                if total <= 0:
+                    done, total = int(row["blocks_done"] or 0), int(row["blocks_total"] or 0)
+                progress_cb(
+                    {
+                        "index_name": index_name,
+                        "method": method,
+                        "phase": str(row["phase"] or ""),
+                        "percent": int(100 * done / total) if total > 0 else None,
+                    }
+                )
+
+        async with self._pool.acquire() as conn:
+            poller = asyncio.create_task(_poll_progress(int(conn.get_server_pid())))
+            try:
+                await conn.execute(ddl)
+            except Exception:
+                try:
+                    await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}";')
+                except Exception:
+                    pass
+                raise
+            finally:
+                poller.cancel()
+                try:
+                    await poller
+                except asyncio.CancelledError:
+                    pass
+
+    async def _list_vector_ann_indexes(self, repo_id: str) -> dict[str, bool]:
+        """Return {index_name: is_valid} for this corpus's ANN indexes."""
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT c.relname AS name, i.indisvalid AS valid
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = 'chunks'::regclass AND c.relname LIKE $1;
+                """,
+                _ann_index_prefix(repo_id).replace("_", "\\_") + "%",
+            )
+        return {str(r["name"]): bool(r["valid"]) for r in rows}
+
+    async def drop_vector_ann_indexes(self, repo_id: str) -> int:
+        """Drop every partial ANN index belonging to one corpus. Returns the number dropped."""
         await self._require_pool()
         assert self._pool is not None
+        names = list(await self._list_vector_ann_indexes(repo_id))
+        if not names:
+            return 0
+        async with self._pool.acquire() as conn:
+            for name in names:
+                await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";')
+        return len(names)
 
+    async def get_cached_embeddings(self, cache_keys: list[str]) -> dict[str, list[float]]:
+        """Bulk lookup in the content-addressed embedding cache."""
+        if not cache_keys:
+            return {}
+        await self._require_pool()
+        assert self._pool is not None
         async with self._pool.acquire() as conn:
-            await self._ensure_corpus_row(conn, repo_id, name=repo_id, root_path=".")
-            # Update tsv for each chunk (ensure row exists first)
-            stmt = """
-            INSERT INTO chunks (
-              repo_id, chunk_id, file_path, start_line, end_line, language, content, token_count, metadata, tsv
+            rows = await conn.fetch(
+                "SELECT cache_key, embedding FROM embedding_cache WHERE cache_key = ANY($1::text[]);",
+                list(cache_keys),
             )
-            VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9::jsonb,to_tsvector($10::regconfig, $7))
-            ON CONFLICT (repo_id, chunk_id) DO UPDATE SET
-              file_path = EXCLUDED.file_path,
-              start_line = EXCLUDED.start_line,
-              end_line = EXCLUDED.end_line,
-              language = EXCLUDED.language,
-              content = EXCLUDED.content,
-              token_count = EXCLUDED.token_count,
-              metadata = EXCLUDED.metadata,
-              tsv = to_tsvector($10::regconfig, EXCLUDED.content);
-            """
+            if rows:
+                # Day granularity keeps repeated reindexes from rewriting every hit row.
+                await conn.execute(
+                    """
+                    UPDATE embedding_cache SET last_used_at = now()
+                    WHERE cache_key = ANY($1::text[]) AND last_used_at < now() - interval '1 day';
+                    """,
+                    [str(r["cache_key"]) for r in rows],
+                )
+        return {str(r["cache_key"]): [float(x) for x in r["embedding"]] for r in rows}
+
+    async def put_cached_embeddings(self, entries: list[tuple[str, list[float]]]) -> int:
+        """Store embeddings in the cache (first writer wins; entries are immutable by key)."""
+        if not entries:
+            return 0
+        await self._require_pool()
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
             await conn.executemany(
-                stmt,
-                [
-                    (
-                        repo_id,
-                        ch.chunk_id,
-                        ch.file_path,
-                        int(ch.start_line),
-                        int(ch.end_line),
-                        ch.language,
-                        ch.content,
-                        int(ch.token_count or 0),
-                        json.dumps(ch.metadata or {}),
-                        ts_config,
-                    )
-                    for ch in chunks
-                ],
+                """
+                INSERT INTO embedding_cache (cache_key, dims, embedding)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (cache_key) DO NOTHING;
+                """,
+                [(key, len(vec), [float(x) for x in vec]) for key, vec in entries],
             )
-            await conn.execute(
-                "UPDATE corpora SET last_indexed = $2 WHERE repo_id = $1;",
+        return len(entries)
+
+    async def prune_embedding_cache(self, *, max_age_days: int, max_entries: int) -> int:
+        """Drop cache entries unused for `max_age_days`, then the least recently used beyond `max_entries`.
+
+        0 disables either limit. Returns the number of entries removed.
+        """
+        await self._require_pool()
+        assert self._pool is not None
+        removed = 0
+        async with self._pool.acquire() as conn:
+            if max_age_days > 0:
+                result = await conn.execute(
+                    "DELETE FROM embedding_cache WHERE last_used_at < now() - make_interval(days => $1);",
+                    int(max_age_days),
+                )
+                removed += int(result.split()[-1])
+            if max_entries > 0:
+                result = await conn.execute(
+                    """
+                    DELETE FROM embedding_cache
+                    WHERE cache_key IN (
+                      SELECT cache_key FROM embedding_cache
+                      ORDER BY last_used_at DESC, cache_key
+                      OFFSET $1
+                    );
+                    """,
+                    int(max_entries),
+                )
+                removed += int(result.split()[-1])
+        return removed
+
+    async def delete_embeddings(self, repo_id: str) -> int:
+        await self._require_pool()
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(
+                "UPDATE chunks SET embedding = NULL WHERE repo_id = $1 AND embedding IS NOT NULL;",
                 repo_id,
-                datetime.now(UTC),
             )
-        return len(chunks)
+        # asyncpg returns "UPDATE <n>"
+        return int(result.split()[-1])
+
+    # FTS operations
+    async def upsert_fts(self, repo_id: str, chunks: list[Chunk], *, ts_config: str) -> int:
+        return await self._copy_merge_chunks(repo_id, chunks, embeddings=False, ts_config=ts_config)
 
     async def sparse_search(self, repo_id: str, query: str, top_k: int, *, ts_config: str) -> list[ChunkMatch]:
         """Back-compat sparse search (postgres_fts + plainto_tsquery)."""
@@ -1354,6 +1719,11 @@ class PostgresClient:
     async def delete_corpus(self, repo_id: str) -> None:
         await self._require_pool()
         assert self._pool is not None
+        # Partial ANN indexes are per corpus; drop them with it (best-effort).
+        try:
+            await self.drop_vector_ann_indexes(repo_id)
+        except Exception:
+            pass
         async with self._pool.acquire() as conn:
             await conn.execute("DELETE FROM corpora WHERE repo_id = $1;", repo_id)
 
@@ -1699,12 +2069,183 @@ class PostgresClient:
             out["meta"] = _coerce_jsonb_dict(out.get("meta"))
             return out
 
-    async def delete_chunks(self, repo_id: str) -> int:
-        """Hard-delete all chunks for a corpus (used for force_reindex)."""
+    async def delete_chunks(
+        self,
+        repo_id: str,
+        *,
+        batch_size: int = 5000,
+        on_progress: Callable[[int], None] | None = None,
+        counts: dict[str, int] | None = None,
+    ) -> int:
+        """Hard-delete all chunks for a corpus (used for force_reindex).
+
+        Deletes in keyset-ordered batches of `batch_size` rows over the (repo_id, chunk_id) primary
+        key, one short transaction per batch, so large corpora never hold a long lock or build one
+        huge transaction. `on_progress` receives the running total after each batch; `counts`, if
+        given, is filled with chunks/embeddings/fts totals of the deleted rows.
+        """
+        await self._require_pool()
+        assert self._pool is not None
+        batch = max(1, int(batch_size))
+        cursor = ""
+        totals = {"chunks": 0, "embeddings": 0, "fts": 0}
+        while True:
+            async with self._pool.acquire() as conn:
+                row = await conn.fetchrow(
+                    """
+                    WITH batch AS (
+                      SELECT chunk_id
+                      FROM chunks
+                      WHERE repo_id = $1 AND chunk_id > $2
+                      ORDER BY chunk_id
+                      LIMIT $3
+                    ), deleted AS (
+                      DELETE FROM chunks c
+                      USING batch b
+                      WHERE c.repo_id = $1 AND c.chunk_id = b.chunk_id
+                      RETURNING c.chunk_id, c.embedding IS NOT NULL AS has_embedding, c.tsv IS NOT NULL AS has_tsv
+                    )
+                    SELECT count(*)::bigint AS n,
+                           count(*) FILTER (WHERE has_embedding)::bigint AS n_embeddings,
+                           count(*) FILTER (WHERE has_tsv)::bigint AS n_fts,
+                           max(chunk_id) AS last_chunk_id
+                    FROM deleted;
+                    """,
+                    repo_id,
+                    cursor,
+                    batch,
+                )
+            n = int(row["n"] or 0) if row else 0
+            if n <= 0:
+                break
+            totals["chunks"] += n
+            totals["embeddings"] += int(row["n_embeddings"] or 0)
+            totals["fts"] += int(row["n_fts"] or 0)
+            cursor = str(row["last_chunk_id"])
+            if on_progress is not None:
+                on_progress(totals["chunks"])
+            if n < batch:
+                break
+        if counts is not None:
+            counts.update(totals)
+        return totals["chunks"]
+
+    async def delete_chunks_for_files(self, repo_id: str, file_paths: list[str]) -> int:
+        """Hard-delete chunks (embeddings + FTS rows) and chunk summaries for specific files."""
+        if not file_paths:
+            return 0
+        await self._require_pool()
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                result = await conn.execute(
+                    "DELETE FROM chunks WHERE repo_id = $1 AND file_path = ANY($2::text[]);",
+                    repo_id,
+                    list(file_paths),
+                )
+                await conn.execute(
+                    "DELETE FROM chunk_summaries WHERE repo_id = $1 AND file_path = ANY($2::text[]);",
+                    repo_id,
+                    list(file_paths),
+                )
+        return int(result.split()[-1])
+
+    async def delete_chunks_outside_files(self, repo_id: str, keep_paths: list[str]) -> list[str]:
+        """Hard-delete chunks and chunk summaries of every file not in `keep_paths`.
+
+        Used when an incremental baseline is built over a corpus indexed before fingerprints
+        existed: rows of files that are no longer walked are swept in one statement instead of
+        wiping the corpus. Returns the distinct file paths whose chunks were deleted.
+        """
+        await self._require_pool()
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    """
+                    WITH deleted AS (
+                      DELETE FROM chunks
+                      WHERE repo_id = $1 AND file_path <> ALL($2::text[])
+                      RETURNING file_path
+                    )
+                    SELECT DISTINCT file_path FROM deleted;
+                    """,
+                    repo_id,
+                    list(keep_paths),
+                )
+                await conn.execute(
+                    "DELETE FROM chunk_summaries WHERE repo_id = $1 AND file_path <> ALL($2::text[]);",
+                    repo_id,
+                    list(keep_paths),
+                )
+        return sorted(str(r["file_path"]) for r in rows)
+
+    async def get_file_fingerprints(self, repo_id: str) -> dict[str, dict[str, Any]]:
+        """Return stored per-file fingerprints keyed by file_path."""
         await self._require_pool()
         assert self._pool is not None
         async with self._pool.acquire() as conn:
-            result = await conn.execute("DELETE FROM chunks WHERE repo_id = $1;", repo_id)
+            rows = await conn.fetch(
+                """
+                SELECT file_path, size_bytes, mtime_ns, content_hash, config_hash, chunk_count, token_count
+                FROM file_fingerprints
+                WHERE repo_id = $1;
+                """,
+                repo_id,
+            )
+        return {str(r["file_path"]): dict(r) for r in rows}
+
+    async def upsert_file_fingerprints(self, repo_id: str, fingerprints: list[dict[str, Any]]) -> int:
+        if not fingerprints:
+            return 0
+        await self._require_pool()
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO file_fingerprints
+                  (repo_id, file_path, size_bytes, mtime_ns, content_hash, config_hash, chunk_count, token_count)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                ON CONFLICT (repo_id, file_path) DO UPDATE SET
+                  size_bytes = EXCLUDED.size_bytes,
+                  mtime_ns = EXCLUDED.mtime_ns,
+                  content_hash = EXCLUDED.content_hash,
+                  config_hash = EXCLUDED.config_hash,
+                  chunk_count = EXCLUDED.chunk_count,
+                  token_count = EXCLUDED.token_count,
+                  indexed_at = now();
+                """,
+                [
+                    (
+                        repo_id,
+                        str(fp["file_path"]),
+                        int(fp["size_bytes"]),
+                        int(fp["mtime_ns"]),
+                        str(fp["content_hash"]),
+                        str(fp["config_hash"]),
+                        int(fp.get("chunk_count") or 0),
+                        int(fp.get("token_count") or 0),
+                    )
+                    for fp in fingerprints
+                ],
+            )
+        return len(fingerprints)
+
+    async def delete_file_fingerprints(self, repo_id: str, file_paths: list[str] | None = None) -> int:
+        """Forget fingerprints for specific files, or for the whole corpus when file_paths is None."""
+        await self._require_pool()
+        assert self._pool is not None
+        async with self._pool.acquire() as conn:
+            if file_paths is None:
+                result = await conn.execute("DELETE FROM file_fingerprints WHERE repo_id = $1;", repo_id)
+            elif not file_paths:
+                return 0
+            else:
+                result = await conn.execute(
+                    "DELETE FROM file_fingerprints WHERE repo_id = $1 AND file_path = ANY($2::text[]);",
+                    repo_id,
+                    list(file_paths),
+                )
         return int(result.split()[-1])
 
     async def _ensure_corpus_row(
@@ -1,16 +1,66 @@
 import bisect
+import math
 from typing import Any
 
-from server.indexing.tokenizer import TextTokenizer
+from server.indexing.tokenizer import TextTokenizer, TokenizationResult
 from server.models.index import Chunk
 from server.models.tribrid_config_model import ChunkingConfig, TokenizationConfig
 
 
+class _TokenTable:
+    """Token start offsets of one document (tokenized once); span token counts by binary search.
+
+    A span counts the tokens that start inside it, plus the token it starts in the middle of, which
+    matches tokenizing the span on its own for whitespace tokens and is within a token of it for
+    subword tokenizers.
+    """
+
+    __slots__ = ("text", "starts", "_estimate")
+
+    def __init__(self, result: TokenizationResult, *, estimate: bool = False) -> None:
+        self.text = result.text
+        self.starts = result.token_starts
+        self._estimate = estimate
+
+    def _partial(self, start: int, lo: int) -> bool:
+        # `start` lies inside the token before starts[lo] (not at a token start or in whitespace).
+        if lo == 0 or start >= len(self.text):
+            return False
+        if lo < len(self.starts) and self.starts[lo] == start:
+            return False
+        return not self.text[start].isspace()
+
+    def count(self, start: int, end: int) -> int:
+        if end <= start:
+            return 0
+        if self._estimate:
+            # Same ~4 chars/token heuristic as TextTokenizer.estimate_token_count.
+            return int(math.ceil((end - start) / 4.0))
+        lo = bisect.bisect_left(self.starts, start)
+        hi = bisect.bisect_left(self.starts, end, lo)
+        return hi - lo + int(self._partial(start, lo))
+
+    def boundaries(self, start: int, end: int) -> list[int]:
+        """Token start offsets within [start, end), beginning with `start` when it cuts a token."""
+        if self._estimate:
+            return list(range(start, end, 4))
+        lo = bisect.bisect_left(self.starts, start)
+        hi = bisect.bisect_left(self.starts, end, lo)
+        out = self.starts[lo:hi]
+        return [start, *out] if self._partial(start, lo) else out
+
+
 class Chunker:
-    def __init__(self, config: ChunkingConfig, tokenization: TokenizationConfig | None = None):
+    def __init__(
+        self,
+        config: ChunkingConfig,
+        tokenization: TokenizationConfig | None = None,
+        *,
+        tokenizer: TextTokenizer | None = None,
+    ):
         self.config = config
         self.tokenization = tokenization or TokenizationConfig()
-        self._tokenizer = TextTokenizer(self.tokenization)
+        self._tokenizer = tokenizer or TextTokenizer(self.tokenization)
 
     def chunk_file(self, file_path: str, content: str) -> list[Chunk]:
         return self.chunk_text(file_path, content, base_char_offset=0, base_line=1, starting_ordinal=0)
@@ -37,25 +87,31 @@ class Chunker:
         language = self._detect_language(file_path)
         parent_doc_id = file_path if bool(self.config.emit_parent_doc_id) else None
         nl_positions = [i for i, ch in enumerate(content) if ch == "\n"]
+        # Tokenize once; every span/unit token count below is a lookup in this table.
+        tokens = self._token_table(content)
 
         spans: list[tuple[int, int]]
         if strategy in {"ast", "hybrid"}:
-            spans = self._spans_code_aware(content, language=language, strategy=strategy)
+            spans = self._spans_code_aware(content, tokens, language=language, strategy=strategy)
             if not spans:
                 # Fallback behavior:
                 # - ast: preserve legacy behavior for non-code/parse failures (fixed_chars)
                 # - hybrid: prefer token windows when AST/braces cannot be used
-                spans = self._spans_fixed_tokens(content) if strategy == "hybrid" else self._spans_fixed_chars(content)
+                spans = (
+                    self._spans_fixed_tokens(content, tokens)
+                    if strategy == "hybrid"
+                    else self._spans_fixed_chars(content)
+                )
         elif strategy == "fixed_tokens":
-            spans = self._spans_fixed_tokens(content)
+            spans = self._spans_fixed_tokens(content, tokens)
         elif strategy == "recursive":
-            spans = self._spans_recursive(content)
+            spans = self._spans_recursive(content, tokens)
         elif strategy == "markdown":
-            spans = self._spans_markdown(content)
+            spans = self._spans_markdown(content, tokens)
         elif strategy == "sentence":
-            spans = self._spans_sentence(content)
+            spans = self._spans_sentence(content, tokens)
         elif strategy == "qa_blocks":
-            spans = self._spans_qa_blocks(content)
+            spans = self._spans_qa_blocks(content, tokens)
         else:
             spans = self._spans_fixed_chars(content)
 
@@ -63,6 +119,7 @@ class Chunker:
         allow_small_singleton = len(spans) == 1 and bool((content or "").strip())
 
         chunks: list[Chunk] = []
+        chunk_starts: list[int] = []
         ordinal = int(starting_ordinal)
         for start_char, end_char in spans:
             if end_char <= start_char:
@@ -72,7 +129,7 @@ class Chunker:
                 continue
             abs_start = int(base_char_offset) + int(start_char)
             start_line, end_line = self._line_span(nl_positions, start_char, end_char, base_line=int(base_line))
-            token_count = self._tokenizer.count_tokens(text)
+            token_count = tokens.count(start_char, end_char)
 
             meta: dict[str, Any] = {}
             meta["char_start"] = abs_start
@@ -94,13 +151,14 @@ class Chunker:
                     metadata=meta,
                 )
             )
+            chunk_starts.append(int(start_char))
             ordinal += 1
 
         # Hard safety: recursively split any over-limit chunk spans by tokens.
         max_tokens = int(self.config.max_chunk_tokens)
         if max_tokens > 0 and chunks:
             out: list[Chunk] = []
-            for ch in chunks:
+            for ch, start_char in zip(chunks, chunk_starts, strict=True):
                 if int(ch.token_count or 0) <= max_tokens:
                     out.append(ch)
                     continue
@@ -110,12 +168,20 @@ class Chunker:
                         max_tokens=max_tokens,
                         language=language,
                         parent_doc_id=parent_doc_id,
+                        tokens=tokens,
+                        offset=start_char,
                     )
                 )
             return out
 
         return chunks
 
+    def _token_table(self, content: str) -> _TokenTable:
+        if self.tokenization.estimate_only:
+            # Estimated counts/windows are computed from char offsets; no token list needed.
+            return _TokenTable(TokenizationResult(text=content, token_starts=[]), estimate=True)
+        return _TokenTable(self._tokenizer.tokenize_with_offsets(content))
+
     @staticmethod
     def _detect_language(file_path: str) -> str | None:
         if file_path.endswith(".py"):
@@ -143,7 +209,7 @@ class Chunker:
 
     def _pack_units_by_tokens(
         self,
-        content: str,
+        tokens: _TokenTable,
         units: list[tuple[int, int]],
         *,
         target_tokens: int,
@@ -158,8 +224,7 @@ class Chunker:
         for s, e in units:
             if e <= s:
                 continue
-            part = content[s:e]
-            part_tok = self._tokenizer.count_tokens(part)
+            part_tok = tokens.count(s, e)
             if cur_s is None:
                 cur_s, cur_e, cur_tok = int(s), int(e), int(part_tok)
                 continue
@@ -173,22 +238,24 @@ class Chunker:
             packed.append((int(cur_s), int(cur_e or cur_s)))
         return [(s, e) for s, e in packed if e > s]
 
-    def _spans_code_aware(self, content: str, *, language: str | None, strategy: str) -> list[tuple[int, int]]:
+    def _spans_code_aware(
+        self, content: str, tokens: _TokenTable, *, language: str | None, strategy: str
+    ) -> list[tuple[int, int]]:
         lang = str(language or "").strip().lower()
         if lang == "python":
-            spans = self._spans_python_ast(content)
+            spans = self._spans_python_ast(content, tokens)
             if spans:
                 return spans
             # For hybrid, allow fallback; for ast we'll let caller decide.
             return []
         if lang in {"typescript", "javascript"}:
-            spans = self._spans_top_level_brace_units(content)
+            spans = self._spans_top_level_brace_units(content, tokens)
             if spans:
                 return spans
             return []
         return []
 
-    def _spans_python_ast(self, content: str) -> list[tuple[int, int]]:
+    def _spans_python_ast(self, content: str, tokens: _TokenTable) -> list[tuple[int, int]]:
         import ast
 
         text = content or ""
@@ -249,7 +316,7 @@ class Chunker:
         if prev < len(text):
             units.append((int(prev), int(len(text))))
 
-        packed = self._pack_units_by_tokens(text, units, target_tokens=target_tokens)
+        packed = self._pack_units_by_tokens(tokens, units, target_tokens=target_tokens)
         if overlap <= 0:
             return packed
 
@@ -265,7 +332,7 @@ class Chunker:
             expanded.append((int(s2), int(e2)))
         return [(s, e) for s, e in expanded if e > s]
 
-    def _spans_top_level_brace_units(self, content: str) -> list[tuple[int, int]]:
+    def _spans_top_level_brace_units(self, content: str, tokens: _TokenTable) -> list[tuple[int, int]]:
         text = content or ""
         if not text.strip():
             return []
@@ -404,7 +471,7 @@ class Chunker:
         if prev < n:
             units.append((int(prev), int(n)))
 
-        packed = self._pack_units_by_tokens(text, units, target_tokens=target_tokens)
+        packed = self._pack_units_by_tokens(tokens, units, target_tokens=target_tokens)
         return packed
 
     @staticmethod
@@ -437,22 +504,26 @@ class Chunker:
             start = max(0, end - overlap)
         return spans
 
-    def _spans_fixed_tokens(self, content: str) -> list[tuple[int, int]]:
-        r = self._tokenizer.tokenize_with_offsets(content)
+    def _spans_fixed_tokens(
+        self, content: str, tokens: _TokenTable, *, start: int = 0, end: int | None = None
+    ) -> list[tuple[int, int]]:
+        """Token windows over content[start:end] (default: all of it), as absolute char spans."""
+        end = len(content) if end is None else int(end)
         max_hard = int(self.tokenization.max_tokens_per_chunk_hard)
         target = int(min(int(self.config.target_tokens), max_hard))
         overlap = int(min(int(self.config.overlap_tokens), max(0, target - 1)))
 
-        n = len(r.token_starts)
+        starts = tokens.boundaries(start, end)
+        n = len(starts)
         if n == 0:
-            return [(0, len(content))] if content.strip() else []
+            return [(start, end)] if content[start:end].strip() else []
 
         spans: list[tuple[int, int]] = []
         start_tok = 0
         while start_tok < n:
             end_tok = min(n, start_tok + target)
-            start_char = int(r.token_starts[start_tok])
-            end_char = int(r.token_starts[end_tok]) if end_tok < n else len(r.text)
+            start_char = int(starts[start_tok])
+            end_char = int(starts[end_tok]) if end_tok < n else end
             spans.append((start_char, end_char))
             if end_tok >= n:
                 break
@@ -466,11 +537,11 @@ class Chunker:
         end: int,
         sep: str,
         keep: str,
+        tokens: _TokenTable | None = None,
     ) -> list[tuple[int, int]]:
         if sep == "":
             # Fallback to token windows for hard splits.
-            tmp = content[start:end]
-            return [(start + s, start + e) for s, e in self._spans_fixed_tokens(tmp)]
+            return self._spans_fixed_tokens(content, tokens or self._token_table(content), start=start, end=end)
 
         if keep == "prefix":
             # Keep separators at the beginning of the *next* span.
@@ -515,36 +586,36 @@ class Chunker:
             result_spans.append((i, int(end)))
         return [(s, e) for s, e in result_spans if e > s]
 
-    def _spans_recursive(self, content: str) -> list[tuple[int, int]]:
+    def _spans_recursive(
+        self, content: str, tokens: _TokenTable, *, start: int = 0, end: int | None = None
+    ) -> list[tuple[int, int]]:
         seps = list(self.config.separators or ["\n\n", "\n", ". ", " ", ""])
         keep = str(self.config.separator_keep or "suffix").strip().lower()
         max_depth = int(self.config.recursive_max_depth)
         target = int(self.config.target_tokens)
 
-        def rec(start: int, end: int, depth: int) -> list[tuple[int, int]]:
-            if end <= start:
+        def rec(span_start: int, span_end: int, depth: int) -> list[tuple[int, int]]:
+            if span_end <= span_start:
                 return []
-            txt = content[start:end]
             if depth >= max_depth:
-                return [(start, end)]
-            if self._tokenizer.count_tokens(txt) <= target:
-                return [(start, end)]
+                return [(span_start, span_end)]
+            if tokens.count(span_start, span_end) <= target:
+                return [(span_start, span_end)]
             sep = seps[min(depth, len(seps) - 1)]
-            pieces = self._split_span_by_separator(content, start, end, sep, keep)
+            pieces = self._split_span_by_separator(content, span_start, span_end, sep, keep, tokens)
             out: list[tuple[int, int]] = []
             for s, e in pieces:
                 out.extend(rec(s, e, depth + 1))
             return out
 
-        atomic = rec(0, len(content), 0)
+        atomic = rec(int(start), len(content) if end is None else int(end), 0)
 
         packed: list[tuple[int, int]] = []
         cur_s: int | None = None
         cur_e: int | None = None
         cur_tok = 0
         for s, e in atomic:
-            part = content[s:e]
-            part_tok = self._tokenizer.count_tokens(part)
+            part_tok = tokens.count(s, e)
             if cur_s is None:
                 cur_s, cur_e, cur_tok = int(s), int(e), int(part_tok)
                 continue
@@ -558,24 +629,23 @@ class Chunker:
             packed.append((int(cur_s), int(cur_e or cur_s)))
         return packed
 
-    def _spans_markdown(self, content: str) -> list[tuple[int, int]]:
+    def _spans_markdown(self, content: str, tokens: _TokenTable) -> list[tuple[int, int]]:
         import re
 
         max_level = int(self.config.markdown_max_heading_level)
         rx = re.compile(rf"^(#{{1,{max_level}}})\s+.+$", re.MULTILINE)
         hits = [m.start() for m in rx.finditer(content)]
         if not hits:
-            return self._spans_recursive(content)
+            return self._spans_recursive(content, tokens)
         cuts = sorted(set([0, *hits, len(content)]))
         spans: list[tuple[int, int]] = []
         for a, b in zip(cuts, cuts[1:], strict=False):
             if b <= a:
                 continue
-            for s, e in self._spans_recursive(content[a:b]):
-                spans.append((int(a) + int(s), int(a) + int(e)))
+            spans.extend(self._spans_recursive(content, tokens, start=a, end=b))
         return [(s, e) for s, e in spans if e > s]
 
-    def _spans_sentence(self, content: str) -> list[tuple[int, int]]:
+    def _spans_sentence(self, content: str, tokens: _TokenTable) -> list[tuple[int, int]]:
         import re
 
         rx = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
@@ -595,8 +665,7 @@ class Chunker:
         cur_e: int | None = None
         cur_tok = 0
         for s, e in parts:
-            part = content[s:e]
-            part_tok = self._tokenizer.count_tokens(part)
+            part_tok = tokens.count(s, e)
             if cur_s is None:
                 cur_s, cur_e, cur_tok = int(s), int(e), int(part_tok)
                 continue
@@ -610,13 +679,13 @@ class Chunker:
             spans.append((int(cur_s), int(cur_e or cur_s)))
         return spans
 
-    def _spans_qa_blocks(self, content: str) -> list[tuple[int, int]]:
+    def _spans_qa_blocks(self, content: str, tokens: _TokenTable) -> list[tuple[int, int]]:
         import re
 
         rx = re.compile(r"^(?:Q:|A:)", re.MULTILINE)
         hits = [m.start() for m in rx.finditer(content)]
         if not hits:
-            return self._spans_sentence(content)
+            return self._spans_sentence(content, tokens)
         cuts = sorted(set([0, *hits, len(content)]))
         parts = [(a, b) for a, b in zip(cuts, cuts[1:], strict=False) if b > a]
         target = int(self.config.target_tokens)
@@ -626,8 +695,7 @@ class Chunker:
         cur_e: int | None = None
         cur_tok = 0
         for s, e in parts:
-            part = content[s:e]
-            part_tok = self._tokenizer.count_tokens(part)
+            part_tok = tokens.count(s, e)
             if cur_s is None:
                 cur_s, cur_e, cur_tok = int(s), int(e), int(part_tok)
                 continue
@@ -648,10 +716,19 @@ class Chunker:
         max_tokens: int,
         language: str | None,
         parent_doc_id: str | None,
+        tokens: _TokenTable | None = None,
+        offset: int = 0,
     ) -> list[Chunk]:
+        """Split an over-limit chunk into `max_tokens` windows.
+
+        `tokens` is the document's table with the chunk starting at `offset`; without it the chunk
+        text is tokenized on its own.
+        """
         text = chunk.content or ""
-        r = self._tokenizer.tokenize_with_offsets(text)
-        n = len(r.token_starts)
+        if tokens is None:
+            tokens, offset = self._token_table(text), 0
+        starts = [s - offset for s in tokens.boundaries(offset, offset + len(text))]
+        n = len(starts)
         if n <= max_tokens:
             return [chunk]
 
@@ -659,8 +736,8 @@ class Chunker:
         start_tok = 0
         while start_tok < n:
             end_tok = min(n, start_tok + max_tokens)
-            start_char = int(r.token_starts[start_tok])
-            end_char = int(r.token_starts[end_tok]) if end_tok < n else len(r.text)
+            start_char = int(starts[start_tok])
+            end_char = int(starts[end_tok]) if end_tok < n else len(text)
             spans.append((start_char, end_char))
             start_tok = end_tok
 
@@ -676,7 +753,7 @@ class Chunker:
                 continue
             abs_start = base_char + int(s)
             start_line, end_line = self._line_span(nl_positions, s, e, base_line=base_line)
-            tok_count = self._tokenizer.count_tokens(sub)
+            tok_count = tokens.count(offset + s, offset + e)
             meta = dict(chunk.metadata or {})
             meta["char_start"] = abs_start
             meta["char_end"] = base_char + int(e)
@@ -4,16 +4,57 @@ import asyncio
 import hashlib
 import math
 import re
-import time
 from functools import lru_cache
-from typing import Any
+from typing import Any, Protocol
+
+import numpy as np
+import numpy.typing as npt
 
 from server.indexing.tokenizer import TextTokenizer
 from server.models.index import Chunk
 from server.models.tribrid_config_model import EmbeddingConfig, TokenizationConfig
+from server.observability.metrics import EMBEDDING_CACHE_REQUESTS_TOTAL
 
 _TOKEN_RE = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]{1,63}")
 
+EmbeddingMatrix = npt.NDArray[np.float32]
+
+
+def _as_matrix(vecs: list[list[float]], dim: int) -> EmbeddingMatrix:
+    """Row-per-text float32 matrix, C-contiguous (what the pgvector writer consumes)."""
+    if not vecs:
+        return np.empty((0, dim), dtype=np.float32)
+    return np.ascontiguousarray(np.asarray(vecs, dtype=np.float32))
+
+
+def token_budget_batches(lengths: list[int], *, max_tokens: int, max_items: int) -> list[list[int]]:
+    """Group text indices into batches of similar length, longest first.
+
+    A batch is padded to its longest text, so it costs len(batch) * longest tokens; batches are
+    filled up to `max_tokens` of that padded cost (and at most `max_items` texts). A text longer
+    than the budget gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: list[list[int]] = []
+    current: list[int] = []
+    for i in order:
+        # Sorted descending: the first text of a batch is its longest.
+        if current and (len(current) >= max_items or (len(current) + 1) * max(1, lengths[current[0]]) > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingCacheStore(Protocol):
+    """Content-addressed embedding storage (PostgresClient implements this)."""
+
+    async def get_cached_embeddings(self, cache_keys: list[str]) -> dict[str, list[float]]: ...
+
+    async def put_cached_embeddings(self, entries: list[tuple[str, list[float]]]) -> int: ...
+
 
 class Embedder:
     """Deterministic local embedder (placeholder).
@@ -23,13 +64,21 @@ class Embedder:
     tests and local dev without external dependencies.
     """
 
-    def __init__(self, config: EmbeddingConfig, tokenization: TokenizationConfig | None = None):
+    def __init__(
+        self,
+        config: EmbeddingConfig,
+        tokenization: TokenizationConfig | None = None,
+        *,
+        cache_store: EmbeddingCacheStore | None = None,
+    ):
         self.config = config
         self.tokenization = tokenization or TokenizationConfig()
+        self.cache_store = cache_store
         self._tokenizer = TextTokenizer(self.tokenization)
         # Deterministic embeddings must match the configured dimensionality so that
         # Postgres pgvector storage and stats are consistent across the system.
         self.dim = max(32, int(getattr(config, "embedding_dim", 256) or 256))
+        self._openai: Any = None
 
     def _prepare_text(self, text: str) -> str:
         t = str(text or "")
@@ -60,16 +109,14 @@ class Embedder:
         return vec
 
     async def embed(self, text: str) -> list[float]:
-        t = self._prepare_text(text)
         backend = str(getattr(self.config, "embedding_backend", "deterministic") or "deterministic").strip().lower()
         if backend != "provider":
-            return await asyncio.to_thread(self._embed_sync, t)
+            return await asyncio.to_thread(self._embed_sync, self._prepare_text(text))
 
         provider = str(getattr(self.config, "embedding_type", "") or "").strip().lower()
-        if provider == "openai":
-            return (await self.embed_batch([t]))[0]
-        if provider in {"local", "huggingface"}:
-            return (await self.embed_batch([t]))[0]
+        if provider in {"openai", "local", "huggingface"}:
+            # Raw text: embed_batch applies prefix/suffix and truncation (exactly once).
+            return (await self.embed_batch([text]))[0]
         raise RuntimeError(f"Unsupported embedding provider: {provider}")
 
     async def embed_batch(self, texts: list[str]) -> list[list[float]]:
@@ -82,17 +129,98 @@ class Embedder:
         if provider == "openai":
             return await self._embed_openai(prepared)
         if provider in {"local", "huggingface"}:
-            mode = str(getattr(self.config, "contextual_chunk_embeddings", "off") or "off").strip().lower()
-            if mode == "late_chunking_local_only":
+            if not self._uses_sentence_transformers():
                 return await self._embed_local_hf_mean_pool(prepared)
-            return await self._embed_local_sentence_transformers(prepared)
+            return (await self._embed_local_sentence_transformers(prepared)).tolist()  # type: ignore[no-any-return]
         raise RuntimeError(f"Unsupported embedding provider: {provider}")
 
+    def _uses_sentence_transformers(self) -> bool:
+        backend = str(getattr(self.config, "embedding_backend", "deterministic") or "deterministic").strip().lower()
+        provider = str(getattr(self.config, "embedding_type", "") or "").strip().lower()
+        mode = str(getattr(self.config, "contextual_chunk_embeddings", "off") or "off").strip().lower()
+        return backend == "provider" and provider in {"local", "huggingface"} and mode != "late_chunking_local_only"
+
+    async def embed_batch_array(self, texts: list[str], *, token_counts: list[int] | None = None) -> EmbeddingMatrix:
+        """`embed_batch` as one C-contiguous float32 [len(texts), dim] matrix.
+
+        Local sentence-transformers embeddings stay in NumPy end to end (no per-value floats).
+        `token_counts` (e.g. the chunker's per-chunk counts; 0 = unknown) size the local batches
+        without tokenizing those texts again.
+        """
+        if self._uses_sentence_transformers():
+            return await self._embed_local_sentence_transformers(
+                [self._prepare_text(t) for t in texts or []], token_counts=token_counts
+            )
+        return _as_matrix(await self.embed_batch(texts), self.dim)
+
     async def embed_chunks(self, chunks: list[Chunk]) -> list[Chunk]:
         if not chunks:
             return []
-        embeddings = await self.embed_batch([c.content for c in chunks])
-        return [c.model_copy(update={"embedding": emb}) for c, emb in zip(chunks, embeddings, strict=True)]
+        vecs = (await self.embed_chunks_array(chunks)).tolist()
+        return [c.model_copy(update={"embedding": emb}) for c, emb in zip(chunks, vecs, strict=True)]
+
+    async def embed_chunks_array(self, chunks: list[Chunk]) -> EmbeddingMatrix:
+        """Embeddings of `chunks` as rows of a float32 matrix (cache-aware, like `embed_chunks`)."""
+        if not chunks:
+            return np.empty((0, self.dim), dtype=np.float32)
+        texts = [c.content for c in chunks]
+        counts = [int(c.token_count or 0) for c in chunks]
+        if not self._cache_enabled():
+            return await self.embed_batch_array(texts, token_counts=counts)
+
+        assert self.cache_store is not None
+        keys = [self.cache_key(t) for t in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            found = await self.cache_store.get_cached_embeddings(unique_keys)
+        except Exception:
+            # Best-effort: a cache outage must never block indexing.
+            found = {}
+        found = {k: v for k, v in found.items() if len(v) == self.dim}
+
+        # Embed each distinct missing text once, then write back only those.
+        miss_index: dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in found and key not in miss_index:
+                miss_index[key] = i
+        EMBEDDING_CACHE_REQUESTS_TOTAL.labels(result="hit").inc(len(unique_keys) - len(miss_index))
+        EMBEDDING_CACHE_REQUESTS_TOTAL.labels(result="miss").inc(len(miss_index))
+        rows: dict[str, EmbeddingMatrix | list[float]] = dict(found)
+        if miss_index:
+            miss_vecs = await self.embed_batch_array(
+                [texts[i] for i in miss_index.values()], token_counts=[counts[i] for i in miss_index.values()]
+            )
+            rows.update(zip(miss_index, miss_vecs, strict=True))
+            try:
+                await self.cache_store.put_cached_embeddings(list(zip(miss_index, miss_vecs.tolist(), strict=True)))
+            except Exception:
+                pass
+        out = np.empty((len(chunks), self.dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            out[i] = rows[key]
+        return out
+
+    def _cache_enabled(self) -> bool:
+        if self.cache_store is None or int(getattr(self.config, "embedding_cache_enabled", 0) or 0) != 1:
+            return False
+        # Deterministic embeddings are cheaper to recompute than to look up.
+        backend = str(getattr(self.config, "embedding_backend", "deterministic") or "deterministic").strip().lower()
+        return backend == "provider"
+
+    def cache_key(self, text: str) -> str:
+        """Content-addressed cache key for one input text under the current embedding config."""
+        prepared = self._prepare_text(text)
+        parts = (
+            str(getattr(self.config, "embedding_type", "") or "").strip().lower(),
+            str(getattr(self.config, "effective_model", "") or ""),
+            str(self.dim),
+            str(getattr(self.config, "embed_text_prefix", "") or ""),
+            str(getattr(self.config, "embed_text_suffix", "") or ""),
+            str(getattr(self.config, "input_truncation", "truncate_end") or "truncate_end"),
+            str(getattr(self.config, "contextual_chunk_embeddings", "off") or "off"),
+            hashlib.sha256(prepared.encode("utf-8")).hexdigest(),
+        )
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
 
     # ---------------------------------------------------------------------
     # Provider backends
@@ -108,7 +236,10 @@ class Embedder:
         timeout_s = float(getattr(self.config, "embedding_timeout", 30) or 30)
         retries = int(getattr(self.config, "embedding_retry_max", 3) or 3)
 
-        client = AsyncOpenAI()
+        # One client (and its connection pool) per embedder; shared query embedders reuse it.
+        if self._openai is None:
+            self._openai = AsyncOpenAI()
+        client = self._openai
         last_err: Exception | None = None
         for attempt in range(max(1, retries)):
             try:
@@ -142,38 +273,61 @@ class Embedder:
 
         return SentenceTransformer(model_name)
 
-    async def _embed_local_sentence_transformers(self, texts: list[str]) -> list[list[float]]:
+    @staticmethod
+    def _token_lengths(model: Any, texts: list[str], known: list[int] | None = None) -> list[int]:
+        """Token count per text (capped at the model's max sequence length).
+
+        Counts in `known` (> 0) are reused as is; only the remaining texts go through the model's
+        own tokenizer.
+        """
+        cap = int(getattr(model, "max_seq_length", 0) or 0)
+        lengths = [max(0, int(n)) for n in known] if known is not None and len(known) == len(texts) else [0] * len(texts)
+        missing = [i for i, n in enumerate(lengths) if n <= 0]
+        if missing:
+            try:
+                ids = model.tokenizer(
+                    [texts[i] for i in missing], add_special_tokens=True, truncation=False, verbose=False
+                )["input_ids"]
+                for i, x in zip(missing, ids, strict=True):
+                    lengths[i] = len(x)
+            except Exception:
+                for i in missing:
+                    lengths[i] = len(texts[i]) // 4 + 2
+        return [min(n, cap) for n in lengths] if cap > 0 else lengths
+
+    async def _embed_local_sentence_transformers(
+        self, texts: list[str], *, token_counts: list[int] | None = None
+    ) -> EmbeddingMatrix:
         model_name = str(getattr(self.config, "embedding_model_local", "") or "").strip()
         if not model_name:
             raise RuntimeError("embedding_model_local is required for local embeddings")
 
-        batch_size = int(getattr(self.config, "embedding_batch_size", 32) or 32)
+        batch_size = max(1, int(getattr(self.config, "embedding_batch_size", 32) or 32))
+        max_tokens = max(1, int(getattr(self.config, "embedding_batch_max_tokens", 16384) or 16384))
         model = self._load_sentence_transformer(model_name)
 
-        def _run() -> list[list[float]]:
-            vecs = model.encode(
-                texts,
-                batch_size=max(1, batch_size),
-                normalize_embeddings=True,
-                convert_to_numpy=False,
-                show_progress_bar=False,
-            )
-            out: list[list[float]] = []
-            for v in vecs:
-                try:
-                    arr = [float(x) for x in v]
-                except Exception:
-                    arr = [float(x) for x in list(v)]
-                out.append(arr)
+        def _run() -> EmbeddingMatrix:
+            out = np.empty((len(texts), self.dim), dtype=np.float32)
+            if not texts:
+                return out
+            # Length-sorted, token-budgeted batches: little padding, and long texts in small batches.
+            lengths = self._token_lengths(model, texts, token_counts)
+            for idxs in token_budget_batches(lengths, max_tokens=max_tokens, max_items=batch_size):
+                vecs = model.encode(
+                    [texts[i] for i in idxs],
+                    batch_size=len(idxs),
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                )
+                vecs = np.asarray(vecs, dtype=np.float32)
+                if vecs.ndim != 2 or vecs.shape[1] != self.dim:
+                    got = vecs.shape[-1] if vecs.ndim else 0
+                    raise RuntimeError(f"Embedding dimension mismatch ({got} != {self.dim}). Reindex after updating embedding_dim.")
+                out[idxs] = vecs
             return out
 
-        t0 = time.perf_counter()
-        vecs = await asyncio.to_thread(_run)
-        _ = t0
-        for v in vecs:
-            if len(v) != self.dim:
-                raise RuntimeError(f"Embedding dimension mismatch ({len(v)} != {self.dim}). Reindex after updating embedding_dim.")
-        return vecs
+        return await asyncio.to_thread(_run)
 
     @staticmethod
     @lru_cache(maxsize=4)
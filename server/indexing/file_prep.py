@@ -0,0 +1,78 @@
+"""Per-file text extraction and chunking, run in the indexing worker pool.
+
+Extraction (pypdf, openpyxl, pyarrow, ...) and chunking are CPU-bound Python: run on the server's
+threads they hold the GIL and stall the event loop (search, chat, SSE progress) for as long as a
+large PDF takes. `prepare_file` does both for one file in a worker process, bounded by a time
+limit and an address-space budget, and returns the chunks (plus the text when the caller needs it,
+e.g. for the code graph or late chunking).
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from server.indexing.chunker import Chunker
+from server.indexing.process_pool import memory_limit, time_limit
+from server.indexing.text_extractors import extract_text_for_path
+from server.models.index import Chunk
+from server.models.tribrid_config_model import ChunkingConfig, TokenizationConfig
+
+
+class FilePrepareTimeoutError(TimeoutError):
+    """Extracting and chunking a file took longer than `indexing.prepare_timeout_s`."""
+
+
+@dataclass
+class PreparedFile:
+    chunks: list[Chunk]
+    # Full extracted text, only when requested.
+    text: str | None = None
+    # NUL bytes in the extracted text: nothing to index.
+    binary: bool = False
+    read_seconds: float = 0.0
+    chunk_seconds: float = 0.0
+
+
+def read_file_text(abs_path: Path, extract_kwargs: dict[str, Any]) -> str:
+    """Extracted text for rich formats (PDF, XLSX, Parquet, ...), else the file decoded as UTF-8."""
+    content = extract_text_for_path(abs_path, **extract_kwargs)
+    if content is None:
+        content = abs_path.read_text(encoding="utf-8", errors="ignore")
+    return content
+
+
+def prepare_file(
+    abs_path: str,
+    rel_path: str,
+    chunking: ChunkingConfig | None,
+    tokenization: TokenizationConfig,
+    extract_kwargs: dict[str, Any],
+    want_text: bool,
+    timeout_s: float,
+    memory_limit_mb: int,
+) -> PreparedFile:
+    """Extract and chunk one file (`chunking=None`: extract only).
+
+    Raises FilePrepareTimeoutError past `timeout_s` and MemoryError past `memory_limit_mb` when run
+    in a worker process (both are no-ops in the server process).
+    """
+    with (
+        time_limit(timeout_s, lambda: FilePrepareTimeoutError(f"preparing {rel_path} exceeded {timeout_s:g}s")),
+        memory_limit(memory_limit_mb),
+    ):
+        t0 = time.perf_counter()
+        content = read_file_text(Path(abs_path), extract_kwargs)
+        t1 = time.perf_counter()
+        if "\x00" in content:
+            return PreparedFile(chunks=[], binary=True, read_seconds=t1 - t0)
+        chunks = Chunker(chunking, tokenization).chunk_file(rel_path, content) if chunking is not None else []
+        t2 = time.perf_counter()
+    return PreparedFile(
+        chunks=chunks,
+        text=content if want_text else None,
+        read_seconds=t1 - t0,
+        chunk_seconds=t2 - t1,
+    )
@@ -0,0 +1,209 @@
+"""Per-file fingerprints for incremental indexing.
+
+A fingerprint records (size, mtime, content hash) for every indexed file plus a hash of the
+config sections that shape chunk content. An incremental run only reprocesses files whose
+fingerprint changed:
+
+- size + mtime unchanged  -> skipped without reading the file
+- stat changed, same hash -> skipped; stored stat is refreshed so the next run is stat-only again
+- otherwise               -> (re)indexed; stale chunks/graph nodes are purged first
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any
+
+from server.models.tribrid_config_model import TriBridConfig
+
+# IndexingConfig fields that do not change what gets stored for a file.
+_INDEXING_FIELDS_IGNORED = {
+    "postgres_url",
+    "table_name",
+    "collection_suffix",
+    "repo_path",
+    "indexing_batch_size",
+    "indexing_workers",
+    "prepare_workers",
+    "prepare_timeout_s",
+    "prepare_memory_limit_mb",
+    "delete_batch_size",
+    "incremental_indexing",
+    "out_dir_base",
+    "rag_out_base",
+    "repos_file",
+}
+
+# EmbeddingConfig fields that only affect throughput, not the stored vectors.
+_EMBEDDING_FIELDS_IGNORED = {
+    "embedding_batch_size",
+    "embedding_cache_max_age_days",
+    "embedding_cache_max_entries",
+    "late_chunking_batch_windows",
+    "late_chunking_cpu_threads",
+    "embedding_batch_max_tokens",
+    "query_embed_coalesce_window_ms",
+    "query_embed_coalesce_max_items",
+}
+
+# GraphIndexingConfig fields that tune write/parse throughput and caching, not the stored graph.
+_GRAPH_INDEXING_FIELDS_IGNORED = {
+    "lexical_write_batch_docs",
+    "lexical_write_batch_chunks",
+    "lexical_write_concurrency",
+    "ast_parse_workers",
+    "ast_parse_timeout_s",
+    "ast_parse_cache_enabled",
+    "ast_parse_cache_dir",
+}
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    file_path: str
+    size_bytes: int
+    mtime_ns: int
+    content_hash: str
+    config_hash: str
+    chunk_count: int = 0
+    token_count: int = 0
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> FileFingerprint:
+        return cls(
+            file_path=str(row["file_path"]),
+            size_bytes=int(row.get("size_bytes") or 0),
+            mtime_ns=int(row.get("mtime_ns") or 0),
+            content_hash=str(row.get("content_hash") or ""),
+            config_hash=str(row.get("config_hash") or ""),
+            chunk_count=int(row.get("chunk_count") or 0),
+            token_count=int(row.get("token_count") or 0),
+        )
+
+
+@dataclass
+class IncrementalPlan:
+    """What an indexing run has to do, relative to the previously stored fingerprints."""
+
+    # rel_path -> fingerprint to store once the file is (re)indexed (counts filled in later)
+    to_index: dict[str, FileFingerprint] = field(default_factory=dict)
+    # rel_path -> stored fingerprint of files that need no work
+    unchanged: dict[str, FileFingerprint] = field(default_factory=dict)
+    # Unchanged content whose stat moved (touch, checkout): refresh the stored stat only
+    refreshed: list[FileFingerprint] = field(default_factory=list)
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    oversized: list[tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def purge_paths(self) -> list[str]:
+        """Files whose stored chunks, FTS rows and graph nodes are stale."""
+        return sorted({*self.changed, *self.removed})
+
+
+def hash_file(path: Path, *, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def index_config_hash(cfg: TriBridConfig) -> str:
+    """Hash of the config that determines stored chunks; any change invalidates every fingerprint."""
+    parts = {
+        "chunking": cfg.chunking.model_dump(mode="json", warnings=False),
+        "tokenization": cfg.tokenization.model_dump(mode="json", warnings=False),
+        "embedding": cfg.embedding.model_dump(mode="json", warnings=False, exclude=_EMBEDDING_FIELDS_IGNORED),
+        "graph_indexing": cfg.graph_indexing.model_dump(mode="json", warnings=False, exclude=_GRAPH_INDEXING_FIELDS_IGNORED),
+        "indexing": cfg.indexing.model_dump(mode="json", warnings=False, exclude=_INDEXING_FIELDS_IGNORED),
+    }
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def plan_incremental(
+    entries: Iterable[tuple[str, Path]],
+    previous: dict[str, FileFingerprint],
+    *,
+    config_hash: str,
+    max_file_bytes: int,
+    hasher: Callable[[Path], str] | None = hash_file,
+    baseline: bool = False,
+) -> IncrementalPlan:
+    """Classify walked files against stored fingerprints.
+
+    Blocking (stat + hashing); run it in a worker thread from async code. Files that cannot be
+    stat'ed or read, or exceed `max_file_bytes`, count as absent: if they were indexed before
+    they are reported as removed so their stale chunks get purged.
+
+    `hasher=None` records stat-only fingerprints (empty content hash) without reading any file:
+    for full runs that reprocess everything anyway. A later incremental run still skips such a
+    file while its size and mtime match; once they move, the file is reindexed.
+
+    `baseline=True` reports every indexable file as changed rather than added: the corpus may
+    still hold rows written before fingerprints existed, so each file's old chunks are purged
+    before it is reindexed.
+    """
+    plan = IncrementalPlan()
+    present: set[str] = set()
+    for rel_path, abs_path in entries:
+        try:
+            st = abs_path.stat()
+        except OSError:
+            continue
+        size_bytes = int(st.st_size)
+        mtime_ns = int(st.st_mtime_ns)
+        if size_bytes > max_file_bytes:
+            plan.oversized.append((rel_path, size_bytes))
+            continue
+
+        prev = previous.get(rel_path)
+        if (
+            prev is not None
+            and prev.config_hash == config_hash
+            and prev.size_bytes == size_bytes
+            and prev.mtime_ns == mtime_ns
+        ):
+            present.add(rel_path)
+            plan.unchanged[rel_path] = prev
+            continue
+
+        content_hash = ""
+        if hasher is not None:
+            try:
+                content_hash = hasher(abs_path)
+            except OSError:
+                continue
+        present.add(rel_path)
+
+        if (
+            content_hash
+            and prev is not None
+            and prev.config_hash == config_hash
+            and prev.content_hash == content_hash
+        ):
+            fresh = replace(prev, size_bytes=size_bytes, mtime_ns=mtime_ns)
+            plan.unchanged[rel_path] = fresh
+            plan.refreshed.append(fresh)
+            continue
+
+        plan.to_index[rel_path] = FileFingerprint(
+            file_path=rel_path,
+            size_bytes=size_bytes,
+            mtime_ns=mtime_ns,
+            content_hash=content_hash,
+            config_hash=config_hash,
+        )
+        (plan.changed if prev is not None or baseline else plan.added).append(rel_path)
+
+    plan.removed = sorted(p for p in previous if p not in present)
+    return plan
@@ -1,13 +1,34 @@
 from __future__ import annotations
 
 import ast
+import asyncio
 import hashlib
+import time
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from pathlib import Path
 
 from server.db.neo4j import Neo4jClient
+from server.indexing.graph_parse_cache import GraphParseCache, parse_cache_key
+from server.indexing.process_pool import ProcessPoolUnavailableError, run_in_process, time_limit
+from server.indexing.tree_sitter_graph import (
+    parse_tree_sitter_source,
+    tree_sitter_available,
+    tree_sitter_language,
+)
 from server.models.graph import Entity, GraphStats, Relationship
 from server.models.index import Chunk
-from server.models.tribrid_config_model import GraphIndexingConfig
+from server.models.tribrid_config_model import GraphIndexingConfig, GraphStorageConfig
+from server.observability.metrics import INDEX_STAGE_ERRORS_TOTAL, INDEX_STAGE_LATENCY_SECONDS
+
+# Bump when extraction output changes so cached parse results are not reused.
+GRAPH_PARSE_VERSION = 1
+# Extra time a pool worker gets to report its own timeout before the caller gives up on it.
+_POOL_TIMEOUT_GRACE_S = 5.0
+
+
+class ParseTimeoutError(TimeoutError):
+    """A file took longer than `ast_parse_timeout_s` to parse."""
 
 
 @dataclass(frozen=True)
@@ -17,6 +38,16 @@ class _ParsedEntity:
     parent_id: str | None
 
 
+@dataclass(frozen=True)
+class EdgeWeights:
+    """AST edge weights (from GraphIndexingConfig), passed by value to parse workers."""
+
+    contains: float = 1.0
+    inherits: float = 1.0
+    imports: float = 1.0
+    calls: float = 1.0
+
+
 class GraphBuilder:
     """Build a lightweight code knowledge graph and store it in Neo4j.
 
@@ -26,243 +57,61 @@ class GraphBuilder:
     - Leaves deeper semantic extraction (LLM descriptions, cross-file resolution) for later
     """
 
-    def __init__(self, neo4j: Neo4jClient | None, cfg: GraphIndexingConfig | None = None):
+    def __init__(
+        self,
+        neo4j: Neo4jClient | None,
+        cfg: GraphIndexingConfig | None = None,
+        storage_cfg: GraphStorageConfig | None = None,
+        *,
+        parse_job: Callable[..., tuple[list[Entity], list[Relationship]]] | None = None,
+    ):
         self.neo4j = neo4j
         # Use LAW defaults when not provided (unit tests may pass cfg=None).
         self.cfg = cfg or GraphIndexingConfig()
+        self.storage_cfg = storage_cfg or GraphStorageConfig()
+        # Parser for one file, called as (repo_id, file_path, content, weights, timeout_s, tree_sitter).
+        # Runs in worker processes when ast_parse_workers > 0, so it must be a module-level function.
+        self.parse_job = parse_job or _parse_source_job
+
+    def stream(self, repo_id: str, *, batch_size: int = 100) -> GraphBuildStream:
+        """Start an incremental build: feed files with `add_file`, then call `finish`."""
+        if self.neo4j is None:
+            raise ValueError("neo4j client is required to build and persist a graph")
+        return GraphBuildStream(self, repo_id, batch_size=batch_size)
 
     async def build_graph_for_files(
         self,
         repo_id: str,
-        files: list[tuple[str, str]],
+        files: Iterable[tuple[str, str]],
         *,
         batch_size: int = 100,
+        changed_files: Iterable[str] | None = None,
     ) -> GraphStats:
-        if self.neo4j is None:
-            raise ValueError("neo4j client is required to build and persist a graph")
-        bs = max(1, int(batch_size))
-        entities_batch: list[Entity] = []
-        rels_batch: list[Relationship] = []
-
-        for file_path, content in files:
-            file_entities, file_rels = self._parse_python_file(repo_id, file_path, content)
-            entities_batch.extend(file_entities)
-            rels_batch.extend(file_rels)
+        """Upsert entities/relationships for `files`, then refresh communities.
 
-            if len(entities_batch) >= bs or len(rels_batch) >= bs:
-                await self.neo4j.upsert_entities(repo_id, entities_batch)
-                await self.neo4j.upsert_relationships(repo_id, rels_batch)
-                entities_batch.clear()
-                rels_batch.clear()
-
-        if entities_batch:
-            await self.neo4j.upsert_entities(repo_id, entities_batch)
-        if rels_batch:
-            await self.neo4j.upsert_relationships(repo_id, rels_batch)
-
-        await self.neo4j.detect_communities(repo_id)
-        return await self.neo4j.get_graph_stats(repo_id)
+        `changed_files` (incremental runs) limits community recomputation to the communities those
+        files touch; None recomputes all of them.
+        """
+        stream = self.stream(repo_id, batch_size=batch_size)
+        try:
+            for file_path, content in files:
+                await stream.add_file(file_path, content)
+        except BaseException:
+            stream.cancel()
+            raise
+        return await stream.finish(changed_files=changed_files)
 
     def _parse_python_file(self, repo_id: str, file_path: str, content: str) -> tuple[list[Entity], list[Relationship]]:
         """Parse a Python file and return entities + relationships."""
-        module_id = self._stable_id(repo_id, file_path, "module", file_path)
-        entities: dict[str, Entity] = {
-            module_id: Entity(
-                entity_id=module_id,
-                name=file_path,
-                entity_type="module",
-                file_path=file_path,
-                description=None,
-                properties={},
-            )
-        }
-        rels: list[Relationship] = []
-
-        try:
-            tree = ast.parse(content or "", filename=file_path)
-        except Exception:
-            return list(entities.values()), rels
-
-        builder = self
-
-        class Visitor(ast.NodeVisitor):
-            def __init__(self) -> None:
-                self.current_class_id: str | None = None
-                self.current_function_id: str | None = None
-
-            def visit_ClassDef(self, node: ast.ClassDef) -> None:
-                class_id = builder._stable_id(repo_id, file_path, "class", node.name)
-                entities[class_id] = Entity(
-                    entity_id=class_id,
-                    name=node.name,
-                    entity_type="class",
-                    file_path=file_path,
-                    description=None,
-                    properties={
-                        "start_line": getattr(node, "lineno", None),
-                        "end_line": getattr(node, "end_lineno", None),
-                    },
-                )
-                rels.append(
-                    Relationship(
-                        source_id=module_id,
-                        target_id=class_id,
-                        relation_type="contains",
-                        weight=float(builder.cfg.ast_contains_weight),
-                        properties={},
-                    )
-                )
-
-                # Inheritance edges (by name, best-effort)
-                for base in node.bases or []:
-                    base_name = builder._format_name(base)
-                    if not base_name:
-                        continue
-                    base_id = builder._stable_id(repo_id, "", "class", base_name)
-                    entities.setdefault(
-                        base_id,
-                        Entity(
-                            entity_id=base_id,
-                            name=base_name,
-                            entity_type="class",
-                            file_path=None,
-                            description=None,
-                            properties={},
-                        ),
-                    )
-                    rels.append(
-                        Relationship(
-                            source_id=class_id,
-                            target_id=base_id,
-                            relation_type="inherits",
-                            weight=float(builder.cfg.ast_inherits_weight),
-                            properties={},
-                        )
-                    )
-
-                prev = self.current_class_id
-                self.current_class_id = class_id
-                self.generic_visit(node)
-                self.current_class_id = prev
-
-            def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
-                fn_id = builder._stable_id(repo_id, file_path, "function", node.name)
-                entities[fn_id] = Entity(
-                    entity_id=fn_id,
-                    name=node.name,
-                    entity_type="function",
-                    file_path=file_path,
-                    description=None,
-                    properties={
-                        "start_line": getattr(node, "lineno", None),
-                        "end_line": getattr(node, "end_lineno", None),
-                    },
-                )
-
-                parent = self.current_class_id or module_id
-                rels.append(
-                    Relationship(
-                        source_id=parent,
-                        target_id=fn_id,
-                        relation_type="contains",
-                        weight=float(builder.cfg.ast_contains_weight),
-                        properties={},
-                    )
-                )
+        return parse_python_source(repo_id, file_path, content, self._edge_weights())
 
-                prev_fn = self.current_function_id
-                self.current_function_id = fn_id
-                self.generic_visit(node)
-                self.current_function_id = prev_fn
-
-            def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
-                # Treat async defs like functions
-                self.visit_FunctionDef(node)  # type: ignore[arg-type]
-
-            def visit_Import(self, node: ast.Import) -> None:
-                for alias in node.names or []:
-                    mod = alias.name
-                    if not mod:
-                        continue
-                    mod_id = builder._stable_id(repo_id, "", "module", mod)
-                    entities.setdefault(
-                        mod_id,
-                        Entity(
-                            entity_id=mod_id,
-                            name=mod,
-                            entity_type="module",
-                            file_path=None,
-                            description=None,
-                            properties={},
-                        ),
-                    )
-                    rels.append(
-                        Relationship(
-                            source_id=module_id,
-                            target_id=mod_id,
-                            relation_type="imports",
-                            weight=float(builder.cfg.ast_imports_weight),
-                            properties={},
-                        )
-                    )
-
-            def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
-                mod = node.module or ""
-                if not mod:
-                    return
-                mod_id = builder._stable_id(repo_id, "", "module", mod)
-                entities.setdefault(
-                    mod_id,
-                    Entity(
-                        entity_id=mod_id,
-                        name=mod,
-                        entity_type="module",
-                        file_path=None,
-                        description=None,
-                        properties={},
-                    ),
-                )
-                rels.append(
-                    Relationship(
-                        source_id=module_id,
-                        target_id=mod_id,
-                        relation_type="imports",
-                        weight=float(builder.cfg.ast_imports_weight),
-                        properties={},
-                    )
-                )
-
-            def visit_Call(self, node: ast.Call) -> None:
-                if not self.current_function_id:
-                    return
-                callee = builder._format_name(node.func)
-                if not callee:
-                    return
-                callee_id = builder._stable_id(repo_id, "", "function", callee)
-                entities.setdefault(
-                    callee_id,
-                    Entity(
-                        entity_id=callee_id,
-                        name=callee,
-                        entity_type="function",
-                        file_path=None,
-                        description=None,
-                        properties={},
-                    ),
-                )
-                rels.append(
-                    Relationship(
-                        source_id=self.current_function_id,
-                        target_id=callee_id,
-                        relation_type="calls",
-                        weight=float(builder.cfg.ast_calls_weight),
-                        properties={},
-                    )
-                )
-                self.generic_visit(node)
-
-        Visitor().visit(tree)
-        return list(entities.values()), rels
+    def _edge_weights(self) -> EdgeWeights:
+        return EdgeWeights(
+            contains=float(self.cfg.ast_contains_weight),
+            inherits=float(self.cfg.ast_inherits_weight),
+            imports=float(self.cfg.ast_imports_weight),
+            calls=float(self.cfg.ast_calls_weight),
+        )
 
     # ---------------------------------------------------------------------
     # Unit-test helpers (lightweight extraction/inference)
@@ -371,3 +220,399 @@ class GraphBuilder:
                 parts.append(cur.id)
             return ".".join(reversed(parts))
         return ""
+
+
+class GraphBuildStream:
+    """Incremental code-graph build for one indexing run.
+
+    `add_file` hands the source to a parse worker (process pool, or a thread when
+    `ast_parse_workers` is 0 or the pool is unavailable) and returns as soon as a parse slot is
+    free, so callers never hold the text of more than `2 * workers` files. Files whose content was
+    parsed before are served from the parse cache; a parse that exceeds `ast_parse_timeout_s`
+    contributes only the file's module entity. Parsed entities and relationships are written to
+    Neo4j in batches of `batch_size` by one writer at a time. Write failures are kept and raised
+    from `finish`; later files are then dropped unparsed.
+    """
+
+    def __init__(self, builder: GraphBuilder, repo_id: str, *, batch_size: int = 100) -> None:
+        assert builder.neo4j is not None
+        cfg = builder.cfg
+        self._neo4j = builder.neo4j
+        self._storage_cfg = builder.storage_cfg
+        self._weights = builder._edge_weights()
+        self._parse_job = builder.parse_job
+        self.repo_id = repo_id
+        self._batch_size = max(1, int(batch_size))
+        self._workers = max(0, int(cfg.ast_parse_workers))
+        self._use_pool = self._workers > 0
+        self._timeout_s = max(0.0, float(cfg.ast_parse_timeout_s))
+        self._tree_sitter = bool(cfg.ast_tree_sitter_enabled) and tree_sitter_available()
+        self._cache = GraphParseCache(cfg, repo_id) if cfg.ast_parse_cache_enabled else None
+        self._cache_salt = f"{GRAPH_PARSE_VERSION}|{self._weights}"
+        self._slots = asyncio.Semaphore(max(2, 2 * self._workers))
+        self._write_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._entities: list[Entity] = []
+        self._rels: list[Relationship] = []
+        self._error: BaseException | None = None
+        self.files = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+        self.entities_written = 0
+        self.relationships_written = 0
+
+    def accepts(self, file_path: str) -> bool:
+        """True when `file_path` is a code file this build extracts entities from."""
+        return graph_language(file_path, tree_sitter=self._tree_sitter) is not None
+
+    async def add_file(self, file_path: str, content: str) -> None:
+        """Queue one code file; waits only for a free parse slot."""
+        if self._error is not None:
+            return
+        await self._slots.acquire()
+        self.files += 1
+        task = asyncio.create_task(self._parse_and_write(file_path, content))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def finish(self, *, changed_files: Iterable[str] | None = None) -> GraphStats:
+        """Wait for queued files, write the last batch, then refresh communities and return stats."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+        if self._error is not None:
+            raise self._error
+        async with self._write_lock:
+            await self._flush()
+        await self._neo4j.detect_communities(self.repo_id, self._storage_cfg, changed_files=changed_files)
+        return await self._neo4j.get_graph_stats(self.repo_id)
+
+    def cancel(self) -> None:
+        """Abandon queued parses and writes (the indexing run failed)."""
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _parse(self, file_path: str, content: str) -> tuple[list[Entity], list[Relationship]]:
+        cache = self._cache
+        key = ""
+        if cache is not None:
+            key = parse_cache_key(content, self._cache_salt)
+            cached = await asyncio.to_thread(cache.get, file_path, key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+        try:
+            with INDEX_STAGE_LATENCY_SECONDS.labels(stage="graph_parse").time():
+                result = await self._run_parser(file_path, content)
+        except TimeoutError:
+            # Timed-out files are not cached: the limit may have been hit only because the host was busy.
+            INDEX_STAGE_ERRORS_TOTAL.labels(stage="graph_parse_timeout").inc()
+            self.timeouts += 1
+            return [_module_entity(self.repo_id, file_path)], []
+        if cache is not None:
+            await asyncio.to_thread(cache.put, file_path, key, *result)
+        return result
+
+    async def _run_parser(self, file_path: str, content: str) -> tuple[list[Entity], list[Relationship]]:
+        args = (self.repo_id, file_path, content, self._weights, self._timeout_s, self._tree_sitter)
+        # Workers enforce the limit themselves; the caller-side limit only catches workers that hang.
+        # Threads cannot be interrupted, so there the caller-side limit is the only one (the thread
+        # finishes in the background).
+        if self._use_pool:
+            try:
+                return await asyncio.wait_for(
+                    run_in_process(self._parse_job, *args, max_workers=self._workers),
+                    timeout=self._timeout_s + _POOL_TIMEOUT_GRACE_S if self._timeout_s else None,
+                )
+            except ProcessPoolUnavailableError:
+                INDEX_STAGE_ERRORS_TOTAL.labels(stage="graph_parse_pool").inc()
+                self._use_pool = False
+        return await asyncio.wait_for(
+            asyncio.to_thread(self._parse_job, *args),
+            timeout=self._timeout_s or None,
+        )
+
+    async def _parse_and_write(self, file_path: str, content: str) -> None:
+        try:
+            entities, rels = await self._parse(file_path, content)
+            del content
+            async with self._write_lock:
+                if self._error is not None:
+                    return
+                self._entities.extend(entities)
+                self._rels.extend(rels)
+                if len(self._entities) >= self._batch_size or len(self._rels) >= self._batch_size:
+                    await self._flush()
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self._slots.release()
+
+    async def _flush(self) -> None:
+        entities, self._entities = self._entities, []
+        rels, self._rels = self._rels, []
+        with INDEX_STAGE_LATENCY_SECONDS.labels(stage="graph_upsert").time():
+            if entities:
+                await self._neo4j.upsert_entities(self.repo_id, entities)
+            if rels:
+                await self._neo4j.upsert_relationships(self.repo_id, rels)
+        self.entities_written += len(entities)
+        self.relationships_written += len(rels)
+
+
+def graph_language(file_path: str, *, tree_sitter: bool = True) -> str | None:
+    """Language the code graph extracts `file_path` with ("python" or a tree-sitter grammar), or None."""
+    if Path(file_path).suffix.lower() == ".py":
+        return "python"
+    return tree_sitter_language(file_path) if tree_sitter else None
+
+
+def parse_source(
+    repo_id: str,
+    file_path: str,
+    content: str,
+    weights: EdgeWeights,
+    *,
+    timeout_s: float = 0.0,
+    tree_sitter: bool = True,
+) -> tuple[list[Entity], list[Relationship]]:
+    """Parse one code file into entities + relationships with the extractor for its language.
+
+    Raises ParseTimeoutError when parsing takes longer than `timeout_s` (0 = no limit). Files in
+    other languages yield only their module entity.
+    """
+    start = time.monotonic()
+    with time_limit(timeout_s, lambda: ParseTimeoutError(f"parse exceeded {timeout_s:g}s")):
+        if graph_language(file_path, tree_sitter=tree_sitter) == "python":
+            result = parse_python_source(repo_id, file_path, content, weights)
+        elif tree_sitter:
+            result = parse_tree_sitter_source(repo_id, file_path, content, weights, timeout_s=timeout_s)
+        else:
+            result = [_module_entity(repo_id, file_path)], []
+    # The extractors swallow syntax errors, which may also swallow the interrupt; check the clock too.
+    if timeout_s > 0 and time.monotonic() - start >= timeout_s:
+        raise ParseTimeoutError(f"parse exceeded {timeout_s:g}s")
+    return result
+
+
+def _module_entity(repo_id: str, file_path: str) -> Entity:
+    return Entity(
+        entity_id=GraphBuilder._stable_id(repo_id, file_path, "module", file_path),
+        name=file_path,
+        entity_type="module",
+        file_path=file_path,
+        description=None,
+        properties={},
+    )
+
+
+def _parse_source_job(
+    repo_id: str, file_path: str, content: str, weights: EdgeWeights, timeout_s: float, tree_sitter: bool
+) -> tuple[list[Entity], list[Relationship]]:
+    # Positional wrapper for executors.
+    return parse_source(repo_id, file_path, content, weights, timeout_s=timeout_s, tree_sitter=tree_sitter)
+
+
+def parse_python_source(
+    repo_id: str, file_path: str, content: str, weights: EdgeWeights
+) -> tuple[list[Entity], list[Relationship]]:
+    """Parse one Python file into entities + relationships.
+
+    Module-level and free of client state so it can run in a worker process.
+    """
+    module_id = GraphBuilder._stable_id(repo_id, file_path, "module", file_path)
+    entities: dict[str, Entity] = {
+        module_id: Entity(
+            entity_id=module_id,
+            name=file_path,
+            entity_type="module",
+            file_path=file_path,
+            description=None,
+            properties={},
+        )
+    }
+    rels: list[Relationship] = []
+
+    try:
+        tree = ast.parse(content or "", filename=file_path)
+    except Exception:
+        return list(entities.values()), rels
+
+    class Visitor(ast.NodeVisitor):
+        def __init__(self) -> None:
+            self.current_class_id: str | None = None
+            self.current_function_id: str | None = None
+
+        def visit_ClassDef(self, node: ast.ClassDef) -> None:
+            class_id = GraphBuilder._stable_id(repo_id, file_path, "class", node.name)
+            entities[class_id] = Entity(
+                entity_id=class_id,
+                name=node.name,
+                entity_type="class",
+                file_path=file_path,
+                description=None,
+                properties={
+                    "start_line": getattr(node, "lineno", None),
+                    "end_line": getattr(node, "end_lineno", None),
+                },
+            )
+            rels.append(
+                Relationship(
+                    source_id=module_id,
+                    target_id=class_id,
+                    relation_type="contains",
+                    weight=weights.contains,
+                    properties={},
+                )
+            )
+
+            # Inheritance edges (by name, best-effort)
+            for base in node.bases or []:
+                base_name = GraphBuilder._format_name(base)
+                if not base_name:
+                    continue
+                base_id = GraphBuilder._stable_id(repo_id, "", "class", base_name)
+                entities.setdefault(
+                    base_id,
+                    Entity(
+                        entity_id=base_id,
+                        name=base_name,
+                        entity_type="class",
+                        file_path=None,
+                        description=None,
+                        properties={},
+                    ),
+                )
+                rels.append(
+                    Relationship(
+                        source_id=class_id,
+                        target_id=base_id,
+                        relation_type="inherits",
+                        weight=weights.inherits,
+                        properties={},
+                    )
+                )
+
+            prev = self.current_class_id
+            self.current_class_id = class_id
+            self.generic_visit(node)
+            self.current_class_id = prev
+
+        def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+            fn_id = GraphBuilder._stable_id(repo_id, file_path, "function", node.name)
+            entities[fn_id] = Entity(
+                entity_id=fn_id,
+                name=node.name,
+                entity_type="function",
+                file_path=file_path,
+                description=None,
+                properties={
+                    "start_line": getattr(node, "lineno", None),
+                    "end_line": getattr(node, "end_lineno", None),
+                },
+            )
+
+            parent = self.current_class_id or module_id
+            rels.append(
+                Relationship(
+                    source_id=parent,
+                    target_id=fn_id,
+                    relation_type="contains",
+                    weight=weights.contains,
+                    properties={},
+                )
+            )
+
+            prev_fn = self.current_function_id
+            self.current_function_id = fn_id
+            self.generic_visit(node)
+            self.current_function_id = prev_fn
+
+        def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+            # Treat async defs like functions
+            self.visit_FunctionDef(node)  # type: ignore[arg-type]
+
+        def visit_Import(self, node: ast.Import) -> None:
+            for alias in node.names or []:
+                mod = alias.name
+                if not mod:
+                    continue
+                mod_id = GraphBuilder._stable_id(repo_id, "", "module", mod)
+                entities.setdefault(
+                    mod_id,
+                    Entity(
+                        entity_id=mod_id,
+                        name=mod,
+                        entity_type="module",
+                        file_path=None,
+                        description=None,
+                        properties={},
+                    ),
+                )
+                rels.append(
+                    Relationship(
+                        source_id=module_id,
+                        target_id=mod_id,
+                        relation_type="imports",
+                        weight=weights.imports,
+                        properties={},
+                    )
+                )
+
+        def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+            mod = node.module or ""
+            if not mod:
+                return
+            mod_id = GraphBuilder._stable_id(repo_id, "", "module", mod)
+            entities.setdefault(
+                mod_id,
+                Entity(
+                    entity_id=mod_id,
+                    name=mod,
+                    entity_type="module",
+                    file_path=None,
+                    description=None,
+                    properties={},
+                ),
+            )
+            rels.append(
+                Relationship(
+                    source_id=module_id,
+                    target_id=mod_id,
+                    relation_type="imports",
+                    weight=weights.imports,
+                    properties={},
+                )
+            )
+
+        def visit_Call(self, node: ast.Call) -> None:
+            if not self.current_function_id:
+                return
+            callee = GraphBuilder._format_name(node.func)
+            if not callee:
+                return
+            callee_id = GraphBuilder._stable_id(repo_id, "", "function", callee)
+            entities.setdefault(
+                callee_id,
+                Entity(
+                    entity_id=callee_id,
+                    name=callee,
+                    entity_type="function",
+                    file_path=None,
+                    description=None,
+                    properties={},
+                ),
+            )
+            rels.append(
+                Relationship(
+                    source_id=self.current_function_id,
+                    target_id=callee_id,
+                    relation_type="calls",
+                    weight=weights.calls,
+                    properties={},
+                )
+            )
+            self.generic_visit(node)
+
+    Visitor().visit(tree)
+    return list(entities.values()), rels
@@ -0,0 +1,88 @@
+"""On-disk cache of code-graph parse results, keyed by file content.
+
+One JSON entry per (corpus, file path) under `graph_indexing.ast_parse_cache_dir`, holding the
+entities and relationships extracted from the file plus the key they were extracted for (a hash of
+the content, the extractor version and the edge weights). Reindexing an unchanged file (force
+reindex, incremental baseline, config-only rebuild) reads the entry instead of re-parsing; a changed
+file overwrites its entry, so the cache never holds more than one result per file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+
+from server.models.graph import Entity, Relationship
+from server.models.tribrid_config_model import GraphIndexingConfig
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _resolve_dir(path_str: str) -> Path:
+    p = Path(path_str).expanduser()
+    if not p.is_absolute():
+        p = _PROJECT_ROOT / p
+    return p
+
+
+def _corpus_dir(cfg: GraphIndexingConfig, corpus_id: str) -> Path:
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(corpus_id)).strip("._") or "corpus"
+    return _resolve_dir(str(cfg.ast_parse_cache_dir or "data/graph_parse_cache")) / safe
+
+
+def parse_cache_key(content: str, salt: str) -> str:
+    """Cache key for one file's content; `salt` covers everything else the result depends on."""
+    h = hashlib.sha256(salt.encode())
+    h.update(b"\x00")
+    h.update((content or "").encode("utf-8", errors="replace"))
+    return h.hexdigest()
+
+
+class GraphParseCache:
+    """Parse results for one corpus. Methods do blocking file I/O (call them from a thread)."""
+
+    def __init__(self, cfg: GraphIndexingConfig, corpus_id: str) -> None:
+        self.root = _corpus_dir(cfg, corpus_id)
+
+    def _entry_path(self, file_path: str) -> Path:
+        digest = hashlib.sha1(file_path.encode()).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def get(self, file_path: str, key: str) -> tuple[list[Entity], list[Relationship]] | None:
+        """Cached result for `file_path`, or None when missing, stale or unreadable."""
+        try:
+            data = json.loads(self._entry_path(file_path).read_text(encoding="utf-8"))
+            if data.get("key") != key or data.get("file_path") != file_path:
+                return None
+            entities = [Entity.model_validate(e) for e in data["entities"]]
+            rels = [Relationship.model_validate(r) for r in data["relationships"]]
+        except Exception:
+            return None
+        return entities, rels
+
+    def put(self, file_path: str, key: str, entities: list[Entity], rels: list[Relationship]) -> None:
+        """Store a result; the entry is written to a temporary file and renamed into place."""
+        path = self._entry_path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "key": key,
+            "file_path": file_path,
+            "entities": [e.model_dump(mode="json") for e in entities],
+            "relationships": [r.model_dump(mode="json") for r in rels],
+        }
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        try:
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+def delete_graph_parse_cache(cfg: GraphIndexingConfig, corpus_id: str) -> None:
+    """Remove a corpus's cached parse results (corpus deleted)."""
+    shutil.rmtree(_corpus_dir(cfg, corpus_id), ignore_errors=True)
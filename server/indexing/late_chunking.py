@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import bisect
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import Any
 
@@ -10,6 +11,7 @@ from transformers import AutoModel, AutoTokenizer
 
 from server.models.index import Chunk
 from server.models.tribrid_config_model import ChunkingConfig, EmbeddingConfig
+from server.observability.metrics import LATE_CHUNKING_DOC_PEAK_BYTES, LATE_CHUNKING_WINDOWS_PER_DOC
 
 
 @lru_cache(maxsize=4)
@@ -29,14 +31,87 @@ def _l2_normalize(vec: Tensor) -> Tensor:
     return vec / denom  # type: ignore[no-any-return]
 
 
-def late_chunk_document(
-    file_path: str,
-    content: str,
+def plan_windows(seq_len: int, window: int, overlap: int) -> list[tuple[int, int, int, int]]:
+    """Cover `seq_len` tokens with encoder windows of `window` tokens overlapping by `overlap`.
+
+    Returns (start, end, keep_start, keep_end) per window. Each token's vector is taken from the
+    window where it sits furthest from an edge (the cut is the middle of each overlap), so the
+    kept ranges tile [0, seq_len) exactly once.
+    """
+    if seq_len <= 0:
+        return []
+    if seq_len <= window:
+        return [(0, seq_len, 0, seq_len)]
+    overlap = max(0, min(overlap, window // 2))
+    stride = window - overlap
+    starts = [*range(0, seq_len - window, stride), seq_len - window]
+    cuts = [0] + [(starts[i + 1] + starts[i] + window) // 2 for i in range(len(starts) - 1)] + [seq_len]
+    return [(s, s + window, cuts[i], cuts[i + 1]) for i, s in enumerate(starts)]
+
+
+def _chunk_spans(token_starts: list[int], token_ends: list[int], target: int, overlap: int) -> list[tuple[int, int]]:
+    """Token spans of the output chunks: `target` tokens each, consecutive chunks sharing `overlap`."""
+    seq_len = len(token_starts)
+    spans: list[tuple[int, int]] = []
+    start_tok = 0
+    while start_tok < seq_len:
+        end_tok = min(seq_len, start_tok + target)
+        if token_ends[end_tok - 1] <= token_starts[start_tok]:
+            break
+        spans.append((start_tok, end_tok))
+        if end_tok >= seq_len:
+            break
+        start_tok = max(0, end_tok - overlap)
+    return spans
+
+
+@dataclass
+class _Doc:
+    file_path: str
+    content: str
+    input_ids: list[int]
+    token_starts: list[int]
+    token_ends: list[int]
+    # Token span [span_starts[c], span_ends[c]) of each output chunk.
+    span_starts: list[int]
+    span_ends: list[int]
+    # Per-chunk sums of token vectors, filled window by window (never the full [seq, hidden] matrix).
+    sums: Tensor | None = None
+    peak_bytes: int = 0
+
+    def accumulate(self, token_vecs: Tensor, start: int, keep_start: int, keep_end: int) -> None:
+        """Add the kept tokens of one window (`token_vecs[0]` is doc token `start`) to chunk sums."""
+        assert self.sums is not None
+        lo = bisect.bisect_right(self.span_ends, keep_start)
+        hi = bisect.bisect_left(self.span_starts, keep_end)
+        for c in range(lo, hi):
+            a = max(keep_start, self.span_starts[c])
+            z = min(keep_end, self.span_ends[c])
+            if z > a:
+                self.sums[c] += token_vecs[a - start : z - start].float().sum(dim=0)
+
+
+def _window_tokens(embedding: EmbeddingConfig, tokenizer: Any) -> int:
+    window = int(getattr(embedding, "late_chunking_max_doc_tokens", 8192) or 8192)
+    hard = int(getattr(embedding, "embedding_max_tokens", 0) or 0)
+    if hard > 0:
+        window = min(window, hard)
+    # Tokenizers report a huge sentinel when the model has no fixed context.
+    model_max = getattr(tokenizer, "model_max_length", None)
+    if isinstance(model_max, int) and 0 < model_max < 1_000_000:
+        window = min(window, model_max)
+    return max(1, window)
+
+
+def late_chunk_documents(
+    docs: list[tuple[str, str]],
     *,
     chunking: ChunkingConfig,
     embedding: EmbeddingConfig,
-) -> list[Chunk]:
-    """Late chunking (local-only): embed the whole doc once, then pool per chunk span.
+    tokenizer: Any | None = None,
+    model: Any | None = None,
+) -> list[list[Chunk]]:
+    """Late chunking (local-only) for several documents: returns the chunks of each, in order.
 
     Requirements (enforced elsewhere):
     - embedding.embedding_backend == 'provider'
@@ -45,89 +120,137 @@ def late_chunk_document(
 
     Notes:
     - Uses HF AutoModel last_hidden_state token embeddings
-    - Pools by mean over token vectors in each chunk span
+    - Documents longer than one window (`late_chunking_max_doc_tokens`, capped by the model's max
+      length) are encoded in overlapping windows whose token vectors are stitched together
+    - Windows of all documents are batched into padded forward passes (longest first)
+    - Pools by mean over token vectors in each chunk span; only per-chunk sums are kept, so memory
+      per document is O(chunks x hidden) plus the current batch's activations
+    - `tokenizer` / `model` default to the cached HF tokenizer and AutoModel for
+      `embedding_model_local`; pass them to encode with an already loaded (or fake) model
     """
     model_name = str(getattr(embedding, "embedding_model_local", "") or "").strip()
     if not model_name:
         raise RuntimeError("late chunking requires embedding.embedding_model_local")
 
-    tokenizer = _load_hf_tokenizer(model_name)
-    model = _load_hf_model(model_name)
+    if tokenizer is None:
+        tokenizer = _load_hf_tokenizer(model_name)
+    if model is None:
+        model = _load_hf_model(model_name)
 
-    max_doc_tokens = int(getattr(embedding, "late_chunking_max_doc_tokens", 8192) or 8192)
-    hard = int(getattr(embedding, "embedding_max_tokens", 0) or 0)
-    if hard > 0:
-        max_doc_tokens = min(max_doc_tokens, hard)
-
-    enc = tokenizer(
-        content,
-        return_offsets_mapping=True,
-        add_special_tokens=False,
-        truncation=True,
-        max_length=max_doc_tokens,
-        return_tensors="pt",
-    )
-    input_ids = enc["input_ids"]
-    attn = enc.get("attention_mask")
-    offsets = enc.get("offset_mapping")
-    if offsets is None:
-        raise RuntimeError("late chunking requires a fast tokenizer with offset_mapping support")
+    threads = int(getattr(embedding, "late_chunking_cpu_threads", 0) or 0)
+    if threads > 0 and torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
 
-    with torch.no_grad():
-        out = model(input_ids=input_ids, attention_mask=attn)
-        h = getattr(out, "last_hidden_state", None)
-        if h is None:
-            raise RuntimeError("HF model output missing last_hidden_state")
-        # [seq, hidden]
-        token_vecs = h[0]
-
-    hidden = int(token_vecs.shape[-1])
-    expected_dim = int(getattr(embedding, "embedding_dim", 0) or 0)
-    if expected_dim and expected_dim != hidden:
-        raise RuntimeError(f"Embedding dimension mismatch for late chunking ({hidden} != {expected_dim}). Set embedding_dim to {hidden} and reindex.")
-
-    offsets0 = offsets[0].tolist()
-    token_starts = [int(s) for s, _e in offsets0]
-    token_ends = [int(e) for _s, e in offsets0]
-    seq_len = len(token_starts)
+    window = _window_tokens(embedding, tokenizer)
+    window_overlap = int(getattr(embedding, "late_chunking_window_overlap_tokens", 256) or 0)
+    batch_windows = max(1, int(getattr(embedding, "late_chunking_batch_windows", 8) or 8))
 
     target = int(getattr(chunking, "target_tokens", 512) or 512)
     overlap = int(getattr(chunking, "overlap_tokens", 64) or 64)
     if overlap >= target:
         overlap = max(0, target // 5)
 
+    prepared: list[_Doc] = []
+    # (doc index, start, end, keep_start, keep_end)
+    jobs: list[tuple[int, int, int, int, int]] = []
+    for file_path, content in docs:
+        enc = tokenizer(
+            content,
+            return_offsets_mapping=True,
+            add_special_tokens=False,
+            truncation=False,
+            verbose=False,
+        )
+        offsets = enc.get("offset_mapping")
+        if offsets is None:
+            raise RuntimeError("late chunking requires a fast tokenizer with offset_mapping support")
+        token_starts = [int(s) for s, _e in offsets]
+        token_ends = [int(e) for _s, e in offsets]
+        spans = _chunk_spans(token_starts, token_ends, target, overlap)
+        doc = _Doc(
+            file_path=file_path,
+            content=content,
+            input_ids=[int(t) for t in enc["input_ids"]],
+            token_starts=token_starts,
+            token_ends=token_ends,
+            span_starts=[s for s, _e in spans],
+            span_ends=[e for _s, e in spans],
+        )
+        windows = plan_windows(len(token_starts), window, window_overlap) if spans else []
+        LATE_CHUNKING_WINDOWS_PER_DOC.observe(len(windows))
+        jobs.extend((len(prepared), *w) for w in windows)
+        prepared.append(doc)
+
+    # Longest windows first: each padded batch holds windows of similar length.
+    jobs.sort(key=lambda j: j[2] - j[1], reverse=True)
+    pad_id = getattr(tokenizer, "pad_token_id", None)
+    pad_id = int(pad_id) if pad_id is not None else 0
+    expected_dim = int(getattr(embedding, "embedding_dim", 0) or 0)
+
+    with torch.no_grad():
+        for b in range(0, len(jobs), batch_windows):
+            batch = jobs[b : b + batch_windows]
+            width = max(end - start for _d, start, end, _ks, _ke in batch)
+            input_ids = torch.full((len(batch), width), pad_id, dtype=torch.long)
+            attn = torch.zeros((len(batch), width), dtype=torch.long)
+            for row, (d, start, end, _ks, _ke) in enumerate(batch):
+                input_ids[row, : end - start] = torch.tensor(prepared[d].input_ids[start:end], dtype=torch.long)
+                attn[row, : end - start] = 1
+
+            out = model(input_ids=input_ids, attention_mask=attn)
+            h = getattr(out, "last_hidden_state", None)
+            if h is None:
+                raise RuntimeError("HF model output missing last_hidden_state")
+            # [batch, width, hidden]
+            hidden = int(h.shape[-1])
+            if expected_dim and expected_dim != hidden:
+                raise RuntimeError(f"Embedding dimension mismatch for late chunking ({hidden} != {expected_dim}). Set embedding_dim to {hidden} and reindex.")
+            batch_bytes = int(h.numel() * h.element_size())
+
+            for row, (d, start, _end, keep_start, keep_end) in enumerate(batch):
+                doc = prepared[d]
+                if doc.sums is None:
+                    doc.sums = torch.zeros((len(doc.span_starts), hidden), dtype=torch.float32)
+                doc.accumulate(h[row], start, keep_start, keep_end)
+                doc.peak_bytes = max(doc.peak_bytes, batch_bytes + doc.sums.numel() * doc.sums.element_size())
+
+    results: list[list[Chunk]] = []
+    for doc in prepared:
+        if doc.sums is not None:
+            LATE_CHUNKING_DOC_PEAK_BYTES.observe(doc.peak_bytes)
+        results.append(_build_chunks(doc, chunking))
+    return results
+
+
+def _build_chunks(doc: _Doc, chunking: ChunkingConfig) -> list[Chunk]:
+    if doc.sums is None:
+        return []
+    content = doc.content
     nl_positions = [i for i, ch in enumerate(content) if ch == "\n"]
 
     chunks: list[Chunk] = []
-    ordinal = 0
-    start_tok = 0
-    while start_tok < seq_len:
-        end_tok = min(seq_len, start_tok + target)
-        start_char = token_starts[start_tok]
-        end_char = token_ends[end_tok - 1] if end_tok - 1 < len(token_ends) else len(content)
-        if end_char <= start_char:
-            break
+    for ordinal, (start_tok, end_tok) in enumerate(zip(doc.span_starts, doc.span_ends, strict=True)):
+        start_char = doc.token_starts[start_tok]
+        end_char = doc.token_ends[end_tok - 1]
 
         text = content[start_char:end_char]
         start_line = 1 + bisect.bisect_left(nl_positions, start_char)
         end_line = 1 + bisect.bisect_left(nl_positions, end_char)
 
-        span_vecs = token_vecs[start_tok:end_tok]
-        pooled = span_vecs.mean(dim=0)
-        pooled = _l2_normalize(pooled)
+        pooled = _l2_normalize(doc.sums[ordinal] / float(end_tok - start_tok))
         emb_list = [float(x) for x in pooled.cpu().tolist()]
 
         meta: dict[str, Any] = {"char_start": int(start_char), "char_end": int(end_char)}
         if bool(getattr(chunking, "emit_chunk_ordinal", True)):
             meta["chunk_ordinal"] = int(ordinal)
         if bool(getattr(chunking, "emit_parent_doc_id", True)):
-            meta["parent_doc_id"] = file_path
+            meta["parent_doc_id"] = doc.file_path
 
         chunks.append(
             Chunk(
-                chunk_id=f"{file_path}:{start_line}-{end_line}:{start_char}",
+                chunk_id=f"{doc.file_path}:{start_line}-{end_line}:{start_char}",
                 content=text,
-                file_path=file_path,
+                file_path=doc.file_path,
                 start_line=int(start_line),
                 end_line=int(end_line),
                 language=None,
@@ -136,11 +259,19 @@ def late_chunk_document(
                 metadata=meta,
             )
         )
-        ordinal += 1
-
-        if end_tok >= seq_len:
-            break
-        start_tok = max(0, end_tok - overlap)
-
     return chunks
 
+
+def late_chunk_document(
+    file_path: str,
+    content: str,
+    *,
+    chunking: ChunkingConfig,
+    embedding: EmbeddingConfig,
+    tokenizer: Any | None = None,
+    model: Any | None = None,
+) -> list[Chunk]:
+    """Late chunking (local-only) for one document; see `late_chunk_documents`."""
+    return late_chunk_documents(
+        [(file_path, content)], chunking=chunking, embedding=embedding, tokenizer=tokenizer, model=model
+    )[0]
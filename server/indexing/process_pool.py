@@ -0,0 +1,142 @@
+"""Process-wide worker pool for CPU-bound indexing work (AST parsing and other pure functions).
+
+Workers are started with the 'spawn' method: the server process runs event loops and driver threads
+that must not be forked. The pool is created lazily, shared by all indexing runs, and grown (never
+shrunk) when a run asks for more workers than it has. Callers must treat it as optional: when it
+cannot be started or breaks, `run_in_process` raises `ProcessPoolUnavailableError` and the caller falls
+back to running the function in a thread.
+
+Jobs bound their own cost with `time_limit` and `memory_limit`, which only take effect inside a
+worker process (a signal timer and an address-space rlimit would otherwise hit the whole server).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import signal
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+class ProcessPoolUnavailableError(RuntimeError):
+    """The worker pool could not be started or has broken; run the work in-process instead."""
+
+
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the shared pool, (re)creating it with at least `max_workers` workers."""
+    global _POOL, _POOL_WORKERS
+    workers = max(1, int(max_workers))
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_WORKERS >= workers:
+            return _POOL
+        old = _POOL
+        _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _POOL_WORKERS = workers
+    if old is not None:
+        # Work already submitted to the old pool still completes.
+        old.shutdown(wait=False)
+    return _POOL
+
+
+def shutdown_process_pool(*, wait: bool = False) -> None:
+    """Shut the shared pool down (app shutdown, or after it broke)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        pool, _POOL, _POOL_WORKERS = _POOL, None, 0
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+async def run_in_process(fn: Callable[..., T], *args: Any, max_workers: int) -> T:
+    """Run `fn(*args)` in the shared pool. `fn` and its arguments must be picklable."""
+    try:
+        pool = get_process_pool(max_workers)
+        fut = asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args))
+    except (OSError, NotImplementedError, RuntimeError) as e:
+        # No usable multiprocessing primitives (e.g. no /dev/shm in sandboxes), or shut down concurrently.
+        raise ProcessPoolUnavailableError(str(e)) from e
+    try:
+        return await fut
+    except BrokenProcessPool as e:
+        shutdown_process_pool()
+        raise ProcessPoolUnavailableError(str(e) or "process pool broke") from e
+
+
+def _in_worker_process() -> bool:
+    return multiprocessing.parent_process() is not None
+
+
+@contextmanager
+def time_limit(seconds: float, error: Callable[[], BaseException]) -> Iterator[None]:
+    """Raise `error()` inside the block once `seconds` have passed (0 = no limit).
+
+    Uses a SIGALRM interval timer, so it only applies on the main thread; in threads it is a no-op
+    and callers rely on their own `asyncio.wait_for`.
+    """
+    if seconds <= 0 or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _expire(_signum: int, _frame: object) -> None:
+        raise error()
+
+    previous = signal.signal(signal.SIGALRM, _expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _address_space_bytes() -> int | None:
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    assert resource is not None
+    return pages * resource.getpagesize()
+
+
+@contextmanager
+def memory_limit(megabytes: int) -> Iterator[None]:
+    """Let the block grow the worker's address space by at most `megabytes` (0 = no limit).
+
+    Allocations past the limit raise MemoryError in the block. Linux worker processes only (needs
+    /proc for the current size); elsewhere, and in the server process, it is a no-op.
+    """
+    current = _address_space_bytes() if megabytes > 0 and resource is not None and _in_worker_process() else None
+    if current is None:
+        yield
+        return
+    assert resource is not None
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + int(megabytes) * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    if soft != resource.RLIM_INFINITY and soft <= limit:
+        yield
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
@@ -0,0 +1,425 @@
+"""Code-graph extraction for non-Python languages with tree-sitter.
+
+Produces the same entity/relationship shapes as the Python AST extractor (`parse_python_source`):
+a module entity per file, class-like and function entities with containment edges, import edges to
+module placeholders, inheritance edges to class placeholders and call edges (from inside functions)
+to function placeholders. Placeholders use an empty file path so references resolve across files
+the same way they do for Python.
+
+`tree_sitter_languages` (bundled grammars) is imported lazily: the server runs without it, and
+`tree_sitter_available()` lets callers skip these languages when it is missing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+from server.models.graph import Entity, Relationship
+
+
+@dataclass(frozen=True)
+class _LanguageSpec:
+    """Node types that carry graph structure in one tree-sitter grammar."""
+
+    grammar: str
+    classes: frozenset[str]
+    functions: frozenset[str]
+    imports: frozenset[str]
+    calls: frozenset[str]
+    # Nodes (under a class) that list base classes / implemented interfaces.
+    bases: frozenset[str] = frozenset()
+    # Impl blocks (Rust): methods inside belong to the `type` field; a `trait` field adds an inherits edge.
+    impls: frozenset[str] = frozenset()
+    # C/C++ struct specifiers are also used as type references; only definitions (with a body) count.
+    class_requires_body: bool = False
+
+
+_JS_CLASSES = frozenset({"class_declaration", "abstract_class_declaration", "interface_declaration", "class"})
+_JS_FUNCTIONS = frozenset(
+    {"function_declaration", "generator_function_declaration", "method_definition", "variable_declarator"}
+)
+_JS_BASES = frozenset({"class_heritage", "extends_clause", "implements_clause", "extends_type_clause"})
+_C_CLASSES = frozenset({"struct_specifier", "union_specifier", "enum_specifier"})
+
+_SPECS: dict[str, _LanguageSpec] = {
+    "javascript": _LanguageSpec(
+        grammar="javascript",
+        classes=_JS_CLASSES,
+        functions=_JS_FUNCTIONS,
+        imports=frozenset({"import_statement"}),
+        calls=frozenset({"call_expression", "new_expression"}),
+        bases=_JS_BASES,
+    ),
+    "typescript": _LanguageSpec(
+        grammar="typescript",
+        classes=_JS_CLASSES,
+        functions=_JS_FUNCTIONS,
+        imports=frozenset({"import_statement"}),
+        calls=frozenset({"call_expression", "new_expression"}),
+        bases=_JS_BASES,
+    ),
+    "tsx": _LanguageSpec(
+        grammar="tsx",
+        classes=_JS_CLASSES,
+        functions=_JS_FUNCTIONS,
+        imports=frozenset({"import_statement"}),
+        calls=frozenset({"call_expression", "new_expression"}),
+        bases=_JS_BASES,
+    ),
+    "go": _LanguageSpec(
+        grammar="go",
+        classes=frozenset({"type_spec"}),
+        functions=frozenset({"function_declaration", "method_declaration"}),
+        imports=frozenset({"import_spec"}),
+        calls=frozenset({"call_expression"}),
+    ),
+    "rust": _LanguageSpec(
+        grammar="rust",
+        classes=frozenset({"struct_item", "enum_item", "union_item", "trait_item"}),
+        functions=frozenset({"function_item"}),
+        imports=frozenset({"use_declaration"}),
+        calls=frozenset({"call_expression"}),
+        impls=frozenset({"impl_item"}),
+    ),
+    "java": _LanguageSpec(
+        grammar="java",
+        classes=frozenset(
+            {
+                "class_declaration",
+                "interface_declaration",
+                "enum_declaration",
+                "record_declaration",
+                "annotation_type_declaration",
+            }
+        ),
+        functions=frozenset({"method_declaration", "constructor_declaration"}),
+        imports=frozenset({"import_declaration"}),
+        calls=frozenset({"method_invocation", "object_creation_expression"}),
+        bases=frozenset({"superclass", "super_interfaces", "extends_interfaces", "type_list"}),
+    ),
+    "kotlin": _LanguageSpec(
+        grammar="kotlin",
+        classes=frozenset({"class_declaration", "object_declaration"}),
+        functions=frozenset({"function_declaration"}),
+        imports=frozenset({"import_header"}),
+        calls=frozenset({"call_expression"}),
+        bases=frozenset({"delegation_specifiers", "delegation_specifier", "constructor_invocation"}),
+    ),
+    "c": _LanguageSpec(
+        grammar="c",
+        classes=_C_CLASSES,
+        functions=frozenset({"function_definition"}),
+        imports=frozenset({"preproc_include"}),
+        calls=frozenset({"call_expression"}),
+        class_requires_body=True,
+    ),
+    "cpp": _LanguageSpec(
+        grammar="cpp",
+        classes=_C_CLASSES | {"class_specifier"},
+        functions=frozenset({"function_definition"}),
+        imports=frozenset({"preproc_include"}),
+        calls=frozenset({"call_expression"}),
+        bases=frozenset({"base_class_clause"}),
+        class_requires_body=True,
+    ),
+}
+
+# File extension -> spec key. Mirrors FileLoader's code extensions; Swift has no bundled grammar.
+TREE_SITTER_LANGUAGES: dict[str, str] = {
+    ".ts": "typescript",
+    ".tsx": "tsx",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "java",
+    ".kt": "kotlin",
+    ".c": "c",
+    ".h": "c",
+    ".cpp": "cpp",
+    ".hpp": "cpp",
+}
+
+_NAME_TYPES = frozenset(
+    {
+        "identifier",
+        "type_identifier",
+        "simple_identifier",
+        "property_identifier",
+        "private_property_identifier",
+        "field_identifier",
+        "qualified_identifier",
+        "destructor_name",
+        "operator_name",
+    }
+)
+# Base-type references are taken whole (qualified names, generic types minus their arguments).
+_BASE_NAME_TYPES = _NAME_TYPES | frozenset(
+    {
+        "member_expression",
+        "nested_type_identifier",
+        "scoped_type_identifier",
+        "scoped_identifier",
+        "generic_type",
+        "user_type",
+    }
+)
+_FUNCTION_VALUES = frozenset({"arrow_function", "function", "function_expression", "generator_function"})
+_CALLEE_FIELDS = ("function", "constructor", "name", "type")
+_IMPORT_FIELDS = ("source", "path", "argument")
+_CALLEE_RE = re.compile(r"^[A-Za-z_$][\w$]*(?:(?:\.|::|->)[A-Za-z_$~][\w$]*)*$")
+_MAX_NAME_CHARS = 200
+
+
+def tree_sitter_available() -> bool:
+    """True when the bundled tree-sitter grammars can be imported."""
+    return importlib.util.find_spec("tree_sitter_languages") is not None
+
+
+def tree_sitter_language(file_path: str) -> str | None:
+    """Spec key for a file, or None when it is not a tree-sitter code file."""
+    return TREE_SITTER_LANGUAGES.get(Path(file_path).suffix.lower())
+
+
+_EntityKind = Literal["function", "class", "module"]
+_RelationKind = Literal["calls", "imports", "inherits", "contains"]
+
+
+def _stable_id(repo_id: str, file_path: str, kind: str, name: str) -> str:
+    # Same scheme as GraphBuilder._stable_id (not imported: that module imports this one).
+    raw = f"{repo_id}|{file_path}|{kind}|{name}".encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+def _text(src: bytes, node: Any) -> str:
+    return src[node.start_byte : node.end_byte].decode("utf-8", errors="replace")
+
+
+def _clean_name(text: str) -> str:
+    name = " ".join(text.split())
+    return name if len(name) <= _MAX_NAME_CHARS else ""
+
+
+def _declarator_name(src: bytes, node: Any) -> str:
+    """Name of a C/C++ function definition: follow `declarator` fields down to the identifier."""
+    cur = node.child_by_field_name("declarator")
+    while cur is not None and cur.type not in _NAME_TYPES:
+        nxt = cur.child_by_field_name("declarator")
+        if nxt is None:
+            nxt = next((c for c in cur.named_children if c.type in _NAME_TYPES or "declarator" in c.type), None)
+        cur = nxt
+    return _clean_name(_text(src, cur)) if cur is not None else ""
+
+
+def _node_name(src: bytes, node: Any) -> str:
+    if node.type == "function_definition":
+        return _declarator_name(src, node)
+    name = node.child_by_field_name("name")
+    if name is None:
+        # Grammars without field names (e.g. Kotlin): first identifier child.
+        name = next((c for c in node.named_children if c.type in _NAME_TYPES), None)
+    return _clean_name(_text(src, name)) if name is not None else ""
+
+
+def _is_function(node: Any) -> bool:
+    if node.type != "variable_declarator":
+        return True
+    # `const f = () => ...` / `const f = function () {...}` define functions; other declarators do not.
+    value = node.child_by_field_name("value")
+    return value is not None and value.type in _FUNCTION_VALUES
+
+
+def _base_names(src: bytes, node: Any, spec: _LanguageSpec) -> list[str]:
+    """Base classes / interfaces named in a class header (not its body)."""
+    out: list[str] = []
+    stack = [c for c in node.named_children if c.type in spec.bases]
+    while stack:
+        cur = stack.pop(0)
+        for child in cur.named_children:
+            if child.type in _BASE_NAME_TYPES:
+                name = _clean_name(re.sub(r"<.*", "", _text(src, child), flags=re.S))
+                if name:
+                    out.append(name)
+            elif child.type in spec.bases:
+                stack.append(child)
+    return out
+
+
+def _import_name(src: bytes, node: Any) -> str:
+    target = None
+    for field in _IMPORT_FIELDS:
+        target = node.child_by_field_name(field)
+        if target is not None:
+            break
+    if target is None:
+        # Java/Kotlin imports carry the dotted name as an (unnamed) identifier child.
+        target = next(
+            (c for c in node.named_children if c.type in {"identifier", "scoped_identifier"}),
+            None,
+        )
+    if target is None:
+        return ""
+    return _clean_name(_text(src, target).strip("\"'`<>"))
+
+
+def _callee_name(src: bytes, node: Any) -> str:
+    target = None
+    for field in _CALLEE_FIELDS:
+        target = node.child_by_field_name(field)
+        if target is not None:
+            break
+    if target is None and node.named_child_count:
+        target = node.named_children[0]
+    if target is None:
+        return ""
+    name = _text(src, target)
+    if node.type == "method_invocation":
+        obj = node.child_by_field_name("object")
+        if obj is not None:
+            name = f"{_text(src, obj)}.{name}"
+    name = re.sub(r"<.*?>", "", name).strip()
+    # Only plain (possibly qualified) names; chained calls and expressions are not resolvable by name.
+    return name if len(name) <= _MAX_NAME_CHARS and _CALLEE_RE.match(name) else ""
+
+
+def _get_parser(grammar: str) -> Any:
+    from tree_sitter_languages import get_parser
+
+    return get_parser(grammar)
+
+
+def parse_tree_sitter_source(
+    repo_id: str,
+    file_path: str,
+    content: str,
+    weights: Any,
+    *,
+    timeout_s: float = 0.0,
+) -> tuple[list[Entity], list[Relationship]]:
+    """Parse one code file with its tree-sitter grammar into entities + relationships.
+
+    `weights` is the builder's `EdgeWeights`. Files whose language has no grammar, or that fail to
+    parse within `timeout_s` (tree-sitter's own parse budget), yield only their module entity.
+    Module-level and free of client state so it can run in a worker process.
+    """
+    module_id = _stable_id(repo_id, file_path, "module", file_path)
+    entities: dict[str, Entity] = {
+        module_id: Entity(
+            entity_id=module_id,
+            name=file_path,
+            entity_type="module",
+            file_path=file_path,
+            description=None,
+            properties={},
+        )
+    }
+    rels: list[Relationship] = []
+
+    language = tree_sitter_language(file_path)
+    spec = _SPECS.get(language or "")
+    if spec is None:
+        return list(entities.values()), rels
+    src = (content or "").encode("utf-8", errors="replace")
+    try:
+        parser = _get_parser(spec.grammar)
+        if timeout_s > 0:
+            micros = int(timeout_s * 1_000_000)
+            setter = getattr(parser, "set_timeout_micros", None)
+            if setter is not None:
+                setter(micros)
+            else:
+                parser.timeout_micros = micros
+        tree = parser.parse(src)
+    except Exception:
+        tree = None
+    if tree is None:
+        return list(entities.values()), rels
+
+    def _relate(source_id: str, target_id: str, relation_type: _RelationKind, weight: float) -> None:
+        rels.append(
+            Relationship(
+                source_id=source_id,
+                target_id=target_id,
+                relation_type=relation_type,
+                weight=weight,
+                properties={},
+            )
+        )
+
+    def _placeholder(kind: _EntityKind, name: str) -> str:
+        ent_id = _stable_id(repo_id, "", kind, name)
+        entities.setdefault(
+            ent_id,
+            Entity(
+                entity_id=ent_id,
+                name=name,
+                entity_type=kind,
+                file_path=None,
+                description=None,
+                properties={},
+            ),
+        )
+        return ent_id
+
+    def _defined(kind: _EntityKind, name: str, node: Any) -> str:
+        ent_id = _stable_id(repo_id, file_path, kind, name)
+        entities[ent_id] = Entity(
+            entity_id=ent_id,
+            name=name,
+            entity_type=kind,
+            file_path=file_path,
+            description=None,
+            properties={
+                "start_line": node.start_point[0] + 1,
+                "end_line": node.end_point[0] + 1,
+            },
+        )
+        return ent_id
+
+    # Iterative walk (deep files would exceed the recursion limit): (node, enclosing class, enclosing function).
+    stack: list[tuple[Any, str | None, str | None]] = [(tree.root_node, None, None)]
+    while stack:
+        node, class_id, fn_id = stack.pop()
+        kind = node.type
+        if kind in spec.classes and (not spec.class_requires_body or node.child_by_field_name("body") is not None):
+            name = _node_name(src, node)
+            if name:
+                class_id = _defined("class", name, node)
+                _relate(module_id, class_id, "contains", weights.contains)
+                for base in _base_names(src, node, spec):
+                    _relate(class_id, _placeholder("class", base), "inherits", weights.inherits)
+        elif kind in spec.impls:
+            type_node = node.child_by_field_name("type")
+            type_name = _clean_name(re.sub(r"<.*", "", _text(src, type_node), flags=re.S)) if type_node else ""
+            if type_name:
+                class_id = _stable_id(repo_id, file_path, "class", type_name)
+                if class_id not in entities:
+                    _defined("class", type_name, node)
+                    _relate(module_id, class_id, "contains", weights.contains)
+                trait_node = node.child_by_field_name("trait")
+                if trait_node is not None:
+                    trait = _clean_name(re.sub(r"<.*", "", _text(src, trait_node), flags=re.S))
+                    if trait:
+                        _relate(class_id, _placeholder("class", trait), "inherits", weights.inherits)
+        elif kind in spec.functions and _is_function(node):
+            name = _node_name(src, node)
+            if name:
+                new_fn_id = _defined("function", name, node)
+                _relate(class_id or module_id, new_fn_id, "contains", weights.contains)
+                fn_id = new_fn_id
+        elif kind in spec.imports:
+            mod = _import_name(src, node)
+            if mod:
+                _relate(module_id, _placeholder("module", mod), "imports", weights.imports)
+        elif kind in spec.calls and fn_id:
+            callee = _callee_name(src, node)
+            if callee:
+                _relate(fn_id, _placeholder("function", callee), "calls", weights.calls)
+        stack.extend((child, class_id, fn_id) for child in reversed(node.children))
+
+    return list(entities.values()), rels
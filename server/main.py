@@ -27,6 +27,9 @@ from server.api.repos import router as repos_router
 from server.api.reranker import router as reranker_router
 from server.api.search import router as search_router
 from server.config import load_config
+from server.db.neo4j import Neo4jClient
+from server.db.postgres import PostgresClient
+from server.indexing.process_pool import shutdown_process_pool
 from server.mcp.server import get_mcp_server
 from server.observability.metrics import render_latest
 
@@ -103,6 +106,14 @@ async def _mcp_shutdown() -> None:
     await cm.__aexit__(None, None, None)
 
 
+@app.on_event("shutdown")
+async def _storage_shutdown() -> None:
+    # Neo4j drivers, asyncpg pools and the indexing worker pool are shared process-wide; close them once on app exit.
+    await Neo4jClient.close_shared_drivers()
+    await PostgresClient.close_shared_pools()
+    shutdown_process_pool()
+
+
 @app.get("/metrics")
 async def metrics() -> Response:
     body, content_type = render_latest()
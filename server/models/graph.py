@@ -7,8 +7,9 @@ from server.models.tribrid_config_model import (
     Community,
     Entity,
     GraphNeighborsResponse,
+    GraphSchemaIndex,
     GraphStats,
     Relationship,
 )
 
-__all__ = ["Entity", "Relationship", "Community", "GraphStats", "GraphNeighborsResponse"]
+__all__ = ["Entity", "Relationship", "Community", "GraphStats", "GraphSchemaIndex", "GraphNeighborsResponse"]
@@ -92,6 +92,14 @@ class IndexStats(BaseModel):
     embedding_dimensions: int = Field(description="Dimension of embedding vectors")
     last_indexed: datetime | None = Field(default=None, description="When last indexed")
     file_breakdown: dict[str, int] = Field(default_factory=dict, description="Count by file extension")
+    incremental: bool = Field(
+        default=False,
+        description="Whether this run reused unchanged files from a previous index (indexing.incremental_indexing=1)",
+    )
+    files_added: int = Field(default=0, description="Files indexed for the first time in this run")
+    files_changed: int = Field(default=0, description="Previously indexed files reprocessed because their content changed")
+    files_removed: int = Field(default=0, description="Previously indexed files purged because they no longer exist")
+    files_skipped: int = Field(default=0, description="Unchanged files skipped by incremental indexing")
 
 
 class IndexEstimate(BaseModel):
@@ -1505,6 +1513,18 @@ class Community(BaseModel):
     summary: str = Field(description="AI-generated summary of what this community represents")
     member_ids: list[str] = Field(description="Entity IDs that belong to this community")
     level: int = Field(ge=0, description="Hierarchy level (0 = top level)")
+    parent_id: str | None = Field(default=None, description="Enclosing community one level up (None at the top level)")
+
+
+class GraphSchemaIndex(BaseModel):
+    """State of one bootstrap constraint/index in the Neo4j database."""
+
+    name: str = Field(description="Index (or owning constraint) name")
+    label: str = Field(description="Node label the index covers")
+    properties: list[str] = Field(default_factory=list, description="Indexed properties, in key order")
+    type: str = Field(default="", description="Neo4j index type (e.g. RANGE)")
+    state: str = Field(default="", description="Neo4j index state (ONLINE, POPULATING, FAILED)")
+    unique: bool = Field(default=False, description="True when backed by a uniqueness constraint")
 
 
 class GraphStats(BaseModel):
@@ -1521,6 +1541,13 @@ class GraphStats(BaseModel):
     total_chunks: int = Field(default=0, description="Number of Chunk nodes in Neo4j for this corpus")
     entity_breakdown: dict[str, int] = Field(default_factory=dict, description="Count by entity type")
     relationship_breakdown: dict[str, int] = Field(default_factory=dict, description="Count by relation type")
+    schema_ready: bool | None = Field(
+        default=None,
+        description="True when every bootstrap constraint/index exists and is ONLINE (None if unknown)",
+    )
+    schema_indexes: list[GraphSchemaIndex] = Field(
+        default_factory=list, description="State of the bootstrap constraints/indexes"
+    )
 
 
 class GraphNeighborsResponse(BaseModel):
@@ -2452,11 +2479,41 @@ class EmbeddingConfig(BaseModel):
         default="off",
         description="Contextual chunk embedding mode. 'late_chunking_local_only' requires local/HF provider backend.",
     )
+    query_embed_coalesce_window_ms: float = Field(
+        default=3.0,
+        ge=0.0,
+        le=100.0,
+        description="Concurrent query embeddings (search/chat/MCP) arriving within this window share one provider/model call (0 = no coalescing)",
+    )
+    query_embed_coalesce_max_items: int = Field(
+        default=32,
+        ge=1,
+        le=256,
+        description="Send a coalesced query-embedding batch as soon as this many distinct texts are waiting",
+    )
     late_chunking_max_doc_tokens: int = Field(
         default=8192,
         ge=256,
         le=65536,
-        description="Max tokens per document segment for local late chunking.",
+        description="Tokens per encoder window for local late chunking (also capped by the model's max length). Longer documents are encoded in overlapping windows.",
+    )
+    late_chunking_window_overlap_tokens: int = Field(
+        default=256,
+        ge=0,
+        le=32768,
+        description="Tokens shared by consecutive late-chunking windows; each token keeps the vector from the window where it has the most context (capped at half a window).",
+    )
+    late_chunking_batch_windows: int = Field(
+        default=8,
+        ge=1,
+        le=256,
+        description="Encoder windows (from any documents) per padded forward pass in late chunking.",
+    )
+    late_chunking_cpu_threads: int = Field(
+        default=0,
+        ge=0,
+        le=256,
+        description="Torch CPU threads for late chunking (0 = torch default). Applies process-wide.",
     )
 
     @field_validator('embedding_type', mode='before')
@@ -2489,6 +2546,12 @@ class EmbeddingConfig(BaseModel):
         le=256,
         description="Batch size for embedding generation"
     )
+    embedding_batch_max_tokens: int = Field(
+        default=16384,
+        ge=256,
+        le=1048576,
+        description="Padded-token budget per local sentence-transformers forward pass; texts are length-sorted so each batch holds similar lengths",
+    )
     embedding_max_tokens: int = Field(
         default=8000,
         ge=512,
@@ -2499,7 +2562,19 @@ class EmbeddingConfig(BaseModel):
         default=1,
         ge=0,
         le=1,
-        description="Enable embedding cache"
+        description="Reuse cached embeddings for identical prepared chunk text during indexing (provider backends)"
+    )
+    embedding_cache_max_age_days: int = Field(
+        default=30,
+        ge=0,
+        le=3650,
+        description="Prune embedding cache entries unused for this many days after each indexing run (0 = no age limit)",
+    )
+    embedding_cache_max_entries: int = Field(
+        default=1000000,
+        ge=0,
+        le=100000000,
+        description="Keep at most this many embedding cache entries, least recently used pruned first (0 = unbounded)",
     )
     embedding_timeout: int = Field(
         default=30,
@@ -2725,6 +2800,27 @@ class IndexingConfig(BaseModel):
         le=16,
         description="Parallel workers for indexing"
     )
+    prepare_workers: int = Field(
+        default=2,
+        ge=0,
+        le=64,
+        description="Worker processes that extract text (PDF, XLSX, Parquet, ...) and chunk files off the "
+        "server process; raise toward the core count for large corpora (0 = threads in the server process)",
+    )
+    prepare_timeout_s: float = Field(
+        default=120.0,
+        ge=0.0,
+        le=3600.0,
+        description="Per-file limit for extraction + chunking; slower files are skipped and reported as "
+        "failed (0 = no limit)",
+    )
+    prepare_memory_limit_mb: int = Field(
+        default=2048,
+        ge=0,
+        le=65536,
+        description="Memory a worker may allocate while preparing one file (Linux); files over it are "
+        "skipped and reported as failed instead of exhausting the host (0 = no limit)",
+    )
     bm25_tokenizer: str = Field(
         default="stemmer",
         pattern="^(stemmer|lowercase|whitespace)$",
@@ -2795,6 +2891,21 @@ class IndexingConfig(BaseModel):
         le=1,
         description="Skip dense vector indexing"
     )
+    incremental_indexing: int = Field(
+        default=1,
+        ge=0,
+        le=1,
+        description="Only reprocess files whose size/mtime/content hash changed since the last run; "
+        "purge chunks and graph nodes of changed or removed files (force_reindex still rebuilds everything)",
+    )
+
+    delete_batch_size: int = Field(
+        default=5000,
+        ge=100,
+        le=100000,
+        description="Rows/nodes per transaction when clearing a corpus (force_reindex, delete index): "
+        "Postgres chunk deletes and Neo4j graph deletes run in batches of this size",
+    )
     out_dir_base: str = Field(
         default="./out",
         description="Base output directory"
@@ -2892,6 +3003,49 @@ class GraphStorageConfig(BaseModel):
         description="Community detection algorithm"
     )
 
+    community_levels: int = Field(
+        default=3,
+        ge=1,
+        le=8,
+        description="Number of community hierarchy levels to store (level 0 = coarsest)"
+    )
+
+    community_resolution: float = Field(
+        default=1.0,
+        ge=0.1,
+        le=10.0,
+        description="Louvain modularity resolution (higher = smaller communities; in-process Louvain only)"
+    )
+
+    community_min_size: int = Field(
+        default=2,
+        ge=1,
+        le=1000,
+        description="Communities with fewer members are not stored"
+    )
+
+    community_memory_budget_mb: int = Field(
+        default=512,
+        ge=16,
+        le=65536,
+        description="Memory budget for in-process detection; caps exported edges and switches Louvain "
+        "to label-propagation coarsening on graphs that do not fit"
+    )
+
+    community_incremental: int = Field(
+        default=1,
+        ge=0,
+        le=1,
+        description="On incremental indexing runs, only recompute communities touched by changed files (1=yes, 0=no)"
+    )
+
+    community_use_gds: int = Field(
+        default=1,
+        ge=0,
+        le=1,
+        description="Use the Neo4j Graph Data Science plugin for full recomputes when it is installed (1=yes, 0=no)"
+    )
+
     entity_types: list[str] = Field(
         default=["function", "class", "module", "variable", "import"],
         description="Entity types to extract and store in graph"
@@ -2973,6 +3127,46 @@ class FusionConfig(BaseModel):
         description="Normalize scores to [0,1] before fusion"
     )
 
+    max_parallel_corpora: int = Field(
+        default=4,
+        ge=1,
+        le=32,
+        description="Maximum number of corpora searched concurrently in a multi-corpus request",
+    )
+
+    corpus_timeout_s: float = Field(
+        default=20.0,
+        ge=0.0,
+        le=300.0,
+        description="Per-corpus deadline in seconds; corpora that miss it are skipped and reported in fusion_per_corpus (0 = no deadline)",
+    )
+
+    result_cache_enabled: bool = Field(
+        default=True,
+        description="Cache fused search results per (corpora, query, legs, top_k, config); invalidated when a corpus is re-indexed",
+    )
+
+    result_cache_ttl_s: float = Field(
+        default=300.0,
+        ge=1.0,
+        le=86400.0,
+        description="Time-to-live for cached search results in seconds",
+    )
+
+    result_cache_max_entries: int = Field(
+        default=512,
+        ge=1,
+        le=100000,
+        description="Maximum number of cached search results (least recently used are evicted first)",
+    )
+
+    result_cache_max_mb: int = Field(
+        default=64,
+        ge=1,
+        le=4096,
+        description="Approximate memory cap for the search result cache in MB",
+    )
+
     @model_validator(mode='after')
     def validate_weights_sum_to_one(self) -> Self:
         """Normalize tri-brid weights to sum to 1.0."""
@@ -3015,6 +3209,60 @@ class VectorSearchConfig(BaseModel):
         description="Minimum similarity score threshold (0 = no threshold)"
     )
 
+    timeout_s: float = Field(
+        default=10.0,
+        ge=0.0,
+        le=120.0,
+        description="Vector leg timeout in seconds; legs run concurrently and a timed-out leg contributes no results (0 = no timeout)",
+    )
+
+    ann_index: Literal["none", "hnsw", "ivfflat"] = Field(
+        default="hnsw",
+        description="Per-corpus pgvector ANN index type built after indexing ('none' = exact scan only)",
+    )
+
+    ann_min_rows: int = Field(
+        default=5000,
+        ge=0,
+        le=10_000_000,
+        description="Only build an ANN index once a corpus has at least this many embedded chunks (exact scan is faster below)",
+    )
+
+    hnsw_m: int = Field(
+        default=16,
+        ge=4,
+        le=100,
+        description="HNSW max connections per layer (higher = better recall, larger index)",
+    )
+
+    hnsw_ef_construction: int = Field(
+        default=64,
+        ge=8,
+        le=1000,
+        description="HNSW candidate list size during build (higher = better recall, slower build)",
+    )
+
+    hnsw_ef_search: int = Field(
+        default=40,
+        ge=1,
+        le=1000,
+        description="HNSW candidate list size per query (hnsw.ef_search); trades recall for latency",
+    )
+
+    ivfflat_lists: int = Field(
+        default=0,
+        ge=0,
+        le=32768,
+        description="IVFFlat list count (0 = auto: rows/1000, or sqrt(rows) above 1M rows)",
+    )
+
+    ivfflat_probes: int = Field(
+        default=10,
+        ge=1,
+        le=32768,
+        description="IVFFlat lists probed per query (ivfflat.probes); trades recall for latency",
+    )
+
 
 # =============================================================================
 # SPARSE SEARCH CONFIG
@@ -3081,6 +3329,13 @@ class SparseSearchConfig(BaseModel):
         description="BM25 length normalization (0 = no penalty, 1 = full penalty)"
     )
 
+    timeout_s: float = Field(
+        default=10.0,
+        ge=0.0,
+        le=120.0,
+        description="Sparse leg timeout in seconds, including the file_path fallback (0 = no timeout)",
+    )
+
 
 # =============================================================================
 # GRAPH SEARCH CONFIG
@@ -3114,6 +3369,26 @@ class GraphSearchConfig(BaseModel):
         description="When mode='chunk' and Neo4j uses a shared database, overfetch seed hits before filtering by corpus_id",
     )
 
+    chunk_seed_overfetch_adaptive: bool = Field(
+        default=True,
+        description="When mode='chunk' and Neo4j uses a shared database, retry with a geometrically larger "
+        "overfetch until top_k in-corpus seeds are found (bounded by chunk_seed_max_candidates)",
+    )
+
+    chunk_seed_overfetch_growth: int = Field(
+        default=4,
+        ge=2,
+        le=16,
+        description="Factor applied to the vector-index candidate count on each adaptive overfetch retry",
+    )
+
+    chunk_seed_max_candidates: int = Field(
+        default=10000,
+        ge=100,
+        le=100000,
+        description="Upper bound on vector-index candidates requested by adaptive overfetch",
+    )
+
     chunk_entity_expansion_enabled: bool = Field(
         default=True,
         description="When mode='chunk', expand from seed chunks via Entity graph (IN_CHUNK links) to find related chunks",
@@ -3133,6 +3408,36 @@ class GraphSearchConfig(BaseModel):
         description="Maximum graph traversal hops"
     )
 
+    expansion_strategy: Literal["frontier", "paths"] = Field(
+        default="frontier",
+        description="Entity expansion strategy. 'frontier' expands hop by hop with fan-out/visited budgets; "
+        "'paths' uses one unbounded variable-length path match (legacy; can blow up on hub entities).",
+    )
+
+    expansion_fanout_cap: int = Field(
+        default=50,
+        ge=1,
+        le=1000,
+        description="When expansion_strategy='frontier', max neighbors followed per entity per hop "
+        "(lowest-degree neighbors first)",
+    )
+
+    expansion_max_visited: int = Field(
+        default=2000,
+        ge=10,
+        le=100000,
+        description="When expansion_strategy='frontier', max entities visited per query (seeds included) "
+        "before expansion stops",
+    )
+
+    expansion_hub_degree: int = Field(
+        default=200,
+        ge=0,
+        le=100000,
+        description="When expansion_strategy='frontier', entities with more relationships than this are "
+        "down-weighted by sqrt(hub_degree / degree) (0 = off)",
+    )
+
     include_communities: bool = Field(
         default=True,
         description="Include community-based expansion in graph search"
@@ -3145,6 +3450,33 @@ class GraphSearchConfig(BaseModel):
         description="Number of results to retrieve from graph search"
     )
 
+    timeout_s: float = Field(
+        default=15.0,
+        ge=0.0,
+        le=120.0,
+        description="Graph leg timeout in seconds, including Neo4j connect and chunk hydration (0 = no timeout)",
+    )
+
+    snapshot_enabled: int = Field(
+        default=0,
+        ge=0,
+        le=1,
+        description="Build an in-memory CSR snapshot of the entity graph after indexing and serve graph-leg "
+        "seeding, traversal and chunk scoring from it, with Neo4j as the fallback (1=yes, 0=no)",
+    )
+
+    snapshot_max_edges: int = Field(
+        default=5_000_000,
+        ge=1000,
+        le=200_000_000,
+        description="Corpora with more entity relationships than this are not snapshotted (Neo4j serves them)",
+    )
+
+    snapshot_dir: str = Field(
+        default="data/graph_snapshots",
+        description="Directory for memory-mapped graph snapshots (relative paths resolve from the project root)",
+    )
+
 
 # =============================================================================
 # GRAPH INDEXING CONFIG
@@ -3168,11 +3500,66 @@ class GraphIndexingConfig(BaseModel):
         description="Store chunk embeddings on Chunk nodes for Neo4j vector search (requires dense embeddings)",
     )
 
+    lexical_write_batch_docs: int = Field(
+        default=200,
+        ge=1,
+        le=10000,
+        description="Documents written per Neo4j transaction when building the lexical graph",
+    )
+
+    lexical_write_batch_chunks: int = Field(
+        default=5000,
+        ge=100,
+        le=200000,
+        description="Chunks per lexical-graph transaction before it is flushed early (a single file is never split)",
+    )
+
+    lexical_write_concurrency: int = Field(
+        default=2,
+        ge=1,
+        le=16,
+        description="Lexical-graph write transactions in flight at once",
+    )
+
     semantic_kg_enabled: bool = Field(
         default=False,
         description="Build semantic knowledge graph (concept entities + relations) linked to chunks during indexing",
     )
 
+    ast_parse_workers: int = Field(
+        default=2,
+        ge=0,
+        le=32,
+        description="Worker processes that parse code files for the code graph while indexing streams "
+        "(0 = parse in a thread of the server process)",
+    )
+
+    ast_tree_sitter_enabled: bool = Field(
+        default=True,
+        description="Extract classes, functions, imports and calls from non-Python code files (TypeScript, "
+        "JavaScript, Go, Rust, Java, Kotlin, C, C++) with tree-sitter; Python always uses its own AST",
+    )
+
+    ast_parse_timeout_s: float = Field(
+        default=10.0,
+        ge=0.0,
+        le=600.0,
+        description="Per-file parse time limit for the code graph; a file that exceeds it contributes only "
+        "its module entity (0 = no limit)",
+    )
+
+    ast_parse_cache_enabled: bool = Field(
+        default=True,
+        description="Cache code-graph parse results by file content so unchanged files are not re-parsed "
+        "on reindex",
+    )
+
+    ast_parse_cache_dir: str = Field(
+        default="data/graph_parse_cache",
+        description="Directory for cached code-graph parse results (one subdirectory per corpus; "
+        "relative paths resolve from the project root)",
+    )
+
     ast_contains_weight: float = Field(
         default=1.0,
         ge=0.0,
@@ -3266,6 +3653,12 @@ class GraphIndexingConfig(BaseModel):
         description="Neo4j vector index name for Chunk embeddings (mode='chunk')",
     )
 
+    chunk_corpus_vector_index: bool = Field(
+        default=False,
+        description="In a shared Neo4j database, also label Chunk nodes per corpus and build a per-corpus vector "
+        "index so chunk vector search is scoped to the corpus without overfetch",
+    )
+
     chunk_embedding_property: str = Field(
         default="embedding",
         description="Chunk node property that stores the embedding vector",
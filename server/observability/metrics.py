@@ -158,6 +158,81 @@ SEARCH_GRAPH_HYDRATED_CHUNKS_COUNT = Histogram(
     buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
 )
 
+# Chunk-mode graph seeding over a Neo4j vector index shared by several corpora: candidates are
+# filtered by corpus after the ANN query, so overfetch is retried until enough seeds survive.
+GRAPH_CHUNK_SEED_ROUNDS = Histogram(
+    "tribrid_graph_chunk_seed_rounds",
+    "Vector-index queries issued per chunk-mode graph search (adaptive overfetch retries).",
+    buckets=(1, 2, 3, 4, 5, 6, 8),
+)
+
+GRAPH_CHUNK_SEED_CANDIDATES = Histogram(
+    "tribrid_graph_chunk_seed_candidates",
+    "Vector-index candidates requested by the final chunk-mode seeding round.",
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000),
+)
+
+GRAPH_CHUNK_SEED_MATCH_RATIO = Histogram(
+    "tribrid_graph_chunk_seed_match_ratio",
+    "Fraction of vector-index candidates that belonged to the searched corpus.",
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0),
+)
+
+GRAPH_CHUNK_SEED_SHORTFALL_TOTAL = Counter(
+    "tribrid_graph_chunk_seed_shortfall_total",
+    "Chunk-mode graph searches that found fewer in-corpus seeds than top_k (index exhausted or candidate cap).",
+)
+
+GRAPH_CHUNK_SEED_SCOPED_TOTAL = Counter(
+    "tribrid_graph_chunk_seed_scoped_total",
+    "Chunk-mode graph searches served by a per-corpus vector index.",
+)
+
+# Query embeddings: concurrent searches are coalesced into batched embed calls (see
+# server/retrieval/embedding_service.py).
+QUERY_EMBED_BATCH_SIZE = Histogram(
+    "tribrid_query_embed_batch_size",
+    "Distinct query texts per coalesced embedding call.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+QUERY_EMBED_QUEUE_WAIT_SECONDS = Histogram(
+    "tribrid_query_embed_queue_wait_seconds",
+    "Time a query text waited in the coalescing queue before its embedding call started.",
+    buckets=(0.0005, 0.001, 0.002, 0.003, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+QUERY_EMBED_DEDUPED_TOTAL = Counter(
+    "tribrid_query_embed_deduped_total",
+    "Query embedding requests served by an identical text already in flight.",
+)
+
+# --------------------------------------------------------------------------------------
+# Search result cache metrics
+# --------------------------------------------------------------------------------------
+
+SEARCH_CACHE_REQUESTS_TOTAL = Counter(
+    "tribrid_search_cache_requests_total",
+    "Total number of search result cache lookups (result=hit|miss).",
+    ["result"],
+)
+
+SEARCH_CACHE_EVICTIONS_TOTAL = Counter(
+    "tribrid_search_cache_evictions_total",
+    "Total number of search result cache evictions (reason=lru|ttl|memory|invalidated).",
+    ["reason"],
+)
+
+SEARCH_CACHE_ENTRIES = Gauge(
+    "tribrid_search_cache_entries",
+    "Current number of entries in the search result cache.",
+)
+
+SEARCH_CACHE_BYTES = Gauge(
+    "tribrid_search_cache_bytes",
+    "Approximate memory held by the search result cache in bytes.",
+)
+
 # --------------------------------------------------------------------------------------
 # Reranker metrics (inference-time)
 # --------------------------------------------------------------------------------------
@@ -244,6 +319,25 @@ INDEX_TOKENS_TOTAL = Counter(
     "Total number of chunk tokens processed during indexing.",
 )
 
+EMBEDDING_CACHE_REQUESTS_TOTAL = Counter(
+    "tribrid_embedding_cache_requests_total",
+    "Total number of distinct texts looked up in the embedding cache (result=hit|miss).",
+    ["result"],
+)
+
+# Local late chunking: documents longer than the encoder window are embedded in overlapping windows.
+LATE_CHUNKING_WINDOWS_PER_DOC = Histogram(
+    "tribrid_late_chunking_windows_per_doc",
+    "Encoder windows needed per document by local late chunking.",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 16, 32, 64, 128),
+)
+
+LATE_CHUNKING_DOC_PEAK_BYTES = Histogram(
+    "tribrid_late_chunking_doc_peak_bytes",
+    "Peak tensor memory attributable to one document during late chunking (its chunk sums plus the largest batch activations it was part of).",
+    buckets=(2**20, 2**22, 2**24, 2**26, 2**28, 2**30, 2**32),
+)
+
 # --------------------------------------------------------------------------------------
 # Process-level gauges (for Grafana stat panels)
 # --------------------------------------------------------------------------------------
@@ -282,6 +376,8 @@ _SEARCH_STAGES = (
     "neo4j_chunk_vector_search",
     "neo4j_expand_chunks_via_entities",
     "neo4j_entity_chunk_search",
+    "graph_snapshot_load",
+    "graph_snapshot_search",
     "postgres_get_chunks",
     "fusion_rrf",
     "normalize_scores",
@@ -291,24 +387,47 @@ _SEARCH_STAGES = (
     "vector_leg",
     "sparse_leg",
     "graph_leg",
+    "vector_leg_timeout",
+    "sparse_leg_timeout",
+    "graph_leg_timeout",
+    "corpus_timeout",
 )
 
 _SEARCH_LEGS = ("vector", "sparse", "graph")
 
+_SEARCH_CACHE_RESULTS = ("hit", "miss")
+_SEARCH_CACHE_EVICTION_REASONS = ("lru", "ttl", "memory", "invalidated")
+
 _INDEX_STAGES = (
     "collect_file_paths",
+    "incremental_plan",
+    "incremental_purge",
+    "postgres_delete_chunks",
+    "neo4j_delete_graph",
     "file_read",
+    "file_read_stream",
     "chunk",
+    "late_chunking",
     "embed_chunks",
-    "postgres_upsert_embeddings",
-    "postgres_upsert_fts",
+    "embedding_cache_prune",
+    "postgres_upsert_chunks",
+    "postgres_vector_ann_index",
     "neo4j_upsert_document_chunks",
+    "neo4j_label_corpus_chunks",
+    "graph_parse",
+    "graph_parse_pool",
+    "graph_parse_timeout",
+    "graph_upsert",
+    "file_prepare_pool",
+    "file_prepare_timeout",
+    "file_prepare_memory",
     "neo4j_upsert_semantic_entities",
     "neo4j_upsert_semantic_relationships",
     "neo4j_link_entities_to_chunks",
     "semantic_kg",
     "graph_build",
     "neo4j_rebuild_entity_chunk_links",
+    "graph_snapshot_build",
 )
 
 for _stage in _SEARCH_STAGES:
@@ -318,6 +437,13 @@ for _stage in _SEARCH_STAGES:
 for _leg in _SEARCH_LEGS:
     SEARCH_LEG_RESULTS_COUNT.labels(leg=_leg)
 
+for _result in _SEARCH_CACHE_RESULTS:
+    SEARCH_CACHE_REQUESTS_TOTAL.labels(result=_result)
+    EMBEDDING_CACHE_REQUESTS_TOTAL.labels(result=_result)
+
+for _reason in _SEARCH_CACHE_EVICTION_REASONS:
+    SEARCH_CACHE_EVICTIONS_TOTAL.labels(reason=_reason)
+
 for _stage in _INDEX_STAGES:
     INDEX_STAGE_LATENCY_SECONDS.labels(stage=_stage)
     INDEX_STAGE_ERRORS_TOTAL.labels(stage=_stage)
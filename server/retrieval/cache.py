@@ -1 +1,204 @@
-"""Retrieval cache module."""
+"""Retrieval cache module.
+
+Process-wide query-result cache for `TriBridFusion.search`.
+
+- Keyed by (corpus ids, normalized query, leg toggles, top_k, config hash, index generations)
+- LRU + TTL eviction with an approximate memory cap
+- Invalidated per corpus when indexing (or index deletion) bumps that corpus's index generation
+
+Cached values are deep copies; callers may freely mutate what they get back.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+
+from server.models.retrieval import ChunkMatch
+from server.observability.metrics import (
+    SEARCH_CACHE_BYTES,
+    SEARCH_CACHE_ENTRIES,
+    SEARCH_CACHE_EVICTIONS_TOTAL,
+    SEARCH_CACHE_REQUESTS_TOTAL,
+)
+
+_WS_RE = re.compile(r"\s+")
+
+# Per-corpus index generation. Bumped whenever a corpus's indexed content changes.
+_INDEX_GENERATIONS: dict[str, int] = {}
+
+
+def get_index_generation(corpus_id: str) -> int:
+    return int(_INDEX_GENERATIONS.get(str(corpus_id), 0))
+
+
+def bump_index_generation(corpus_id: str) -> int:
+    """Advance a corpus's index generation and drop its cached results."""
+    cid = str(corpus_id)
+    gen = int(_INDEX_GENERATIONS.get(cid, 0)) + 1
+    _INDEX_GENERATIONS[cid] = gen
+    get_result_cache().invalidate_corpus(cid)
+    return gen
+
+
+def normalize_query(query: str) -> str:
+    # Whitespace/Unicode normalization only: casing can change embeddings and rerank scores.
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", str(query or ""))).strip()
+
+
+def config_fingerprint(parts: Iterable[BaseModel | None]) -> str:
+    """Stable hash over the config sections that influence retrieval results."""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(b"\x00" if part is None else part.model_dump_json(warnings=False).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class ResultCacheKey:
+    corpus_ids: tuple[str, ...]
+    query: str
+    include_vector: bool
+    include_sparse: bool
+    include_graph: bool
+    top_k: int
+    config_hash: str
+    generations: tuple[int, ...]
+
+
+@dataclass
+class _CacheEntry:
+    results: list[ChunkMatch]
+    debug: dict[str, Any]
+    size_bytes: int
+    expires_at: float
+
+
+def _estimate_size_bytes(results: list[ChunkMatch], debug: dict[str, Any]) -> int:
+    size = 512
+    for r in results:
+        size += 256 + len(r.content) + len(r.file_path) + len(r.chunk_id)
+        if r.metadata:
+            size += len(json.dumps(r.metadata, default=str))
+    size += len(json.dumps(debug, default=str))
+    return size
+
+
+class QueryResultCache:
+    """LRU + TTL cache of fused search results with an approximate memory cap."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_s: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl_s = float(ttl_s)
+        self._clock = clock
+        self._entries: OrderedDict[ResultCacheKey, _CacheEntry] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def configure(self, *, max_entries: int, max_bytes: int, ttl_s: float) -> None:
+        """Apply new limits (evicting immediately if the cache shrank)."""
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl_s = float(ttl_s)
+        self._enforce_limits()
+
+    def get(self, key: ResultCacheKey) -> tuple[list[ChunkMatch], dict[str, Any]] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            SEARCH_CACHE_REQUESTS_TOTAL.labels(result="miss").inc()
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key, reason="ttl")
+            SEARCH_CACHE_REQUESTS_TOTAL.labels(result="miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        SEARCH_CACHE_REQUESTS_TOTAL.labels(result="hit").inc()
+        return [r.model_copy(deep=True) for r in entry.results], copy.deepcopy(entry.debug)
+
+    def put(self, key: ResultCacheKey, results: list[ChunkMatch], debug: dict[str, Any]) -> None:
+        if self.max_entries <= 0 or self.ttl_s <= 0:
+            return
+        size = _estimate_size_bytes(results, debug)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key, reason=None)
+        self._entries[key] = _CacheEntry(
+            results=[r.model_copy(deep=True) for r in results],
+            debug=copy.deepcopy(debug),
+            size_bytes=size,
+            expires_at=self._clock() + self.ttl_s,
+        )
+        self._bytes += size
+        self._enforce_limits()
+        self._update_gauges()
+
+    def invalidate_corpus(self, corpus_id: str) -> int:
+        stale = [key for key in self._entries if corpus_id in key.corpus_ids]
+        for key in stale:
+            self._remove(key, reason="invalidated")
+        self._update_gauges()
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._update_gauges()
+
+    def _enforce_limits(self) -> None:
+        now = self._clock()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            self._remove(key, reason="ttl")
+        while self._entries and len(self._entries) > max(0, self.max_entries):
+            self._remove(next(iter(self._entries)), reason="lru")
+        while self._entries and self._bytes > max(0, self.max_bytes):
+            self._remove(next(iter(self._entries)), reason="memory")
+        self._update_gauges()
+
+    def _remove(self, key: ResultCacheKey, *, reason: str | None) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size_bytes
+        if reason is not None:
+            SEARCH_CACHE_EVICTIONS_TOTAL.labels(reason=reason).inc()
+
+    def _update_gauges(self) -> None:
+        SEARCH_CACHE_ENTRIES.set(len(self._entries))
+        SEARCH_CACHE_BYTES.set(self._bytes)
+
+
+_RESULT_CACHE: QueryResultCache | None = None
+
+
+def get_result_cache() -> QueryResultCache:
+    """Get the process-wide result cache singleton."""
+    global _RESULT_CACHE
+    if _RESULT_CACHE is None:
+        _RESULT_CACHE = QueryResultCache()
+    return _RESULT_CACHE
@@ -0,0 +1,138 @@
+"""Process-wide query embedding service.
+
+Concurrent searches (`/api/search`, chat, MCP) each need one query embedding. Instead of one
+provider/model call per request, `QueryEmbedder.embed` queues the text and a single `embed_batch`
+call serves everything queued within a short window (or as soon as `max_items` are waiting):
+
+- one `QueryEmbedder` (and so one `Embedder`, its model handles and HTTP client) per embedding
+  config, shared by every corpus using that config
+- identical texts in flight share one result
+- batch sizes and queue waits are exported as histograms
+
+Only provider backends are coalesced; deterministic embeddings are computed inline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from server.indexing.embedder import Embedder
+from server.models.tribrid_config_model import EmbeddingConfig, TokenizationConfig
+from server.observability.metrics import (
+    QUERY_EMBED_BATCH_SIZE,
+    QUERY_EMBED_DEDUPED_TOTAL,
+    QUERY_EMBED_QUEUE_WAIT_SECONDS,
+)
+from server.retrieval.cache import config_fingerprint
+
+# Distinct embedding configs kept warm (least recently used beyond this are dropped).
+_MAX_SERVICES = 16
+
+
+class QueryEmbedder:
+    """Micro-batches concurrent `embed()` calls for one embedding config (one event loop)."""
+
+    def __init__(self, embedder: Any, *, window_s: float, max_items: int) -> None:
+        self.embedder = embedder
+        self.window_s = max(0.0, float(window_s))
+        self.max_items = max(1, int(max_items))
+        # window 0: every call goes straight to the embedder.
+        self.coalesce = self.window_s > 0
+        self.loop = asyncio.get_running_loop()
+        self._queued: list[tuple[str, float]] = []
+        self._inflight: dict[str, asyncio.Future[list[float]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        if not self.coalesce:
+            return await self.embedder.embed(text)  # type: ignore[no-any-return]
+        fut = self._inflight.get(text)
+        if fut is not None:
+            QUERY_EMBED_DEDUPED_TOTAL.inc()
+        else:
+            fut = self.loop.create_future()
+            # Retrieve the outcome even if every waiter is cancelled first.
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[text] = fut
+            self._queued.append((text, time.perf_counter()))
+            if len(self._queued) >= self.max_items:
+                self._flush()
+            elif self._timer is None:
+                self._timer = self.loop.call_later(self.window_s, self._flush)
+        # Shield: one caller giving up must not fail the others waiting on the same batch.
+        return await asyncio.shield(fut)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queued = self._queued, []
+        if not batch:
+            return
+        task = self.loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, float]]) -> None:
+        started = time.perf_counter()
+        for _text, queued_at in batch:
+            QUERY_EMBED_QUEUE_WAIT_SECONDS.observe(started - queued_at)
+        QUERY_EMBED_BATCH_SIZE.observe(len(batch))
+        texts = [text for text, _queued_at in batch]
+        try:
+            vecs = await self.embedder.embed_batch(texts)
+            if len(vecs) != len(texts):
+                raise RuntimeError(f"embed_batch returned {len(vecs)} vectors for {len(texts)} texts")
+        except asyncio.CancelledError:
+            for text in texts:
+                self._inflight.pop(text).cancel()
+            raise
+        except Exception as e:
+            for text in texts:
+                fut = self._inflight.pop(text)
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for text, vec in zip(texts, vecs, strict=True):
+            fut = self._inflight.pop(text)
+            if not fut.done():
+                fut.set_result(vec)
+
+
+_SERVICES: OrderedDict[tuple[Any, str], QueryEmbedder] = OrderedDict()
+
+
+def get_query_embedder(
+    embedding: EmbeddingConfig,
+    tokenization: TokenizationConfig | None = None,
+    *,
+    factory: Callable[..., Any] = Embedder,
+) -> QueryEmbedder:
+    """Shared `QueryEmbedder` for this embedding config, built with `factory` on first use.
+
+    Call from a coroutine: batches are flushed on the running event loop.
+    """
+    key = (factory, config_fingerprint([embedding, tokenization]))
+    service = _SERVICES.get(key)
+    if service is None or service.loop is not asyncio.get_running_loop():
+        backend = str(embedding.embedding_backend or "deterministic").strip().lower()
+        service = QueryEmbedder(
+            factory(embedding, tokenization),
+            window_s=float(embedding.query_embed_coalesce_window_ms) / 1000.0 if backend == "provider" else 0.0,
+            max_items=int(embedding.query_embed_coalesce_max_items),
+        )
+        _SERVICES[key] = service
+        while len(_SERVICES) > _MAX_SERVICES:
+            _SERVICES.popitem(last=False)
+    _SERVICES.move_to_end(key)
+    return service
+
+
+def clear_query_embedders() -> None:
+    """Drop every shared service (tests, config reloads)."""
+    _SERVICES.clear()
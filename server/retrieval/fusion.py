@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import math
 import re
 from collections import defaultdict
+from collections.abc import Awaitable, Callable
 from typing import TYPE_CHECKING, Any
 
-from server.db.neo4j import Neo4jClient
+import numpy as np
+from pydantic import BaseModel
+
+from server.db.neo4j import GraphExpansionBudget, Neo4jClient, corpus_vector_index_name
 from server.db.postgres import PostgresClient
 from server.indexing.embedder import Embedder
 from server.models.retrieval import ChunkMatch
@@ -16,6 +21,11 @@ from server.models.tribrid_config_model import (
     TriBridConfig,
 )
 from server.observability.metrics import (
+    GRAPH_CHUNK_SEED_CANDIDATES,
+    GRAPH_CHUNK_SEED_MATCH_RATIO,
+    GRAPH_CHUNK_SEED_ROUNDS,
+    GRAPH_CHUNK_SEED_SCOPED_TOTAL,
+    GRAPH_CHUNK_SEED_SHORTFALL_TOTAL,
     GRAPH_LEG_LATENCY_SECONDS,
     SEARCH_GRAPH_HYDRATED_CHUNKS_COUNT,
     SEARCH_LEG_RESULTS_COUNT,
@@ -25,6 +35,15 @@ from server.observability.metrics import (
     SPARSE_LEG_LATENCY_SECONDS,
     VECTOR_LEG_LATENCY_SECONDS,
 )
+from server.retrieval.cache import (
+    ResultCacheKey,
+    config_fingerprint,
+    get_index_generation,
+    get_result_cache,
+    normalize_query,
+)
+from server.retrieval.embedding_service import get_query_embedder
+from server.retrieval.graph_snapshot import GraphSnapshot, get_graph_snapshot
 from server.retrieval.rerank import Reranker
 from server.services.config_store import get_config as load_scoped_config
 
@@ -35,10 +54,25 @@ if TYPE_CHECKING:
 
 
 class TriBridFusion:
-    def __init__(self, vector: VectorRetriever | None, sparse: SparseRetriever | None, graph: GraphRetriever | None):
+    def __init__(
+        self,
+        vector: VectorRetriever | None,
+        sparse: SparseRetriever | None,
+        graph: GraphRetriever | None,
+        *,
+        postgres_factory: Callable[[str], PostgresClient] | None = None,
+        neo4j_factory: Callable[..., Neo4jClient] | None = None,
+        embedder_factory: Callable[..., Any] | None = None,
+        load_config: Callable[..., Awaitable[TriBridConfig]] | None = None,
+    ):
         self.vector = vector
         self.sparse = sparse
         self.graph = graph
+        # Storage clients, query embedder and per-corpus config; tests inject in-memory fakes.
+        self._postgres_factory = postgres_factory or PostgresClient
+        self._neo4j_factory = neo4j_factory or Neo4jClient
+        self._embedder_factory = embedder_factory or Embedder
+        self._load_config = load_config or load_scoped_config
         # Populated after each search() call; used by API layers to expose deterministic debug.
         self.last_debug: dict[str, Any] = {}
 
@@ -88,6 +122,42 @@ class TriBridFusion:
             msg = msg.replace("\\n", " ").replace("\\r", " ").strip()
             return msg[: int(max_len)]
 
+        # Query-result cache (process-wide; per-corpus index generations are part of the key).
+        result_cache = get_result_cache()
+        cache_key: ResultCacheKey | None = None
+        if bool(getattr(config, "result_cache_enabled", False)):
+            try:
+                scoped_cfgs = [await self._load_config(repo_id=cid) for cid in corpus_ids]
+                cache_key = ResultCacheKey(
+                    corpus_ids=tuple(corpus_ids),
+                    query=normalize_query(query),
+                    include_vector=bool(include_vector),
+                    include_sparse=bool(include_sparse),
+                    include_graph=bool(include_graph),
+                    top_k=int(top_k or 0),
+                    config_hash=config_fingerprint(
+                        [config, *(section for c in scoped_cfgs for section in _result_cache_sections(c))]
+                    ),
+                    generations=tuple(get_index_generation(cid) for cid in corpus_ids),
+                )
+            except Exception:
+                # Uncacheable (e.g. missing corpus config); run the search normally.
+                cache_key = None
+            if cache_key is not None:
+                result_cache.configure(
+                    max_entries=int(config.result_cache_max_entries),
+                    max_bytes=int(config.result_cache_max_mb) * 1024 * 1024,
+                    ttl_s=float(config.result_cache_ttl_s),
+                )
+                cached = result_cache.get(cache_key)
+                if cached is not None:
+                    cached_results, cached_debug = cached
+                    self.last_debug = {**cached_debug, "fusion_cache_hit": True}
+                    SEARCH_RESULTS_FINAL_COUNT.observe(len(cached_results))
+                    return cached_results
+
+        partial_debug: dict[str, dict[str, Any]] = {}
+
         async def _search_single_corpus(
             cid: str,
         ) -> tuple[
@@ -102,7 +172,7 @@ class TriBridFusion:
         ]:
             cfg_error: Exception | None = None
             try:
-                cfg = await load_scoped_config(repo_id=cid)
+                cfg = await self._load_config(repo_id=cid)
             except Exception as e:
                 # Fail open: if corpus config cannot be loaded (missing corpus, Postgres down, etc),
                 # return empty results with debug instead of raising into a 500.
@@ -141,7 +211,12 @@ class TriBridFusion:
                     getattr(cfg.graph_search, "chunk_entity_expansion_enabled", False)
                 ),
                 "fusion_graph_entity_expansion_hits": 0,
+                "fusion_vector_timed_out": False,
+                "fusion_sparse_timed_out": False,
+                "fusion_graph_timed_out": False,
             }
+            # Visible to the fan-out so a corpus that misses its deadline still reports leg progress.
+            partial_debug[cid] = debug
 
             if cfg_error is not None:
                 debug["fusion_config_error"] = _safe_error_message(cfg_error)
@@ -159,7 +234,7 @@ class TriBridFusion:
                 )
 
             # Use real storage backends per corpus config.
-            postgres = PostgresClient(cfg.indexing.postgres_url)
+            postgres = self._postgres_factory(cfg.indexing.postgres_url)
             try:
                 await postgres.connect()
             except Exception as e:
@@ -177,41 +252,57 @@ class TriBridFusion:
                     str(cfg.training.tribrid_reranker_model_path or ""),
                 )
 
-            embedder = Embedder(cfg.embedding, cfg.tokenization)
+            # Shared per embedding config: concurrent searches are batched into one embed call.
+            embedder = get_query_embedder(cfg.embedding, cfg.tokenization, factory=self._embedder_factory)
 
-            # Reuse query embeddings across legs when possible (vector + graph chunk-mode).
-            q_emb: list[float] | None = None
+            # Legs run concurrently. The query embedding is computed at most once and shared by the
+            # vector leg and chunk-mode graph retrieval (whichever leg asks first starts it).
+            q_emb_task: asyncio.Task[list[float]] | None = None
 
-            # Run legs (request toggles + config.*.enabled)
-            if include_vector and cfg.vector_search.enabled:
+            async def _embed_query() -> list[float]:
+                with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="embed_query").time():
+                    return await embedder.embed(query)
+
+            async def _query_embedding() -> list[float]:
+                nonlocal q_emb_task
+                if q_emb_task is None:
+                    q_emb_task = asyncio.create_task(_embed_query())
+                    # Retrieve the outcome even if every awaiting leg times out first.
+                    q_emb_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                # Shield: one leg timing out must not cancel the embedding the other leg awaits.
+                return await asyncio.shield(q_emb_task)
+
+            async def _vector_leg() -> list[ChunkMatch]:
+                results: list[ChunkMatch] = []
                 with VECTOR_LEG_LATENCY_SECONDS.time():
                     try:
-                        if q_emb is None:
-                            with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="embed_query").time():
-                                q_emb = await embedder.embed(query)
+                        q_emb = await _query_embedding()
                         with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="postgres_vector_search").time():
-                            vector_results = await postgres.vector_search(
-                                cid, q_emb, int(top_k or cfg.vector_search.top_k)
+                            results = await postgres.vector_search(
+                                cid,
+                                q_emb,
+                                int(top_k or cfg.vector_search.top_k),
+                                ef_search=int(getattr(cfg.vector_search, "hnsw_ef_search", 40) or 40),
+                                probes=int(getattr(cfg.vector_search, "ivfflat_probes", 10) or 10),
                             )
                     except Exception as e:
                         debug["fusion_vector_error"] = _safe_error_message(e)
                         debug["fusion_vector_error_kind"] = type(e).__name__
                         SEARCH_STAGE_ERRORS_TOTAL.labels(stage="vector_leg").inc()
-                        vector_results = []
+                        results = []
                     if cfg.vector_search.similarity_threshold > 0:
-                        vector_results = [
-                            r for r in vector_results if r.score >= cfg.vector_search.similarity_threshold
-                        ]
+                        results = [r for r in results if r.score >= cfg.vector_search.similarity_threshold]
                     min_v = float(getattr(cfg.retrieval, "min_score_vector", 0.0) or 0.0)
                     if min_v > 0:
-                        vector_results = [r for r in vector_results if float(r.score) >= float(min_v)]
-            debug["fusion_vector_results"] = len(vector_results)
+                        results = [r for r in results if float(r.score) >= float(min_v)]
+                return results
 
-            if include_sparse and cfg.sparse_search.enabled:
+            async def _sparse_leg() -> list[ChunkMatch]:
+                results: list[ChunkMatch] = []
                 with SPARSE_LEG_LATENCY_SECONDS.time():
                     try:
                         with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="postgres_sparse_search").time():
-                            sparse_results = await postgres.sparse_search_engine(
+                            results = await postgres.sparse_search_engine(
                                 cid,
                                 query,
                                 int(top_k or cfg.sparse_search.top_k),
@@ -226,46 +317,58 @@ class TriBridFusion:
                         debug["fusion_sparse_error"] = _safe_error_message(e)
                         debug["fusion_sparse_error_kind"] = type(e).__name__
                         SEARCH_STAGE_ERRORS_TOTAL.labels(stage="sparse_leg").inc()
-                        sparse_results = []
+                        results = []
 
-                if not sparse_results and bool(getattr(cfg.sparse_search, "file_path_fallback", True)):
-                    try:
-                        with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="postgres_file_path_search").time():
-                            sparse_results = await postgres.file_path_search(
-                                cid,
-                                query,
-                                int(top_k or cfg.sparse_search.top_k),
-                                max_terms=int(getattr(cfg.sparse_search, "file_path_max_terms", 6) or 6),
-                            )
-                        debug["fusion_sparse_file_path_fallback_used"] = bool(sparse_results)
-                    except Exception as e:
-                        debug["fusion_sparse_file_path_fallback_error"] = _safe_error_message(e)
-                        debug["fusion_sparse_file_path_fallback_error_kind"] = type(e).__name__
-                        SEARCH_STAGE_ERRORS_TOTAL.labels(stage="sparse_file_path_fallback").inc()
+                    if not results and bool(getattr(cfg.sparse_search, "file_path_fallback", True)):
+                        try:
+                            with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="postgres_file_path_search").time():
+                                results = await postgres.file_path_search(
+                                    cid,
+                                    query,
+                                    int(top_k or cfg.sparse_search.top_k),
+                                    max_terms=int(getattr(cfg.sparse_search, "file_path_max_terms", 6) or 6),
+                                )
+                            debug["fusion_sparse_file_path_fallback_used"] = bool(results)
+                        except Exception as e:
+                            debug["fusion_sparse_file_path_fallback_error"] = _safe_error_message(e)
+                            debug["fusion_sparse_file_path_fallback_error_kind"] = type(e).__name__
+                            SEARCH_STAGE_ERRORS_TOTAL.labels(stage="sparse_file_path_fallback").inc()
 
                 min_s = float(getattr(cfg.retrieval, "min_score_sparse", 0.0) or 0.0)
                 if min_s > 0:
-                    sparse_results = [r for r in sparse_results if float(r.score) >= float(min_s)]
+                    results = [r for r in results if float(r.score) >= float(min_s)]
                 try:
                     engines = {
                         str((r.metadata or {}).get("sparse_engine") or "").strip()
-                        for r in sparse_results
+                        for r in results
                         if (r.metadata or {}).get("sparse_engine")
                     }
                 except Exception:
                     engines = set()
                 debug["fusion_sparse_engine"] = next(iter(sorted(engines)), None) if engines else None
-            debug["fusion_sparse_results"] = len(sparse_results)
+                return results
 
             # Graph retrieval: query Neo4j for relevant entities, then hydrate to chunks from Postgres.
-            if include_graph and cfg.graph_search.enabled:
-                debug["fusion_graph_attempted"] = True
+            async def _graph_leg() -> list[ChunkMatch]:
+                results: list[ChunkMatch] = []
                 graph_k = int(top_k or cfg.graph_search.top_k)
                 db_name = cfg.graph_storage.resolve_database(cid)
                 neo4j: Neo4jClient | None = None
-                try:
-                    with GRAPH_LEG_LATENCY_SECONDS.time():
-                        neo4j = Neo4jClient(
+                expansion_budget = GraphExpansionBudget.from_config(cfg.graph_search)
+                expansion_stats: dict[str, Any] = {}
+
+                def _record_expansion(stats: dict[str, Any]) -> None:
+                    if not stats:
+                        return
+                    debug["fusion_graph_expansion"] = dict(stats)
+                    debug["fusion_graph_expansion_budget_exhausted"] = bool(stats.get("budget_exhausted"))
+
+                snapshot: GraphSnapshot | None = None
+
+                async def _connect() -> Neo4jClient:
+                    nonlocal neo4j
+                    if neo4j is None:
+                        neo4j = self._neo4j_factory(
                             cfg.graph_storage.neo4j_uri,
                             cfg.graph_storage.neo4j_user,
                             cfg.graph_storage.neo4j_password,
@@ -273,26 +376,59 @@ class TriBridFusion:
                         )
                         with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="neo4j_connect").time():
                             await neo4j.connect()
+                    return neo4j
+
+                def _snapshot_failed(e: Exception) -> None:
+                    nonlocal snapshot
+                    debug["fusion_graph_snapshot_error"] = str(e)
+                    SEARCH_STAGE_ERRORS_TOTAL.labels(stage="graph_snapshot_search").inc()
+                    snapshot = None
+                    debug["fusion_graph_engine"] = "neo4j"
+
+                try:
+                    with GRAPH_LEG_LATENCY_SECONDS.time():
+                        with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="graph_snapshot_load").time():
+                            snapshot = await get_graph_snapshot(cid, cfg.graph_search)
+                        debug["fusion_graph_engine"] = "snapshot" if snapshot is not None else "neo4j"
                         if getattr(cfg.graph_search, "mode", "entity") == "chunk":
                             # Chunk-level graph retrieval: Neo4j vector index over Chunk nodes.
-                            if q_emb is None:
-                                with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="embed_query").time():
-                                    q_emb = await embedder.embed(query)
+                            client = await _connect()
+                            q_emb = await _query_embedding()
+                            shared = cfg.graph_storage.neo4j_database_mode == "shared"
                             overfetch = (
-                                int(getattr(cfg.graph_search, "chunk_seed_overfetch_multiplier", 1) or 1)
-                                if cfg.graph_storage.neo4j_database_mode == "shared"
-                                else 1
+                                int(getattr(cfg.graph_search, "chunk_seed_overfetch_multiplier", 1) or 1) if shared else 1
                             )
+                            seed_stats: dict[str, Any] = {}
                             with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="neo4j_chunk_vector_search").time():
-                                hits = await neo4j.chunk_vector_search(
+                                hits = await client.chunk_vector_search(
                                     cid,
                                     q_emb,
                                     index_name=cfg.graph_indexing.chunk_vector_index_name,
                                     top_k=graph_k,
                                     neighbor_window=int(getattr(cfg.graph_search, "chunk_neighbor_window", 0) or 0),
                                     overfetch_multiplier=overfetch,
+                                    adaptive=shared and bool(cfg.graph_search.chunk_seed_overfetch_adaptive),
+                                    overfetch_growth=int(cfg.graph_search.chunk_seed_overfetch_growth),
+                                    max_candidates=int(cfg.graph_search.chunk_seed_max_candidates),
+                                    corpus_index_name=(
+                                        corpus_vector_index_name(cfg.graph_indexing.chunk_vector_index_name, cid)
+                                        if shared and cfg.graph_indexing.chunk_corpus_vector_index
+                                        else None
+                                    ),
+                                    stats=seed_stats,
                                 )
                             debug["fusion_graph_entity_hits"] = len(hits)
+                            if seed_stats:
+                                debug["fusion_graph_chunk_seeding"] = dict(seed_stats)
+                                GRAPH_CHUNK_SEED_ROUNDS.observe(int(seed_stats.get("rounds") or 0))
+                                GRAPH_CHUNK_SEED_CANDIDATES.observe(int(seed_stats.get("seed_k") or 0))
+                                candidates = int(seed_stats.get("candidates") or 0)
+                                if candidates:
+                                    GRAPH_CHUNK_SEED_MATCH_RATIO.observe(int(seed_stats.get("matched") or 0) / candidates)
+                                if int(seed_stats.get("matched") or 0) < graph_k:
+                                    GRAPH_CHUNK_SEED_SHORTFALL_TOTAL.inc()
+                                if seed_stats.get("scoped"):
+                                    GRAPH_CHUNK_SEED_SCOPED_TOTAL.inc()
 
                             score_by_id = {chunk_id: float(score) for chunk_id, score in hits}
 
@@ -300,16 +436,35 @@ class TriBridFusion:
                             if bool(
                                 getattr(cfg.graph_search, "chunk_entity_expansion_enabled", False)
                             ) and int(cfg.graph_search.max_hops) > 0:
-                                with SEARCH_STAGE_LATENCY_SECONDS.labels(
-                                    stage="neo4j_expand_chunks_via_entities"
-                                ).time():
-                                    exp_hits = await neo4j.expand_chunks_via_entities(
-                                        cid,
-                                        hits,
-                                        max_hops=int(cfg.graph_search.max_hops),
-                                        top_k=graph_k,
-                                    )
+                                exp_hits: list[tuple[str, float]] | None = None
+                                if snapshot is not None:
+                                    try:
+                                        with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="graph_snapshot_search").time():
+                                            # CPU-bound traversal (and mmap page faults): keep it off the event loop.
+                                            exp_hits = await asyncio.to_thread(
+                                                snapshot.expand_chunks_via_entities,
+                                                hits,
+                                                max_hops=int(cfg.graph_search.max_hops),
+                                                top_k=graph_k,
+                                                budget=expansion_budget,
+                                                stats=expansion_stats,
+                                            )
+                                    except Exception as e:
+                                        _snapshot_failed(e)
+                                if exp_hits is None:
+                                    with SEARCH_STAGE_LATENCY_SECONDS.labels(
+                                        stage="neo4j_expand_chunks_via_entities"
+                                    ).time():
+                                        exp_hits = await client.expand_chunks_via_entities(
+                                            cid,
+                                            hits,
+                                            max_hops=int(cfg.graph_search.max_hops),
+                                            top_k=graph_k,
+                                            budget=expansion_budget,
+                                            stats=expansion_stats,
+                                        )
                                 debug["fusion_graph_entity_expansion_hits"] = len(exp_hits)
+                                _record_expansion(expansion_stats)
                                 w = float(getattr(cfg.graph_search, "chunk_entity_expansion_weight", 1.0) or 0.0)
                                 for chunk_id, score in exp_hits:
                                     score_by_id[chunk_id] = max(
@@ -321,7 +476,7 @@ class TriBridFusion:
                             )[:graph_k]
                             with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="postgres_get_chunks").time():
                                 hydrated = await postgres.get_chunks(cid, chunk_ids)
-                            graph_results = [
+                            results = [
                                 ChunkMatch(
                                     chunk_id=ch.chunk_id,
                                     content=ch.content,
@@ -341,18 +496,43 @@ class TriBridFusion:
                                 for ch in hydrated
                                 if ch.chunk_id in score_by_id
                             ]
-                            debug["fusion_graph_hydrated_chunks"] = len(graph_results)
+                            debug["fusion_graph_hydrated_chunks"] = len(results)
                         else:
                             # Entity-mode graph retrieval: return real chunk_ids via Entity-[:IN_CHUNK]->Chunk.
-                            with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="neo4j_entity_chunk_search").time():
-                                hits = await neo4j.entity_chunk_search(cid, query, cfg.graph_search.max_hops, graph_k)
+                            entity_hits: list[tuple[str, float]] | None = None
+                            if snapshot is not None:
+                                try:
+                                    with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="graph_snapshot_search").time():
+                                        entity_hits = await asyncio.to_thread(
+                                            snapshot.entity_chunk_search,
+                                            query,
+                                            cfg.graph_search.max_hops,
+                                            graph_k,
+                                            budget=expansion_budget,
+                                            stats=expansion_stats,
+                                        )
+                                except Exception as e:
+                                    _snapshot_failed(e)
+                            if entity_hits is None:
+                                client = await _connect()
+                                with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="neo4j_entity_chunk_search").time():
+                                    entity_hits = await client.entity_chunk_search(
+                                        cid,
+                                        query,
+                                        cfg.graph_search.max_hops,
+                                        graph_k,
+                                        budget=expansion_budget,
+                                        stats=expansion_stats,
+                                    )
+                            hits = entity_hits
                             debug["fusion_graph_entity_hits"] = len(hits)
+                            _record_expansion(expansion_stats)
 
                             score_by_id = {chunk_id: float(score) for chunk_id, score in hits}
                             chunk_ids = [chunk_id for chunk_id, _score in hits]
                             with SEARCH_STAGE_LATENCY_SECONDS.labels(stage="postgres_get_chunks").time():
                                 hydrated = await postgres.get_chunks(cid, chunk_ids)
-                            graph_results = [
+                            results = [
                                 ChunkMatch(
                                     chunk_id=ch.chunk_id,
                                     content=ch.content,
@@ -367,10 +547,11 @@ class TriBridFusion:
                                 for ch in hydrated
                                 if ch.chunk_id in score_by_id
                             ]
-                            debug["fusion_graph_hydrated_chunks"] = len(graph_results)
+                            debug["fusion_graph_hydrated_chunks"] = len(results)
                 except Exception as e:
                     debug["fusion_graph_error"] = str(e)
                     SEARCH_STAGE_ERRORS_TOTAL.labels(stage="graph_leg").inc()
+                    results = []
                 finally:
                     if neo4j is not None:
                         try:
@@ -379,7 +560,58 @@ class TriBridFusion:
                             pass
                 min_g = float(getattr(cfg.retrieval, "min_score_graph", 0.0) or 0.0)
                 if min_g > 0:
-                    graph_results = [r for r in graph_results if float(r.score) >= float(min_g)]
+                    results = [r for r in results if float(r.score) >= float(min_g)]
+                return results
+
+            async def _run_leg(
+                leg: str, fn: Callable[[], Awaitable[list[ChunkMatch]]], timeout_s: float
+            ) -> list[ChunkMatch]:
+                # wait_for cancels the leg on timeout; the leg's own finally blocks still run.
+                try:
+                    if timeout_s > 0:
+                        return await asyncio.wait_for(fn(), timeout=timeout_s)
+                    return await fn()
+                except TimeoutError:
+                    debug[f"fusion_{leg}_timed_out"] = True
+                    debug[f"fusion_{leg}_error"] = f"{leg} leg timed out after {timeout_s:g}s"
+                    debug[f"fusion_{leg}_error_kind"] = "TimeoutError"
+                    SEARCH_STAGE_ERRORS_TOTAL.labels(stage=f"{leg}_leg_timeout").inc()
+                    return []
+
+            # Run legs (request toggles + config.*.enabled)
+            leg_tasks: dict[str, asyncio.Task[list[ChunkMatch]]] = {}
+            if include_vector and cfg.vector_search.enabled:
+                leg_tasks["vector"] = asyncio.create_task(
+                    _run_leg("vector", _vector_leg, float(getattr(cfg.vector_search, "timeout_s", 0.0) or 0.0))
+                )
+            if include_sparse and cfg.sparse_search.enabled:
+                leg_tasks["sparse"] = asyncio.create_task(
+                    _run_leg("sparse", _sparse_leg, float(getattr(cfg.sparse_search, "timeout_s", 0.0) or 0.0))
+                )
+            if include_graph and cfg.graph_search.enabled:
+                debug["fusion_graph_attempted"] = True
+                leg_tasks["graph"] = asyncio.create_task(
+                    _run_leg("graph", _graph_leg, float(getattr(cfg.graph_search, "timeout_s", 0.0) or 0.0))
+                )
+            try:
+                if leg_tasks:
+                    await asyncio.gather(*leg_tasks.values())
+            finally:
+                # Propagate cancellation of the caller to any leg still in flight.
+                for task in leg_tasks.values():
+                    if not task.done():
+                        task.cancel()
+                if q_emb_task is not None and not q_emb_task.done():
+                    q_emb_task.cancel()
+
+            if "vector" in leg_tasks:
+                vector_results = leg_tasks["vector"].result()
+            if "sparse" in leg_tasks:
+                sparse_results = leg_tasks["sparse"].result()
+            if "graph" in leg_tasks:
+                graph_results = leg_tasks["graph"].result()
+            debug["fusion_vector_results"] = len(vector_results)
+            debug["fusion_sparse_results"] = len(sparse_results)
 
             # Ensure corpus_id is always present for multi-corpus identity + UI reporting.
             for r in vector_results:
@@ -420,8 +652,49 @@ class TriBridFusion:
         any_graph_attempted = False
         graph_errors: list[dict[str, str]] = []
 
-        for cid in corpus_ids:
-            v, s, g, dbg, final_k_default, rerank_cfg, train_cfg, train_path = await _search_single_corpus(cid)
+        # Fan out across corpora with a bounded concurrency budget and a per-corpus deadline.
+        max_parallel = max(1, int(getattr(config, "max_parallel_corpora", 4) or 1))
+        corpus_timeout_s = float(getattr(config, "corpus_timeout_s", 0.0) or 0.0)
+        corpus_sem = asyncio.Semaphore(max_parallel)
+        timed_out_corpora: list[str] = []
+
+        async def _search_corpus_bounded(
+            cid: str,
+        ) -> (
+            tuple[
+                list[ChunkMatch],
+                list[ChunkMatch],
+                list[ChunkMatch],
+                dict[str, Any],
+                int,
+                RerankingConfig,
+                TrainingConfig,
+                str,
+            ]
+            | None
+        ):
+            async with corpus_sem:
+                try:
+                    if corpus_timeout_s > 0:
+                        return await asyncio.wait_for(_search_single_corpus(cid), timeout=corpus_timeout_s)
+                    return await _search_single_corpus(cid)
+                except TimeoutError:
+                    SEARCH_STAGE_ERRORS_TOTAL.labels(stage="corpus_timeout").inc()
+                    return None
+
+        corpus_outcomes = await asyncio.gather(*(_search_corpus_bounded(cid) for cid in corpus_ids))
+
+        for cid, outcome in zip(corpus_ids, corpus_outcomes, strict=True):
+            if outcome is None:
+                timed_out_corpora.append(cid)
+                per_corpus_debug[cid] = {
+                    **partial_debug.get(cid, {}),
+                    "fusion_corpus_timed_out": True,
+                    "fusion_corpus_error": f"corpus search timed out after {corpus_timeout_s:g}s",
+                    "fusion_corpus_error_kind": "TimeoutError",
+                }
+                continue
+            v, s, g, dbg, final_k_default, rerank_cfg, train_cfg, train_path = outcome
             per_corpus_debug[cid] = dbg
             vector_lists.append(v)
             sparse_lists.append(s)
@@ -483,6 +756,11 @@ class TriBridFusion:
                 any(bool(d.get("fusion_graph_entity_expansion_enabled")) for d in per_corpus_debug.values())
             ),
             "fusion_graph_entity_expansion_hits": int(total_graph_exp_hits),
+            "fusion_graph_expansion_budget_exhausted": bool(
+                any(bool(d.get("fusion_graph_expansion_budget_exhausted")) for d in per_corpus_debug.values())
+            ),
+            "fusion_max_parallel_corpora": int(max_parallel),
+            "fusion_corpora_timed_out": timed_out_corpora,
             "fusion_per_corpus": per_corpus_debug,
         }
 
@@ -570,7 +848,7 @@ class TriBridFusion:
         try:
             shape_corpus_id = str(rerank_config_corpus_id or (corpus_ids[0] if corpus_ids else "")).strip()
             if shape_corpus_id:
-                shape_full = await load_scoped_config(repo_id=shape_corpus_id)
+                shape_full = await self._load_config(repo_id=shape_corpus_id)
                 shape_cfg = shape_full.retrieval
                 shape_pg_url = str(getattr(shape_full.indexing, "postgres_url", "") or "").strip() or None
         except Exception:
@@ -596,6 +874,7 @@ class TriBridFusion:
                     final_k=int(final_k or 0),
                     repo_id=str(shape_corpus_id or ""),
                     postgres_url=shape_pg_url,
+                    postgres_factory=self._postgres_factory,
                 )
 
                 # Neighbor hydration: include adjacent chunks within the same file for top seeds.
@@ -608,6 +887,8 @@ class TriBridFusion:
                         results,
                         neighbor_window=neighbor_window,
                         seed_limit=seed_limit,
+                        load_config=self._load_config,
+                        postgres_factory=self._postgres_factory,
                     )
                     results = _dedup_results(results, by="chunk_id")
 
@@ -624,9 +905,13 @@ class TriBridFusion:
                 debug["postprocess_enabled"] = False
                 debug["postprocess_error"] = str(e)
 
+        debug["fusion_cache_hit"] = False
         self.last_debug = debug
         final_results = results[:final_k] if final_k > 0 else []
         SEARCH_RESULTS_FINAL_COUNT.observe(len(final_results))
+        # Only cache clean runs; transient failures (timeouts, backend errors) must not stick.
+        if cache_key is not None and _debug_is_cacheable(debug):
+            result_cache.put(cache_key, final_results, debug)
         return final_results
 
     def rrf_fusion(self, results: list[list[ChunkMatch]], k: int) -> list[ChunkMatch]:
@@ -665,6 +950,35 @@ class TriBridFusion:
         return f"{corpus_id}::{chunk.chunk_id}" if corpus_id else str(chunk.chunk_id)
 
 
+def _result_cache_sections(cfg: TriBridConfig) -> tuple[BaseModel, ...]:
+    """Config sections whose values change what a search returns."""
+    return (
+        cfg.embedding,
+        cfg.tokenization,
+        cfg.indexing,
+        cfg.vector_search,
+        cfg.sparse_search,
+        cfg.graph_search,
+        cfg.graph_storage,
+        cfg.graph_indexing,
+        cfg.retrieval,
+        cfg.reranking,
+        cfg.training,
+    )
+
+
+def _debug_is_cacheable(debug: dict[str, Any]) -> bool:
+    if debug.get("fusion_corpora_timed_out") or debug.get("fusion_graph_errors"):
+        return False
+    if not debug.get("rerank_ok", True) or debug.get("postprocess_error"):
+        return False
+    for corpus_debug in (debug.get("fusion_per_corpus") or {}).values():
+        for key, value in (corpus_debug or {}).items():
+            if value and (key.endswith("_error") or key.endswith("_timed_out")):
+                return False
+    return True
+
+
 def _normalize(chunks: list[ChunkMatch]) -> list[ChunkMatch]:
     if not chunks:
         return chunks
@@ -755,6 +1069,7 @@ async def _apply_mmr_if_enabled(
     final_k: int,
     repo_id: str | None = None,
     postgres_url: str | None = None,
+    postgres_factory: Callable[[str], PostgresClient] = PostgresClient,
 ) -> list[ChunkMatch]:
     if not enabled or not results:
         return results
@@ -772,65 +1087,75 @@ async def _apply_mmr_if_enabled(
     emb_by_id: dict[str, list[float]] = {}
     if repo_id and postgres_url:
         try:
-            pg = PostgresClient(str(postgres_url))
+            pg = postgres_factory(str(postgres_url))
             await pg.connect()
             emb_by_id = await pg.get_embeddings(str(repo_id), [r.chunk_id for r in pool])
             await pg.disconnect()
         except Exception:
             emb_by_id = {}
 
-    tokens = [_mmr_token_set(r.content) for r in pool]
-    selected_idx: list[int] = []
-    candidate_idx: list[int] = list(range(len(pool)))
-
-    while candidate_idx and len(selected_idx) < min(k, len(pool)):
-        best_i = None
-        best_score = None
-        for i in candidate_idx:
-            rel = float(pool[i].score)
-            max_sim = 0.0
-            cand_emb = emb_by_id.get(pool[i].chunk_id)
-            if cand_emb is not None and selected_idx:
-                for j in selected_idx:
-                    sel_emb = emb_by_id.get(pool[j].chunk_id)
-                    if sel_emb is None:
-                        continue
-                    max_sim = max(max_sim, _cosine_sim(cand_emb, sel_emb))
-                    if max_sim >= 0.999:
-                        break
-            else:
-                for j in selected_idx:
-                    max_sim = max(max_sim, _jaccard(tokens[i], tokens[j]))
-                    if max_sim >= 0.999:
-                        break
-            mmr_score = (lam * rel) - ((1.0 - lam) * max_sim)
-            if best_score is None or mmr_score > best_score:
-                best_score = mmr_score
-                best_i = i
-        assert best_i is not None
-        selected_idx.append(best_i)
-        candidate_idx.remove(best_i)
-
-    selected = [pool[i] for i in selected_idx]
-    remaining = [pool[i] for i in candidate_idx]
-    return selected + remaining + rest
-
-
-def _cosine_sim(a: list[float], b: list[float]) -> float:
-    if not a or not b or len(a) != len(b):
-        return 0.0
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for x, y in zip(a, b, strict=False):
-        fx = float(x)
-        fy = float(y)
-        dot += fx * fy
-        na += fx * fx
-        nb += fy * fy
-    if na <= 0.0 or nb <= 0.0:
-        return 0.0
-    return float(float(dot) / (float(na ** 0.5) * float(nb ** 0.5)))
+    order = _mmr_order(pool, emb_by_id, k=k, mmr_lambda=lam)
+    return [pool[i] for i in order] + rest
+
+
+def _mmr_order(
+    pool: list[ChunkMatch],
+    emb_by_id: dict[str, list[float]],
+    *,
+    k: int,
+    mmr_lambda: float,
+) -> list[int]:
+    """Greedy MMR over `pool`; returns pool indices (selected first, then the rest in pool order).
+
+    Candidates with an embedding are compared by cosine similarity against selected items that have
+    one; candidates without fall back to token Jaccard. Embeddings are L2-normalized once into a
+    matrix, and each candidate's max-similarity-to-selected is updated incrementally with a single
+    matrix-vector product per pick, so a selection round costs O(n·dim) instead of O(n·k·dim).
+    """
+    n = len(pool)
+    if n == 0:
+        return []
+    lam = max(0.0, min(1.0, float(mmr_lambda)))
+    limit = min(int(k), n)
+
+    vectors = [emb_by_id.get(r.chunk_id) for r in pool]
+    has_emb = np.fromiter((v is not None for v in vectors), dtype=bool, count=n)
+    matrix: np.ndarray | None = None
+    if has_emb.any():
+        # Mixed dimensions are not comparable; rows off the dominant dim keep a zero vector (similarity 0).
+        dims = [len(v) for v in vectors if v]
+        dim = max(set(dims), key=dims.count) if dims else 0
+        matrix = np.zeros((n, dim), dtype=np.float32)
+        for i, v in enumerate(vectors):
+            if v is not None and len(v) == dim and dim > 0:
+                matrix[i] = np.asarray(v, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        np.divide(matrix, norms[:, None], out=matrix, where=norms[:, None] > 0)
+
+    relevance = np.fromiter((float(r.score) for r in pool), dtype=np.float64, count=n)
+    # Similarities are floored at 0 (an anti-correlated pick never boosts a candidate).
+    max_sim = np.zeros(n, dtype=np.float64)
+    available = np.ones(n, dtype=bool)
+    tokens = [_mmr_token_set(r.content) for r in pool] if not has_emb.all() else []
+
+    selected: list[int] = []
+    while len(selected) < limit:
+        scores = (lam * relevance) - ((1.0 - lam) * max_sim)
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+
+        if matrix is not None and has_emb[best]:
+            sims = matrix @ matrix[best]
+            upd = has_emb & available
+            max_sim[upd] = np.maximum(max_sim[upd], sims[upd])
+        if tokens:
+            for cand in np.flatnonzero(~has_emb & available).tolist():
+                max_sim[cand] = max(max_sim[cand], _jaccard(tokens[cand], tokens[best]))
+
+    remaining = [i for i in range(n) if available[i]]
+    return selected + remaining
 
 
 async def _expand_neighbors(
@@ -838,6 +1163,8 @@ async def _expand_neighbors(
     *,
     neighbor_window: int,
     seed_limit: int,
+    load_config: Callable[..., Awaitable[TriBridConfig]] = load_scoped_config,
+    postgres_factory: Callable[[str], PostgresClient] = PostgresClient,
 ) -> list[ChunkMatch]:
     w = int(neighbor_window)
     if w <= 0 or not results:
@@ -881,10 +1208,10 @@ async def _expand_neighbors(
         for (corpus_id, file_path), ords in ords_by_group.items():
             if not ords:
                 continue
-            cfg = await load_scoped_config(repo_id=corpus_id)
+            cfg = await load_config(repo_id=corpus_id)
             pg = pg_by_corpus.get(corpus_id)
             if pg is None:
-                pg = PostgresClient(cfg.indexing.postgres_url)
+                pg = postgres_factory(cfg.indexing.postgres_url)
                 await pg.connect()
                 pg_by_corpus[corpus_id] = pg
             chunks = await pg.get_chunks_by_file_ordinals(corpus_id, file_path, sorted(ords))
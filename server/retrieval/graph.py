@@ -1,8 +1,9 @@
-from server.db.neo4j import Neo4jClient
+from server.db.neo4j import GraphExpansionBudget, Neo4jClient
 from server.db.postgres import PostgresClient
 from server.indexing.embedder import Embedder
 from server.models.retrieval import ChunkMatch
 from server.models.tribrid_config_model import GraphSearchConfig
+from server.retrieval.graph_snapshot import GraphSnapshot
 
 
 class GraphRetriever:
@@ -12,7 +13,13 @@ class GraphRetriever:
         self.embedder = embedder
 
     async def search(self, repo_id: str, query: str, config: GraphSearchConfig) -> list[ChunkMatch]:
-        return await self.neo4j.graph_search(repo_id, query, config.max_hops, config.top_k)
+        return await self.neo4j.graph_search(
+            repo_id,
+            query,
+            config.max_hops,
+            config.top_k,
+            budget=GraphExpansionBudget.from_config(config),
+        )
 
     async def expand_context(
         self,
@@ -21,11 +28,14 @@ class GraphRetriever:
         *,
         max_hops: int,
         top_k: int,
+        budget: GraphExpansionBudget | None = None,
+        snapshot: GraphSnapshot | None = None,
     ) -> list[ChunkMatch]:
         """Expand from seed chunks through the entity graph.
 
-        This is a small wrapper around Neo4jClient.expand_chunks_via_entities() that
-        hydrates returned chunk IDs via Postgres into ChunkMatch results.
+        This is a small wrapper around Neo4jClient.expand_chunks_via_entities() (or the in-memory
+        `snapshot` of the corpus graph, when given) that hydrates returned chunk IDs via Postgres
+        into ChunkMatch results.
         """
         if not chunk_ids or int(top_k or 0) <= 0:
             return []
@@ -38,12 +48,16 @@ class GraphRetriever:
         if not seeds:
             return []
 
-        hits = await self.neo4j.expand_chunks_via_entities(
-            repo_id,
-            seeds,
-            max_hops=hops,
-            top_k=int(top_k),
-        )
+        if snapshot is not None:
+            hits = snapshot.expand_chunks_via_entities(seeds, max_hops=hops, top_k=int(top_k), budget=budget)
+        else:
+            hits = await self.neo4j.expand_chunks_via_entities(
+                repo_id,
+                seeds,
+                max_hops=hops,
+                top_k=int(top_k),
+                budget=budget,
+            )
         if not hits:
             return []
 
@@ -0,0 +1,517 @@
+"""In-memory CSR snapshot of a corpus' entity graph.
+
+Optional graph-leg accelerator (`graph_search.snapshot_enabled`). After indexing, the corpus' Entity
+graph is exported from Neo4j once and written as NumPy arrays:
+
+- Entity-Entity adjacency (undirected, traversal relationship types) as CSR, plus each entity's total
+  degree (for hub down-weighting)
+- Entity->Chunk and Chunk->Entity (IN_CHUNK) links as CSR
+- Term postings over entity name / qualified name / name words (seed lookup, standing in for the
+  Neo4j full-text index)
+
+Arrays are memory-mapped on load; id and term tables are loaded into dicts. The process keeps one
+snapshot per corpus and reloads the newest build from disk whenever the corpus's index generation
+moves. Seeding, hop-bounded expansion (frontier budget or all-paths) and chunk scoring then run
+in-process with the same scoring as the Cypher queries; callers fall back to Neo4j when no snapshot
+exists.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from server.db.neo4j import GraphExpansionBudget, Neo4jClient, _identifier_terms, _query_tokens
+from server.models.tribrid_config_model import GraphSearchConfig
+from server.retrieval.cache import get_index_generation
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_FORMAT_VERSION = 1
+_TERM_RE = re.compile(r"[a-z0-9_]+")
+# Lucene expands wildcard terms up to its boolean clause limit; mirror that for prefix matches.
+_MAX_PREFIX_TERMS = 1024
+_ARRAYS = (
+    "adj_indptr",
+    "adj_indices",
+    "degree",
+    "e2c_indptr",
+    "e2c_indices",
+    "c2e_indptr",
+    "c2e_indices",
+    "term_indptr",
+    "term_indices",
+    "name_indptr",
+    "name_indices",
+)
+
+IndexArray = npt.NDArray[np.int64]
+
+# Loaded snapshots by corpus, tagged with the index generation they were loaded for.
+_SNAPSHOTS: dict[str, tuple[int, GraphSnapshot | None]] = {}
+_SNAPSHOT_LOCKS: dict[str, asyncio.Lock] = {}
+
+
+def _resolve_dir(path_str: str) -> Path:
+    p = Path(path_str).expanduser()
+    if not p.is_absolute():
+        p = _PROJECT_ROOT / p
+    return p
+
+
+def _corpus_dir(cfg: GraphSearchConfig, corpus_id: str) -> Path:
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(corpus_id)).strip("._") or "corpus"
+    return _resolve_dir(str(cfg.snapshot_dir or "data/graph_snapshots")) / safe
+
+
+def _csr(n: int, rows: IndexArray, cols: IndexArray) -> tuple[IndexArray, npt.NDArray[np.int32]]:
+    """CSR (indptr int64, indices int32) for the unique pairs (rows[i], cols[i]); neighbors sorted per row."""
+    if rows.size == 0:
+        return np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32)
+    width = max(1, int(np.max(cols)) + 1)
+    keys = rows.astype(np.int64) * width + cols.astype(np.int64)
+    keys = np.unique(keys)
+    r = keys // width
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(r, minlength=n), out=indptr[1:])
+    return indptr, (keys % width).astype(np.int32)
+
+
+def _gather(indptr: npt.NDArray[Any], indices: npt.NDArray[Any], rows: IndexArray) -> tuple[IndexArray, IndexArray]:
+    """All neighbors of `rows` in one vectorized gather, with the position in `rows` each came from."""
+    starts = indptr[rows]
+    lens = indptr[rows + 1] - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(lens) - lens), lens) + np.arange(total, dtype=np.int64)
+    return np.repeat(np.arange(rows.size, dtype=np.int64), lens), indices[offsets].astype(np.int64)
+
+
+@dataclass
+class GraphSnapshot:
+    """A loaded (memory-mapped) snapshot; query methods mirror the Neo4jClient graph-leg methods."""
+
+    corpus_id: str
+    path: Path
+    entity_ids: list[str]
+    chunk_ids: list[str]
+    terms: list[str]
+    arrays: dict[str, npt.NDArray[Any]]
+    meta: dict[str, Any] = field(default_factory=dict)
+    _chunk_index: dict[str, int] = field(default_factory=dict, repr=False)
+    _term_index: dict[str, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        self._chunk_index = {cid: i for i, cid in enumerate(self.chunk_ids)}
+        self._term_index = {t: i for i, t in enumerate(self.terms)}
+
+    @property
+    def num_entities(self) -> int:
+        return len(self.entity_ids)
+
+    # ------------------------------------------------------------------
+    # Graph-leg queries
+    # ------------------------------------------------------------------
+    def entity_chunk_search(
+        self,
+        query: str,
+        max_hops: int,
+        top_k: int,
+        *,
+        budget: GraphExpansionBudget | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> list[tuple[str, float]]:
+        """Snapshot version of `Neo4jClient.entity_chunk_search`."""
+        if not query.strip() or top_k <= 0:
+            return []
+        tokens = _query_tokens(query)
+        hops = int(max(0, max_hops or 0))
+        if budget is not None:
+            seed_cap = min(int(budget.max_visited), max(50, int(top_k) * 2))
+            seeds = self.seed_entities(tokens, limit=seed_cap)
+            scored = self.frontier_expand(seeds, max_hops=hops, budget=budget, stats=stats)
+        else:
+            seeds = self.seed_entities(tokens, limit=max(50, int(top_k) * 4))
+            scored = self.path_expand(seeds, max_hops=hops, stats=stats)
+        return self.chunk_scores(scored, top_k=top_k)
+
+    def expand_chunks_via_entities(
+        self,
+        seeds: list[tuple[str, float]],
+        *,
+        max_hops: int,
+        top_k: int,
+        budget: GraphExpansionBudget | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> list[tuple[str, float]]:
+        """Snapshot version of `Neo4jClient.expand_chunks_via_entities`."""
+        hops = int(max(0, max_hops or 0))
+        if not seeds or top_k <= 0 or hops <= 0:
+            return []
+        chunk_rows: list[int] = []
+        chunk_scores: list[float] = []
+        for cid, score in seeds:
+            idx = self._chunk_index.get(str(cid))
+            if idx is not None:
+                chunk_rows.append(idx)
+                chunk_scores.append(float(score))
+        # Seed entities: those IN_CHUNK-linked to a seed chunk, at their best seed chunk's score.
+        seed_scores: dict[int, float] = {}
+        if chunk_rows:
+            pos, entities = _gather(
+                self.arrays["c2e_indptr"], self.arrays["c2e_indices"], np.asarray(chunk_rows, dtype=np.int64)
+            )
+            for p, ent in zip(pos.tolist(), entities.tolist(), strict=False):
+                if chunk_scores[p] > seed_scores.get(ent, float("-inf")):
+                    seed_scores[ent] = chunk_scores[p]
+        if budget is not None:
+            ranked = sorted(seed_scores.items(), key=lambda kv: (-kv[1], kv[0]))[: int(budget.max_visited)]
+            scored = self.frontier_expand(dict(ranked), max_hops=hops, budget=budget, stats=stats)
+        else:
+            scored = self.path_expand(seed_scores, max_hops=hops, stats=stats)
+        return self.chunk_scores(scored, top_k=top_k)
+
+    # ------------------------------------------------------------------
+    # Building blocks
+    # ------------------------------------------------------------------
+    def seed_entities(self, tokens: list[str], *, limit: int) -> dict[int, float]:
+        """Seed entities for query tokens, scored like the full-text seed query, normalized to (0, 1].
+
+        Per token: +4 for a name hit, +1 for a hit in any text field, +1 for a prefix hit (tokens of
+        3+ characters), +1 per identifier word of the token found in any field.
+        """
+        acc: dict[int, float] = {}
+
+        def _add(postings: IndexArray, weight: float) -> None:
+            for ent in postings.tolist():
+                acc[ent] = acc.get(ent, 0.0) + weight
+
+        for tok in tokens:
+            _add(self._postings("name", tok), 4.0)
+            _add(self._postings("term", tok), 1.0)
+            if len(tok) >= 3 and _TERM_RE.fullmatch(tok):
+                _add(self._prefix_postings(tok), 1.0)
+            for word in _identifier_terms(tok):
+                if word != tok:
+                    _add(self._postings("term", word), 1.0)
+        if not acc:
+            return {}
+        top = max(acc.values())
+        ranked = sorted(acc.items(), key=lambda kv: (-kv[1], kv[0]))[: max(1, int(limit))]
+        return {ent: score / top for ent, score in ranked}
+
+    def frontier_expand(
+        self,
+        seeds: dict[int, float],
+        *,
+        max_hops: int,
+        budget: GraphExpansionBudget,
+        stats: dict[str, Any] | None = None,
+    ) -> dict[int, tuple[float, int]]:
+        """In-process `Neo4jClient._frontier_expand`: same admission order, decay and hub weighting."""
+        indptr = self.arrays["adj_indptr"]
+        indices = self.arrays["adj_indices"]
+        degree = self.arrays["degree"]
+        max_visited = int(budget.max_visited)
+        fanout = int(budget.fanout_cap)
+
+        visited: dict[int, tuple[float, int]] = {}
+        ranked_seeds = sorted(seeds.items(), key=lambda kv: (-kv[1], kv[0]))
+        exhausted = len(ranked_seeds) > max_visited
+        for ent, score in ranked_seeds[:max_visited]:
+            visited[ent] = (float(score), 0)
+        seen = np.zeros(self.num_entities, dtype=bool)
+        if visited:
+            seen[np.fromiter(visited, dtype=np.int64)] = True
+
+        frontier = [ent for ent, _score in ranked_seeds[:max_visited]]
+        frontier_sizes: list[int] = [len(frontier)]
+        fanout_capped = 0
+        hubs = 0
+        hops_completed = 0
+        for hop in range(1, int(max_hops) + 1):
+            if not frontier:
+                break
+            if len(visited) >= max_visited:
+                exhausted = True
+                break
+            hops_completed = hop
+            decay = float(hop) / float(hop + 1)
+            candidates: dict[int, float] = {}
+            for source in frontier:
+                nbrs = indices[indptr[source] : indptr[source + 1]]
+                nbrs = nbrs[~seen[nbrs]]
+                if nbrs.size > fanout:
+                    fanout_capped += 1
+                # Lowest degree first, entity_id order on ties (entities are stored sorted by id).
+                order = np.lexsort((nbrs, degree[nbrs]))[:fanout]
+                source_score = visited[source][0]
+                for ent, deg in zip(nbrs[order].tolist(), degree[nbrs[order]].tolist(), strict=False):
+                    weight = budget.hub_weight(int(deg))
+                    if weight < 1.0:
+                        hubs += 1
+                    score = source_score * decay * weight
+                    if score > candidates.get(ent, -1.0):
+                        candidates[ent] = score
+
+            ranked = sorted(candidates.items(), key=lambda kv: (-kv[1], kv[0]))
+            room = max_visited - len(visited)
+            if len(ranked) > room:
+                exhausted = True
+                ranked = ranked[: max(0, room)]
+            for ent, score in ranked:
+                visited[ent] = (score, hop)
+                seen[ent] = True
+            frontier = [ent for ent, _score in ranked]
+            frontier_sizes.append(len(frontier))
+
+        if stats is not None:
+            stats.update(
+                {
+                    "strategy": "frontier",
+                    "engine": "snapshot",
+                    "seeds": len(ranked_seeds),
+                    "hops_completed": hops_completed,
+                    "visited": len(visited),
+                    "frontier_sizes": frontier_sizes,
+                    "fanout_capped": fanout_capped,
+                    "hubs_downweighted": hubs,
+                    "budget_exhausted": exhausted,
+                }
+            )
+        return visited
+
+    def path_expand(
+        self, seeds: dict[int, float], *, max_hops: int, stats: dict[str, Any] | None = None
+    ) -> dict[int, tuple[float, int]]:
+        """All-paths expansion: score(e) = max over seeds of seed_score / (1 + shortest hops).
+
+        Propagates the best seed score reachable within h hops one hop at a time, touching only the
+        neighbors of entities whose value changed in the previous hop.
+        """
+        if stats is not None:
+            stats.update({"strategy": "paths", "engine": "snapshot"})
+        if not seeds:
+            return {}
+        indptr = self.arrays["adj_indptr"]
+        indices = self.arrays["adj_indices"]
+        reach = np.zeros(self.num_entities, dtype=np.float64)
+        best = np.zeros(self.num_entities, dtype=np.float64)
+        best_hops = np.zeros(self.num_entities, dtype=np.int64)
+        seed_idx = np.fromiter(seeds, dtype=np.int64)
+        reach[seed_idx] = np.fromiter(seeds.values(), dtype=np.float64)
+        best[seed_idx] = reach[seed_idx]
+        changed = seed_idx
+        for hop in range(1, int(max_hops) + 1):
+            if changed.size == 0:
+                break
+            pos, nbrs = _gather(indptr, indices, changed)
+            if nbrs.size == 0:
+                break
+            nxt = reach.copy()
+            np.maximum.at(nxt, nbrs, reach[changed[pos]])
+            changed = np.flatnonzero(nxt > reach)
+            reach = nxt
+            cand = reach[changed] / float(1 + hop)
+            better = cand > best[changed]
+            best[changed[better]] = cand[better]
+            best_hops[changed[better]] = hop
+        hit = np.flatnonzero(best > 0.0)
+        return {int(e): (float(best[e]), int(best_hops[e])) for e in hit.tolist()}
+
+    def chunk_scores(self, scored: dict[int, tuple[float, int]], *, top_k: int) -> list[tuple[str, float]]:
+        """Best entity score per linked chunk, top_k by score (chunk_id breaks ties)."""
+        if not scored or top_k <= 0:
+            return []
+        ents = np.fromiter(scored, dtype=np.int64)
+        vals = np.fromiter((v[0] for v in scored.values()), dtype=np.float64)
+        pos, chunks = _gather(self.arrays["e2c_indptr"], self.arrays["e2c_indices"], ents)
+        if chunks.size == 0:
+            return []
+        best = np.full(len(self.chunk_ids), -np.inf)
+        np.maximum.at(best, chunks, vals[pos])
+        hit = np.flatnonzero(np.isfinite(best))
+        ranked = sorted(((float(best[c]), self.chunk_ids[c]) for c in hit.tolist()), key=lambda t: (-t[0], t[1]))
+        return [(cid, score) for score, cid in ranked[: int(top_k)]]
+
+    def _postings(self, kind: str, term: str) -> IndexArray:
+        tid = self._term_index.get(term)
+        if tid is None:
+            return np.zeros(0, dtype=np.int64)
+        indptr = self.arrays[f"{kind}_indptr"]
+        return np.asarray(self.arrays[f"{kind}_indices"][indptr[tid] : indptr[tid + 1]], dtype=np.int64)
+
+    def _prefix_postings(self, prefix: str) -> IndexArray:
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = min(bisect.bisect_left(self.terms, prefix + "\U0010ffff"), lo + _MAX_PREFIX_TERMS)
+        if hi <= lo:
+            return np.zeros(0, dtype=np.int64)
+        parts = [self._postings("term", t) for t in self.terms[lo:hi]]
+        return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+
+# ----------------------------------------------------------------------
+# Build / load
+# ----------------------------------------------------------------------
+def write_graph_snapshot(cfg: GraphSearchConfig, corpus_id: str, export: dict[str, Any]) -> Path:
+    """Write an exported entity graph (see `Neo4jClient.export_entity_graph`) as a new snapshot build.
+
+    The build is written to a temporary directory and renamed into place; older builds are removed.
+    """
+    entity_ids: list[str] = list(export["entity_ids"])
+    chunk_ids: list[str] = list(export["chunk_ids"])
+    n = len(entity_ids)
+    m = len(chunk_ids)
+
+    src = np.frombuffer(export["edge_src"], dtype=np.int64) if len(export["edge_src"]) else np.zeros(0, np.int64)
+    dst = np.frombuffer(export["edge_dst"], dtype=np.int64) if len(export["edge_dst"]) else np.zeros(0, np.int64)
+    keep = src != dst
+    adj_indptr, adj_indices = _csr(n, np.concatenate([src[keep], dst[keep]]), np.concatenate([dst[keep], src[keep]]))
+
+    le = np.frombuffer(export["link_entity"], dtype=np.int64) if len(export["link_entity"]) else np.zeros(0, np.int64)
+    lc = np.frombuffer(export["link_chunk"], dtype=np.int64) if len(export["link_chunk"]) else np.zeros(0, np.int64)
+    e2c_indptr, e2c_indices = _csr(n, le, lc)
+    c2e_indptr, c2e_indices = _csr(m, lc, le)
+
+    # Term postings: all words of name / qualified_name / name_terms, and whole-name words separately.
+    term_ids: dict[str, int] = {}
+    term_rows: list[int] = []
+    term_cols: list[int] = []
+    name_rows: list[int] = []
+    name_cols: list[int] = []
+    for ent, text in enumerate(export["search_text"]):
+        name = str(text).split("\t", 1)[0]
+        for t in set(_TERM_RE.findall(str(text).lower())):
+            term_rows.append(term_ids.setdefault(t, len(term_ids)))
+            term_cols.append(ent)
+        for t in set(_TERM_RE.findall(name.lower())):
+            name_rows.append(term_ids.setdefault(t, len(term_ids)))
+            name_cols.append(ent)
+    terms = sorted(term_ids)
+    remap = np.zeros(len(term_ids), dtype=np.int64)
+    for new_id, t in enumerate(terms):
+        remap[term_ids[t]] = new_id
+    term_indptr, term_indices = _csr(
+        len(terms), remap[np.asarray(term_rows, dtype=np.int64)], np.asarray(term_cols, dtype=np.int64)
+    )
+    name_indptr, name_indices = _csr(
+        len(terms), remap[np.asarray(name_rows, dtype=np.int64)], np.asarray(name_cols, dtype=np.int64)
+    )
+
+    arrays: dict[str, npt.NDArray[Any]] = {
+        "adj_indptr": adj_indptr,
+        "adj_indices": adj_indices,
+        "degree": np.asarray(export["degree"], dtype=np.int64) if n else np.zeros(0, np.int64),
+        "e2c_indptr": e2c_indptr,
+        "e2c_indices": e2c_indices,
+        "c2e_indptr": c2e_indptr,
+        "c2e_indices": c2e_indices,
+        "term_indptr": term_indptr,
+        "term_indices": term_indices,
+        "name_indptr": name_indptr,
+        "name_indices": name_indices,
+    }
+    meta = {
+        "format": _FORMAT_VERSION,
+        "corpus_id": corpus_id,
+        "created_at": time.time(),
+        "entities": n,
+        "edges": int(adj_indices.size // 2),
+        "chunks": m,
+        "links": int(e2c_indices.size),
+        "terms": len(terms),
+    }
+
+    root = _corpus_dir(cfg, corpus_id)
+    root.mkdir(parents=True, exist_ok=True)
+    build = f"{int(time.time() * 1000):015d}-{uuid.uuid4().hex[:8]}"
+    tmp = root / f".tmp-{build}"
+    tmp.mkdir()
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", arr)
+    (tmp / "entity_ids.json").write_text(json.dumps(entity_ids), encoding="utf-8")
+    (tmp / "chunk_ids.json").write_text(json.dumps(chunk_ids), encoding="utf-8")
+    (tmp / "terms.json").write_text(json.dumps(terms), encoding="utf-8")
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    final = root / build
+    tmp.rename(final)
+    for old in root.iterdir():
+        if old != final and old.is_dir():
+            shutil.rmtree(old, ignore_errors=True)
+    return final
+
+
+def load_graph_snapshot(cfg: GraphSearchConfig, corpus_id: str) -> GraphSnapshot | None:
+    """Memory-map the newest complete snapshot build for a corpus (None if there is none)."""
+    root = _corpus_dir(cfg, corpus_id)
+    if not root.is_dir():
+        return None
+    builds = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".") and (p / "meta.json").is_file())
+    if not builds:
+        return None
+    path = builds[-1]
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    if int(meta.get("format") or 0) != _FORMAT_VERSION:
+        return None
+    return GraphSnapshot(
+        corpus_id=corpus_id,
+        path=path,
+        entity_ids=json.loads((path / "entity_ids.json").read_text(encoding="utf-8")),
+        chunk_ids=json.loads((path / "chunk_ids.json").read_text(encoding="utf-8")),
+        terms=json.loads((path / "terms.json").read_text(encoding="utf-8")),
+        arrays={name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS},
+        meta=meta,
+    )
+
+
+async def build_graph_snapshot(neo4j: Neo4jClient, cfg: GraphSearchConfig, corpus_id: str) -> dict[str, Any] | None:
+    """Export the corpus graph from Neo4j and write a snapshot build; returns its meta.
+
+    Returns None (and removes any previous build) when the graph exceeds `snapshot_max_edges`.
+    """
+    export = await neo4j.export_entity_graph(corpus_id, max_edges=int(cfg.snapshot_max_edges))
+    if export is None:
+        await asyncio.to_thread(delete_graph_snapshot, cfg, corpus_id)
+        return None
+    path = await asyncio.to_thread(write_graph_snapshot, cfg, corpus_id, export)
+    meta: dict[str, Any] = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    return meta
+
+
+def delete_graph_snapshot(cfg: GraphSearchConfig, corpus_id: str) -> None:
+    """Remove a corpus's snapshot builds and forget the loaded copy."""
+    _SNAPSHOTS.pop(str(corpus_id), None)
+    shutil.rmtree(_corpus_dir(cfg, corpus_id), ignore_errors=True)
+
+
+async def get_graph_snapshot(corpus_id: str, cfg: GraphSearchConfig) -> GraphSnapshot | None:
+    """The corpus's snapshot for its current index generation, loading the newest build if needed."""
+    if int(getattr(cfg, "snapshot_enabled", 0) or 0) != 1:
+        return None
+    cid = str(corpus_id)
+    generation = get_index_generation(cid)
+    cached = _SNAPSHOTS.get(cid)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    lock = _SNAPSHOT_LOCKS.setdefault(cid, asyncio.Lock())
+    async with lock:
+        cached = _SNAPSHOTS.get(cid)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        try:
+            snapshot = await asyncio.to_thread(load_graph_snapshot, cfg, cid)
+        except Exception:
+            snapshot = None
+        _SNAPSHOTS[cid] = (generation, snapshot)
+        return snapshot
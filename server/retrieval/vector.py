@@ -11,7 +11,13 @@ class VectorRetriever:
 
     async def search(self, repo_id: str, query: str, config: VectorSearchConfig) -> list[ChunkMatch]:
         embedding = await self.embedder.embed(query)
-        results = await self.postgres.vector_search(repo_id, embedding, config.top_k)
+        results = await self.postgres.vector_search(
+            repo_id,
+            embedding,
+            config.top_k,
+            ef_search=config.hnsw_ef_search,
+            probes=config.ivfflat_probes,
+        )
         if config.similarity_threshold > 0:
             results = [r for r in results if r.score >= config.similarity_threshold]
         return results
@@ -19,6 +19,16 @@ def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def _clear_search_result_cache() -> Generator[None, None, None]:
+    """Keep the process-wide search result cache from leaking results between tests."""
+    from server.retrieval.cache import get_result_cache
+
+    get_result_cache().clear()
+    yield
+    get_result_cache().clear()
+
+
 @pytest_asyncio.fixture
 async def client() -> AsyncGenerator[AsyncClient, None]:
     """Create async test client."""
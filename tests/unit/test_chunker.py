@@ -5,7 +5,7 @@ import signal
 import pytest
 
 from server.indexing.chunker import Chunker
-from server.indexing.tokenizer import TextTokenizer
+from server.indexing.tokenizer import TextTokenizer, TokenizationResult
 from server.models.tribrid_config_model import ChunkingConfig, TokenizationConfig
 
 
@@ -254,3 +254,40 @@ def test_ast_chunking_typescript_respects_top_level_brace_blocks() -> None:
     assert "function foo" in chunks[0].content
     assert "function bar" not in chunks[0].content
     assert any("function bar" in c.content for c in chunks[1:])
+
+
+class _CountingTokenizer(TextTokenizer):
+    """Records the length of every text passed to tokenize_with_offsets."""
+
+    def __init__(self, config: TokenizationConfig) -> None:
+        super().__init__(config)
+        self.calls: list[int] = []
+
+    def tokenize_with_offsets(self, text: str) -> TokenizationResult:
+        self.calls.append(len(text))
+        return super().tokenize_with_offsets(text)
+
+
+@pytest.mark.parametrize("strategy", ["recursive", "sentence", "ast", "fixed_chars"])
+def test_chunking_tokenizes_each_document_once(strategy: str) -> None:
+    cfg = ChunkingConfig(
+        chunking_strategy=strategy,
+        chunk_size=300,
+        chunk_overlap=50,
+        target_tokens=64,
+        overlap_tokens=0,
+        max_chunk_tokens=100,
+        min_chunk_chars=10,
+    )
+    tok_cfg = TokenizationConfig(strategy="whitespace", normalize_unicode=False, lowercase=False)
+    counting = _CountingTokenizer(tok_cfg)
+    ch = Chunker(cfg, tok_cfg, tokenizer=counting)
+    body = " ".join(f"word{i}" for i in range(400))
+    content = f"def f():\n    x = '{body}'\n\n\ndef g():\n    return 1\n\nSecond. Third part here.\n"
+    chunks = ch.chunk_file("doc.py", content)
+
+    assert counting.calls == [len(content)]
+    tok = TextTokenizer(tok_cfg)
+    # Table lookups agree with tokenizing each chunk on its own (including spans cut mid-word).
+    assert [c.token_count for c in chunks] == [tok.count_tokens(c.content) for c in chunks]
+    assert all(int(c.token_count or 0) <= 100 for c in chunks)
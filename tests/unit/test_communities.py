@@ -0,0 +1,90 @@
+"""Tests for in-process community detection (CSR graph, Louvain, label propagation)."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from server.indexing.communities import (
+    aggregate,
+    build_csr,
+    detect_hierarchy,
+    label_propagation,
+    modularity,
+)
+
+
+def _cliques(count: int, size: int) -> tuple[int, list[int], list[int]]:
+    """`count` cliques of `size` nodes, consecutive cliques joined by a single bridge edge."""
+    src: list[int] = []
+    dst: list[int] = []
+    for c in range(count):
+        base = c * size
+        for i in range(size):
+            for j in range(i + 1, size):
+                src.append(base + i)
+                dst.append(base + j)
+        if c:
+            src.append(base - 1)
+            dst.append(base)
+    return count * size, src, dst
+
+
+def _groups(membership: np.ndarray) -> set[frozenset[int]]:
+    out: dict[int, set[int]] = {}
+    for node, label in enumerate(membership.tolist()):
+        out.setdefault(int(label), set()).add(node)
+    return {frozenset(g) for g in out.values()}
+
+
+def test_build_csr_symmetrizes_sums_duplicates_and_drops_self_loops() -> None:
+    g = build_csr(3, [0, 0, 1, 2], [1, 1, 1, 0], [1.0, 2.0, 5.0, 1.0])
+    assert g.indptr.tolist() == [0, 2, 3, 4]
+    assert g.indices.tolist() == [1, 2, 0, 0]
+    assert g.weights.tolist() == [3.0, 1.0, 3.0, 1.0]
+
+    agg = aggregate(g, np.array([0, 0, 1]), 2)
+    # Internal 0-1 edge becomes a self-loop on community 0 (both directions kept).
+    assert agg.indptr.tolist() == [0, 2, 3]
+    assert agg.weights.tolist() == [6.0, 1.0, 1.0]
+
+
+def test_louvain_separates_bridged_cliques() -> None:
+    n, src, dst = _cliques(2, 5)
+    levels = detect_hierarchy(build_csr(n, src, dst), algorithm="louvain")
+    assert levels
+    assert _groups(levels[0]) == {frozenset(range(5)), frozenset(range(5, 10))}
+
+
+def test_label_propagation_separates_bridged_cliques() -> None:
+    n, src, dst = _cliques(3, 6)
+    labels = label_propagation(build_csr(n, src, dst))
+    assert _groups(labels) == {frozenset(range(0, 6)), frozenset(range(6, 12)), frozenset(range(12, 18))}
+
+
+def test_hierarchy_levels_are_nested_and_coarsen() -> None:
+    # 16 small cliques in a ring of bridges: Louvain first finds cliques, then merges neighbors.
+    n, src, dst = _cliques(16, 4)
+    src.append(n - 1)
+    dst.append(0)
+    graph = build_csr(n, src, dst)
+    levels = detect_hierarchy(graph, algorithm="louvain")
+
+    sizes = [len(_groups(lv)) for lv in levels]
+    assert sizes == sorted(sizes, reverse=True)
+    assert len(set(sizes)) == len(sizes)
+    for fine, coarse in zip(levels, levels[1:], strict=False):
+        # Every fine community sits inside exactly one coarse community.
+        for group in _groups(fine):
+            assert len({int(coarse[i]) for i in group}) == 1
+    assert modularity(graph, levels[-1]) > 0.5
+
+
+def test_memory_budget_switches_louvain_to_label_propagation_coarsening() -> None:
+    n, src, dst = _cliques(4, 5)
+    graph = build_csr(n, src, dst)
+    constrained = detect_hierarchy(graph, algorithm="louvain", memory_budget_bytes=1)
+    assert _groups(constrained[0]) == _groups(label_propagation(graph, seed=0))
+
+
+def test_graph_without_edges_has_no_levels() -> None:
+    assert detect_hierarchy(build_csr(4, [], [])) == []
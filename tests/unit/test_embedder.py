@@ -1,10 +1,11 @@
 """Tests for the embedder module."""
 
+import numpy as np
 import pytest
 from unittest.mock import AsyncMock, patch
 
-from server.indexing.embedder import Embedder
-from server.models.tribrid_config_model import EmbeddingConfig
+from server.indexing.embedder import Embedder, token_budget_batches
+from server.models.tribrid_config_model import EmbeddingConfig, TokenizationConfig
 from server.models.index import Chunk
 
 
@@ -70,3 +71,197 @@ async def test_embed_chunks(embedder: Embedder) -> None:
         assert len(result) == 2
         assert result[0].embedding is not None
         assert result[1].embedding is not None
+
+
+class _MemoryCacheStore:
+    def __init__(self) -> None:
+        self.data: dict[str, list[float]] = {}
+        self.lookups: list[list[str]] = []
+        self.writes: list[list[tuple[str, list[float]]]] = []
+
+    async def get_cached_embeddings(self, cache_keys: list[str]) -> dict[str, list[float]]:
+        self.lookups.append(list(cache_keys))
+        return {k: self.data[k] for k in cache_keys if k in self.data}
+
+    async def put_cached_embeddings(self, entries: list[tuple[str, list[float]]]) -> int:
+        self.writes.append(list(entries))
+        self.data.update(entries)
+        return len(entries)
+
+
+# Offline tokenizer so cache keys (computed on prepared text) need no tokenizer downloads.
+_WHITESPACE = TokenizationConfig(strategy="whitespace")
+
+
+def _chunk(chunk_id: str, content: str) -> Chunk:
+    return Chunk(
+        chunk_id=chunk_id,
+        content=content,
+        file_path="test.py",
+        start_line=1,
+        end_line=1,
+        language="python",
+        token_count=2,
+    )
+
+
+class _RecordingEmbedder(Embedder):
+    """Provider embedder whose `embed_batch` records every call instead of calling the provider."""
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        self.batches: list[list[str]] = []
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(t))] * 1536 for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_embed_chunks_uses_cache_and_writes_back_only_misses() -> None:
+    """Cached texts skip the provider; duplicates within a batch are embedded once."""
+    config = EmbeddingConfig(
+        embedding_backend="provider",
+        embedding_type="openai",
+        embedding_model="text-embedding-3-small",
+        embedding_dim=1536,
+        embedding_cache_enabled=1,
+    )
+    store = _MemoryCacheStore()
+    embedder = _RecordingEmbedder(config, _WHITESPACE, cache_store=store)
+
+    first = await embedder.embed_chunks([_chunk("1", "alpha"), _chunk("2", "alpha"), _chunk("3", "beta")])
+    assert embedder.batches[0] == ["alpha", "beta"]
+    assert len(store.writes[0]) == 2
+
+    second = await embedder.embed_chunks([_chunk("4", "beta"), _chunk("5", "gamma!")])
+    assert embedder.batches[1] == ["gamma!"]
+    assert [k for k, _ in store.writes[1]] == [embedder.cache_key("gamma!")]
+
+    assert first[0].embedding == first[1].embedding
+    assert second[0].embedding == first[2].embedding
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_key_depends_on_model_and_prefix() -> None:
+    base = EmbeddingConfig(embedding_backend="provider", embedding_type="openai", embedding_dim=1536)
+    other_model = base.model_copy(update={"embedding_model": "text-embedding-3-small"})
+    prefixed = base.model_copy(update={"embed_text_prefix": "passage: "})
+    keys = {Embedder(c, _WHITESPACE).cache_key("same text") for c in (base, other_model, prefixed)}
+    assert len(keys) == 3
+    assert Embedder(base, _WHITESPACE).cache_key("same text") == Embedder(base, _WHITESPACE).cache_key("same text")
+
+
+@pytest.mark.asyncio
+async def test_embed_chunks_skips_cache_when_disabled() -> None:
+    config = EmbeddingConfig(
+        embedding_backend="provider",
+        embedding_type="openai",
+        embedding_dim=1536,
+        embedding_cache_enabled=0,
+    )
+    store = _MemoryCacheStore()
+    embedder = _RecordingEmbedder(config, _WHITESPACE, cache_store=store)
+    await embedder.embed_chunks([_chunk("1", "alpha")])
+    assert embedder.batches == [["alpha"]]
+    assert store.lookups == []
+    assert store.writes == []
+
+
+def test_token_budget_batches_group_similar_lengths_under_budget() -> None:
+    lengths = [10, 500, 12, 480, 11, 9000, 30]
+    batches = token_budget_batches(lengths, max_tokens=1024, max_items=3)
+
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    assert batches[0] == [5]  # longer than the budget: alone
+    assert batches[1] == [1, 3]  # 3 * 500 > 1024
+    for b in batches:
+        assert len(b) <= 3
+        assert len(b) == 1 or len(b) * max(lengths[i] for i in b) <= 1024
+
+
+@pytest.mark.asyncio
+async def test_local_sentence_transformers_returns_float32_matrix_in_input_order() -> None:
+    config = EmbeddingConfig(
+        embedding_backend="provider",
+        embedding_type="local",
+        embedding_model_local="fake-st",
+        embedding_dim=128,
+        embedding_batch_size=4,
+        embedding_batch_max_tokens=256,
+    )
+    calls: list[list[str]] = []
+
+    class _FakeST:
+        max_seq_length = 512
+
+        def tokenizer(self, texts: list[str], **_kwargs: object) -> dict[str, list[list[int]]]:
+            return {"input_ids": [[0] * len(t.split()) for t in texts]}
+
+        def encode(self, texts: list[str], **kwargs: object) -> np.ndarray:
+            assert kwargs["convert_to_numpy"] is True
+            calls.append(list(texts))
+            return np.array([[float(len(t.split()))] * 128 for t in texts], dtype=np.float32)
+
+    fake_st = _FakeST()
+
+    class _FakeSTEmbedder(Embedder):
+        @staticmethod
+        def _load_sentence_transformer(model_name: str) -> _FakeST:
+            return fake_st
+
+    embedder = _FakeSTEmbedder(config, _WHITESPACE)
+    texts = ["word " * n for n in (3, 120, 5, 100, 4)]
+    vecs = await embedder.embed_batch_array(texts)
+    as_lists = await embedder.embed_batch(texts)
+
+    assert vecs.dtype == np.float32 and vecs.flags.c_contiguous and vecs.shape == (5, 128)
+    assert vecs[:, 0].tolist() == [3.0, 120.0, 5.0, 100.0, 4.0]
+    assert as_lists == vecs.tolist()
+    # Longest first; 2 * 120 tokens fit the budget, a third text would not.
+    assert [len(c) for c in calls[:2]] == [2, 3]
+
+
+class _CountingST:
+    """Sentence-transformers stand-in that records which texts its tokenizer sees."""
+
+    max_seq_length = 512
+
+    def __init__(self) -> None:
+        self.tokenized: list[str] = []
+
+    def tokenizer(self, texts: list[str], **_kwargs: object) -> dict[str, list[list[int]]]:
+        self.tokenized.extend(texts)
+        return {"input_ids": [[0] * len(t.split()) for t in texts]}
+
+    def encode(self, texts: list[str], **_kwargs: object) -> np.ndarray:
+        return np.array([[float(len(t.split()))] * 128 for t in texts], dtype=np.float32)
+
+
+_COUNTING_ST = _CountingST()
+
+
+class _CountingSTEmbedder(Embedder):
+    @staticmethod
+    def _load_sentence_transformer(model_name: str) -> _CountingST:
+        return _COUNTING_ST
+
+
+@pytest.mark.asyncio
+async def test_local_batches_reuse_chunk_token_counts() -> None:
+    config = EmbeddingConfig(
+        embedding_backend="provider",
+        embedding_type="local",
+        embedding_model_local="fake-st",
+        embedding_dim=128,
+    )
+    embedder = _CountingSTEmbedder(config, _WHITESPACE)
+    counted = _chunk("1", "alpha beta")
+    uncounted = _chunk("2", "gamma delta epsilon").model_copy(update={"token_count": 0})
+    _COUNTING_ST.tokenized.clear()
+
+    vecs = await embedder.embed_chunks_array([counted, uncounted])
+
+    # Only the chunk without a chunker token count is tokenized again for batching.
+    assert _COUNTING_ST.tokenized == ["gamma delta epsilon"]
+    assert vecs[:, 0].tolist() == [2.0, 3.0]
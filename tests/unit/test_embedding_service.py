@@ -0,0 +1,129 @@
+"""Tests for the shared query embedding service (request coalescing)."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from server.indexing.embedder import Embedder
+from server.models.tribrid_config_model import EmbeddingConfig, TokenizationConfig
+from server.observability.metrics import QUERY_EMBED_BATCH_SIZE
+from server.retrieval.embedding_service import (
+    QueryEmbedder,
+    clear_query_embedders,
+    get_query_embedder,
+)
+
+
+class _FakeEmbedder:
+    def __init__(self, config: Any = None, _tokenization: Any = None, *, fail: bool = False) -> None:
+        self.config = config
+        self.batches: list[list[str]] = []
+        self.single: list[str] = []
+        self.fail = fail
+
+    async def embed(self, text: str) -> list[float]:
+        self.single.append(text)
+        return [float(len(text))]
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("provider down")
+        return [[float(len(t))] for t in texts]
+
+
+def _histogram_count() -> float:
+    for metric in QUERY_EMBED_BATCH_SIZE.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                return sample.value
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_embeds_share_one_batch_and_dedupe_identical_texts() -> None:
+    fake = _FakeEmbedder()
+    service = QueryEmbedder(fake, window_s=0.005, max_items=32)
+    before = _histogram_count()
+
+    results = await asyncio.gather(*(service.embed(q) for q in ["a", "bb", "a", "ccc", "bb"]))
+
+    assert results == [[1.0], [2.0], [1.0], [3.0], [2.0]]
+    assert fake.batches == [["a", "bb", "ccc"]]
+    assert _histogram_count() == before + 1
+
+    # Nothing in flight any more: the same text is embedded again.
+    assert await service.embed("a") == [1.0]
+    assert fake.batches[-1] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting_for_the_window() -> None:
+    fake = _FakeEmbedder()
+    service = QueryEmbedder(fake, window_s=10.0, max_items=3)
+
+    results = await asyncio.wait_for(asyncio.gather(*(service.embed(q) for q in ["x", "yy", "zzz"])), timeout=1.0)
+
+    assert results == [[1.0], [2.0], [3.0]]
+    assert fake.batches == [["x", "yy", "zzz"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_waiter_and_a_cancelled_waiter_does_not_cancel_others() -> None:
+    failing = QueryEmbedder(_FakeEmbedder(fail=True), window_s=0.002, max_items=8)
+    outcomes = await asyncio.gather(failing.embed("a"), failing.embed("b"), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+    fake = _FakeEmbedder()
+    service = QueryEmbedder(fake, window_s=0.002, max_items=8)
+    impatient = asyncio.create_task(service.embed("same"))
+    patient = asyncio.create_task(service.embed("same"))
+    await asyncio.sleep(0)
+    impatient.cancel()
+    assert await patient == [4.0]
+
+
+@pytest.mark.asyncio
+async def test_get_query_embedder_is_shared_per_config_and_coalesces_only_provider_backends() -> None:
+    clear_query_embedders()
+    provider = EmbeddingConfig(embedding_backend="provider", embedding_type="openai", query_embed_coalesce_window_ms=4)
+    tok = TokenizationConfig()
+
+    first = get_query_embedder(provider, tok, factory=_FakeEmbedder)
+    assert get_query_embedder(provider.model_copy(), tok, factory=_FakeEmbedder) is first
+    assert first.coalesce and first.window_s == pytest.approx(0.004)
+    assert get_query_embedder(provider.model_copy(update={"embedding_dim": 1024}), tok, factory=_FakeEmbedder) is not first
+
+    deterministic = get_query_embedder(EmbeddingConfig(), tok, factory=_FakeEmbedder)
+    assert deterministic.coalesce is False
+    assert await deterministic.embed("query") == [5.0]
+    assert deterministic.embedder.single == ["query"]
+    clear_query_embedders()
+
+
+class _RecordingProviderEmbedder(Embedder):
+    """Real `Embedder` text preparation; the provider call just records what it was sent."""
+
+    sent: list[str] = []
+
+    async def _embed_openai(self, texts: list[str]) -> list[list[float]]:
+        _RecordingProviderEmbedder.sent.extend(texts)
+        return [self._embed_sync(t) for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_windowed_and_direct_query_embeddings_prepare_the_text_once() -> None:
+    _RecordingProviderEmbedder.sent = []
+    config = EmbeddingConfig(
+        embedding_backend="provider", embedding_type="openai", embedding_dim=128, embed_text_prefix="query: "
+    )
+    tok = TokenizationConfig(strategy="whitespace")
+    direct = QueryEmbedder(_RecordingProviderEmbedder(config, tok), window_s=0.0, max_items=8)
+    windowed = QueryEmbedder(_RecordingProviderEmbedder(config, tok), window_s=0.002, max_items=8)
+
+    assert await direct.embed("find the parser") == await windowed.embed("find the parser")
+    assert _RecordingProviderEmbedder.sent == ["query: find the parser", "query: find the parser"]
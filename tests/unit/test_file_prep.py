@@ -0,0 +1,69 @@
+"""Tests for per-file extraction + chunking (`server.indexing.file_prep`) and the worker limits."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from server.indexing.file_prep import FilePrepareTimeoutError, PreparedFile, prepare_file
+from server.indexing.process_pool import memory_limit, time_limit
+from server.models.tribrid_config_model import ChunkingConfig, TokenizationConfig
+
+
+def _prepare(path: Path, *, chunking: ChunkingConfig | None, want_text: bool = False) -> PreparedFile:
+    return prepare_file(
+        str(path),
+        path.name,
+        chunking,
+        TokenizationConfig(strategy="whitespace"),
+        {},
+        want_text,
+        0.0,
+        0,
+    )
+
+
+def test_prepare_file_extracts_and_chunks(tmp_path: Path) -> None:
+    doc = tmp_path / "notes.md"
+    doc.write_text("# Notes\n\n" + "alpha beta gamma delta\n" * 50, encoding="utf-8")
+
+    prepared = _prepare(doc, chunking=ChunkingConfig(chunking_strategy="fixed_chars", chunk_size=300, chunk_overlap=50))
+    assert prepared.chunks and all(c.file_path == "notes.md" for c in prepared.chunks)
+    assert prepared.text is None
+    assert prepared.binary is False
+
+    text_only = _prepare(doc, chunking=None, want_text=True)
+    assert text_only.chunks == []
+    assert text_only.text == doc.read_text(encoding="utf-8")
+
+
+def test_prepare_file_flags_binary_content(tmp_path: Path) -> None:
+    blob = tmp_path / "blob.txt"
+    blob.write_bytes(b"header\x00\x01\x02payload")
+
+    prepared = _prepare(blob, chunking=ChunkingConfig(chunking_strategy="fixed_chars"), want_text=True)
+    assert prepared.binary is True
+    assert prepared.chunks == []
+    assert prepared.text is None
+
+
+def test_time_limit_interrupts_the_block() -> None:
+    t0 = time.perf_counter()
+    with pytest.raises(FilePrepareTimeoutError):
+        with time_limit(0.05, lambda: FilePrepareTimeoutError("too slow")):
+            while time.perf_counter() - t0 < 5:
+                pass
+    assert time.perf_counter() - t0 < 1
+
+    # The timer is disarmed on exit.
+    with time_limit(0.05, lambda: FilePrepareTimeoutError("too slow")):
+        pass
+    time.sleep(0.1)
+
+
+def test_memory_limit_is_a_no_op_outside_worker_processes() -> None:
+    with memory_limit(1):
+        data = bytearray(8 * 1024 * 1024)
+    assert len(data) == 8 * 1024 * 1024
@@ -0,0 +1,152 @@
+"""Tests for incremental-indexing fingerprints."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from server.indexing.fingerprints import (
+    FileFingerprint,
+    hash_file,
+    index_config_hash,
+    plan_incremental,
+)
+from server.models.tribrid_config_model import TriBridConfig
+
+
+def _write(root: Path, rel: str, text: str, *, mtime_ns: int | None = None) -> tuple[str, Path]:
+    path = root / rel
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return rel, path
+
+
+def _fingerprint(rel: str, path: Path, *, config_hash: str = "cfg", chunk_count: int = 2) -> FileFingerprint:
+    st = path.stat()
+    return FileFingerprint(
+        file_path=rel,
+        size_bytes=st.st_size,
+        mtime_ns=st.st_mtime_ns,
+        content_hash=hash_file(path),
+        config_hash=config_hash,
+        chunk_count=chunk_count,
+    )
+
+
+def test_plan_classifies_added_changed_removed_and_unchanged(tmp_path: Path) -> None:
+    same = _write(tmp_path, "same.py", "x = 1\n", mtime_ns=1_000)
+    touched = _write(tmp_path, "touched.py", "y = 2\n", mtime_ns=1_000)
+    edited = _write(tmp_path, "edited.py", "z = 3\n", mtime_ns=1_000)
+    previous = {rel: _fingerprint(rel, path) for rel, path in (same, touched, edited)}
+    previous["gone.py"] = FileFingerprint("gone.py", 1, 1, "h", "cfg")
+
+    os.utime(touched[1], ns=(2_000, 2_000))
+    _write(tmp_path, "edited.py", "z = 4\n", mtime_ns=2_000)
+    added = _write(tmp_path, "new.py", "w = 5\n")
+
+    hashed: list[str] = []
+
+    def _hasher(path: Path) -> str:
+        hashed.append(path.name)
+        return hash_file(path)
+
+    plan = plan_incremental(
+        [same, touched, edited, added], previous, config_hash="cfg", max_file_bytes=1_000_000, hasher=_hasher
+    )
+
+    assert plan.added == ["new.py"]
+    assert plan.changed == ["edited.py"]
+    assert plan.removed == ["gone.py"]
+    assert set(plan.unchanged) == {"same.py", "touched.py"}
+    assert set(plan.to_index) == {"new.py", "edited.py"}
+    assert plan.purge_paths == ["edited.py", "gone.py"]
+    # Size + mtime match → no read at all; a touched file is hashed and only its stat refreshed.
+    assert "same.py" not in hashed
+    assert [fp.file_path for fp in plan.refreshed] == ["touched.py"]
+    assert plan.refreshed[0].mtime_ns == 2_000
+    assert plan.unchanged["touched.py"].chunk_count == 2
+
+
+def test_plan_reindexes_everything_when_config_hash_changes(tmp_path: Path) -> None:
+    entry = _write(tmp_path, "a.md", "hello\n")
+    previous = {"a.md": _fingerprint(*entry, config_hash="old")}
+
+    plan = plan_incremental([entry], previous, config_hash="new", max_file_bytes=1_000_000)
+
+    assert plan.changed == ["a.md"]
+    assert plan.to_index["a.md"].config_hash == "new"
+
+
+def test_plan_treats_oversized_files_as_removed(tmp_path: Path) -> None:
+    entry = _write(tmp_path, "big.txt", "x" * 64)
+    previous = {"big.txt": _fingerprint(*entry)}
+
+    plan = plan_incremental([entry], previous, config_hash="cfg", max_file_bytes=16)
+
+    assert plan.oversized == [("big.txt", 64)]
+    assert plan.removed == ["big.txt"]
+    assert not plan.to_index
+
+
+def test_plan_without_hasher_records_stat_only_fingerprints(tmp_path: Path) -> None:
+    entry = _write(tmp_path, "a.md", "hello\n", mtime_ns=1_000)
+
+    full = plan_incremental([entry], {}, config_hash="cfg", max_file_bytes=1_000_000, hasher=None)
+    assert full.to_index["a.md"].content_hash == ""
+
+    # Unhashed fingerprints still let an incremental run skip files whose stat did not move...
+    previous = {"a.md": full.to_index["a.md"]}
+    assert set(plan_incremental([entry], previous, config_hash="cfg", max_file_bytes=1_000_000).unchanged) == {"a.md"}
+    # ...and never count as a content match once it did.
+    os.utime(entry[1], ns=(2_000, 2_000))
+    touched = plan_incremental([entry], previous, config_hash="cfg", max_file_bytes=1_000_000)
+    assert touched.changed == ["a.md"]
+    assert touched.to_index["a.md"].content_hash == hash_file(entry[1])
+
+
+def test_index_config_hash_ignores_storage_only_settings() -> None:
+    base = TriBridConfig()
+    tuned = base.model_copy(deep=True)
+    tuned.indexing.indexing_workers = 8
+    tuned.indexing.postgres_url = "postgresql://elsewhere/db"
+    tuned.embedding.late_chunking_cpu_threads = 4
+    tuned.embedding.late_chunking_batch_windows = 32
+    rechunked = base.model_copy(deep=True)
+    rechunked.chunking.chunk_overlap = int(base.chunking.chunk_overlap) + 1
+
+    assert index_config_hash(tuned) == index_config_hash(base)
+    assert index_config_hash(rechunked) != index_config_hash(base)
+
+
+def test_index_config_hash_ignores_throughput_only_settings() -> None:
+    base = TriBridConfig()
+    tuned = base.model_copy(deep=True)
+    tuned.embedding.embedding_batch_size = int(base.embedding.embedding_batch_size) + 7
+    gi = tuned.graph_indexing
+    gi.lexical_write_batch_docs = int(gi.lexical_write_batch_docs) + 1
+    gi.lexical_write_batch_chunks = int(gi.lexical_write_batch_chunks) + 1
+    gi.lexical_write_concurrency = int(gi.lexical_write_concurrency) + 1
+    gi.ast_parse_workers = int(gi.ast_parse_workers) + 1
+    gi.ast_parse_timeout_s = float(gi.ast_parse_timeout_s) + 1.0
+    gi.ast_parse_cache_enabled = not gi.ast_parse_cache_enabled
+    gi.ast_parse_cache_dir = "/tmp/elsewhere"
+    regraphed = base.model_copy(deep=True)
+    regraphed.graph_indexing.build_lexical_graph = not base.graph_indexing.build_lexical_graph
+
+    assert index_config_hash(tuned) == index_config_hash(base)
+    assert index_config_hash(regraphed) != index_config_hash(base)
+
+
+def test_toggling_incremental_indexing_keeps_stored_fingerprints_valid(tmp_path: Path) -> None:
+    entry = _write(tmp_path, "a.md", "hello\n", mtime_ns=1_000)
+    cfg = TriBridConfig()
+    cfg.indexing.incremental_indexing = 1
+    previous = {"a.md": _fingerprint(*entry, config_hash=index_config_hash(cfg))}
+
+    # A run with incremental_indexing=0 in between must not invalidate the next incremental run.
+    cfg.indexing.incremental_indexing = 0
+    plan = plan_incremental([entry], previous, config_hash=index_config_hash(cfg), max_file_bytes=1_000_000)
+
+    assert plan.changed == []
+    assert set(plan.unchanged) == {"a.md"}
@@ -110,7 +110,7 @@ async def test_search_multiple_corpora_dedupes_by_corpus_and_chunk_id(monkeypatc
         async def connect(self) -> None:
             return None
 
-        async def vector_search(self, repo_id: str, _embedding: list[float], top_k: int):
+        async def vector_search(self, repo_id: str, _embedding: list[float], top_k: int, **_kwargs):
             _ = top_k
             return [
                 ChunkMatch(
@@ -258,6 +258,7 @@ async def test_search_graph_chunk_mode_hydrates_by_chunk_id(monkeypatch) -> None
             top_k: int,
             neighbor_window: int = 0,
             overfetch_multiplier: int = 1,
+            **_kwargs,
         ) -> list[tuple[str, float]]:
             assert repo_id == "test-corpus"
             assert index_name == "tribrid_chunk_embeddings"
@@ -272,6 +273,7 @@ async def test_search_graph_chunk_mode_hydrates_by_chunk_id(monkeypatch) -> None
             *,
             max_hops: int,
             top_k: int,
+            **_kwargs,
         ) -> list[tuple[str, float]]:
             _ = (repo_id, seeds, max_hops, top_k)
             return []
@@ -368,6 +370,7 @@ async def test_search_graph_chunk_mode_entity_expansion_adds_chunks(monkeypatch)
             *,
             max_hops: int,
             top_k: int,
+            **_kwargs,
         ) -> list[tuple[str, float]]:
             assert repo_id == "test-corpus"
             assert max_hops == 2
@@ -462,10 +465,14 @@ async def test_search_graph_entity_mode_hydrates_by_chunk_id(monkeypatch) -> Non
         async def disconnect(self) -> None:
             return None
 
-        async def entity_chunk_search(self, repo_id: str, _query: str, max_hops: int, top_k: int) -> list[tuple[str, float]]:
+        async def entity_chunk_search(
+            self, repo_id: str, _query: str, max_hops: int, top_k: int, *, budget=None, stats=None
+        ) -> list[tuple[str, float]]:
             assert repo_id == "test-corpus"
             assert max_hops == 2
             assert top_k == 5
+            assert budget is not None and budget.fanout_cap == 7
+            stats.update({"strategy": "frontier", "visited": 10, "budget_exhausted": True})
             return [("c1", 0.9)]
 
     async def _fake_load_scoped_config(*, repo_id: str | None = None) -> TriBridConfig:
@@ -477,6 +484,7 @@ async def test_search_graph_entity_mode_hydrates_by_chunk_id(monkeypatch) -> Non
         cfg.graph_search.mode = "entity"
         cfg.graph_search.max_hops = 2
         cfg.graph_search.top_k = 5
+        cfg.graph_search.expansion_fanout_cap = 7
         cfg.retrieval.final_k = 10
         return cfg
 
@@ -496,3 +504,394 @@ async def test_search_graph_entity_mode_hydrates_by_chunk_id(monkeypatch) -> Non
     )
     assert [c.chunk_id for c in out] == ["c1"]
     assert fusion.last_debug.get("fusion_graph_mode") == "entity"
+    assert fusion.last_debug.get("fusion_graph_expansion_budget_exhausted") is True
+    corpus_debug = fusion.last_debug["fusion_per_corpus"]["test-corpus"]
+    assert corpus_debug["fusion_graph_expansion_budget_exhausted"] is True
+    assert corpus_debug["fusion_graph_expansion"]["visited"] == 10
+
+
+@pytest.mark.asyncio
+async def test_search_graph_entity_mode_uses_snapshot_without_neo4j(tmp_path) -> None:
+    """With a graph snapshot on disk, entity-mode graph search never opens a Neo4j connection."""
+    from array import array
+
+    from server.models.index import Chunk
+    from server.models.tribrid_config_model import FusionConfig, TriBridConfig
+    from server.retrieval.cache import bump_index_generation
+    from server.retrieval.graph_snapshot import write_graph_snapshot
+
+    class _FakePostgres:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def get_chunks(self, repo_id: str, chunk_ids: list[str]) -> list[Chunk]:
+            return [
+                Chunk(
+                    chunk_id=cid,
+                    content=f"content {cid}",
+                    file_path="src/test.py",
+                    start_line=1,
+                    end_line=2,
+                    language="python",
+                    token_count=3,
+                    embedding=None,
+                    summary=None,
+                )
+                for cid in chunk_ids
+            ]
+
+    class _NoNeo4j:
+        def __init__(self, *_args, **_kwargs) -> None:
+            raise AssertionError("Neo4j should not be used when a snapshot is loaded")
+
+    cfg = TriBridConfig()
+    cfg.vector_search.enabled = 0
+    cfg.sparse_search.enabled = 0
+    cfg.graph_search.enabled = 1
+    cfg.graph_search.mode = "entity"
+    cfg.graph_search.max_hops = 1
+    cfg.graph_search.snapshot_enabled = 1
+    cfg.graph_search.snapshot_dir = str(tmp_path)
+    cfg.retrieval.final_k = 10
+
+    async def _fake_load_scoped_config(*, repo_id: str | None = None) -> TriBridConfig:
+        return cfg
+
+    write_graph_snapshot(
+        cfg.graph_search,
+        "snap-corpus",
+        {
+            "entity_ids": ["e0", "e1"],
+            "search_text": ["load_config\t\tload config", "helper\t\thelper"],
+            "degree": array("q", [1, 1]),
+            "edge_src": array("q", [0]),
+            "edge_dst": array("q", [1]),
+            "chunk_ids": ["c0", "c1"],
+            "link_entity": array("q", [0, 1]),
+            "link_chunk": array("q", [0, 1]),
+        },
+    )
+    bump_index_generation("snap-corpus")
+
+    fusion = TriBridFusion(
+        vector=None,
+        sparse=None,
+        graph=None,
+        postgres_factory=_FakePostgres,
+        neo4j_factory=_NoNeo4j,
+        load_config=_fake_load_scoped_config,
+    )
+    out = await fusion.search(
+        corpus_ids=["snap-corpus"],
+        query="load_config",
+        config=FusionConfig(),
+        include_vector=False,
+        include_sparse=False,
+        include_graph=True,
+        top_k=5,
+    )
+    assert [c.chunk_id for c in out] == ["c0", "c1"]
+    corpus_debug = fusion.last_debug["fusion_per_corpus"]["snap-corpus"]
+    assert corpus_debug["fusion_graph_engine"] == "snapshot"
+    assert corpus_debug["fusion_graph_expansion"]["engine"] == "snapshot"
+
+
+@pytest.mark.asyncio
+async def test_search_runs_legs_concurrently_and_shares_query_embedding() -> None:
+    """Vector, sparse and chunk-mode graph legs overlap; the query is embedded once."""
+    import asyncio
+    import time
+
+    from server.models.index import Chunk
+    from server.models.tribrid_config_model import FusionConfig, TriBridConfig
+
+    embed_calls: list[str] = []
+
+    class _FakePostgres:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def vector_search(self, repo_id: str, _embedding: list[float], top_k: int, **_kwargs):
+            _ = (repo_id, top_k)
+            await asyncio.sleep(0.2)
+            return [make_chunk("v1", 0.9, "vector")]
+
+        async def sparse_search_engine(self, repo_id: str, _query: str, top_k: int, **_kwargs):
+            _ = (repo_id, top_k)
+            await asyncio.sleep(0.2)
+            return [make_chunk("s1", 0.8, "sparse")]
+
+        async def get_chunks(self, repo_id: str, chunk_ids: list[str]) -> list[Chunk]:
+            _ = repo_id
+            return [
+                Chunk(
+                    chunk_id=cid,
+                    content=f"content {cid}",
+                    file_path="src/test.py",
+                    start_line=1,
+                    end_line=2,
+                    language="python",
+                    token_count=3,
+                    embedding=None,
+                    summary=None,
+                )
+                for cid in chunk_ids
+            ]
+
+    class _FakeNeo4j:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def disconnect(self) -> None:
+            return None
+
+        async def chunk_vector_search(self, repo_id: str, _embedding: list[float], **_kwargs):
+            _ = repo_id
+            await asyncio.sleep(0.2)
+            return [("g1", 0.7)]
+
+    class _FakeEmbedder:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def embed(self, text: str) -> list[float]:
+            embed_calls.append(text)
+            await asyncio.sleep(0.05)
+            return [0.0, 0.1, 0.2]
+
+    async def _fake_load_scoped_config(*, repo_id: str | None = None) -> TriBridConfig:
+        _ = repo_id
+        cfg = TriBridConfig()
+        cfg.vector_search.enabled = 1
+        cfg.sparse_search.enabled = 1
+        cfg.sparse_search.file_path_fallback = False
+        cfg.graph_search.enabled = 1
+        cfg.graph_search.mode = "chunk"
+        cfg.graph_search.chunk_entity_expansion_enabled = False
+        cfg.retrieval.final_k = 10
+        return cfg
+
+    fusion = TriBridFusion(
+        vector=None,
+        sparse=None,
+        graph=None,
+        postgres_factory=_FakePostgres,
+        neo4j_factory=_FakeNeo4j,
+        embedder_factory=_FakeEmbedder,
+        load_config=_fake_load_scoped_config,
+    )
+    started = time.perf_counter()
+    out = await fusion.search(corpus_ids=["test-corpus"], query="foo", config=FusionConfig(), top_k=10)
+    elapsed = time.perf_counter() - started
+
+    assert {c.chunk_id for c in out} == {"v1", "s1", "g1"}
+    assert embed_calls == ["foo"]
+    # Sequential legs would take >= 0.65s.
+    assert elapsed < 0.5
+    assert fusion.last_debug.get("fusion_vector_results") == 1
+    assert fusion.last_debug.get("fusion_sparse_results") == 1
+    assert fusion.last_debug.get("fusion_graph_hydrated_chunks") == 1
+
+
+@pytest.mark.asyncio
+async def test_search_leg_timeout_is_cancelled_and_recorded() -> None:
+    """A slow leg times out without failing the search; other legs still contribute."""
+    import asyncio
+
+    from server.models.tribrid_config_model import FusionConfig, TriBridConfig
+
+    disconnected: list[bool] = []
+
+    class _FakePostgres:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def sparse_search_engine(self, repo_id: str, _query: str, top_k: int, **_kwargs):
+            _ = (repo_id, top_k)
+            return [make_chunk("s1", 0.8, "sparse")]
+
+    class _FakeNeo4j:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def disconnect(self) -> None:
+            disconnected.append(True)
+
+        async def entity_chunk_search(self, repo_id: str, _query: str, max_hops: int, top_k: int, **_kwargs):
+            _ = (repo_id, max_hops, top_k)
+            await asyncio.sleep(5)
+            return [("g1", 0.9)]
+
+    async def _fake_load_scoped_config(*, repo_id: str | None = None) -> TriBridConfig:
+        _ = repo_id
+        cfg = TriBridConfig()
+        cfg.vector_search.enabled = 0
+        cfg.sparse_search.enabled = 1
+        cfg.graph_search.enabled = 1
+        cfg.graph_search.mode = "entity"
+        cfg.graph_search.timeout_s = 0.05
+        cfg.retrieval.final_k = 10
+        return cfg
+
+    fusion = TriBridFusion(
+        vector=None,
+        sparse=None,
+        graph=None,
+        postgres_factory=_FakePostgres,
+        neo4j_factory=_FakeNeo4j,
+        load_config=_fake_load_scoped_config,
+    )
+    out = await fusion.search(corpus_ids=["test-corpus"], query="foo", config=FusionConfig(), top_k=5)
+
+    assert [c.chunk_id for c in out] == ["s1"]
+    per_corpus = fusion.last_debug["fusion_per_corpus"]["test-corpus"]
+    assert per_corpus["fusion_graph_timed_out"] is True
+    assert per_corpus["fusion_graph_error_kind"] == "TimeoutError"
+    assert fusion.last_debug.get("fusion_graph_error")
+    # Cancellation still runs the leg's cleanup.
+    assert disconnected == [True]
+
+
+@pytest.mark.asyncio
+async def test_search_fans_out_corpora_in_parallel_and_reports_deadline_misses() -> None:
+    """Corpora are searched concurrently; a corpus past its deadline is reported, not awaited."""
+    import asyncio
+    import time
+
+    from server.models.tribrid_config_model import FusionConfig, TriBridConfig
+
+    in_flight = 0
+    max_in_flight = 0
+
+    class _FakePostgres:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def sparse_search_engine(self, repo_id: str, _query: str, top_k: int, **_kwargs):
+            nonlocal in_flight, max_in_flight
+            _ = top_k
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                await asyncio.sleep(5 if repo_id == "slow" else 0.2)
+            finally:
+                in_flight -= 1
+            chunk = make_chunk(f"{repo_id}-c1", 0.8, "sparse")
+            return [chunk]
+
+    async def _fake_load_scoped_config(*, repo_id: str | None = None) -> TriBridConfig:
+        _ = repo_id
+        cfg = TriBridConfig()
+        cfg.vector_search.enabled = 0
+        cfg.sparse_search.enabled = 1
+        cfg.sparse_search.timeout_s = 0
+        cfg.graph_search.enabled = 0
+        cfg.retrieval.final_k = 10
+        return cfg
+
+    fusion = TriBridFusion(
+        vector=None,
+        sparse=None,
+        graph=None,
+        postgres_factory=_FakePostgres,
+        load_config=_fake_load_scoped_config,
+    )
+    started = time.perf_counter()
+    out = await fusion.search(
+        corpus_ids=["a", "b", "c", "slow"],
+        query="foo",
+        config=FusionConfig(max_parallel_corpora=4, corpus_timeout_s=0.5),
+        include_vector=False,
+        include_graph=False,
+        top_k=10,
+    )
+    elapsed = time.perf_counter() - started
+
+    assert {c.chunk_id for c in out} == {"a-c1", "b-c1", "c-c1"}
+    assert max_in_flight == 4
+    assert elapsed < 1.5
+    assert fusion.last_debug["fusion_corpora_timed_out"] == ["slow"]
+    slow_debug = fusion.last_debug["fusion_per_corpus"]["slow"]
+    assert slow_debug["fusion_corpus_timed_out"] is True
+    assert slow_debug["fusion_corpus_error_kind"] == "TimeoutError"
+    # Leg-level debug captured before the deadline is preserved.
+    assert slow_debug["fusion_sparse_requested"] is True
+
+
+@pytest.mark.asyncio
+async def test_search_result_cache_hits_until_index_generation_bumps() -> None:
+    """Repeated searches are served from cache; re-indexing the corpus invalidates them."""
+    from server.models.tribrid_config_model import FusionConfig, TriBridConfig
+    from server.retrieval.cache import bump_index_generation
+
+    calls: list[str] = []
+
+    class _FakePostgres:
+        def __init__(self, *_args, **_kwargs) -> None:
+            pass
+
+        async def connect(self) -> None:
+            return None
+
+        async def sparse_search_engine(self, repo_id: str, query: str, top_k: int, **_kwargs):
+            _ = (repo_id, top_k)
+            calls.append(query)
+            return [make_chunk("s1", 0.8, "sparse")]
+
+    cfg = TriBridConfig()
+    cfg.vector_search.enabled = 0
+    cfg.sparse_search.enabled = 1
+    cfg.graph_search.enabled = 0
+    cfg.retrieval.final_k = 10
+
+    async def _fake_load_scoped_config(*, repo_id: str | None = None) -> TriBridConfig:
+        _ = repo_id
+        return cfg
+
+    fusion = TriBridFusion(
+        vector=None,
+        sparse=None,
+        graph=None,
+        postgres_factory=_FakePostgres,
+        load_config=_fake_load_scoped_config,
+    )
+    kwargs = {"config": FusionConfig(), "include_vector": False, "include_graph": False, "top_k": 5}
+
+    first = await fusion.search(corpus_ids=["cache-corpus"], query="foo  bar", **kwargs)
+    assert fusion.last_debug["fusion_cache_hit"] is False
+    second = await fusion.search(corpus_ids=["cache-corpus"], query="foo bar", **kwargs)
+    assert fusion.last_debug["fusion_cache_hit"] is True
+    assert [c.chunk_id for c in second] == [c.chunk_id for c in first]
+    assert len(calls) == 1
+
+    # Different leg toggles are a different key.
+    await fusion.search(corpus_ids=["cache-corpus"], query="foo bar", **{**kwargs, "include_graph": True})
+    assert fusion.last_debug["fusion_cache_hit"] is False
+
+    # Config changes change the key.
+    cfg.sparse_search.top_k = 20
+    await fusion.search(corpus_ids=["cache-corpus"], query="foo bar", **kwargs)
+    assert fusion.last_debug["fusion_cache_hit"] is False
+
+    bump_index_generation("cache-corpus")
+    await fusion.search(corpus_ids=["cache-corpus"], query="foo bar", **kwargs)
+    assert fusion.last_debug["fusion_cache_hit"] is False
+    assert len(calls) == 4
@@ -1,8 +1,20 @@
 """Tests for the graph builder module."""
 
+import asyncio
+import time
+from pathlib import Path
+
 import pytest
 
-from server.indexing.graph_builder import GraphBuilder
+from server.indexing.graph_builder import (
+    EdgeWeights,
+    GraphBuilder,
+    ParseTimeoutError,
+    graph_language,
+    parse_source,
+)
+from server.indexing.process_pool import shutdown_process_pool, time_limit
+from server.models.graph import GraphStats
 from server.models.index import Chunk
 from server.models.tribrid_config_model import GraphIndexingConfig
 
@@ -141,3 +153,211 @@ def helper():
     assert all(r.weight == pytest.approx(0.23) for r in inherits)
     assert all(r.weight == pytest.approx(0.34) for r in imports)
     assert all(r.weight == pytest.approx(0.45) for r in calls)
+
+
+class _RecordingNeo4j:
+    """Records entity/relationship upserts and community refreshes."""
+
+    def __init__(self) -> None:
+        self.entity_batches: list[list[str]] = []
+        self.rel_batches: list[int] = []
+        self.communities_for: list[object] = []
+
+    async def upsert_entities(self, _repo_id: str, entities: list) -> int:
+        self.entity_batches.append([e.entity_id for e in entities])
+        return len(entities)
+
+    async def upsert_relationships(self, _repo_id: str, rels: list) -> int:
+        self.rel_batches.append(len(rels))
+        return len(rels)
+
+    async def detect_communities(self, _repo_id: str, _cfg: object, *, changed_files=None) -> list:
+        self.communities_for.append(changed_files)
+        return []
+
+    async def get_graph_stats(self, repo_id: str) -> GraphStats:
+        return GraphStats(repo_id=repo_id, total_entities=0, total_relationships=0, total_communities=0)
+
+
+def _graph_cfg(tmp_path: Path, **overrides: object) -> GraphIndexingConfig:
+    """Graph config whose parse cache lives under the test's tmp dir, not the project's data/."""
+    return GraphIndexingConfig(ast_parse_cache_dir=str(tmp_path / "graph_parse_cache"), **overrides)
+
+
+_SOURCES = [(f"pkg/mod{i}.py", f"import os\n\nclass C{i}:\n    def run(self):\n        helper{i}()\n") for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_graph_stream_writes_batches_before_finish(tmp_path: Path) -> None:
+    neo4j = _RecordingNeo4j()
+    gb = GraphBuilder(neo4j=neo4j, cfg=_graph_cfg(tmp_path, ast_parse_workers=0))  # type: ignore[arg-type]
+    stream = gb.stream("repo", batch_size=8)
+
+    for path, source in _SOURCES:
+        await stream.add_file(path, source)
+    while stream._tasks:
+        await asyncio.sleep(0)
+    # Batches are written while files stream in, not only at the end.
+    assert neo4j.entity_batches
+    assert neo4j.communities_for == []
+
+    await stream.finish(changed_files=["pkg/mod0.py"])
+    assert neo4j.communities_for == [["pkg/mod0.py"]]
+    assert stream.files == 6
+    expected: set[str] = set()
+    for path, source in _SOURCES:
+        expected.update(e.entity_id for e in gb._parse_python_file("repo", path, source)[0])
+    assert {eid for batch in neo4j.entity_batches for eid in batch} == expected
+    assert stream.entities_written == sum(len(b) for b in neo4j.entity_batches)
+
+
+@pytest.mark.asyncio
+async def test_graph_stream_parses_in_worker_processes(tmp_path: Path) -> None:
+    neo4j = _RecordingNeo4j()
+    gb = GraphBuilder(neo4j=neo4j, cfg=_graph_cfg(tmp_path, ast_parse_workers=1))  # type: ignore[arg-type]
+    try:
+        await gb.build_graph_for_files("repo", _SOURCES[:2], batch_size=1000)
+    finally:
+        shutdown_process_pool()
+    expected = [e.entity_id for path, source in _SOURCES[:2] for e in gb._parse_python_file("repo", path, source)[0]]
+    assert sorted(eid for batch in neo4j.entity_batches for eid in batch) == sorted(expected)
+    assert neo4j.communities_for == [None]
+
+
+@pytest.mark.asyncio
+async def test_graph_stream_surfaces_write_errors_from_finish(tmp_path: Path) -> None:
+    class _FailingNeo4j(_RecordingNeo4j):
+        async def upsert_entities(self, _repo_id: str, entities: list) -> int:
+            raise RuntimeError("neo4j down")
+
+    gb = GraphBuilder(neo4j=_FailingNeo4j(), cfg=_graph_cfg(tmp_path, ast_parse_workers=0))  # type: ignore[arg-type]
+    stream = gb.stream("repo", batch_size=1)
+    for path, source in _SOURCES:
+        await stream.add_file(path, source)
+    with pytest.raises(RuntimeError, match="neo4j down"):
+        await stream.finish()
+
+
+def test_graph_language_routes_code_files() -> None:
+    assert graph_language("pkg/mod.py") == "python"
+    assert graph_language("web/App.tsx") == "tsx"
+    assert graph_language("cmd/main.go") == "go"
+    assert graph_language("lib.rs", tree_sitter=False) is None
+    assert graph_language("README.md") is None
+
+
+_PARSED: list[str] = []
+
+
+def _counting_parse_job(repo_id, file_path, content, weights, timeout_s, tree_sitter):
+    _PARSED.append(file_path)
+    return parse_source(repo_id, file_path, content, weights, timeout_s=timeout_s, tree_sitter=tree_sitter)
+
+
+def _slow_parse_job(repo_id, file_path, content, weights, timeout_s, tree_sitter):
+    if file_path == "slow.py":
+        time.sleep(0.5)
+    return parse_source(repo_id, file_path, content, weights, timeout_s=timeout_s, tree_sitter=tree_sitter)
+
+
+@pytest.mark.asyncio
+async def test_graph_stream_reuses_cached_parses_for_unchanged_files(tmp_path: Path) -> None:
+    _PARSED.clear()
+    cfg = _graph_cfg(tmp_path, ast_parse_workers=0)
+
+    first = GraphBuilder(neo4j=_RecordingNeo4j(), cfg=cfg, parse_job=_counting_parse_job)  # type: ignore[arg-type]
+    await first.build_graph_for_files("repo", _SOURCES[:2])
+    assert sorted(_PARSED) == ["pkg/mod0.py", "pkg/mod1.py"]
+    assert any((tmp_path / "graph_parse_cache" / "repo").rglob("*.json"))
+
+    neo4j = _RecordingNeo4j()
+    stream = GraphBuilder(neo4j=neo4j, cfg=cfg, parse_job=_counting_parse_job).stream("repo")  # type: ignore[arg-type]
+    await stream.add_file("pkg/mod0.py", _SOURCES[0][1])
+    await stream.add_file("pkg/mod1.py", _SOURCES[1][1] + "\ndef extra():\n    pass\n")
+    await stream.finish()
+
+    assert _PARSED[2:] == ["pkg/mod1.py"]  # only the changed file is parsed again
+    assert stream.cache_hits == 1
+    expected = {e.entity_id for e in first._parse_python_file("repo", *_SOURCES[0])[0]}
+    assert expected <= {eid for batch in neo4j.entity_batches for eid in batch}
+
+
+@pytest.mark.asyncio
+async def test_graph_stream_keeps_only_the_module_for_files_that_time_out() -> None:
+    neo4j = _RecordingNeo4j()
+    cfg = GraphIndexingConfig(ast_parse_workers=0, ast_parse_timeout_s=0.1, ast_parse_cache_enabled=False)
+    stream = GraphBuilder(neo4j=neo4j, cfg=cfg, parse_job=_slow_parse_job).stream("repo")  # type: ignore[arg-type]
+    await stream.add_file("slow.py", "class Slow:\n    pass\n")
+    await stream.add_file("fast.py", "class Fast:\n    pass\n")
+    await stream.finish()
+
+    assert stream.timeouts == 1
+    written = {eid for batch in neo4j.entity_batches for eid in batch}
+    assert GraphBuilder._stable_id("repo", "slow.py", "module", "slow.py") in written
+    assert GraphBuilder._stable_id("repo", "slow.py", "class", "Slow") not in written
+    assert GraphBuilder._stable_id("repo", "fast.py", "class", "Fast") in written
+
+
+def test_parse_source_interrupts_parses_over_the_time_limit() -> None:
+    # The limit interrupts pure-Python work mid-flight...
+    started = time.monotonic()
+    with pytest.raises(ParseTimeoutError):
+        with time_limit(0.1, lambda: ParseTimeoutError("spin")):
+            while time.monotonic() - started < 5:
+                pass
+    assert time.monotonic() - started < 2
+
+    # ...and parse_source reports a parse that overran it even when the extractor swallowed the signal.
+    source = "".join(f"def f{i}(a):\n    return g{i}(a)\n" for i in range(5000))
+    with pytest.raises(ParseTimeoutError):
+        parse_source("repo", "a.py", source, EdgeWeights(), timeout_s=0.001)
+
+
+_TS_SOURCE = """
+import { Base } from "./base";
+
+export class Widget extends Base implements Renderable {
+  render(): string {
+    return helper(this.name);
+  }
+}
+
+export const makeWidget = () => new Widget();
+"""
+
+_GO_SOURCE = """
+package main
+
+import "fmt"
+
+type Server struct{}
+
+func (s *Server) Start() {
+    fmt.Println("start")
+}
+"""
+
+
+@pytest.mark.parametrize(
+    ("file_path", "source", "classes", "functions", "imports", "calls"),
+    [
+        ("web/widget.ts", _TS_SOURCE, {"Widget"}, {"render", "makeWidget"}, {"./base"}, {"helper", "Widget"}),
+        ("cmd/main.go", _GO_SOURCE, {"Server"}, {"Start"}, {"fmt"}, {"fmt.Println"}),
+    ],
+)
+def test_tree_sitter_extracts_classes_functions_imports_and_calls(
+    file_path: str, source: str, classes: set[str], functions: set[str], imports: set[str], calls: set[str]
+) -> None:
+    pytest.importorskip("tree_sitter_languages")
+    entities, rels = parse_source("repo", file_path, source, EdgeWeights())
+    by_id = {e.entity_id: e for e in entities}
+
+    def _targets(relation_type: str) -> set[str]:
+        return {by_id[r.target_id].name for r in rels if r.relation_type == relation_type}
+
+    assert {e.name for e in entities if e.entity_type == "class" and e.file_path == file_path} == classes
+    assert {e.name for e in entities if e.entity_type == "function" and e.file_path == file_path} == functions
+    assert _targets("imports") == imports
+    assert _targets("calls") == calls
+    if file_path.endswith(".ts"):
+        assert _targets("inherits") == {"Base", "Renderable"}
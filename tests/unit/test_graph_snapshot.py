@@ -0,0 +1,132 @@
+"""Tests for the in-memory CSR graph snapshot (build, load, traversal parity, generation refresh)."""
+
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from server.db.neo4j import GraphExpansionBudget
+from server.models.tribrid_config_model import GraphSearchConfig
+from server.retrieval.cache import bump_index_generation
+from server.retrieval.graph_snapshot import (
+    delete_graph_snapshot,
+    get_graph_snapshot,
+    load_graph_snapshot,
+    write_graph_snapshot,
+)
+
+
+def _export(edges: list[tuple[int, int]], *, names: list[str] | None = None) -> dict[str, Any]:
+    """Entities e0..eN (sorted ids), each linked to its own chunk cN."""
+    n = 1 + max((max(a, b) for a, b in edges), default=0)
+    names = names or [f"node{i}" for i in range(n)]
+    degree = [0] * n
+    for a, b in edges:
+        degree[a] += 1
+        degree[b] += 1
+    return {
+        "entity_ids": [f"e{i:02d}" for i in range(n)],
+        "search_text": [f"{name}\t\t{name}" for name in names],
+        "degree": array("q", degree),
+        "edge_src": array("q", [a for a, _ in edges]),
+        "edge_dst": array("q", [b for _, b in edges]),
+        "chunk_ids": [f"c{i:02d}" for i in range(n)],
+        "link_entity": array("q", range(n)),
+        "link_chunk": array("q", range(n)),
+    }
+
+
+@pytest.fixture
+def cfg(tmp_path: Path) -> GraphSearchConfig:
+    return GraphSearchConfig(snapshot_enabled=1, snapshot_dir=str(tmp_path / "snapshots"))
+
+
+def test_snapshot_roundtrip_memory_maps_csr_arrays(cfg: GraphSearchConfig) -> None:
+    write_graph_snapshot(cfg, "corpus/a", _export([(0, 1), (1, 2), (1, 2), (2, 2)]))
+    snap = load_graph_snapshot(cfg, "corpus/a")
+
+    assert snap is not None
+    assert snap.meta["entities"] == 3
+    assert snap.meta["edges"] == 2  # duplicate collapsed, self-loop dropped
+    assert snap.arrays["adj_indptr"].tolist() == [0, 1, 3, 4]
+    assert snap.arrays["adj_indices"].tolist() == [1, 0, 2, 1]
+    assert type(snap.arrays["adj_indices"]).__name__ == "memmap"
+
+
+def test_entity_search_seeds_by_name_and_decays_by_hops(cfg: GraphSearchConfig) -> None:
+    # Path: parse_config(0) - helper(1) - loader(2) - unrelated(3)
+    export = _export([(0, 1), (1, 2), (2, 3)], names=["parse_config", "helper", "loader", "unrelated"])
+    write_graph_snapshot(cfg, "c", export)
+    snap = load_graph_snapshot(cfg, "c")
+    assert snap is not None
+
+    paths = snap.entity_chunk_search("parse_config", 2, 10)
+    assert paths == [("c00", 1.0), ("c01", 0.5), ("c02", pytest.approx(1 / 3))]
+
+    stats: dict[str, Any] = {}
+    frontier = snap.entity_chunk_search(
+        "parse_config", 2, 10, budget=GraphExpansionBudget(fanout_cap=50, max_visited=2000, hub_degree=200), stats=stats
+    )
+    assert frontier == paths
+    assert stats["engine"] == "snapshot"
+    assert stats["frontier_sizes"] == [1, 1, 1]
+
+
+def test_frontier_caps_fanout_by_lowest_degree_and_downweights_hubs(cfg: GraphSearchConfig) -> None:
+    # Seed 0 has neighbors 1..4; node 4 is a hub (extra edges to 5..9).
+    edges = [(0, i) for i in range(1, 5)] + [(4, i) for i in range(5, 10)]
+    names = ["seed"] + [f"n{i}" for i in range(1, 10)]
+    write_graph_snapshot(cfg, "c", _export(edges, names=names))
+    snap = load_graph_snapshot(cfg, "c")
+    assert snap is not None
+
+    stats: dict[str, Any] = {}
+    scored = snap.frontier_expand(
+        {0: 1.0}, max_hops=1, budget=GraphExpansionBudget(fanout_cap=3, max_visited=100, hub_degree=4), stats=stats
+    )
+    assert sorted(scored) == [0, 1, 2, 3]
+    assert stats["fanout_capped"] == 1
+
+    scored = snap.frontier_expand(
+        {0: 1.0}, max_hops=1, budget=GraphExpansionBudget(fanout_cap=10, max_visited=100, hub_degree=3), stats=stats
+    )
+    # Hub 4 (degree 6) is scaled by sqrt(3 / 6); the others keep the plain 1/2 decay.
+    assert scored[1] == (0.5, 1)
+    assert scored[4][0] == pytest.approx(0.5 * (3 / 6) ** 0.5)
+    assert stats["hubs_downweighted"] == 1
+
+
+def test_expand_chunks_via_entities_starts_from_linked_entities(cfg: GraphSearchConfig) -> None:
+    write_graph_snapshot(cfg, "c", _export([(0, 1), (1, 2)]))
+    snap = load_graph_snapshot(cfg, "c")
+    assert snap is not None
+
+    out = snap.expand_chunks_via_entities([("c01", 0.8), ("missing", 1.0)], max_hops=1, top_k=10)
+    assert out == [("c01", 0.8), ("c00", 0.4), ("c02", 0.4)]
+
+
+@pytest.mark.asyncio
+async def test_get_graph_snapshot_reloads_on_generation_bump(cfg: GraphSearchConfig) -> None:
+    corpus = "snapshot-reload-corpus"
+    delete_graph_snapshot(cfg, corpus)
+    assert await get_graph_snapshot(corpus, cfg) is None
+
+    write_graph_snapshot(cfg, corpus, _export([(0, 1)]))
+    # Same generation: the cached miss stands until indexing bumps the generation.
+    assert await get_graph_snapshot(corpus, cfg) is None
+    bump_index_generation(corpus)
+    first = await get_graph_snapshot(corpus, cfg)
+    assert first is not None and first.num_entities == 2
+    assert await get_graph_snapshot(corpus, cfg) is first
+
+    write_graph_snapshot(cfg, corpus, _export([(0, 1), (1, 2)]))
+    bump_index_generation(corpus)
+    second = await get_graph_snapshot(corpus, cfg)
+    assert second is not None and second.num_entities == 3
+    assert len(list(second.path.parent.iterdir())) == 1  # older builds are pruned
+
+    disabled = cfg.model_copy(update={"snapshot_enabled": 0})
+    assert await get_graph_snapshot(corpus, disabled) is None
@@ -0,0 +1,432 @@
+"""Tests for `_run_index`: incremental fingerprints and the indexing pipeline (Postgres/Neo4j faked)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+import server.api.index as index_api
+from server.indexing import file_prep
+from server.indexing.embedder import Embedder, EmbeddingMatrix
+from server.models.index import Chunk
+from server.models.tribrid_config_model import TriBridConfig
+
+
+class _FakePostgres:
+    """In-memory stand-in for the PostgresClient surface `_run_index` uses."""
+
+    def __init__(self) -> None:
+        self.chunks: dict[str, Chunk] = {}
+        self.fingerprints: dict[str, dict[str, Any]] = {}
+        self.purged: list[list[str]] = []
+        self.upsert_batches: list[int] = []
+        self.vector_batches: list[EmbeddingMatrix | None] = []
+        self.delete_batch_sizes: list[int] = []
+        self.cache_prunes: list[tuple[int, int]] = []
+
+    async def connect(self) -> None:
+        return None
+
+    async def upsert_corpus(self, *_args: object, **_kwargs: object) -> None:
+        return None
+
+    async def get_corpus(self, repo_id: str) -> dict[str, Any]:
+        return {"repo_id": repo_id, "meta": {}}
+
+    async def delete_chunks(
+        self,
+        _repo_id: str,
+        *,
+        batch_size: int = 5000,
+        on_progress: Callable[[int], None] | None = None,
+        counts: dict[str, int] | None = None,
+    ) -> int:
+        self.delete_batch_sizes.append(batch_size)
+        n = len(self.chunks)
+        self.chunks.clear()
+        if on_progress is not None and n:
+            on_progress(n)
+        return n
+
+    async def delete_chunks_for_files(self, _repo_id: str, file_paths: list[str]) -> int:
+        self.purged.append(sorted(file_paths))
+        stale = [cid for cid, ch in self.chunks.items() if ch.file_path in set(file_paths)]
+        for cid in stale:
+            del self.chunks[cid]
+        return len(stale)
+
+    async def delete_chunks_outside_files(self, _repo_id: str, keep_paths: list[str]) -> list[str]:
+        orphans = {ch.file_path for ch in self.chunks.values() if ch.file_path not in set(keep_paths)}
+        self.chunks = {cid: ch for cid, ch in self.chunks.items() if ch.file_path not in orphans}
+        return sorted(orphans)
+
+    async def get_file_fingerprints(self, _repo_id: str) -> dict[str, dict[str, Any]]:
+        return {k: dict(v) for k, v in self.fingerprints.items()}
+
+    async def upsert_file_fingerprints(self, _repo_id: str, fingerprints: list[dict[str, Any]]) -> int:
+        for fp in fingerprints:
+            self.fingerprints[str(fp["file_path"])] = dict(fp)
+        return len(fingerprints)
+
+    async def delete_file_fingerprints(self, _repo_id: str, file_paths: list[str] | None = None) -> int:
+        paths = list(self.fingerprints) if file_paths is None else file_paths
+        return sum(1 for p in paths if self.fingerprints.pop(p, None) is not None)
+
+    async def upsert_chunks(
+        self,
+        _repo_id: str,
+        chunks: list[Chunk],
+        *,
+        ts_config: str,
+        store_embeddings: bool = True,
+        vectors: EmbeddingMatrix | None = None,
+    ) -> int:
+        self.upsert_batches.append(len(chunks))
+        if vectors is not None:
+            assert vectors.dtype == np.float32 and vectors.flags.c_contiguous
+            assert vectors.shape[0] == len(chunks)
+        self.vector_batches.append(vectors)
+        for ch in chunks:
+            self.chunks[ch.chunk_id] = ch
+        return len(chunks)
+
+    async def update_corpus_embedding_meta(self, *_args: object, **_kwargs: object) -> None:
+        return None
+
+    async def drop_vector_ann_indexes(self, _repo_id: str) -> int:
+        return 0
+
+    async def ensure_vector_ann_index(self, *_args: object, **_kwargs: object) -> dict[str, Any]:
+        return {"built": False}
+
+    async def prune_embedding_cache(self, *, max_age_days: int, max_entries: int) -> int:
+        self.cache_prunes.append((max_age_days, max_entries))
+        return 0
+
+
+def _config(**indexing: Any) -> TriBridConfig:
+    cfg = TriBridConfig()
+    cfg.graph_indexing.enabled = False
+    cfg.tokenization.strategy = "whitespace"
+    cfg.chunking.chunking_strategy = "fixed_chars"
+    for key, value in indexing.items():
+        setattr(cfg.indexing, key, value)
+    return cfg
+
+
+class _SpyEmbedder(Embedder):
+    """Real (deterministic) embedder that records the file paths of every batch it embeds."""
+
+    def __init__(self, batches: list[list[str]], *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._batches = batches
+
+    async def embed_chunks_array(self, chunks: list[Chunk]) -> EmbeddingMatrix:
+        self._batches.append([c.file_path for c in chunks])
+        return await super().embed_chunks_array(chunks)
+
+
+def _deps(cfg: TriBridConfig, pg: _FakePostgres, **overrides: Any) -> index_api._IndexRunDeps:
+    async def _load(*, repo_id: str | None = None) -> TriBridConfig:
+        return cfg
+
+    fields: dict[str, Any] = {"load_config": _load, "postgres": lambda _url: pg}
+    neo4j = overrides.pop("neo4j", None)
+    if neo4j is not None:
+        fields["neo4j"] = lambda *_args, **_kwargs: neo4j
+    batches = overrides.pop("embedded_batches", None)
+    if batches is not None:
+        fields["embedder"] = lambda *args, **kwargs: _SpyEmbedder(batches, *args, **kwargs)
+    fields.update(overrides)
+    return index_api._IndexRunDeps(**fields)
+
+
+@pytest.mark.asyncio
+async def test_incremental_run_skips_unchanged_and_purges_changed_and_removed(tmp_path: Path) -> None:
+    cfg = _config()
+    pg = _FakePostgres()
+    for name in ("keep.md", "edit.md", "drop.md"):
+        (tmp_path / name).write_text(f"# {name}\n\nsome text about {name}\n", encoding="utf-8")
+
+    first = await index_api._run_index("inc-corpus", str(tmp_path), False, deps=_deps(cfg, pg))
+    assert first.incremental is True
+    # No fingerprints yet: the baseline run replaces every walked file's rows.
+    assert (first.files_added, first.files_changed, first.files_removed, first.files_skipped) == (0, 3, 0, 0)
+    assert set(pg.fingerprints) == {"keep.md", "edit.md", "drop.md"}
+    pg.purged.clear()
+
+    (tmp_path / "edit.md").write_text("# edit.md\n\nrewritten content\n", encoding="utf-8")
+    os.utime(tmp_path / "edit.md", ns=(1, 1))
+    (tmp_path / "drop.md").unlink()
+    (tmp_path / "new.md").write_text("# new.md\n\nbrand new\n", encoding="utf-8")
+
+    # Second run reuses the stored state of the first.
+    batches: list[list[str]] = []
+    second = await index_api._run_index(
+        "inc-corpus", str(tmp_path), False, deps=_deps(cfg, pg, embedded_batches=batches)
+    )
+    assert (second.files_added, second.files_changed, second.files_removed, second.files_skipped) == (1, 1, 1, 1)
+    assert {p for batch in batches for p in batch} == {"edit.md", "new.md"}
+    assert pg.purged == [["drop.md", "edit.md"]]
+    assert {ch.file_path for ch in pg.chunks.values()} == {"keep.md", "edit.md", "new.md"}
+    assert set(pg.fingerprints) == {"keep.md", "edit.md", "new.md"}
+    assert second.total_chunks == len(pg.chunks)
+
+
+@pytest.mark.asyncio
+async def test_incremental_baseline_replaces_untracked_rows_without_wiping(tmp_path: Path) -> None:
+    cfg = _config()
+    pg = _FakePostgres()
+    (tmp_path / "kept.md").write_text("# kept.md\n\ncurrent text\n", encoding="utf-8")
+    # Rows written before fingerprints existed: one for a walked file, one for a deleted file.
+    for path in ("kept.md", "gone.md"):
+        pg.chunks[f"{path}:1-1:0"] = Chunk(
+            chunk_id=f"{path}:1-1:0", content="old", file_path=path, start_line=1, end_line=1
+        )
+
+    result = await index_api._run_index("baseline-corpus", str(tmp_path), False, deps=_deps(cfg, pg))
+
+    assert result.incremental is True
+    assert (result.files_added, result.files_changed) == (0, 1)
+    assert pg.delete_batch_sizes == []  # no corpus-wide clear
+    assert pg.purged == [["kept.md"]]
+    assert {ch.file_path for ch in pg.chunks.values()} == {"kept.md"}
+    assert all(ch.content != "old" for ch in pg.chunks.values())
+    assert set(pg.fingerprints) == {"kept.md"}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_coalesces_embedding_batches_across_files(tmp_path: Path) -> None:
+    cfg = _config(indexing_workers=3)
+    cfg.embedding.embedding_batch_size = 8
+    pg = _FakePostgres()
+    for i in range(10):
+        (tmp_path / f"doc{i}.txt").write_text(f"document number {i}\n", encoding="utf-8")
+
+    batches: list[list[str]] = []
+    stats = await index_api._run_index(
+        "pipe-corpus", str(tmp_path), True, deps=_deps(cfg, pg, embedded_batches=batches)
+    )
+
+    # One chunk per file: 10 chunks become batches of 8 + 2 spanning several files each.
+    assert [len(set(b)) for b in batches] == [8, 2]
+    assert stats.total_chunks == 10
+    assert pg.upsert_batches == [8, 2]
+    # Embeddings reach the writer as one float32 matrix per batch, not as per-chunk lists.
+    dim = cfg.embedding.embedding_dim
+    assert [v.shape if v is not None else None for v in pg.vector_batches] == [(8, dim), (2, dim)]
+    assert all(ch.embedding is None for ch in pg.chunks.values())
+    assert set(pg.fingerprints) == {f"doc{i}.txt" for i in range(10)}
+    # The shared embedding cache is pruned once per run with the configured limits.
+    assert pg.cache_prunes == [(cfg.embedding.embedding_cache_max_age_days, cfg.embedding.embedding_cache_max_entries)]
+
+
+@pytest.mark.asyncio
+async def test_force_reindex_clears_in_batches_and_streams_progress(tmp_path: Path) -> None:
+    cfg = _config(delete_batch_size=250)
+    pg = _FakePostgres()
+    (tmp_path / "a.md").write_text("# a\n\nhello\n", encoding="utf-8")
+
+    await index_api._run_index("del-corpus", str(tmp_path), True, deps=_deps(cfg, pg))
+
+    queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=100)
+    await index_api._run_index("del-corpus", str(tmp_path), True, event_queue=queue, deps=_deps(cfg, pg))
+
+    assert pg.delete_batch_sizes[-1] == 250
+    messages: list[str] = []
+    while not queue.empty():
+        messages.append(str(queue.get_nowait().get("message")))
+    assert any("Deleted 1 chunks" in m for m in messages)
+
+
+class _FakeNeo4j:
+    """Records lexical-graph write transactions; everything else is a no-op."""
+
+    def __init__(self) -> None:
+        self.transactions: list[list[str]] = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self.entity_files: set[str] = set()
+        self.communities_detected = False
+        self.disconnects = 0
+
+    async def connect(self) -> None:
+        return None
+
+    async def disconnect(self) -> None:
+        self.disconnects += 1
+
+    async def ensure_vector_index(self, **_kwargs: object) -> bool:
+        return True
+
+    async def delete_graph(self, _repo_id: str, **_kwargs: object) -> int:
+        return 0
+
+    async def upsert_entities(self, _repo_id: str, entities: list[Any]) -> int:
+        self.entity_files.update(e.file_path for e in entities if e.file_path)
+        return len(entities)
+
+    async def upsert_relationships(self, _repo_id: str, rels: list[Any]) -> int:
+        return len(rels)
+
+    async def detect_communities(self, _repo_id: str, _cfg: object, **_kwargs: object) -> list[Any]:
+        self.communities_detected = True
+        return []
+
+    async def get_graph_stats(self, repo_id: str) -> Any:
+        return None
+
+    async def rebuild_entity_chunk_links(self, _repo_id: str) -> int:
+        return 0
+
+    async def upsert_documents_and_chunks(
+        self,
+        _repo_id: str,
+        documents: list[tuple[str, list[Chunk]]],
+        *,
+        store_embeddings: bool,
+        embedding_property: str = "embedding",
+        corpus_label: str | None = None,
+        stats: dict[str, int] | None = None,
+    ) -> int:
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        await asyncio.sleep(0.01)
+        self.inflight -= 1
+        self.transactions.append([path for path, _ in documents])
+        if stats is not None:
+            stats["transactions"] = stats.get("transactions", 0) + 1
+            stats["documents"] = stats.get("documents", 0) + len(documents)
+        return sum(len(chunks) for _, chunks in documents)
+
+
+class _FingerprintLockedPostgres(_FakePostgres):
+    async def upsert_file_fingerprints(self, _repo_id: str, fingerprints: list[dict[str, Any]]) -> int:
+        raise RuntimeError("fingerprint table locked")
+
+
+@pytest.mark.asyncio
+async def test_lexical_graph_writes_many_documents_per_transaction(tmp_path: Path) -> None:
+    cfg = _config()
+    cfg.graph_indexing.enabled = True
+    cfg.graph_indexing.lexical_write_batch_docs = 4
+    cfg.graph_indexing.lexical_write_concurrency = 2
+    pg = _FakePostgres()
+    neo4j = _FakeNeo4j()
+    for i in range(10):
+        (tmp_path / f"doc{i}.txt").write_text(f"document number {i}\n", encoding="utf-8")
+
+    queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=1000)
+    await index_api._run_index(
+        "lex-corpus", str(tmp_path), False, event_queue=queue, deps=_deps(cfg, pg, neo4j=neo4j)
+    )
+
+    assert sorted(len(tx) for tx in neo4j.transactions) == [2, 4, 4]
+    assert sorted(p for tx in neo4j.transactions for p in tx) == sorted(f"doc{i}.txt" for i in range(10))
+    assert neo4j.max_inflight == 2
+    # Fingerprints are only recorded once both writers have persisted the file.
+    assert set(pg.fingerprints) == {f"doc{i}.txt" for i in range(10)}
+    messages: list[str] = []
+    while not queue.empty():
+        messages.append(str(queue.get_nowait().get("message")))
+    assert any("Lexical graph: 10 documents" in m and "3 transactions" in m for m in messages)
+
+
+@pytest.mark.asyncio
+async def test_python_files_stream_into_the_code_graph(tmp_path: Path) -> None:
+    cfg = _config()
+    cfg.graph_indexing.enabled = True
+    cfg.graph_indexing.ast_parse_workers = 0
+    cfg.graph_indexing.ast_parse_cache_dir = str(tmp_path / "graph_parse_cache")
+    neo4j = _FakeNeo4j()
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    for i in range(3):
+        (repo / f"mod{i}.py").write_text(f"def f{i}():\n    return {i}\n", encoding="utf-8")
+    (repo / "notes.txt").write_text("not code\n", encoding="utf-8")
+
+    await index_api._run_index("graph-corpus", str(repo), True, deps=_deps(cfg, _FakePostgres(), neo4j=neo4j))
+
+    assert neo4j.entity_files == {"mod0.py", "mod1.py", "mod2.py"}
+    assert neo4j.communities_detected is True
+    assert any((tmp_path / "graph_parse_cache" / "graph-corpus").rglob("*.json"))
+
+
+@pytest.mark.asyncio
+async def test_failed_run_releases_its_neo4j_hold(tmp_path: Path) -> None:
+    cfg = _config()
+    cfg.graph_indexing.enabled = True
+    neo4j = _FakeNeo4j()
+    (tmp_path / "a.txt").write_text("alpha\n", encoding="utf-8")
+
+    with pytest.raises(RuntimeError, match="fingerprint table locked"):
+        await index_api._run_index(
+            "failing-corpus", str(tmp_path), False, deps=_deps(cfg, _FingerprintLockedPostgres(), neo4j=neo4j)
+        )
+
+    assert neo4j.disconnects == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_snapshot_build_drops_the_previous_snapshot(tmp_path: Path) -> None:
+    cfg = _config()
+    cfg.graph_indexing.enabled = True
+    cfg.graph_search.snapshot_enabled = 1
+
+    calls: list[str] = []
+
+    async def _fail_build(*_args: object, **_kwargs: object) -> None:
+        calls.append("build")
+        raise RuntimeError("export failed")
+
+    deps = _deps(
+        cfg,
+        _FakePostgres(),
+        neo4j=_FakeNeo4j(),
+        build_graph_snapshot=_fail_build,
+        delete_graph_snapshot=lambda _cfg, _repo_id: calls.append("delete"),
+    )
+    (tmp_path / "a.txt").write_text("alpha\n", encoding="utf-8")
+
+    await index_api._run_index("snapshot-corpus", str(tmp_path), False, deps=deps)
+
+    assert calls[-2:] == ["build", "delete"]
+
+
+@pytest.mark.asyncio
+async def test_prepared_files_are_emitted_in_walk_order_and_timeouts_fail_the_file(tmp_path: Path) -> None:
+    cfg = _config(indexing_workers=4, prepare_workers=0, prepare_timeout_s=0.2)
+    pg = _FakePostgres()
+    for i in range(6):
+        (tmp_path / f"doc{i}.txt").write_text(f"document number {i}\n", encoding="utf-8")
+
+    started: list[str] = []
+
+    def _slow_prepare(abs_path: str, rel_path: str, *args: Any) -> Any:
+        started.append(rel_path)
+        # The first file finishes last; the third one never finishes in time.
+        if len(started) == 1:
+            time.sleep(0.1)
+        elif len(started) == 3:
+            time.sleep(0.5)
+        return file_prep.prepare_file(abs_path, rel_path, *args)
+
+    batches: list[list[str]] = []
+    stats = await index_api._run_index(
+        "order-corpus",
+        str(tmp_path),
+        True,
+        deps=_deps(cfg, pg, embedded_batches=batches, prepare_file=_slow_prepare),
+    )
+
+    timed_out = started[2]
+    assert [p for batch in batches for p in batch] == [p for p in started if p != timed_out]
+    assert set(pg.fingerprints) == set(started) - {timed_out}
+    assert stats.total_chunks == 5
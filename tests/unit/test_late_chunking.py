@@ -0,0 +1,126 @@
+"""Tests for sliding-window late chunking (`server.indexing.late_chunking`).
+
+A context-free fake encoder (token vector = f(token id)) makes windowed encoding exactly equal to
+one pass over the whole document, so stitching and batching can be checked without a real model.
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from server.indexing import late_chunking  # noqa: E402
+from server.models.tribrid_config_model import ChunkingConfig, EmbeddingConfig  # noqa: E402
+
+_HIDDEN = 128
+
+
+class _WordTokenizer:
+    """Whitespace tokenizer with char offsets; ids are stable per word."""
+
+    pad_token_id = 0
+    model_max_length = 10**30
+
+    def __call__(self, text: str, **_kwargs: Any) -> dict[str, Any]:
+        ids: list[int] = []
+        offsets: list[tuple[int, int]] = []
+        pos = 0
+        for word in text.split():
+            start = text.index(word, pos)
+            pos = start + len(word)
+            ids.append(1 + sum(map(ord, word)) % 997)
+            offsets.append((start, pos))
+        return {"input_ids": ids, "offset_mapping": offsets}
+
+
+class _ContextFreeEncoder:
+    def __init__(self) -> None:
+        self.batch_shapes: list[tuple[int, int]] = []
+
+    def __call__(self, *, input_ids: Any, attention_mask: Any) -> Any:
+        self.batch_shapes.append(tuple(input_ids.shape))
+        freqs = torch.arange(1, _HIDDEN + 1, dtype=torch.float32)
+        h = torch.sin(input_ids.unsqueeze(-1).float() * freqs) * attention_mask.unsqueeze(-1)
+        return SimpleNamespace(last_hidden_state=h)
+
+
+@pytest.fixture
+def encoder() -> _ContextFreeEncoder:
+    return _ContextFreeEncoder()
+
+
+def _configs(*, window: int, batch_windows: int = 8) -> tuple[ChunkingConfig, EmbeddingConfig]:
+    chunking = ChunkingConfig(chunking_strategy="fixed_tokens", target_tokens=64, overlap_tokens=16)
+    embedding = EmbeddingConfig(
+        embedding_dim=_HIDDEN,
+        embedding_model_local="fake-model",
+        late_chunking_max_doc_tokens=window,
+        late_chunking_window_overlap_tokens=64,
+        late_chunking_batch_windows=batch_windows,
+    )
+    return chunking, embedding
+
+
+def _doc(n_words: int, seed: int = 0) -> str:
+    return "\n".join(" ".join(f"w{seed}_{i * 7 + j}" for j in range(7)) for i in range(n_words // 7))
+
+
+@pytest.mark.parametrize(
+    ("seq_len", "window", "overlap"), [(1, 256, 64), (256, 256, 64), (1000, 256, 64), (1000, 300, 299)]
+)
+def test_plan_windows_tiles_the_document(seq_len: int, window: int, overlap: int) -> None:
+    windows = late_chunking.plan_windows(seq_len, window, overlap)
+
+    assert windows[0][2] == 0
+    assert windows[-1][1] == seq_len and windows[-1][3] == seq_len
+    for (start, end, keep_start, keep_end), nxt in zip(windows, [*windows[1:], None], strict=True):
+        assert end - start <= window
+        assert start <= keep_start < keep_end <= end
+        if nxt is not None:
+            assert nxt[2] == keep_end
+
+
+def test_windowed_document_matches_single_pass(encoder: _ContextFreeEncoder) -> None:
+    content = _doc(2100)
+    chunking, single = _configs(window=65536)
+    whole = late_chunking.late_chunk_document(
+        "doc.md", content, chunking=chunking, embedding=single, tokenizer=_WordTokenizer(), model=encoder
+    )
+    _chunking, windowed = _configs(window=256)
+    stitched = late_chunking.late_chunk_document(
+        "doc.md", content, chunking=chunking, embedding=windowed, tokenizer=_WordTokenizer(), model=encoder
+    )
+
+    # The full document is covered, not cut at the window.
+    assert stitched[-1].content.endswith(content.split()[-1])
+    assert [c.content for c in stitched] == [c.content for c in whole]
+    for a, b in zip(stitched, whole, strict=True):
+        assert a.embedding == pytest.approx(b.embedding, abs=1e-5)
+
+
+def test_windows_of_several_documents_share_padded_batches(encoder: _ContextFreeEncoder) -> None:
+    docs = [("a.md", _doc(700, 1)), ("b.md", _doc(70, 2)), ("c.md", _doc(1400, 3))]
+    chunking, embedding = _configs(window=256, batch_windows=4)
+
+    per_doc = late_chunking.late_chunk_documents(
+        docs, chunking=chunking, embedding=embedding, tokenizer=_WordTokenizer(), model=encoder
+    )
+
+    windows = sum(len(late_chunking.plan_windows(len(text.split()), 256, 64)) for _p, text in docs)
+    assert sum(rows for rows, _width in encoder.batch_shapes) == windows
+    assert len(encoder.batch_shapes) == -(-windows // 4)
+    assert [{c.file_path for c in chunks} for chunks in per_doc] == [{"a.md"}, {"b.md"}, {"c.md"}]
+    singles = [
+        late_chunking.late_chunk_document(
+            p, t, chunking=chunking, embedding=embedding, tokenizer=_WordTokenizer(), model=encoder
+        )
+        for p, t in docs
+    ]
+    for batched, single in zip(per_doc, singles, strict=True):
+        for a, b in zip(batched, single, strict=True):
+            assert a.embedding == pytest.approx(b.embedding, abs=1e-5)
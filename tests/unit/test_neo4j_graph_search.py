@@ -6,7 +6,12 @@ import json
 
 import pytest
 
-from server.db.neo4j import Neo4jClient
+from server.db.neo4j import (
+    GraphExpansionBudget,
+    Neo4jClient,
+    corpus_chunk_label,
+    corpus_vector_index_name,
+)
 
 
 class _FakeResult:
@@ -16,6 +21,9 @@ class _FakeResult:
     async def data(self) -> list[dict[str, object]]:
         return self._records
 
+    async def single(self) -> dict[str, object] | None:
+        return self._records[0] if self._records else None
+
 
 class _FakeSession:
     def __init__(self, records: list[dict[str, object]]):
@@ -57,6 +65,7 @@ async def test_graph_search_scoring_and_metadata() -> None:
             "name": "Foo",
             "hops": 0,
             "direct_match": True,
+            "score": 1.0,
         },
         {
             "entity_id": "e2",
@@ -65,6 +74,7 @@ async def test_graph_search_scoring_and_metadata() -> None:
             "name": "Bar",
             "hops": 2,
             "direct_match": False,
+            "score": 0.25,
         },
     ]
 
@@ -99,15 +109,71 @@ async def test_graph_search_scoring_and_metadata() -> None:
     assert "*0..2" in session.last_query
     assert session.last_params.get("max_hops") is None
     assert "tokens" in session.last_params
+    # Seeds come from the entity full-text index, with relevance carried into the hop decay.
+    assert "db.index.fulltext.queryNodes" in session.last_query
+    assert "seed_score / (1.0 + toFloat(length(p)))" in session.last_query
+    assert session.last_params.get("index_name") == "tribrid_entity_text"
+    assert session.last_params.get("search") == '+repo_id:"test\\-corpus" +(name:foo^4 OR foo OR foo*)'
+    assert top.score == pytest.approx(1.0)
+    assert tail.score == pytest.approx(0.25)
+
+
+class _NoFulltextSession(_FakeSession):
+    def __init__(self, records: list[dict[str, object]]):
+        super().__init__(records)
+        self.queries: list[str] = []
+
+    async def run(self, query: str, **params):
+        self.queries.append(query)
+        if "db.index.fulltext.queryNodes" in query:
+            raise RuntimeError("There is no such fulltext schema index: tribrid_entity_text")
+        return await super().run(query, **params)
+
+
+@pytest.mark.asyncio
+async def test_entity_chunk_search_falls_back_to_name_scan_without_fulltext_index() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver([{"chunk_id": "c1", "score": 1.0}])
+    driver.session_obj = _NoFulltextSession(driver._records)
+    client._driver = driver  # type: ignore[assignment]
+
+    out = await client.entity_chunk_search(repo_id="test-corpus", query="Foo", max_hops=1, top_k=5)
+    assert out == [("c1", 1.0)]
+
+    session = driver.session_obj
+    assert len(session.queries) == 2
+    assert session.last_query is not None
+    assert "toLower(seed.name) CONTAINS tok" in session.last_query
+    assert "*0..1" in session.last_query
+
+
+def test_entity_fulltext_search_splits_identifiers_and_escapes() -> None:
+    from server.db.neo4j import _entity_fulltext_search, _entity_qualified_name, _identifier_terms
+    from server.models.graph import Entity
+
+    assert _identifier_terms("getGraphStats") == ["get", "graph", "stats"]
+    assert _identifier_terms("Neo4jClient") == ["neo4j", "client"]
+
+    search = _entity_fulltext_search("corpus", ["get_graph_stats", "a+b"])
+    assert search.startswith('+repo_id:"corpus" +(')
+    assert "name:get_graph_stats^4" in search
+    assert " OR graph OR " in search
+    assert "a\\+b" in search
+
+    entity = Entity(entity_id="e", name="Neo4jClient", entity_type="class", file_path="server/db/neo4j.py")
+    assert _entity_qualified_name(entity) == "server.db.neo4j.Neo4jClient"
 
 
 @pytest.mark.asyncio
 async def test_chunk_vector_search_builds_query_and_returns_chunk_ids() -> None:
     client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
 
-    records = [
-        {"chunk_id": "c1", "score": 0.91},
-        {"chunk_id": "c2", "score": 0.88},
+    records: list[dict[str, object]] = [
+        {
+            "candidates": 20,
+            "matched": 5,
+            "results": [{"chunk_id": "c2", "score": 0.88}, {"chunk_id": "c1", "score": 0.91}],
+        }
     ]
 
     # Inject a fake driver so we never connect to Neo4j.
@@ -134,6 +200,101 @@ async def test_chunk_vector_search_builds_query_and_returns_chunk_ids() -> None:
     assert session.last_params.get("seed_k") == 20
 
 
+class _RoundsSession(_FakeSession):
+    """Answers one vector-index round per `run`; a round given as an exception is raised."""
+
+    def __init__(self, rounds: list[dict[str, object] | Exception]):
+        super().__init__([])
+        self._rounds = list(rounds)
+        self.seed_ks: list[tuple[object, object]] = []
+
+    async def run(self, query: str, **params):
+        self.seed_ks.append((params.get("index_name"), params.get("seed_k")))
+        item = self._rounds.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return _FakeResult([item])
+
+
+def _round(candidates: int, matched: int, chunk_ids: list[str]) -> dict[str, object]:
+    return {
+        "candidates": candidates,
+        "matched": matched,
+        "results": [{"chunk_id": cid, "score": 1.0 - i / 10} for i, cid in enumerate(chunk_ids)],
+    }
+
+
+@pytest.mark.asyncio
+async def test_chunk_vector_search_adaptive_overfetch_grows_until_top_k_in_corpus() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver([])
+    driver.session_obj = _RoundsSession([_round(20, 1, ["c1"]), _round(80, 2, ["c1", "c2"]), _round(320, 4, ["x"])])
+    client._driver = driver  # type: ignore[assignment]
+
+    stats: dict[str, object] = {}
+    out = await client.chunk_vector_search(
+        "small-corpus",
+        [0.1],
+        index_name="tribrid_chunk_embeddings",
+        top_k=2,
+        overfetch_multiplier=10,
+        adaptive=True,
+        overfetch_growth=4,
+        stats=stats,
+    )
+    assert out == [("c1", 1.0), ("c2", 0.9)]
+    assert driver.session_obj.seed_ks == [("tribrid_chunk_embeddings", 20), ("tribrid_chunk_embeddings", 80)]
+    assert stats == {"rounds": 2, "seed_k": 80, "candidates": 80, "matched": 2, "scoped": False}
+
+
+@pytest.mark.asyncio
+async def test_chunk_vector_search_adaptive_stops_when_index_exhausted_or_capped() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver([])
+    # Index holds only 30 chunks: the second round returns fewer candidates than requested.
+    driver.session_obj = _RoundsSession([_round(20, 0, []), _round(30, 1, ["c1"])])
+    client._driver = driver  # type: ignore[assignment]
+    out = await client.chunk_vector_search(
+        "r", [0.1], index_name="idx", top_k=2, overfetch_multiplier=10, adaptive=True
+    )
+    assert out == [("c1", 1.0)]
+    assert [k for _, k in driver.session_obj.seed_ks] == [20, 80]
+
+    driver.session_obj = _RoundsSession([_round(20, 0, []), _round(50, 0, [])])
+    stats: dict[str, object] = {}
+    await client.chunk_vector_search(
+        "r", [0.1], index_name="idx", top_k=2, overfetch_multiplier=10, adaptive=True, max_candidates=50, stats=stats
+    )
+    assert [k for _, k in driver.session_obj.seed_ks] == [20, 50]
+    assert stats["rounds"] == 2
+
+
+@pytest.mark.asyncio
+async def test_chunk_vector_search_prefers_per_corpus_index_and_falls_back() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver([])
+    scoped_index = corpus_vector_index_name("idx", "r")
+    driver.session_obj = _RoundsSession([_round(2, 2, ["c1", "c2"])])
+    client._driver = driver  # type: ignore[assignment]
+
+    stats: dict[str, object] = {}
+    out = await client.chunk_vector_search(
+        "r", [0.1], index_name="idx", top_k=2, overfetch_multiplier=10, corpus_index_name=scoped_index, stats=stats
+    )
+    assert [cid for cid, _ in out] == ["c1", "c2"]
+    assert driver.session_obj.seed_ks == [(scoped_index, 2)]
+    assert stats["scoped"] is True
+
+    driver.session_obj = _RoundsSession([RuntimeError("no such index"), _round(20, 2, ["c1", "c2"])])
+    stats = {}
+    await client.chunk_vector_search(
+        "r", [0.1], index_name="idx", top_k=2, overfetch_multiplier=10, corpus_index_name=scoped_index, stats=stats
+    )
+    assert driver.session_obj.seed_ks == [(scoped_index, 2), ("idx", 20)]
+    assert stats["scoped"] is False
+    assert corpus_chunk_label("r").startswith("CorpusChunk_")
+
+
 @pytest.mark.asyncio
 async def test_entity_chunk_search_uses_in_chunk_links() -> None:
     client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
@@ -213,3 +374,78 @@ async def test_get_entity_neighbors_inlines_hops_and_parses_response() -> None:
     assert session.last_params.get("entity_id") == "e1"
     assert "max_hops" not in session.last_params
 
+
+
+class _ScriptedSession(_FakeSession):
+    """Returns one scripted record list per query, in order."""
+
+    def __init__(self, scripted: list[list[dict[str, object]]]):
+        super().__init__([])
+        self._scripted = list(scripted)
+        self.calls: list[tuple[str, dict[str, object]]] = []
+
+    async def run(self, query: str, **params):
+        self.calls.append((query, params))
+        return _FakeResult(self._scripted.pop(0) if self._scripted else [])
+
+
+@pytest.mark.asyncio
+async def test_frontier_expansion_caps_fanout_downweights_hubs_and_stops_at_budget() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver([])
+    driver.session_obj = _ScriptedSession(
+        [
+            # seed lookup (full-text)
+            [{"entity_id": "a", "score": 1.0}],
+            # hop 1: a has 60 candidate neighbors, fan-out cap keeps 2 (lowest degree first)
+            [
+                {
+                    "source_id": "a",
+                    "neighbors": [{"entity_id": "b", "degree": 2}, {"entity_id": "typing", "degree": 800}],
+                    "available": 60,
+                },
+            ],
+            # chunk mapping
+            [{"chunk_id": "cb", "score": 0.5}, {"chunk_id": "ct", "score": 0.25}],
+        ]
+    )
+    client._driver = driver  # type: ignore[assignment]
+    budget = GraphExpansionBudget(fanout_cap=2, max_visited=3, hub_degree=200)
+    stats: dict[str, object] = {}
+
+    out = await client.entity_chunk_search(
+        repo_id="test-corpus", query="Foo", max_hops=3, top_k=5, budget=budget, stats=stats
+    )
+    assert out == [("cb", 0.5), ("ct", 0.25)]
+
+    calls = driver.session_obj.calls
+    # seed + one hop + chunk mapping: the visited budget (3) is spent after hop 1, so hop 2 never runs.
+    assert len(calls) == 3
+    hop_query, hop_params = calls[1]
+    assert "*0.." not in hop_query
+    assert hop_params["frontier"] == ["a"]
+    assert hop_params["visited"] == ["a"]
+    assert hop_params["fanout"] == 2
+
+    scores = {e["entity_id"]: e["score"] for e in calls[2][1]["entities"]}  # type: ignore[index, union-attr]
+    assert scores["a"] == pytest.approx(1.0)
+    assert scores["b"] == pytest.approx(0.5)
+    # Hub entered at hop 1: 1.0 / 2 * sqrt(200 / 800)
+    assert scores["typing"] == pytest.approx(0.25)
+
+    assert stats["strategy"] == "frontier"
+    assert stats["budget_exhausted"] is True
+    assert stats["hops_completed"] == 1
+    assert stats["visited"] == 3
+    assert stats["fanout_capped"] == 1
+    assert stats["hubs_downweighted"] == 1
+
+
+def test_expansion_budget_from_config_respects_strategy() -> None:
+    from server.models.tribrid_config_model import GraphSearchConfig
+
+    cfg = GraphSearchConfig(expansion_fanout_cap=10, expansion_max_visited=500, expansion_hub_degree=0)
+    budget = GraphExpansionBudget.from_config(cfg)
+    assert budget == GraphExpansionBudget(fanout_cap=10, max_visited=500, hub_degree=0)
+    assert budget.hub_weight(10_000) == 1.0
+    assert GraphExpansionBudget.from_config(GraphSearchConfig(expansion_strategy="paths")) is None
@@ -5,6 +5,7 @@ from __future__ import annotations
 import pytest
 
 from server.db.neo4j import Neo4jClient
+from server.models.tribrid_config_model import GraphStorageConfig
 
 
 class _FakeResult:
@@ -23,6 +24,13 @@ class _FakeResult:
     async def data(self) -> list[dict[str, object]]:
         return self._data
 
+    def __aiter__(self):
+        async def _gen():
+            for row in self._data:
+                yield row
+
+        return _gen()
+
 
 class _QueueSession:
     def __init__(self, results: list[_FakeResult]):
@@ -70,6 +78,18 @@ async def test_get_graph_stats_uses_optional_match_and_parses_counts() -> None:
             ),
             _FakeResult(data=[]),
             _FakeResult(data=[]),
+            _FakeResult(
+                data=[
+                    {
+                        "name": "tribrid_entity_key",
+                        "type": "RANGE",
+                        "labelsOrTypes": ["Entity"],
+                        "properties": ["repo_id", "entity_id"],
+                        "state": "ONLINE",
+                        "owningConstraint": "tribrid_entity_key",
+                    }
+                ]
+            ),
         ]
     )
 
@@ -79,6 +99,10 @@ async def test_get_graph_stats_uses_optional_match_and_parses_counts() -> None:
     assert out.total_communities == 0
     assert out.total_documents == 3
     assert out.total_chunks == 7
+    # Only one of the bootstrap indexes exists → not ready, but its state is reported.
+    assert out.schema_ready is False
+    assert [ix.name for ix in out.schema_indexes] == ["tribrid_entity_key"]
+    assert out.schema_indexes[0].unique is True
 
     session = client._driver.session_obj  # type: ignore[attr-defined]
     assert session.queries
@@ -92,8 +116,11 @@ async def test_get_graph_stats_uses_optional_match_and_parses_counts() -> None:
 async def test_detect_communities_normalizes_windows_paths_in_query() -> None:
     client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
 
+    # No relationships exported → directory fallback.
     client._driver = _FakeDriver(  # type: ignore[assignment]
         [
+            _FakeResult(data=[{"entity_id": "e1", "name": "e1", "file_path": "src/a.py"}]),
+            _FakeResult(data=[]),
             _FakeResult(data=[{"entity_id": "e1", "grp": "src"}]),
             _FakeResult(),
             _FakeResult(),
@@ -101,11 +128,214 @@ async def test_detect_communities_normalizes_windows_paths_in_query() -> None:
         ]
     )
 
-    out = await client.detect_communities(repo_id="test-corpus")
+    stats: dict[str, object] = {}
+    out = await client.detect_communities(
+        repo_id="test-corpus", config=GraphStorageConfig(community_use_gds=0), stats=stats
+    )
     assert out
+    assert stats["engine"] == "directory"
 
     session = client._driver.session_obj  # type: ignore[attr-defined]
     assert session.queries
-    q0 = session.queries[0]
-    assert "replace(coalesce(e.file_path, c.file_path), '\\\\', '/')" in q0
+    q2 = session.queries[2]
+    assert "replace(coalesce(e.file_path, c.file_path), '\\\\', '/')" in q2
+
+
+def _clique_rows(prefix: str, size: int) -> list[dict[str, object]]:
+    return [
+        {"s": f"{prefix}{i}", "t": f"{prefix}{j}", "w": 1.0} for i in range(size) for j in range(i + 1, size)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_detect_communities_runs_louvain_in_process_and_stores_levels() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    entities = [
+        {"entity_id": f"{p}{i}", "name": f"{p}{i}", "file_path": f"{p}/mod.py"} for p in ("a", "b") for i in range(5)
+    ]
+    edges = _clique_rows("a", 5) + _clique_rows("b", 5) + [{"s": "a4", "t": "b0", "w": 1.0}]
+    client._driver = _FakeDriver(  # type: ignore[assignment]
+        [
+            _FakeResult(data=[]),  # gds.version() → no GDS
+            _FakeResult(data=entities),
+            _FakeResult(data=edges),
+        ]
+    )
+
+    stats: dict[str, object] = {}
+    out = await client.detect_communities(repo_id="c1", config=GraphStorageConfig(), stats=stats)
+
+    assert stats["engine"] == "in_process"
+    assert stats["edges"] == len(edges)
+    assert {frozenset(c.member_ids) for c in out} == {
+        frozenset(f"a{i}" for i in range(5)),
+        frozenset(f"b{i}" for i in range(5)),
+    }
+    assert all(c.level == 0 and c.parent_id is None and c.community_id.startswith("c1:L0:") for c in out)
+    assert {c.name for c in out} == {"a4 (a)", "b0 (b)"}
+
+    session = client._driver.session_obj  # type: ignore[attr-defined]
+    delete_q, upsert_q, member_q = session.queries[3:6]
+    assert "DETACH DELETE c" in delete_q and session.params[3]["roots"] is None
+    assert "comm.root_id = c.root_id" in upsert_q
+    assert session.params[4]["method"] == "louvain"
+    assert len(session.params[5]["rows"]) == 10  # type: ignore[arg-type]
+    assert "IN_COMMUNITY" in member_q
+
+
+@pytest.mark.asyncio
+async def test_detect_communities_incremental_replaces_only_touched_roots() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    entities = [{"entity_id": f"a{i}", "name": f"a{i}", "file_path": "a/mod.py"} for i in range(4)]
+    client._driver = _FakeDriver(  # type: ignore[assignment]
+        [
+            _FakeResult(single={"total": 5, "foreign": 0}),
+            _FakeResult(data=[{"entity_id": "a0"}, {"entity_id": "a1"}]),
+            _FakeResult(data=[{"root_id": "c1:L0:old"}]),
+            _FakeResult(data=[{"entity_id": f"a{i}"} for i in range(4)]),
+            _FakeResult(single={"n": 40}),
+            _FakeResult(data=entities),
+            # An edge leaving the region is ignored.
+            _FakeResult(data=_clique_rows("a", 4) + [{"s": "a0", "t": "z9", "w": 1.0}]),
+        ]
+    )
+
+    stats: dict[str, object] = {}
+    out = await client.detect_communities(
+        repo_id="c1", config=GraphStorageConfig(), changed_files=["a/mod.py"], stats=stats
+    )
+
+    assert stats["mode"] == "incremental"
+    assert stats["region_entities"] == 4
+    assert stats["edges"] == 6
+    assert [sorted(c.member_ids) for c in out] == [["a0", "a1", "a2", "a3"]]
+
+    session = client._driver.session_obj  # type: ignore[attr-defined]
+    assert session.params[1]["paths"] == ["a/mod.py"]
+    assert session.params[5]["ids"] == ["a0", "a1", "a2", "a3"]
+    assert session.params[7]["roots"] == ["c1:L0:old"]
+
+
+@pytest.mark.asyncio
+async def test_detect_communities_incremental_falls_back_to_full_for_large_regions() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    client._driver = _FakeDriver(  # type: ignore[assignment]
+        [
+            _FakeResult(single={"total": 1, "foreign": 0}),
+            _FakeResult(data=[{"entity_id": "a0"}, {"entity_id": "a1"}]),
+            _FakeResult(data=[]),
+            _FakeResult(data=[]),
+            _FakeResult(single={"n": 3}),
+            _FakeResult(data=[]),  # gds.version() → no GDS
+            _FakeResult(data=[]),
+        ]
+    )
 
+    stats: dict[str, object] = {}
+    await client.detect_communities(
+        repo_id="c1", config=GraphStorageConfig(), changed_files=["a/mod.py"], stats=stats
+    )
+    assert stats["mode"] == "full"
+
+
+@pytest.mark.asyncio
+async def test_detect_communities_incremental_edgeless_region_falls_back_to_full() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    entities = [{"entity_id": f"a{i}", "name": f"a{i}", "file_path": "a/mod.py"} for i in range(4)]
+    client._driver = _FakeDriver(  # type: ignore[assignment]
+        [
+            _FakeResult(single={"total": 5, "foreign": 0}),
+            _FakeResult(data=[{"entity_id": "a0"}]),
+            _FakeResult(data=[{"root_id": "c1:L0:old"}]),
+            _FakeResult(data=[{"entity_id": "a0"}]),
+            _FakeResult(single={"n": 40}),
+            _FakeResult(data=entities[:1]),
+            _FakeResult(data=[]),  # the region lost all its relationships
+            _FakeResult(data=[]),  # gds.version() → no GDS
+            _FakeResult(data=entities),
+            _FakeResult(data=_clique_rows("a", 4)),
+        ]
+    )
+
+    stats: dict[str, object] = {}
+    out = await client.detect_communities(
+        repo_id="c1", config=GraphStorageConfig(), changed_files=["a/mod.py"], stats=stats
+    )
+
+    assert stats["mode"] == "full"
+    assert [sorted(c.member_ids) for c in out] == [["a0", "a1", "a2", "a3"]]
+    session = client._driver.session_obj  # type: ignore[attr-defined]
+    assert "DETACH DELETE c" in session.queries[10] and session.params[10]["roots"] is None
+
+
+@pytest.mark.asyncio
+async def test_detect_communities_disabled_clears_stored_communities() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    client._driver = _FakeDriver([])  # type: ignore[assignment]
+
+    stats: dict[str, object] = {}
+    out = await client.detect_communities(
+        repo_id="c1", config=GraphStorageConfig(include_communities=False), stats=stats
+    )
+
+    assert out == []
+    assert stats["engine"] == "disabled"
+    session = client._driver.session_obj  # type: ignore[attr-defined]
+    assert len(session.queries) == 1
+    assert "DETACH DELETE c" in session.queries[0] and session.params[0]["roots"] is None
+
+
+@pytest.mark.asyncio
+async def test_delete_graph_deletes_label_by_label_in_transaction_batches() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    # Community: 3 nodes; Entity: one full round (20) + 5; Chunk/Document/other: nothing left.
+    client._driver = _FakeDriver(  # type: ignore[assignment]
+        [
+            _FakeResult(single={"n": 3}),
+            _FakeResult(single={"n": 20}),
+            _FakeResult(single={"n": 5}),
+            _FakeResult(single={"n": 0}),
+            _FakeResult(single={"n": 0}),
+            _FakeResult(single={"n": 0}),
+        ]
+    )
+    progress: list[tuple[str, int]] = []
+
+    deleted = await client.delete_graph(
+        "test-corpus", batch_size=2, on_progress=lambda label, n: progress.append((label, n))
+    )
+    assert deleted == 28
+    assert progress == [("Community", 3), ("Entity", 23), ("Entity", 28)]
+
+    session = client._driver.session_obj  # type: ignore[attr-defined]
+    assert len(session.queries) == 6
+    assert all("IN TRANSACTIONS OF $batch ROWS" in q for q in session.queries)
+    assert "MATCH (n:`Entity` {repo_id: $repo_id})" in session.queries[1]
+    assert "MATCH (n {repo_id: $repo_id})" in session.queries[-1]
+    assert session.params[0] == {"repo_id": "test-corpus", "round_size": 20, "batch": 2}
+
+
+@pytest.mark.asyncio
+async def test_delete_file_nodes_deletes_per_label_and_sweeps_only_touched_placeholders() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    client._driver = _FakeDriver(  # type: ignore[assignment]
+        [
+            _FakeResult(single={"entity_ids": ["import:os"]}),
+            _FakeResult(single={"n": 4}),
+            _FakeResult(single={"n": 1}),
+            _FakeResult(single={"n": 2}),
+            _FakeResult(),
+        ]
+    )
+
+    deleted = await client.delete_file_nodes("test-corpus", ["a.py"], batch_size=3)
+    assert deleted == 7
+
+    session = client._driver.session_obj  # type: ignore[attr-defined]
+    assert len(session.queries) == 5
+    for query, label in zip(session.queries[1:4], ("Chunk", "Document", "Entity"), strict=True):
+        assert f"MATCH (n:`{label}` {{repo_id: $repo_id}})" in query
+        assert "IN TRANSACTIONS OF $batch ROWS" in query
+    assert session.params[1] == {"repo_id": "test-corpus", "file_paths": ["a.py"], "batch": 3}
+    assert "e.entity_id IN $entity_ids" in session.queries[4]
+    assert session.params[4]["entity_ids"] == ["import:os"]
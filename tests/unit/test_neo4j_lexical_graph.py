@@ -0,0 +1,129 @@
+"""Unit tests for the bulk lexical-graph (Document/Chunk) writer without a live Neo4j instance."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from server.db.neo4j import Neo4jClient
+from server.models.index import Chunk
+
+
+class _FakeResult:
+    def __init__(self, record: dict[str, object] | None) -> None:
+        self._record = record
+
+    async def single(self) -> dict[str, object] | None:
+        return self._record
+
+
+class _FakeTx:
+    def __init__(self, session: _FakeSession) -> None:
+        self._session = session
+
+    async def run(self, query: str, **params: Any) -> _FakeResult:
+        self._session.queries.append(query)
+        self._session.params.append(params)
+        docs = params["docs"]
+        return _FakeResult(
+            {
+                "documents": len(docs),
+                "chunks": sum(len(d["chunks"]) for d in docs),
+                "has_chunk_removed": 1,
+                "next_chunk_removed": 0,
+                "next_chunk_linked": sum(len(d["next"]) for d in docs),
+            }
+        )
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+        self.params: list[dict[str, Any]] = []
+        self.access_modes: list[str | None] = []
+        self.write_calls = 0
+
+    async def __aenter__(self) -> _FakeSession:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    async def execute_write(self, fn):
+        self.write_calls += 1
+        return await fn(_FakeTx(self))
+
+
+class _FakeDriver:
+    def __init__(self) -> None:
+        self.session_obj = _FakeSession()
+
+    def session(self, database: str | None = None, default_access_mode: str | None = None) -> _FakeSession:
+        _ = database
+        self.session_obj.access_modes.append(default_access_mode)
+        return self.session_obj
+
+
+def _chunks(path: str, n: int) -> list[Chunk]:
+    return [
+        Chunk(
+            chunk_id=f"{path}:{i}",
+            content="",
+            file_path=path,
+            start_line=i + 1,
+            end_line=i + 1,
+            language="python",
+            token_count=2,
+            embedding=[0.1, 0.2],
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_writer_sends_many_documents_in_one_write_transaction() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver()
+    client._driver = driver  # type: ignore[assignment]
+
+    stats: dict[str, int] = {}
+    written = await client.upsert_documents_and_chunks(
+        "repo",
+        [("a.py", _chunks("a.py", 3)), ("empty.py", []), ("b.py", _chunks("b.py", 1))],
+        store_embeddings=True,
+        stats=stats,
+    )
+
+    session = driver.session_obj
+    assert written == 4
+    assert session.write_calls == 1
+    assert session.access_modes == ["WRITE"]
+    docs = session.params[0]["docs"]
+    assert [d["file_path"] for d in docs] == ["a.py", "b.py"]
+    assert docs[0]["next"] == [["a.py:0", "a.py:1"], ["a.py:1", "a.py:2"]]
+    assert docs[1]["next"] == []
+    # Edges are diffed against the document's chunk list, never dropped wholesale.
+    query = session.queries[0]
+    assert "WHERE NOT c.chunk_id IN doc.chunk_ids" in query
+    assert "WHERE NOT [a.chunk_id, b.chunk_id] IN doc.next" in query
+    assert stats == {
+        "transactions": 1,
+        "documents": 2,
+        "chunks": 4,
+        "has_chunk_removed": 1,
+        "next_chunk_removed": 0,
+        "next_chunk_linked": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_single_file_upsert_delegates_and_skips_empty_input() -> None:
+    client = Neo4jClient(uri="bolt://fake", user="neo4j", password="test")
+    driver = _FakeDriver()
+    client._driver = driver  # type: ignore[assignment]
+
+    assert await client.upsert_document_and_chunks("repo", "a.py", [], store_embeddings=False) == 0
+    assert driver.session_obj.write_calls == 0
+    assert await client.upsert_document_and_chunks("repo", "a.py", _chunks("a.py", 2), store_embeddings=False) == 2
+    assert driver.session_obj.params[0]["store_embeddings"] is False
@@ -0,0 +1,243 @@
+"""Unit tests for Neo4j driver reuse.
+
+These tests verify that Neo4jClient shares one driver per (uri, user, database),
+health-checks idle drivers, evicts drivers nobody holds and bootstraps the schema
+once per database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+
+class _FakeSession:
+    def __init__(self, driver: _FakeDriver, database: str | None) -> None:
+        self._driver = driver
+        self._database = database
+
+    async def __aenter__(self) -> _FakeSession:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    async def run(self, query: str, **_params: Any) -> None:
+        self._driver.queries.append((str(self._database), query))
+        if self._driver.run_error is not None:
+            raise self._driver.run_error
+        fail_on = self._driver.fail_constraint_on
+        if fail_on is not None and fail_on in query and "CREATE CONSTRAINT" in query:
+            raise RuntimeError("duplicate nodes")
+        return None
+
+
+class _FakeDriver:
+    def __init__(
+        self,
+        queries: list[tuple[str, str]] | None = None,
+        *,
+        fail_constraint_on: str | None = None,
+        run_error: BaseException | None = None,
+    ) -> None:
+        self.queries = queries if queries is not None else []
+        self.fail_constraint_on = fail_constraint_on
+        self.run_error = run_error
+        self.connectivity_error: Exception | None = None
+        self.close_count = 0
+        self.verify_count = 0
+
+    async def close(self) -> None:
+        self.close_count += 1
+
+    async def verify_connectivity(self) -> None:
+        self.verify_count += 1
+        if self.connectivity_error is not None:
+            raise self.connectivity_error
+
+    def session(self, database: str | None = None) -> _FakeSession:
+        return _FakeSession(self, database)
+
+
+class _DriverFactory:
+    """Hands out queued fake drivers (or fresh ones) and records every driver it built."""
+
+    def __init__(self, *queued: _FakeDriver, **driver_kwargs: Any) -> None:
+        self._queued = list(queued)
+        self._driver_kwargs = driver_kwargs
+        self.built: list[_FakeDriver] = []
+
+    def __call__(self, _uri: str, *, auth: tuple[str, str]) -> _FakeDriver:
+        _ = auth
+        driver = self._queued.pop(0) if self._queued else _FakeDriver(**self._driver_kwargs)
+        self.built.append(driver)
+        return driver
+
+
+@pytest.fixture
+def neo4jmod():
+    import server.db.neo4j as neo4jmod
+
+    # Reset module-level caches for test isolation.
+    neo4jmod._DRIVERS_BY_KEY.clear()
+    neo4jmod._DRIVER_LOCKS_BY_KEY.clear()
+    neo4jmod._SCHEMA_READY_BY_KEY.clear()
+    neo4jmod._SCHEMA_LOCKS_BY_KEY.clear()
+    yield neo4jmod
+    neo4jmod._DRIVERS_BY_KEY.clear()
+    neo4jmod._DRIVER_LOCKS_BY_KEY.clear()
+    neo4jmod._SCHEMA_READY_BY_KEY.clear()
+    neo4jmod._SCHEMA_LOCKS_BY_KEY.clear()
+
+
+def _client(neo4jmod, factory: _DriverFactory, database: str | None = None):
+    return neo4jmod.Neo4jClient(
+        "bolt://example", "neo4j", "pw", database=database, driver_factory=factory
+    )
+
+
+@pytest.mark.asyncio
+async def test_neo4j_driver_is_shared_per_uri_user_database(neo4jmod) -> None:
+    factory = _DriverFactory()
+
+    c1 = _client(neo4jmod, factory, "db1")
+    c2 = _client(neo4jmod, factory, "db1")
+    c3 = _client(neo4jmod, factory, "db2")
+
+    await c1.connect()
+    await c2.connect()
+    await c3.connect()
+
+    assert len(factory.built) == 2
+    assert c1._driver is c2._driver
+    assert c3._driver is not c1._driver
+    entry_refs = sorted(entry.refs for entry in neo4jmod._DRIVERS_BY_KEY.values())
+    assert entry_refs == [1, 2]
+
+    # disconnect() should not close shared drivers.
+    for c in (c1, c2, c3):
+        await c.disconnect()
+    assert all(d.close_count == 0 for d in factory.built)
+    assert all(entry.refs == 0 for entry in neo4jmod._DRIVERS_BY_KEY.values())
+
+    # Explicit shared driver shutdown closes them.
+    await neo4jmod.Neo4jClient.close_shared_drivers()
+    assert all(d.close_count == 1 for d in factory.built)
+    assert not neo4jmod._DRIVERS_BY_KEY
+
+
+@pytest.mark.asyncio
+async def test_neo4j_unhealthy_driver_is_replaced(neo4jmod) -> None:
+    first = _FakeDriver()
+    second = _FakeDriver()
+    factory = _DriverFactory(first, second)
+
+    c1 = _client(neo4jmod, factory)
+    await c1.connect()
+    await c1.disconnect()
+
+    # Force a health check on next connect and make it fail.
+    entry = next(iter(neo4jmod._DRIVERS_BY_KEY.values()))
+    entry.last_checked -= neo4jmod._DRIVER_HEALTHCHECK_INTERVAL_S + 1
+    first.connectivity_error = RuntimeError("connection reset")
+
+    c2 = _client(neo4jmod, factory)
+    await c2.connect()
+    assert c2._driver is second
+    assert first.verify_count == 1
+    assert first.close_count == 1
+    await c2.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_neo4j_retired_driver_is_closed_by_last_holder(neo4jmod) -> None:
+    first = _FakeDriver()
+    factory = _DriverFactory(first)
+
+    holder = _client(neo4jmod, factory)
+    await holder.connect()
+
+    entry = next(iter(neo4jmod._DRIVERS_BY_KEY.values()))
+    entry.last_checked -= neo4jmod._DRIVER_HEALTHCHECK_INTERVAL_S + 1
+    first.connectivity_error = RuntimeError("connection reset")
+
+    replacement = _client(neo4jmod, factory)
+    await replacement.connect()
+    # Still held by `holder`: retired from the pool but left open.
+    assert first.close_count == 0
+    await holder.disconnect()
+    assert first.close_count == 1
+    await replacement.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_neo4j_idle_drivers_are_evicted_only_when_unheld(neo4jmod) -> None:
+    factory = _DriverFactory()
+
+    idle = _client(neo4jmod, factory, "idle")
+    held = _client(neo4jmod, factory, "held")
+    await idle.connect()
+    await held.connect()
+    await idle.disconnect()
+
+    for entry in neo4jmod._DRIVERS_BY_KEY.values():
+        entry.last_used -= neo4jmod._DRIVER_IDLE_TTL_S + 1
+
+    other = _client(neo4jmod, factory, "other")
+    await other.connect()
+
+    keys = {key[2] for key in neo4jmod._DRIVERS_BY_KEY}
+    assert keys == {"held", "other"}
+    assert factory.built[0].close_count == 1
+    assert factory.built[1].close_count == 0
+    await held.disconnect()
+    await other.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_neo4j_schema_bootstrap_runs_once_per_database(neo4jmod) -> None:
+    queries: list[tuple[str, str]] = []
+    factory = _DriverFactory(queries=queries)
+
+    for db in ("db1", "db1", "db2"):
+        c = _client(neo4jmod, factory, db)
+        await c.connect()
+        await c.disconnect()
+
+    per_item = len(neo4jmod._SCHEMA_ITEMS)
+    assert [d for d, _q in queries].count("db1") == per_item
+    assert [d for d, _q in queries].count("db2") == per_item
+    assert all("IF NOT EXISTS" in q for _d, q in queries)
+    entity_key = next(q for _d, q in queries if "tribrid_entity_key" in q)
+    assert "REQUIRE (n.`repo_id`, n.`entity_id`) IS UNIQUE" in entity_key
+
+
+@pytest.mark.asyncio
+async def test_neo4j_schema_constraint_failure_falls_back_to_range_index(neo4jmod) -> None:
+    queries: list[tuple[str, str]] = []
+    factory = _DriverFactory(queries=queries, fail_constraint_on="tribrid_chunk_key")
+
+    c = _client(neo4jmod, factory)
+    await c.connect()
+    outcome = await c.ensure_schema()
+    await c.disconnect()
+
+    assert outcome["tribrid_chunk_key"] == "index"
+    assert outcome["tribrid_entity_key"] == "constraint"
+    assert any(q.startswith("CREATE INDEX `tribrid_chunk_key`") for _d, q in queries)
+
+
+@pytest.mark.asyncio
+async def test_neo4j_connect_releases_hold_when_schema_bootstrap_fails(neo4jmod) -> None:
+    # ensure_schema() swallows ordinary errors; cancellation mid-bootstrap still escapes connect().
+    factory = _DriverFactory(run_error=asyncio.CancelledError())
+
+    c = _client(neo4jmod, factory)
+    with pytest.raises(asyncio.CancelledError):
+        await c.connect()
+
+    entry = next(iter(neo4jmod._DRIVERS_BY_KEY.values()))
+    assert entry.refs == 0
+    assert c._driver is None
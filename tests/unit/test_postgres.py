@@ -165,3 +165,258 @@ async def test_file_path_search_finds_filename_like_queries() -> None:
             await pg.delete_corpus(repo_id)
         except Exception:
             pass
+
+
+@pytest.mark.asyncio
+async def test_vector_ann_index_lifecycle_follows_corpus() -> None:
+    if not _postgres_available():
+        pytest.skip("POSTGRES_DSN/POSTGRES_HOST not set")
+
+    repo_id = f"test_ann_{uuid.uuid4().hex[:10]}"
+    pg = PostgresClient("postgresql://ignored")
+    await pg.connect()
+    try:
+        await pg.upsert_corpus(repo_id, name=repo_id, root_path=".")
+        chunks = [
+            Chunk(
+                chunk_id=f"c{i}",
+                content=f"chunk {i}",
+                file_path="a.txt",
+                start_line=i,
+                end_line=i,
+                language=None,
+                token_count=2,
+                embedding=[float(i), 1.0, 0.5],
+                summary=None,
+            )
+            for i in range(1, 21)
+        ]
+        try:
+            await pg.upsert_embeddings(repo_id, chunks)
+        except Exception as e:  # pragma: no cover
+            pytest.skip(f"vector insert failed (pgvector dims?): {e}")
+
+        progress: list[dict[str, object]] = []
+        status = await pg.ensure_vector_ann_index(
+            repo_id, dimensions=3, method="hnsw", min_rows=1, progress_cb=progress.append
+        )
+        assert status["built"] is True
+        hnsw_name = str(status["index_name"])
+        assert await pg._list_vector_ann_indexes(repo_id) == {hnsw_name: True}
+
+        # Unchanged parameters are a no-op.
+        again = await pg.ensure_vector_ann_index(repo_id, dimensions=3, method="hnsw", min_rows=1)
+        assert again["built"] is False and again["index_name"] == hnsw_name
+
+        matches = await pg.vector_search(repo_id, [20.0, 1.0, 0.5], top_k=5, ef_search=10)
+        assert len(matches) == 5
+
+        # Switching method replaces the old index.
+        ivf = await pg.ensure_vector_ann_index(repo_id, dimensions=3, method="ivfflat", lists=2, min_rows=1)
+        assert set(await pg._list_vector_ann_indexes(repo_id)) == {str(ivf["index_name"])}
+        matches = await pg.vector_search(repo_id, [20.0, 1.0, 0.5], top_k=5, probes=2)
+        assert len(matches) == 5
+
+        await pg.delete_corpus(repo_id)
+        assert await pg._list_vector_ann_indexes(repo_id) == {}
+    finally:
+        try:
+            await pg.delete_corpus(repo_id)
+        except Exception:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_file_fingerprints_and_per_file_chunk_deletes() -> None:
+    if not _postgres_available():
+        pytest.skip("POSTGRES_DSN/POSTGRES_HOST not set")
+
+    repo_id = f"test_fp_{uuid.uuid4().hex[:10]}"
+    pg = PostgresClient("postgresql://ignored")
+    await pg.connect()
+    try:
+        await pg.upsert_corpus(repo_id, name=repo_id, root_path=".")
+        chunks = [
+            Chunk(
+                chunk_id=f"{path}:1",
+                content=f"content of {path}",
+                file_path=path,
+                start_line=1,
+                end_line=1,
+                language=None,
+                token_count=3,
+                embedding=None,
+                summary=None,
+            )
+            for path in ("a.txt", "b.txt")
+        ]
+        await pg.upsert_fts(repo_id, chunks, ts_config="english")
+        fps = [
+            {
+                "file_path": path,
+                "size_bytes": 10,
+                "mtime_ns": 1,
+                "content_hash": f"h-{path}",
+                "config_hash": "cfg",
+                "chunk_count": 1,
+                "token_count": 3,
+            }
+            for path in ("a.txt", "b.txt")
+        ]
+        assert await pg.upsert_file_fingerprints(repo_id, fps) == 2
+        stored = await pg.get_file_fingerprints(repo_id)
+        assert set(stored) == {"a.txt", "b.txt"}
+        assert stored["a.txt"]["content_hash"] == "h-a.txt"
+
+        assert await pg.delete_chunks_for_files(repo_id, ["a.txt"]) == 1
+        assert await pg.get_chunk(repo_id, "a.txt:1") is None
+        assert await pg.get_chunk(repo_id, "b.txt:1") is not None
+
+        assert await pg.delete_file_fingerprints(repo_id, ["a.txt"]) == 1
+        assert set(await pg.get_file_fingerprints(repo_id)) == {"b.txt"}
+        assert await pg.delete_file_fingerprints(repo_id) == 1
+        assert await pg.get_file_fingerprints(repo_id) == {}
+    finally:
+        try:
+            await pg.delete_corpus(repo_id)
+        except Exception:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_delete_chunks_runs_in_keyset_batches() -> None:
+    if not _postgres_available():
+        pytest.skip("POSTGRES_DSN/POSTGRES_HOST not set")
+
+    repo_id = f"test_del_{uuid.uuid4().hex[:10]}"
+    pg = PostgresClient("postgresql://ignored")
+    await pg.connect()
+    try:
+        await pg.upsert_corpus(repo_id, name=repo_id, root_path=".")
+        chunks = [
+            Chunk(
+                chunk_id=f"c{i:03d}",
+                content=f"content {i}",
+                file_path="a.txt",
+                start_line=i,
+                end_line=i,
+                language=None,
+                token_count=2,
+                embedding=None,
+                summary=None,
+            )
+            for i in range(25)
+        ]
+        await pg.upsert_fts(repo_id, chunks, ts_config="english")
+
+        progress: list[int] = []
+        counts: dict[str, int] = {}
+        deleted = await pg.delete_chunks(repo_id, batch_size=10, on_progress=progress.append, counts=counts)
+        assert deleted == 25
+        assert progress == [10, 20, 25]
+        assert counts == {"chunks": 25, "embeddings": 0, "fts": 25}
+        assert await pg.get_chunk(repo_id, "c000") is None
+    finally:
+        try:
+            await pg.delete_corpus(repo_id)
+        except Exception:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_upsert_chunks_writes_embedding_and_tsv_in_one_merge() -> None:
+    if not _postgres_available():
+        pytest.skip("POSTGRES_DSN/POSTGRES_HOST not set")
+
+    repo_id = f"test_bulk_{uuid.uuid4().hex[:10]}"
+    pg = PostgresClient("postgresql://ignored")
+    await pg.connect()
+    try:
+        await pg.upsert_corpus(repo_id, name=repo_id, root_path=".")
+
+        def _chunk(content: str, embedding: list[float] | None) -> Chunk:
+            return Chunk(
+                chunk_id="c1",
+                content=content,
+                file_path="a.txt",
+                start_line=1,
+                end_line=1,
+                language=None,
+                token_count=2,
+                embedding=embedding,
+                summary=None,
+            )
+
+        # Duplicate chunk_ids in one batch: the last one wins.
+        try:
+            n = await pg.upsert_chunks(
+                repo_id,
+                [_chunk("stale text", [0.0, 1.0, 0.0]), _chunk("fresh banana text", [1.0, 0.0, 0.0])],
+                ts_config="english",
+            )
+        except Exception as e:  # pragma: no cover
+            pytest.skip(f"vector insert failed (pgvector dims?): {e}")
+        assert n == 2
+        got = await pg.get_chunk(repo_id, "c1")
+        assert got is not None and got.content == "fresh banana text"
+        assert await pg.fts_search(repo_id, "banana", 5, ts_config="english")
+        assert (await pg.get_embeddings(repo_id, ["c1"]))["c1"] == pytest.approx([1.0, 0.0, 0.0])
+
+        # store_embeddings=False (skip_dense) rewrites content/tsv but keeps the stored vector.
+        await pg.upsert_chunks(repo_id, [_chunk("cherry text", None)], ts_config="english", store_embeddings=False)
+        assert await pg.fts_search(repo_id, "cherry", 5, ts_config="english")
+        assert (await pg.get_embeddings(repo_id, ["c1"]))["c1"] == pytest.approx([1.0, 0.0, 0.0])
+    finally:
+        try:
+            await pg.delete_corpus(repo_id)
+        except Exception:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_prune_embedding_cache_drops_stale_then_least_recently_used() -> None:
+    if not _postgres_available():
+        pytest.skip("POSTGRES_DSN/POSTGRES_HOST not set")
+
+    prefix = f"test_prune_{uuid.uuid4().hex[:10]}"
+    keys = [f"{prefix}:{i}" for i in range(4)]
+    pg = PostgresClient("postgresql://ignored")
+    await pg.connect()
+    try:
+        assert await pg.put_cached_embeddings([(k, [0.1, 0.2]) for k in keys]) == 4
+        assert pg._pool is not None
+        async with pg._pool.acquire() as conn:
+            # keys[0] is stale; keys[1..3] are just inside the age limit, keys[1] least recently used.
+            await conn.execute(
+                "UPDATE embedding_cache SET last_used_at = now() - interval '400 days' WHERE cache_key = $1;",
+                keys[0],
+            )
+            for i, key in enumerate(keys[1:], start=1):
+                await conn.execute(
+                    """
+                    UPDATE embedding_cache SET last_used_at = now() - interval '364 days' + make_interval(mins => $2)
+                    WHERE cache_key = $1;
+                    """,
+                    key,
+                    i,
+                )
+
+        async def _remaining() -> set[str]:
+            # Not get_cached_embeddings: hits refresh last_used_at.
+            assert pg._pool is not None
+            async with pg._pool.acquire() as conn:
+                rows = await conn.fetch("SELECT cache_key FROM embedding_cache WHERE cache_key = ANY($1::text[]);", keys)
+            return {str(r["cache_key"]) for r in rows}
+
+        assert await pg.prune_embedding_cache(max_age_days=365, max_entries=0) >= 1
+        assert await _remaining() == set(keys[1:])
+
+        async with pg._pool.acquire() as conn:
+            total = int(await conn.fetchval("SELECT count(*) FROM embedding_cache;"))
+        # One row over the cap: the least recently used entry goes.
+        assert await pg.prune_embedding_cache(max_age_days=0, max_entries=total - 1) == 1
+        assert await _remaining() == set(keys[2:])
+    finally:
+        assert pg._pool is not None
+        async with pg._pool.acquire() as conn:
+            await conn.execute("DELETE FROM embedding_cache WHERE cache_key LIKE $1;", f"{prefix}:%")
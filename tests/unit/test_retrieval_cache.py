@@ -0,0 +1,107 @@
+"""Tests for the process-wide search result cache."""
+
+from __future__ import annotations
+
+from server.models.retrieval import ChunkMatch
+from server.retrieval.cache import (
+    QueryResultCache,
+    ResultCacheKey,
+    bump_index_generation,
+    get_index_generation,
+    get_result_cache,
+    normalize_query,
+)
+
+
+def _match(chunk_id: str, content: str = "x") -> ChunkMatch:
+    return ChunkMatch(
+        chunk_id=chunk_id,
+        content=content,
+        file_path="a.py",
+        start_line=1,
+        end_line=1,
+        language="python",
+        score=1.0,
+        source="vector",
+        metadata={},
+    )
+
+
+def _key(query: str, corpus_ids: tuple[str, ...] = ("c1",), generation: int = 0) -> ResultCacheKey:
+    return ResultCacheKey(
+        corpus_ids=corpus_ids,
+        query=normalize_query(query),
+        include_vector=True,
+        include_sparse=True,
+        include_graph=True,
+        top_k=10,
+        config_hash="h",
+        generations=tuple(generation for _ in corpus_ids),
+    )
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalize_query_collapses_whitespace_but_keeps_case() -> None:
+    assert normalize_query("  Foo \n\t bar ") == "Foo bar"
+    assert normalize_query("Foo") != normalize_query("foo")
+
+
+def test_cache_returns_copies_and_expires_by_ttl() -> None:
+    clock = _Clock()
+    cache = QueryResultCache(max_entries=10, ttl_s=5.0, clock=clock)
+    cache.put(_key("q"), [_match("a")], {"k": 1})
+
+    hit = cache.get(_key(" q "))
+    assert hit is not None
+    results, debug = hit
+    results[0].metadata["mutated"] = True
+    debug["k"] = 2
+    again = cache.get(_key("q"))
+    assert again is not None
+    assert again[0][0].metadata == {}
+    assert again[1] == {"k": 1}
+
+    clock.now = 5.0
+    assert cache.get(_key("q")) is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used_and_respects_memory_cap() -> None:
+    cache = QueryResultCache(max_entries=2, ttl_s=60.0)
+    cache.put(_key("a"), [_match("a")], {})
+    cache.put(_key("b"), [_match("b")], {})
+    assert cache.get(_key("a")) is not None  # "b" is now least recently used
+    cache.put(_key("c"), [_match("c")], {})
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.get(_key("c")) is not None
+
+    big = QueryResultCache(max_entries=100, max_bytes=4096, ttl_s=60.0)
+    big.put(_key("a"), [_match("a", "x" * 1500)], {})
+    big.put(_key("b"), [_match("b", "x" * 1500)], {})
+    assert big.size_bytes <= 4096
+    assert big.get(_key("a")) is None
+    assert big.get(_key("b")) is not None
+    # Oversized entries are never stored.
+    big.put(_key("huge"), [_match("h", "x" * 10_000)], {})
+    assert big.get(_key("huge")) is None
+
+
+def test_bump_index_generation_invalidates_only_that_corpus() -> None:
+    cache = get_result_cache()
+    gen = get_index_generation("c1")
+    cache.put(_key("q", ("c1",), gen), [_match("a")], {})
+    cache.put(_key("q", ("c2",), get_index_generation("c2")), [_match("b")], {})
+    cache.put(_key("q", ("c1", "c2"), gen), [_match("c")], {})
+
+    assert bump_index_generation("c1") == gen + 1
+    assert cache.get(_key("q", ("c1",), gen)) is None
+    assert cache.get(_key("q", ("c1", "c2"), gen)) is None
+    assert cache.get(_key("q", ("c2",), get_index_generation("c2"))) is not None
@@ -82,3 +82,49 @@ async def test_expand_neighbors_no_ordinals_is_noop() -> None:
     out = await fusion_mod._expand_neighbors([r1, r2], neighbor_window=1, seed_limit=2)
     assert [r.chunk_id for r in out] == ["c1", "c2"]
 
+
+
+def _naive_mmr(pool: list[ChunkMatch], emb: dict[str, list[float]], k: int, lam: float) -> list[str]:
+    import math
+
+    def cos(a: list[float], b: list[float]) -> float:
+        na = math.sqrt(sum(x * x for x in a))
+        nb = math.sqrt(sum(x * x for x in b))
+        return sum(x * y for x, y in zip(a, b, strict=True)) / (na * nb) if na and nb else 0.0
+
+    selected: list[int] = []
+    candidates = list(range(len(pool)))
+    while candidates and len(selected) < k:
+        def mmr(i: int) -> float:
+            sims = [cos(emb[pool[i].chunk_id], emb[pool[j].chunk_id]) for j in selected]
+            return lam * pool[i].score - (1.0 - lam) * max([0.0, *sims])
+
+        best = max(candidates, key=mmr)
+        selected.append(best)
+        candidates.remove(best)
+    return [pool[i].chunk_id for i in selected]
+
+
+def test_mmr_order_matches_naive_greedy_selection() -> None:
+    import random
+
+    rng = random.Random(7)
+    pool = [_mk(f"c{i}", file_path=f"f{i}.txt", score=1.0 - i * 0.01) for i in range(40)]
+    emb = {r.chunk_id: [rng.uniform(-1.0, 1.0) for _ in range(16)] for r in pool}
+
+    order = fusion_mod._mmr_order(pool, emb, k=10, mmr_lambda=0.6)
+
+    assert sorted(order) == list(range(40))
+    assert [pool[i].chunk_id for i in order[:10]] == _naive_mmr(pool, emb, 10, 0.6)
+
+
+def test_mmr_order_uses_jaccard_for_chunks_without_embeddings() -> None:
+    dup_a = _mk("a", file_path="a.txt", score=0.9).model_copy(update={"content": "apple banana"})
+    dup_b = _mk("b", file_path="a.txt", score=0.85).model_copy(update={"content": "apple banana"})
+    other = _mk("c", file_path="c.txt", score=0.5).model_copy(update={"content": "zebra yak"})
+    embedded = _mk("d", file_path="d.txt", score=0.8)
+
+    order = fusion_mod._mmr_order([dup_a, dup_b, other, embedded], {"d": [1.0, 0.0]}, k=3, mmr_lambda=0.5)
+
+    # "b" duplicates "a" token-for-token, so it drops below both the embedded and the distinct chunk.
+    assert order == [0, 3, 2, 1]
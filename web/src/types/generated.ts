@@ -481,18 +481,34 @@ export interface EmbeddingConfig {
   embed_text_suffix?: string; // default: ""
   /** Contextual chunk embedding mode. 'late_chunking_local_only' requires local/HF provider backend. */
   contextual_chunk_embeddings?: "off" | "prepend_context" | "late_chunking_local_only"; // default: "off"
-  /** Max tokens per document segment for local late chunking. */
+  /** Concurrent query embeddings (search/chat/MCP) arriving within this window share one provider/model call (0 = no coalescing) */
+  query_embed_coalesce_window_ms?: number; // default: 3.0
+  /** Send a coalesced query-embedding batch as soon as this many distinct texts are waiting */
+  query_embed_coalesce_max_items?: number; // default: 32
+  /** Tokens per encoder window for local late chunking (also capped by the model's max length). Longer documents are encoded in overlapping windows. */
   late_chunking_max_doc_tokens?: number; // default: 8192
+  /** Tokens shared by consecutive late-chunking windows; each token keeps the vector from the window where it has the most context (capped at half a window). */
+  late_chunking_window_overlap_tokens?: number; // default: 256
+  /** Encoder windows (from any documents) per padded forward pass in late chunking. */
+  late_chunking_batch_windows?: number; // default: 8
+  /** Torch CPU threads for late chunking (0 = torch default). Applies process-wide. */
+  late_chunking_cpu_threads?: number; // default: 0
   /** Voyage embedding model */
   voyage_model?: string; // default: "voyage-code-3"
   /** Local SentenceTransformer model */
   embedding_model_local?: string; // default: "all-MiniLM-L6-v2"
   /** Batch size for embedding generation */
   embedding_batch_size?: number; // default: 64
+  /** Padded-token budget per local sentence-transformers forward pass; texts are length-sorted so each batch holds similar lengths */
+  embedding_batch_max_tokens?: number; // default: 16384
   /** Max tokens per embedding chunk */
   embedding_max_tokens?: number; // default: 8000
-  /** Enable embedding cache */
+  /** Reuse cached embeddings for identical prepared chunk text during indexing (provider backends) */
   embedding_cache_enabled?: number; // default: 1
+  /** Prune embedding cache entries unused for this many days after each indexing run (0 = no age limit) */
+  embedding_cache_max_age_days?: number; // default: 30
+  /** Keep at most this many embedding cache entries, least recently used pruned first (0 = unbounded) */
+  embedding_cache_max_entries?: number; // default: 1000000
   /** Embedding API timeout (seconds) */
   embedding_timeout?: number; // default: 30
   /** Max retries for embedding API */
@@ -666,6 +682,18 @@ export interface FusionConfig {
   rrf_k?: number; // default: 60
   /** Normalize scores to [0,1] before fusion */
   normalize_scores?: boolean; // default: True
+  /** Maximum number of corpora searched concurrently in a multi-corpus request */
+  max_parallel_corpora?: number; // default: 4
+  /** Per-corpus deadline in seconds; corpora that miss it are skipped and reported in fusion_per_corpus (0 = no deadline) */
+  corpus_timeout_s?: number; // default: 20.0
+  /** Cache fused search results per (corpora, query, legs, top_k, config); invalidated when a corpus is re-indexed */
+  result_cache_enabled?: boolean; // default: True
+  /** Time-to-live for cached search results in seconds */
+  result_cache_ttl_s?: number; // default: 300.0
+  /** Maximum number of cached search results (least recently used are evicted first) */
+  result_cache_max_entries?: number; // default: 512
+  /** Approximate memory cap for the search result cache in MB */
+  result_cache_max_mb?: number; // default: 64
 }
 
 /** LLM generation configuration. */
@@ -718,8 +746,24 @@ export interface GraphIndexingConfig {
   build_lexical_graph?: boolean; // default: True
   /** Store chunk embeddings on Chunk nodes for Neo4j vector search (requires dense embeddings) */
   store_chunk_embeddings?: boolean; // default: True
+  /** Documents written per Neo4j transaction when building the lexical graph */
+  lexical_write_batch_docs?: number; // default: 200
+  /** Chunks per lexical-graph transaction before it is flushed early (a single file is never split) */
+  lexical_write_batch_chunks?: number; // default: 5000
+  /** Lexical-graph write transactions in flight at once */
+  lexical_write_concurrency?: number; // default: 2
   /** Build semantic knowledge graph (concept entities + relations) linked to chunks during indexing */
   semantic_kg_enabled?: boolean; // default: False
+  /** Worker processes that parse code files for the code graph while indexing streams (0 = parse in a thread of the server process) */
+  ast_parse_workers?: number; // default: 2
+  /** Extract classes, functions, imports and calls from non-Python code files (TypeScript, JavaScript, Go, Rust, Java, Kotlin, C, C++) with tree-sitter; Python always uses its own AST */
+  ast_tree_sitter_enabled?: boolean; // default: True
+  /** Per-file parse time limit for the code graph; a file that exceeds it contributes only its module entity (0 = no limit) */
+  ast_parse_timeout_s?: number; // default: 10.0
+  /** Cache code-graph parse results by file content so unchanged files are not re-parsed on reindex */
+  ast_parse_cache_enabled?: boolean; // default: True
+  /** Directory for cached code-graph parse results (one subdirectory per corpus; relative paths resolve from the project root) */
+  ast_parse_cache_dir?: string; // default: "data/graph_parse_cache"
   /** Edge weight for AST containment relationships (module->class/function, class->method). */
   ast_contains_weight?: number; // default: 1.0
   /** Edge weight for AST inheritance relationships (class->base). */
@@ -748,6 +792,8 @@ export interface GraphIndexingConfig {
   semantic_kg_llm_timeout_s?: number; // default: 30
   /** Neo4j vector index name for Chunk embeddings (mode='chunk') */
   chunk_vector_index_name?: string; // default: "tribrid_chunk_embeddings"
+  /** In a shared Neo4j database, also label Chunk nodes per corpus and build a per-corpus vector index so chunk vector search is scoped to the corpus without overfetch */
+  chunk_corpus_vector_index?: boolean; // default: False
   /** Chunk node property that stores the embedding vector */
   chunk_embedding_property?: string; // default: "embedding"
   /** Neo4j vector similarity function */
@@ -758,6 +804,22 @@ export interface GraphIndexingConfig {
   vector_index_online_timeout_s?: number; // default: 60.0
 }
 
+/** State of one bootstrap constraint/index in the Neo4j database. */
+export interface GraphSchemaIndex {
+  /** Index (or owning constraint) name */
+  name: string;
+  /** Node label the index covers */
+  label: string;
+  /** Indexed properties, in key order */
+  properties?: string[];
+  /** Neo4j index type (e.g. RANGE) */
+  type?: string; // default: ""
+  /** Neo4j index state (ONLINE, POPULATING, FAILED) */
+  state?: string; // default: ""
+  /** True when backed by a uniqueness constraint */
+  unique?: boolean; // default: False
+}
+
 /** Configuration for graph-based search using Neo4j. */
 export interface GraphSearchConfig {
   /** Graph retrieval mode. 'chunk' uses lexical chunk nodes + Neo4j vector index; 'entity' uses the legacy code-entity graph. */
@@ -768,16 +830,38 @@ export interface GraphSearchConfig {
   chunk_neighbor_window?: number; // default: 1
   /** When mode='chunk' and Neo4j uses a shared database, overfetch seed hits before filtering by corpus_id */
   chunk_seed_overfetch_multiplier?: number; // default: 10
+  /** When mode='chunk' and Neo4j uses a shared database, retry with a geometrically larger overfetch until top_k in-corpus seeds are found (bounded by chunk_seed_max_candidates) */
+  chunk_seed_overfetch_adaptive?: boolean; // default: True
+  /** Factor applied to the vector-index candidate count on each adaptive overfetch retry */
+  chunk_seed_overfetch_growth?: number; // default: 4
+  /** Upper bound on vector-index candidates requested by adaptive overfetch */
+  chunk_seed_max_candidates?: number; // default: 10000
   /** When mode='chunk', expand from seed chunks via Entity graph (IN_CHUNK links) to find related chunks */
   chunk_entity_expansion_enabled?: boolean; // default: True
   /** Blend weight for entity-expansion scores relative to seed chunk scores (mode='chunk') */
   chunk_entity_expansion_weight?: number; // default: 0.8
   /** Maximum graph traversal hops */
   max_hops?: number; // default: 2
+  /** Entity expansion strategy. 'frontier' expands hop by hop with fan-out/visited budgets; 'paths' uses one unbounded variable-length path match (legacy; can blow up on hub entities). */
+  expansion_strategy?: "frontier" | "paths"; // default: "frontier"
+  /** When expansion_strategy='frontier', max neighbors followed per entity per hop (lowest-degree neighbors first) */
+  expansion_fanout_cap?: number; // default: 50
+  /** When expansion_strategy='frontier', max entities visited per query (seeds included) before expansion stops */
+  expansion_max_visited?: number; // default: 2000
+  /** When expansion_strategy='frontier', entities with more relationships than this are down-weighted by sqrt(hub_degree / degree) (0 = off) */
+  expansion_hub_degree?: number; // default: 200
   /** Include community-based expansion in graph search */
   include_communities?: boolean; // default: True
   /** Number of results to retrieve from graph search */
   top_k?: number; // default: 30
+  /** Graph leg timeout in seconds, including Neo4j connect and chunk hydration (0 = no timeout) */
+  timeout_s?: number; // default: 15.0
+  /** Build an in-memory CSR snapshot of the entity graph after indexing and serve graph-leg seeding, traversal and chunk scoring from it, with Neo4j as the fallback (1=yes, 0=no) */
+  snapshot_enabled?: number; // default: 0
+  /** Corpora with more entity relationships than this are not snapshotted (Neo4j serves them) */
+  snapshot_max_edges?: number; // default: 5000000
+  /** Directory for memory-mapped graph snapshots (relative paths resolve from the project root) */
+  snapshot_dir?: string; // default: "data/graph_snapshots"
 }
 
 /** Statistics about a repository's knowledge graph. */
@@ -798,6 +882,10 @@ export interface GraphStats {
   entity_breakdown?: Record<string, number>;
   /** Count by relation type */
   relationship_breakdown?: Record<string, number>;
+  /** True when every bootstrap constraint/index exists and is ONLINE (None if unknown) */
+  schema_ready?: boolean | null; // default: None
+  /** State of the bootstrap constraints/indexes */
+  schema_indexes?: GraphSchemaIndex[];
 }
 
 /** Configuration for Neo4j graph storage and traversal. */
@@ -822,6 +910,18 @@ export interface GraphStorageConfig {
   include_communities?: boolean; // default: True
   /** Community detection algorithm */
   community_algorithm?: "louvain" | "label_propagation"; // default: "louvain"
+  /** Number of community hierarchy levels to store (level 0 = coarsest) */
+  community_levels?: number; // default: 3
+  /** Louvain modularity resolution (higher = smaller communities; in-process Louvain only) */
+  community_resolution?: number; // default: 1.0
+  /** Communities with fewer members are not stored */
+  community_min_size?: number; // default: 2
+  /** Memory budget for in-process detection; caps exported edges and switches Louvain to label-propagation coarsening on graphs that do not fit */
+  community_memory_budget_mb?: number; // default: 512
+  /** On incremental indexing runs, only recompute communities touched by changed files (1=yes, 0=no) */
+  community_incremental?: number; // default: 1
+  /** Use the Neo4j Graph Data Science plugin for full recomputes when it is installed (1=yes, 0=no) */
+  community_use_gds?: number; // default: 1
   /** Entity types to extract and store in graph */
   entity_types?: string[]; // default: ["function", "class", "module", "variable", "im...
   /** Relationship types to extract */
@@ -890,6 +990,16 @@ export interface IndexStats {
   last_indexed?: string | null; // default: None
   /** Count by file extension */
   file_breakdown?: Record<string, number>;
+  /** Whether this run reused unchanged files from a previous index (indexing.incremental_indexing=1) */
+  incremental?: boolean; // default: False
+  /** Files indexed for the first time in this run */
+  files_added?: number; // default: 0
+  /** Previously indexed files reprocessed because their content changed */
+  files_changed?: number; // default: 0
+  /** Previously indexed files purged because they no longer exist */
+  files_removed?: number; // default: 0
+  /** Unchanged files skipped by incremental indexing */
+  files_skipped?: number; // default: 0
 }
 
 /** Indexing and vector storage configuration. */
@@ -906,6 +1016,12 @@ export interface IndexingConfig {
   indexing_batch_size?: number; // default: 100
   /** Parallel workers for indexing */
   indexing_workers?: number; // default: 4
+  /** Worker processes that extract text (PDF, XLSX, Parquet, ...) and chunk files off the server process; raise toward the core count for large corpora (0 = threads in the server process) */
+  prepare_workers?: number; // default: 2
+  /** Per-file limit for extraction + chunking; slower files are skipped and reported as failed (0 = no limit) */
+  prepare_timeout_s?: number; // default: 120.0
+  /** Memory a worker may allocate while preparing one file (Linux); files over it are skipped and reported as failed instead of exhausting the host (0 = no limit) */
+  prepare_memory_limit_mb?: number; // default: 2048
   /** BM25 tokenizer type */
   bm25_tokenizer?: string; // default: "stemmer"
   /** Stemmer language */
@@ -932,6 +1048,10 @@ export interface IndexingConfig {
   parquet_extract_include_column_names?: number; // default: 1
   /** Skip dense vector indexing */
   skip_dense?: number; // default: 0
+  /** Only reprocess files whose size/mtime/content hash changed since the last run; purge chunks and graph nodes of changed or removed files (force_reindex still rebuilds everything) */
+  incremental_indexing?: number; // default: 1
+  /** Rows/nodes per transaction when clearing a corpus (force_reindex, delete index): Postgres chunk deletes and Neo4j graph deletes run in batches of this size */
+  delete_batch_size?: number; // default: 5000
   /** Base output directory */
   out_dir_base?: string; // default: "./out"
   /** Override for OUT_DIR_BASE if specified */
@@ -1465,6 +1585,8 @@ export interface SparseSearchConfig {
   bm25_k1?: number; // default: 1.2
   /** BM25 length normalization (0 = no penalty, 1 = full penalty) */
   bm25_b?: number; // default: 0.4
+  /** Sparse leg timeout in seconds, including the file_path fallback (0 = no timeout) */
+  timeout_s?: number; // default: 10.0
 }
 
 /** System prompts for LLM interactions - affects RAG pipeline behavior.  These prompts control how LLMs behave during query processing, code analysis, and result generation. Changes here can significantly impact RAG accuracy. */
@@ -1747,6 +1869,22 @@ export interface VectorSearchConfig {
   top_k?: number; // default: 50
   /** Minimum similarity score threshold (0 = no threshold) */
   similarity_threshold?: number; // default: 0.0
+  /** Vector leg timeout in seconds; legs run concurrently and a timed-out leg contributes no results (0 = no timeout) */
+  timeout_s?: number; // default: 10.0
+  /** Per-corpus pgvector ANN index type built after indexing ('none' = exact scan only) */
+  ann_index?: "none" | "hnsw" | "ivfflat"; // default: "hnsw"
+  /** Only build an ANN index once a corpus has at least this many embedded chunks (exact scan is faster below) */
+  ann_min_rows?: number; // default: 5000
+  /** HNSW max connections per layer (higher = better recall, larger index) */
+  hnsw_m?: number; // default: 16
+  /** HNSW candidate list size during build (higher = better recall, slower build) */
+  hnsw_ef_construction?: number; // default: 64
+  /** HNSW candidate list size per query (hnsw.ef_search); trades recall for latency */
+  hnsw_ef_search?: number; // default: 40
+  /** IVFFlat list count (0 = auto: rows/1000, or sqrt(rows) above 1M rows) */
+  ivfflat_lists?: number; // default: 0
+  /** IVFFlat lists probed per query (ivfflat.probes); trades recall for latency */
+  ivfflat_probes?: number; // default: 10
 }
 
 /** A single term in the Postgres FTS vocabulary preview. */
@@ -1985,6 +2123,8 @@ export interface Community {
   member_ids: string[];
   /** Hierarchy level (0 = top level) */
   level: number;
+  /** Enclosing community one level up (None at the top level) */
+  parent_id?: string | null;
 }
 
 /** User-managed corpus (formerly "repo" in earlier versions).  A corpus is the unit of isolation for: - indexing storage (Postgres) - graph storage (Neo4j) - configuration (per-corpus TriBridConfig) */